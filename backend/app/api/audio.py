@@ -4,16 +4,30 @@ Audio processing API endpoints
 
 from pathlib import Path
 
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi import APIRouter, File, Form, HTTPException, Response, UploadFile
 
-from app.config import TEMP_DIR
-from app.models.audio import AudioMetadataResponse, AudioProcessingResponse
+from app.config import AUDIO_BATCH_MAX_FILES, TEMP_DIR
+from app.models.audio import AudioMetadataResponse, AudioProcessingResponse, AudioWaveformResponse
 from app.services.audio_service import (
+    AUDIO_CODECS,
+    AUDIO_INPUT_EXTENSIONS,
+    check_waveform_params,
     compress_audio,
     convert_audio,
+    encode_waveform,
     extract_audio_metadata,
+    extract_waveform,
     merge_audio,
 )
+from app.services.audio_service_async import (
+    compress_audio_with_progress,
+    convert_audio_batch_with_progress,
+    convert_audio_with_progress,
+    merge_audio_with_progress,
+)
+from app.tasks import expiry_manager, task_store
+from app.tasks.scheduler import FFMPEG_JOB, scheduler
+from app.utils.executors import run_blocking
 from app.utils.file_handler import delete_file, generate_unique_filename, save_upload_file
 
 router = APIRouter(prefix="/audio", tags=["Audio"])
@@ -32,21 +46,20 @@ def validate_audio_format(filename: str) -> bool:
     if not filename:
         return False
 
-    supported_formats = {
-        ".mp3",
-        ".wav",
-        ".flac",
-        ".ogg",
-        ".aac",
-        ".m4a",
-        ".wma",
-        ".opus",
-        ".mp4",  # Can contain audio
-        ".m4v",  # Can contain audio
-    }
+    return Path(filename).suffix.lower() in AUDIO_INPUT_EXTENSIONS
+
+
+def compressed_filename(filename: str) -> str:
+    """Unique output name for a compressed file (original extension, mp3 for lossless)"""
+    base_name = Path(filename).stem
+    input_ext = Path(filename).suffix.lower()
 
-    file_ext = Path(filename).suffix.lower()
-    return file_ext in supported_formats
+    if input_ext in [".wav", ".flac"]:
+        output_ext = "mp3"
+    else:
+        output_ext = input_ext.lstrip(".")
+
+    return generate_unique_filename(f"{base_name}_compressed.{output_ext}")
 
 
 @router.post("/convert", response_model=AudioProcessingResponse)
@@ -98,7 +111,8 @@ async def convert_audio_endpoint(
         output_filename = generate_unique_filename(f"{base_name}.{output_format}")
         output_path = TEMP_DIR / output_filename
 
-        result = convert_audio(
+        result = await run_blocking(
+            convert_audio,
             input_path=input_path,
             output_path=output_path,
             output_format=output_format,
@@ -162,20 +176,10 @@ async def compress_audio_endpoint(
         # Save uploaded file
         input_path = await save_upload_file(file)
 
-        # Build output filename (keep original extension or use mp3 for lossless)
-        base_name = Path(file.filename).stem
-        input_ext = Path(file.filename).suffix.lower()
-
-        # Determine output format
-        if input_ext in [".wav", ".flac"]:
-            output_ext = "mp3"
-        else:
-            output_ext = input_ext.lstrip(".")
+        output_path = TEMP_DIR / compressed_filename(file.filename)
 
-        output_filename = generate_unique_filename(f"{base_name}_compressed.{output_ext}")
-        output_path = TEMP_DIR / output_filename
-
-        result = compress_audio(
+        result = await run_blocking(
+            compress_audio,
             input_path=input_path,
             output_path=output_path,
             quality=quality,
@@ -250,7 +254,8 @@ async def merge_audio_endpoint(
         output_filename = generate_unique_filename(f"{base_name}_merged.{output_format}")
         output_path = TEMP_DIR / output_filename
 
-        result = merge_audio(
+        result = await run_blocking(
+            merge_audio,
             input_paths=input_paths,
             output_path=output_path,
             output_format=output_format,
@@ -289,7 +294,7 @@ async def get_audio_metadata_endpoint(
         # Save uploaded file
         input_path = await save_upload_file(file)
 
-        result = extract_audio_metadata(input_path=input_path)
+        result = await run_blocking(extract_audio_metadata, input_path=input_path)
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message)
@@ -299,3 +304,361 @@ async def get_audio_metadata_endpoint(
     finally:
         if input_path:
             delete_file(input_path)
+
+
+@router.post("/waveform", response_model=AudioWaveformResponse)
+async def get_audio_waveform_endpoint(
+    file: UploadFile = File(..., description="Audio file to draw"),
+    peaks: int = Form(2048, description="Peaks of the finest zoom level (16-16384)"),
+    zoom_levels: int = Form(4, description="Zoom levels, each with half the peaks (1-8)"),
+    output_format: str = Form("json", description="json, or binary (compact int8 peaks)"),
+):
+    """
+    Extract min/max waveform peaks for an audio player.
+
+    The audio is decoded once as a stream and reduced to peaks without holding the file in
+    memory; results are cached per file content. The binary format is a little-endian
+    header (b"WAVP", version, bits, level count, sample rate, duration as float32) followed
+    per level by its samples per peak and length (uint32) and its interleaved int8 min/max
+    pairs.
+    """
+    if not validate_audio_format(file.filename):
+        raise HTTPException(status_code=400, detail="Unsupported audio format")
+
+    if output_format not in ("json", "binary"):
+        raise HTTPException(status_code=400, detail="output_format must be json or binary")
+
+    error = check_waveform_params(peaks, zoom_levels)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+
+    input_path = None
+
+    try:
+        # Save uploaded file
+        input_path = await save_upload_file(file)
+
+        result = await run_blocking(extract_waveform, input_path, peaks, zoom_levels)
+
+        if not result.success:
+            raise HTTPException(status_code=500, detail=result.message)
+
+        if output_format == "binary":
+            return Response(content=encode_waveform(result), media_type="application/octet-stream")
+        return result
+
+    finally:
+        if input_path:
+            delete_file(input_path)
+
+
+# ============================================
+# ASYNC ENDPOINTS WITH SSE PROGRESS TRACKING
+# ============================================
+
+
+async def run_convert_task(
+    task_id: str,
+    input_path: Path,
+    output_path: Path,
+    output_format: str,
+    quality: str,
+    bitrate: str,
+):
+    """Background task for audio conversion with progress"""
+    try:
+        await convert_audio_with_progress(
+            task_id, input_path, output_path, output_format, quality, bitrate
+        )
+    finally:
+        delete_file(input_path)
+
+
+async def run_compress_task(
+    task_id: str, input_path: Path, output_path: Path, quality: str, target_bitrate: str
+):
+    """Background task for audio compression with progress"""
+    try:
+        await compress_audio_with_progress(
+            task_id, input_path, output_path, quality, target_bitrate
+        )
+    finally:
+        delete_file(input_path)
+
+
+async def run_merge_task(
+    task_id: str,
+    input_paths: list[Path],
+    output_path: Path,
+    output_format: str,
+    quality: str,
+    bitrate: str,
+):
+    """Background task for audio merging with progress"""
+    try:
+        await merge_audio_with_progress(
+            task_id, input_paths, output_path, output_format, quality, bitrate
+        )
+    finally:
+        for input_path in input_paths:
+            if input_path:
+                delete_file(input_path)
+
+
+@router.post("/convert/async")
+async def convert_audio_async(
+    file: UploadFile = File(..., description="Audio file to convert"),
+    output_format: str = Form(
+        ..., description="Output audio format (mp3, wav, flac, ogg, aac, m4a)"
+    ),
+    quality: str = Form("medium", description="Conversion quality (low, medium, high)"),
+    bitrate: str = Form("192k", description="Audio bitrate (e.g., 128k, 192k, 256k, 320k)"),
+):
+    """
+    Start async audio conversion with progress tracking
+
+    Returns a task_id that can be used to:
+    - Poll status: GET /api/v1/tasks/{task_id}/status
+    - Stream progress: GET /api/v1/tasks/{task_id}/stream (SSE)
+    """
+    if not validate_audio_format(file.filename):
+        raise HTTPException(status_code=400, detail="Unsupported audio format")
+
+    allowed_output_formats = {"mp3", "wav", "flac", "ogg", "aac", "m4a"}
+    if output_format.lower() not in allowed_output_formats:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported output format. Allowed formats: {', '.join(allowed_output_formats)}",
+        )
+
+    allowed_qualities = {"low", "medium", "high"}
+    if quality.lower() not in allowed_qualities:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid quality. Allowed values: {', '.join(allowed_qualities)}",
+        )
+
+    input_path = await save_upload_file(file)
+
+    base_name = Path(file.filename).stem
+    output_filename = generate_unique_filename(f"{base_name}.{output_format}")
+    output_path = TEMP_DIR / output_filename
+
+    task = task_store.create_task(
+        task_type="audio_convert",
+        metadata={
+            "filename": file.filename,
+            "output_format": output_format,
+            "quality": quality,
+            "bitrate": bitrate,
+        },
+    )
+    expiry_manager.track_task(task.id, outputs=[output_path])
+
+    scheduler.submit(
+        task.id,
+        FFMPEG_JOB,
+        run_convert_task(task.id, input_path, output_path, output_format, quality, bitrate),
+        inputs=[input_path],
+    )
+
+    return {"task_id": task.id}
+
+
+@router.post("/compress/async")
+async def compress_audio_async(
+    file: UploadFile = File(..., description="Audio file to compress"),
+    quality: str = Form("medium", description="Compression quality (low, medium, high)"),
+    target_bitrate: str = Form(
+        "128k", description="Target audio bitrate (e.g., 64k, 96k, 128k, 160k, 192k)"
+    ),
+):
+    """
+    Start async audio compression with progress tracking
+
+    Returns a task_id for progress tracking via SSE
+    """
+    if not validate_audio_format(file.filename):
+        raise HTTPException(status_code=400, detail="Unsupported audio format")
+
+    allowed_qualities = {"low", "medium", "high"}
+    if quality.lower() not in allowed_qualities:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid quality. Allowed values: {', '.join(allowed_qualities)}",
+        )
+
+    if not target_bitrate.endswith("k"):
+        raise HTTPException(
+            status_code=400,
+            detail="Bitrate must be in format like '128k', '192k', etc.",
+        )
+
+    input_path = await save_upload_file(file)
+    output_path = TEMP_DIR / compressed_filename(file.filename)
+
+    task = task_store.create_task(
+        task_type="audio_compress",
+        metadata={
+            "filename": file.filename,
+            "quality": quality,
+            "target_bitrate": target_bitrate,
+        },
+    )
+    expiry_manager.track_task(task.id, outputs=[output_path])
+
+    scheduler.submit(
+        task.id,
+        FFMPEG_JOB,
+        run_compress_task(task.id, input_path, output_path, quality, target_bitrate),
+        inputs=[input_path],
+    )
+
+    return {"task_id": task.id}
+
+
+@router.post("/merge/async")
+async def merge_audio_async(
+    files: list[UploadFile] = File(..., description="Audio files to merge (in order)"),
+    output_format: str = Form("mp3", description="Output format (mp3, wav, flac, ogg, aac, m4a)"),
+    quality: str = Form("medium", description="Output quality (low, medium, high)"),
+    bitrate: str = Form("192k", description="Audio bitrate (e.g., 128k, 192k, 256k, 320k)"),
+):
+    """
+    Start async audio merging with progress tracking
+
+    Returns a task_id for progress tracking via SSE
+    """
+    if len(files) < 2:
+        raise HTTPException(
+            status_code=400, detail="At least 2 audio files are required for merging"
+        )
+
+    for file in files:
+        if not validate_audio_format(file.filename):
+            raise HTTPException(
+                status_code=400, detail=f"Unsupported audio format: {file.filename}"
+            )
+
+    allowed_output_formats = {"mp3", "wav", "flac", "ogg", "aac", "m4a"}
+    if output_format.lower() not in allowed_output_formats:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported output format. Allowed formats: {', '.join(allowed_output_formats)}",
+        )
+
+    allowed_qualities = {"low", "medium", "high"}
+    if quality.lower() not in allowed_qualities:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid quality. Allowed values: {', '.join(allowed_qualities)}",
+        )
+
+    input_paths = []
+    for file in files:
+        input_paths.append(await save_upload_file(file))
+
+    base_name = Path(files[0].filename).stem
+    output_filename = generate_unique_filename(f"{base_name}_merged.{output_format}")
+    output_path = TEMP_DIR / output_filename
+
+    task = task_store.create_task(
+        task_type="audio_merge",
+        metadata={
+            "filenames": [f.filename for f in files],
+            "output_format": output_format,
+            "quality": quality,
+            "bitrate": bitrate,
+        },
+    )
+    expiry_manager.track_task(task.id, outputs=[output_path])
+
+    scheduler.submit(
+        task.id,
+        FFMPEG_JOB,
+        run_merge_task(task.id, input_paths, output_path, output_format, quality, bitrate),
+        inputs=input_paths,
+    )
+
+    return {"task_id": task.id}
+
+
+async def run_convert_batch_task(
+    task_id: str,
+    uploads: list[tuple[str, Path]],
+    output_path: Path,
+    output_format: str,
+    quality: str,
+    bitrate: str,
+):
+    """Background task for batch audio conversion with progress"""
+    try:
+        await convert_audio_batch_with_progress(
+            task_id, uploads, output_path, output_format, quality, bitrate
+        )
+    finally:
+        for _, input_path in uploads:
+            delete_file(input_path)
+
+
+@router.post("/convert/batch")
+async def convert_audio_batch(
+    files: list[UploadFile] = File(..., description="Audio files and/or zip archives of them"),
+    output_format: str = Form(
+        ..., description="Output audio format (mp3, wav, flac, ogg, aac, m4a)"
+    ),
+    quality: str = Form("medium", description="Conversion quality (low, medium, high)"),
+    bitrate: str = Form("192k", description="Audio bitrate (e.g., 128k, 192k, 256k, 320k)"),
+):
+    """
+    Start converting many audio files at once into a zip archive
+
+    Files are converted concurrently and added to the archive as each one finishes, the task's
+    progress counts converted files. Zip uploads are expanded to the audio files they contain.
+
+    Returns a task_id for progress tracking via SSE
+    """
+    if len(files) > AUDIO_BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400, detail=f"A batch accepts at most {AUDIO_BATCH_MAX_FILES} files"
+        )
+
+    for file in files:
+        is_zip = Path(file.filename or "").suffix.lower() == ".zip"
+        if not is_zip and not validate_audio_format(file.filename):
+            raise HTTPException(
+                status_code=400, detail=f"Unsupported audio format: {file.filename}"
+            )
+
+    if output_format.lower() not in AUDIO_CODECS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported output format. Allowed formats: {', '.join(AUDIO_CODECS)}",
+        )
+
+    uploads = []
+    for file in files:
+        uploads.append((file.filename, await save_upload_file(file)))
+
+    output_filename = generate_unique_filename(f"audio_{output_format.lower()}.zip")
+    output_path = TEMP_DIR / output_filename
+
+    task = task_store.create_task(
+        task_type="audio_convert_batch",
+        metadata={
+            "filenames": [f.filename for f in files],
+            "output_format": output_format,
+            "quality": quality,
+            "bitrate": bitrate,
+        },
+    )
+    expiry_manager.track_task(task.id, outputs=[output_path])
+
+    scheduler.submit(
+        task.id,
+        FFMPEG_JOB,
+        run_convert_batch_task(task.id, uploads, output_path, output_format, quality, bitrate),
+        inputs=[input_path for _, input_path in uploads],
+    )
+
+    return {"task_id": task.id}
@@ -7,25 +7,42 @@ from pathlib import Path
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile
 
 from app.config import TEMP_DIR
-from app.models.image import ColorExtractionResponse, ImageProcessingResponse
+from app.models.image import (
+    ColorExtractionResponse,
+    ImageProcessingResponse,
+    ResponsiveImageResponse,
+)
 from app.services.image_service import (
+    COLLAGE_FORMATS,
+    COLLAGE_MAX_CELL_SIZE,
+    COLLAGE_MIN_CELL_SIZE,
+    MAX_EXTRACT_COLORS,
+    RESPONSIVE_MAX_WIDTH,
+    RESPONSIVE_MAX_WIDTHS,
+    RESPONSIVE_MIN_WIDTH,
     adjust_image,
     apply_filter,
     compress_image,
     convert_image,
     create_collage,
+    create_favicon_pack,
     create_icon,
+    create_responsive_images,
     extract_colors,
     flip_image,
     resize_image,
     rotate_image,
+    supported_responsive_formats,
 )
+from app.utils.executors import run_cpu_bound
 from app.utils.file_handler import (
     delete_file,
     generate_unique_filename,
     save_upload_file,
+    save_upload_stream,
 )
-from app.utils.validators import validate_image_format
+from app.utils.result_cache import result_cache
+from app.utils.validators import is_image_content, validate_image_format
 
 router = APIRouter(prefix="/image", tags=["Image"])
 
@@ -49,14 +66,21 @@ async def compress_image_endpoint(
 
     try:
         # Save uploaded file
-        input_path = await save_upload_file(file)
+        upload = await save_upload_stream(file, content_check=is_image_content)
+        input_path = upload.path
 
         # Create output path
         output_filename = generate_unique_filename(f"compressed_{file.filename}")
         output_path = TEMP_DIR / output_filename
 
-        # Compress image
-        result = compress_image(input_path, output_path, quality)
+        # Compress image (reused when the same image was compressed with the same quality)
+        result = await result_cache.get_or_compute(
+            upload.sha256,
+            "image.compress",
+            {"quality": quality},
+            output_path,
+            lambda: run_cpu_bound(compress_image, input_path, output_path, quality),
+        )
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message)
@@ -93,7 +117,8 @@ async def convert_image_endpoint(
 
     try:
         # Save uploaded file
-        input_path = await save_upload_file(file)
+        upload = await save_upload_stream(file, content_check=is_image_content)
+        input_path = upload.path
 
         # Create output path with new extension
         base_name = Path(file.filename).stem
@@ -101,7 +126,13 @@ async def convert_image_endpoint(
         output_path = TEMP_DIR / output_filename
 
         # Convert image
-        result = convert_image(input_path, output_path, output_format, quality)
+        result = await result_cache.get_or_compute(
+            upload.sha256,
+            "image.convert",
+            {"output_format": output_format.lower(), "quality": quality},
+            output_path,
+            lambda: run_cpu_bound(convert_image, input_path, output_path, output_format, quality),
+        )
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message)
@@ -128,17 +159,19 @@ async def extract_colors_endpoint(
     if not validate_image_format(file.filename):
         raise HTTPException(status_code=400, detail="Unsupported image format")
 
-    if max_colors <= 0 or max_colors > 12:
-        raise HTTPException(status_code=400, detail="max_colors must be between 1 and 12")
+    if max_colors <= 0 or max_colors > MAX_EXTRACT_COLORS:
+        raise HTTPException(
+            status_code=400, detail=f"max_colors must be between 1 and {MAX_EXTRACT_COLORS}"
+        )
 
     input_path = None
 
     try:
         # Save uploaded file
-        input_path = await save_upload_file(file)
+        input_path = await save_upload_file(file, content_check=is_image_content)
 
         # Extract colors
-        result = extract_colors(input_path, max_colors=max_colors)
+        result = await run_cpu_bound(extract_colors, input_path, max_colors=max_colors)
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message)
@@ -175,14 +208,14 @@ async def rotate_image_endpoint(
 
     try:
         # Save uploaded file
-        input_path = await save_upload_file(file)
+        input_path = await save_upload_file(file, content_check=is_image_content)
 
         # Create output path
         output_filename = generate_unique_filename(f"rotated_{angle}_{file.filename}")
         output_path = TEMP_DIR / output_filename
 
         # Rotate image
-        result = rotate_image(input_path, output_path, angle)
+        result = await run_cpu_bound(rotate_image, input_path, output_path, angle)
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message)
@@ -240,14 +273,15 @@ async def resize_image_endpoint(
 
     try:
         # Save uploaded file
-        input_path = await save_upload_file(file)
+        input_path = await save_upload_file(file, content_check=is_image_content)
 
         # Create output path
         output_filename = generate_unique_filename(f"resized_{file.filename}")
         output_path = TEMP_DIR / output_filename
 
         # Resize image
-        result = resize_image(
+        result = await run_cpu_bound(
+            resize_image,
             input_path,
             output_path,
             width=width,
@@ -299,14 +333,15 @@ async def adjust_image_endpoint(
 
     try:
         # Save uploaded file
-        input_path = await save_upload_file(file)
+        input_path = await save_upload_file(file, content_check=is_image_content)
 
         # Create output path
         output_filename = generate_unique_filename(f"adjusted_{file.filename}")
         output_path = TEMP_DIR / output_filename
 
         # Adjust image
-        result = adjust_image(
+        result = await run_cpu_bound(
+            adjust_image,
             input_path,
             output_path,
             brightness=brightness,
@@ -349,11 +384,11 @@ async def filter_image_endpoint(
     output_path = None
 
     try:
-        input_path = await save_upload_file(file)
+        input_path = await save_upload_file(file, content_check=is_image_content)
         output_filename = generate_unique_filename(f"filtered_{file.filename}")
         output_path = TEMP_DIR / output_filename
 
-        result = apply_filter(input_path, output_path, filter_name)
+        result = await run_cpu_bound(apply_filter, input_path, output_path, filter_name)
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message)
@@ -389,14 +424,14 @@ async def flip_image_endpoint(
 
     try:
         # Save uploaded file
-        input_path = await save_upload_file(file)
+        input_path = await save_upload_file(file, content_check=is_image_content)
 
         # Create output path
         output_filename = generate_unique_filename(f"flipped_{direction}_{file.filename}")
         output_path = TEMP_DIR / output_filename
 
         # Flip image
-        result = flip_image(input_path, output_path, direction)
+        result = await run_cpu_bound(flip_image, input_path, output_path, direction)
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message)
@@ -418,6 +453,9 @@ async def create_collage_endpoint(
         ...,
         description="Comma-separated list of image indices in order (e.g., '0,1,2,3' for 2x2 grid)",
     ),
+    cell_size: int = Form(800, description="Width and height of each cell in pixels (64-2000)"),
+    output_format: str = Form("png", description="Output format (png, jpg, webp)"),
+    quality: str = Form("medium", description="JPEG / WebP quality (low, medium, high)"),
 ):
     """
     Create a collage from multiple images arranged in a grid
@@ -429,6 +467,17 @@ async def create_collage_endpoint(
         raise HTTPException(status_code=400, detail="Rows must be between 1 and 10")
     if cols < 1 or cols > 10:
         raise HTTPException(status_code=400, detail="Columns must be between 1 and 10")
+    if cell_size < COLLAGE_MIN_CELL_SIZE or cell_size > COLLAGE_MAX_CELL_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cell size must be between {COLLAGE_MIN_CELL_SIZE} and {COLLAGE_MAX_CELL_SIZE}",
+        )
+    output_format = output_format.lower()
+    if output_format not in COLLAGE_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported output format. Use one of: {', '.join(COLLAGE_FORMATS)}",
+        )
 
     total_cells = rows * cols
     if len(files) == 0:
@@ -470,15 +519,25 @@ async def create_collage_endpoint(
     try:
         # Save all uploaded files
         for file in files:
-            input_path = await save_upload_file(file)
+            input_path = await save_upload_file(file, content_check=is_image_content)
             input_paths.append(input_path)
 
         # Create output path
-        output_filename = generate_unique_filename("collage.png")
+        output_filename = generate_unique_filename(f"collage.{output_format}")
         output_path = TEMP_DIR / output_filename
 
         # Create collage
-        result = create_collage(input_paths, output_path, rows, cols, order_list)
+        result = await run_cpu_bound(
+            create_collage,
+            input_paths,
+            output_path,
+            rows,
+            cols,
+            order_list,
+            cell_size=cell_size,
+            output_format=output_format,
+            quality=quality,
+        )
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message)
@@ -516,7 +575,7 @@ async def create_icon_endpoint(
 
     try:
         # Save uploaded file
-        input_path = await save_upload_file(file)
+        input_path = await save_upload_file(file, content_check=is_image_content)
 
         # Create output path
         base_name = Path(file.filename).stem
@@ -524,7 +583,134 @@ async def create_icon_endpoint(
         output_path = TEMP_DIR / output_filename
 
         # Create icon
-        result = create_icon(input_path, output_path, size)
+        result = await run_cpu_bound(create_icon, input_path, output_path, size)
+
+        if not result.success:
+            raise HTTPException(status_code=500, detail=result.message)
+
+        return result
+
+    finally:
+        # Clean up input file
+        if input_path:
+            delete_file(input_path)
+
+
+@router.post("/favicon-pack", response_model=ImageProcessingResponse)
+async def create_favicon_pack_endpoint(
+    file: UploadFile = File(..., description="Image file to build favicons from"),
+    name: str = Form("", description="Application name for site.webmanifest"),
+):
+    """
+    Build a complete favicon set in one request
+
+    Supported formats: JPG, JPEG, PNG, GIF, BMP, WEBP
+    Output: ZIP with favicon.ico (16-256px), PNG icons (16-512px, apple-touch-icon)
+    and site.webmanifest
+    """
+    # Validate file format
+    if not validate_image_format(file.filename):
+        raise HTTPException(status_code=400, detail="Unsupported image format")
+
+    input_path = None
+    output_path = None
+
+    try:
+        # Save uploaded file
+        input_path = await save_upload_file(file, content_check=is_image_content)
+
+        # Create output path
+        base_name = Path(file.filename).stem
+        output_filename = generate_unique_filename(f"{base_name}_favicons.zip")
+        output_path = TEMP_DIR / output_filename
+
+        # Create favicon pack
+        result = await run_cpu_bound(create_favicon_pack, input_path, output_path, name)
+
+        if not result.success:
+            raise HTTPException(status_code=500, detail=result.message)
+
+        return result
+
+    finally:
+        # Clean up input file
+        if input_path:
+            delete_file(input_path)
+
+
+@router.post("/responsive", response_model=ResponsiveImageResponse)
+async def create_responsive_images_endpoint(
+    file: UploadFile = File(..., description="Image file to build variants of"),
+    widths: str = Form(
+        "320,640,960,1280,1920", description="Comma-separated target widths in pixels"
+    ),
+    formats: str = Form("jpg,webp", description="Comma-separated formats (jpg, webp, avif)"),
+    quality: str = Form("medium", description="Quality (low, medium, high)"),
+):
+    """
+    Build width / format variants of an image and their srcset values in one request
+
+    Supported formats: JPG, JPEG, PNG, GIF, BMP, WEBP
+    Output: ZIP with one file per width and format (never wider than the image)
+    """
+    # Validate file format
+    if not validate_image_format(file.filename):
+        raise HTTPException(status_code=400, detail="Unsupported image format")
+
+    try:
+        width_list = sorted({int(w.strip()) for w in widths.split(",") if w.strip()})
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid widths format. Use comma-separated integers (e.g., '320,640,1280')",
+        )
+    if not width_list or len(width_list) > RESPONSIVE_MAX_WIDTHS:
+        raise HTTPException(
+            status_code=400, detail=f"Between 1 and {RESPONSIVE_MAX_WIDTHS} widths are allowed"
+        )
+    if width_list[0] < RESPONSIVE_MIN_WIDTH or width_list[-1] > RESPONSIVE_MAX_WIDTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Widths must be between {RESPONSIVE_MIN_WIDTH} and {RESPONSIVE_MAX_WIDTH} pixels",
+        )
+
+    supported = supported_responsive_formats()
+    format_list = list(dict.fromkeys(f.strip().lower() for f in formats.split(",") if f.strip()))
+    if not format_list or any(f not in supported for f in format_list):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported output format. Use one of: {', '.join(supported)}",
+        )
+
+    input_path = None
+    output_path = None
+
+    try:
+        # Save uploaded file
+        upload = await save_upload_stream(file, content_check=is_image_content)
+        input_path = upload.path
+
+        # Create output path
+        base_name = Path(file.filename).stem
+        output_filename = generate_unique_filename(f"{base_name}_responsive.zip")
+        output_path = TEMP_DIR / output_filename
+
+        # Build variants (reused when the same image was requested with the same options)
+        result = await result_cache.get_or_compute(
+            upload.sha256,
+            "image.responsive",
+            {"widths": width_list, "formats": format_list, "quality": quality, "name": base_name},
+            output_path,
+            lambda: run_cpu_bound(
+                create_responsive_images,
+                input_path,
+                output_path,
+                width_list,
+                format_list,
+                quality=quality,
+                base_name=base_name,
+            ),
+        )
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message)
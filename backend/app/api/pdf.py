@@ -2,7 +2,6 @@
 PDF processing API endpoints
 """
 
-import asyncio
 from pathlib import Path
 import shutil
 from typing import List, Optional
@@ -24,12 +23,16 @@ from app.services.pdf_service import (
     split_pdf,
 )
 from app.services.pdf_service_async import extract_text_with_ocr_async
-from app.tasks import task_store
+from app.tasks import expiry_manager, task_store
+from app.tasks.scheduler import OCR_JOB, scheduler
+from app.utils.executors import run_blocking, run_cpu_bound
 from app.utils.file_handler import (
     delete_file,
     generate_unique_filename,
     save_upload_file,
+    save_upload_stream,
 )
+from app.utils.result_cache import result_cache
 from app.utils.validators import validate_image_format, validate_pdf_format
 
 router = APIRouter(prefix="/pdf", tags=["PDF"])
@@ -48,7 +51,7 @@ async def get_pdf_file_info(
     input_path = None
     try:
         input_path = await save_upload_file(file)
-        info = get_pdf_info(input_path)
+        info = await run_cpu_bound(get_pdf_info, input_path)
 
         if not info:
             raise HTTPException(status_code=500, detail="Could not read PDF info")
@@ -89,7 +92,7 @@ async def merge_pdf_files(
         output_path = TEMP_DIR / output_filename
 
         # Merge PDFs
-        result = merge_pdfs(input_paths, output_path)
+        result = await run_cpu_bound(merge_pdfs, input_paths, output_path)
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message)
@@ -117,10 +120,17 @@ async def compress_pdf_file(
     output_path = None
 
     try:
-        input_path = await save_upload_file(file)
+        upload = await save_upload_stream(file)
+        input_path = upload.path
         output_filename = generate_unique_filename(f"compressed_{file.filename}")
         output_path = TEMP_DIR / output_filename
-        result = compress_pdf(input_path, output_path)
+        result = await result_cache.get_or_compute(
+            upload.sha256,
+            "pdf.compress",
+            None,
+            output_path,
+            lambda: run_cpu_bound(compress_pdf, input_path, output_path),
+        )
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message or "Failed to compress PDF")
@@ -170,7 +180,7 @@ async def split_pdf_file(
         output_dir.mkdir(exist_ok=True)
 
         # Split PDF
-        result = split_pdf(input_path, output_dir, pages_list, ranges_list)
+        result = await run_cpu_bound(split_pdf, input_path, output_dir, pages_list, ranges_list)
 
         if not result.success:
             shutil.rmtree(output_dir)
@@ -180,7 +190,7 @@ async def split_pdf_file(
         zip_filename = f"{dir_name}.zip"
         zip_path = TEMP_DIR / zip_filename
 
-        shutil.make_archive(str(zip_path.with_suffix("")), "zip", output_dir)
+        await run_blocking(shutil.make_archive, str(zip_path.with_suffix("")), "zip", output_dir)
 
         # Update result with zip info and individual file paths (prefixed with subdir)
         result.filename = zip_filename
@@ -215,7 +225,7 @@ async def reorganize_pdf_pages(
         input_path = await save_upload_file(file)
         output_filename = generate_unique_filename(f"reorganized_{file.filename}")
         output_path = TEMP_DIR / output_filename
-        result = reorganize_pdf(input_path, output_path, page_order_list)
+        result = await run_cpu_bound(reorganize_pdf, input_path, output_path, page_order_list)
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message)
@@ -242,10 +252,17 @@ async def extract_text_from_pdf_ocr(
     output_path = None
 
     try:
-        input_path = await save_upload_file(file)
+        upload = await save_upload_stream(file)
+        input_path = upload.path
         output_filename = generate_unique_filename(f"extracted_text_{file.filename}.txt")
         output_path = TEMP_DIR / output_filename
-        result = extract_text_with_ocr(input_path, output_path, language)
+        result = await result_cache.get_or_compute(
+            upload.sha256,
+            "pdf.ocr",
+            {"language": language},
+            output_path,
+            lambda: run_blocking(extract_text_with_ocr, input_path, output_path, language),
+        )
 
         if not result.success:
             # Log the error for debugging
@@ -311,9 +328,15 @@ async def extract_text_from_pdf_ocr_async(
             "language": language,
         },
     )
-
-    # Start background processing
-    asyncio.create_task(run_ocr_task(task.id, input_path, output_path, language))
+    expiry_manager.track_task(task.id, outputs=[output_path])
+
+    # Queue background processing (runs once an OCR slot is free)
+    scheduler.submit(
+        task.id,
+        OCR_JOB,
+        run_ocr_task(task.id, input_path, output_path, language),
+        inputs=[input_path],
+    )
 
     return {"task_id": task.id}
 
@@ -345,11 +368,11 @@ async def password_pdf_file(
         if action == "add":
             output_filename = generate_unique_filename(f"protected_{file.filename}")
             output_path = TEMP_DIR / output_filename
-            result = add_password_pdf(input_path, output_path, password)
+            result = await run_cpu_bound(add_password_pdf, input_path, output_path, password)
         else:  # remove
             output_filename = generate_unique_filename(f"unprotected_{file.filename}")
             output_path = TEMP_DIR / output_filename
-            result = remove_password_pdf(input_path, output_path, password)
+            result = await run_cpu_bound(remove_password_pdf, input_path, output_path, password)
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message)
@@ -386,39 +409,54 @@ async def convert_pdf_to_images(
         raise HTTPException(status_code=400, detail="DPI must be between 72 and 300")
 
     input_path = None
-    output_dir = None
 
     try:
-        input_path = await save_upload_file(file)
+        upload = await save_upload_stream(file)
+        input_path = upload.path
 
-        # Create output directory
+        # Create output directory and ZIP paths
         dir_name = f"pdf_images_{generate_unique_filename('').replace('.', '')}"
         output_dir = TEMP_DIR / dir_name
-        output_dir.mkdir(exist_ok=True)
-
-        # Convert PDF to images
-        result = pdf_to_images(input_path, output_dir, image_format.lower(), dpi)
-
-        if not result.success:
-            if output_dir.exists():
-                shutil.rmtree(output_dir)
-            raise HTTPException(status_code=500, detail=result.message)
-
-        # Create ZIP of the directory
         zip_filename = f"{dir_name}.zip"
         zip_path = TEMP_DIR / zip_filename
 
-        shutil.make_archive(str(zip_path.with_suffix("")), "zip", output_dir)
+        async def convert_to_zip() -> PDFProcessingResponse:
+            output_dir.mkdir(exist_ok=True)
 
-        # Cleanup output dir (we only keep the zip)
-        shutil.rmtree(output_dir)
+            # Convert PDF to images
+            result = await run_cpu_bound(
+                pdf_to_images, input_path, output_dir, image_format.lower(), dpi
+            )
 
-        # Update result with zip info
-        result.filename = zip_filename
-        result.download_url = f"/api/v1/download/{zip_filename}"
-        result.message = f"PDF converted to {len(result.filenames or [])} images (download as ZIP)"
+            if not result.success:
+                if output_dir.exists():
+                    shutil.rmtree(output_dir)
+                raise HTTPException(status_code=500, detail=result.message)
 
-        return result
+            # Create ZIP of the directory
+            await run_blocking(
+                shutil.make_archive, str(zip_path.with_suffix("")), "zip", output_dir
+            )
+
+            # Cleanup output dir (we only keep the zip)
+            shutil.rmtree(output_dir)
+
+            # Update result with zip info
+            result.filename = zip_filename
+            result.download_url = f"/api/v1/download/{zip_filename}"
+            result.message = (
+                f"PDF converted to {len(result.filenames or [])} images (download as ZIP)"
+            )
+            return result
+
+        # Same PDF at the same format and DPI reuses the ZIP
+        return await result_cache.get_or_compute(
+            upload.sha256,
+            "pdf.to_images",
+            {"image_format": image_format.lower(), "dpi": dpi},
+            zip_path,
+            convert_to_zip,
+        )
 
     finally:
         if input_path:
@@ -467,7 +505,7 @@ async def convert_images_to_pdf(
         output_path = TEMP_DIR / output_filename
 
         # Convert images to PDF
-        result = images_to_pdf(input_paths, output_path, page_size)
+        result = await run_cpu_bound(images_to_pdf, input_paths, output_path, page_size)
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message)
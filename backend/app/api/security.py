@@ -11,6 +11,7 @@ from app.models.encryption import EncryptionResponse
 from app.models.hash import FileHashResponse
 from app.services.encryption_service import decrypt_file, encrypt_file
 from app.services.hash_service import hash_file
+from app.utils.executors import run_cpu_bound
 from app.utils.file_handler import delete_file, generate_unique_filename, save_upload_file
 
 router = APIRouter(prefix="/security", tags=["Security"])
@@ -43,7 +44,7 @@ async def encrypt_file_endpoint(
         output_path = TEMP_DIR / output_filename
 
         # Encrypt file
-        result = encrypt_file(input_path, output_path, password)
+        result = await run_cpu_bound(encrypt_file, input_path, output_path, password)
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message)
@@ -87,7 +88,7 @@ async def decrypt_file_endpoint(
         output_path = TEMP_DIR / output_filename
 
         # Decrypt file
-        result = decrypt_file(input_path, output_path, password)
+        result = await run_cpu_bound(decrypt_file, input_path, output_path, password)
 
         if not result.success:
             # Check if it's a password error (client error) or server error
@@ -134,7 +135,7 @@ async def hash_file_endpoint(
         input_path = await save_upload_file(file)
 
         # Calculate hash
-        result = hash_file(input_path, algo_lower, uppercase)
+        result = await run_cpu_bound(hash_file, input_path, algo_lower, uppercase)
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message)
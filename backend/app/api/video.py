@@ -2,38 +2,58 @@
 Video processing API endpoints
 """
 
-import asyncio
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, BackgroundTasks, File, Form, HTTPException, UploadFile
 
 from app.config import TEMP_DIR
-from app.models.video import VideoProcessingResponse
+from app.models.video import VideoProcessingResponse, VideoThumbnailsResponse
 from app.services.video_service import (
+    ANIMATION_EXTENSIONS,
+    check_gif_params,
+    check_thumbnail_params,
     compress_video,
     convert_video,
     extract_audio,
+    extract_thumbnails,
     merge_videos,
     rotate_video,
     video_to_gif,
 )
 from app.services.video_service_async import (
+    STREAMING_FORMATS,
     compress_video_with_progress,
     convert_video_with_progress,
+    extract_audio_with_progress,
+    extract_thumbnails_with_progress,
     merge_videos_with_progress,
+    rotate_video_with_progress,
+    video_to_gif_with_progress,
 )
-from app.tasks import task_store
+from app.tasks import expiry_manager, task_store
+from app.tasks.scheduler import FFMPEG_JOB, scheduler
+from app.utils.executors import run_blocking
 from app.utils.file_handler import (
+    STREAMING_DIR_SUFFIX,
     delete_file,
     generate_unique_filename,
     save_upload_file,
+    save_upload_stream,
 )
-from app.utils.validators import validate_video_format
+from app.utils.result_cache import result_cache
+from app.utils.validators import is_video_content, validate_video_format
 
 router = APIRouter(prefix="/video", tags=["Video"])
 
 
+def animation_filename(filename: str, output_format: str) -> str:
+    """Unique output name of a GIF, WebP or APNG rendered from a video"""
+    prefix = "gif" if output_format == "gif" else "animated"
+    extension = ANIMATION_EXTENSIONS[output_format]
+    return generate_unique_filename(f"{prefix}_{Path(filename).stem}.{extension}")
+
+
 @router.post("/compress", response_model=VideoProcessingResponse)
 async def compress_video_endpoint(
     file: UploadFile = File(..., description="Video file to compress"),
@@ -55,14 +75,21 @@ async def compress_video_endpoint(
 
     try:
         # Save uploaded file
-        input_path = await save_upload_file(file)
+        upload = await save_upload_stream(file, content_check=is_video_content)
+        input_path = upload.path
 
         # Create output path
         output_filename = generate_unique_filename(f"compressed_{file.filename}")
         output_path = TEMP_DIR / output_filename
 
-        # Compress video
-        result = compress_video(input_path, output_path, quality)
+        # Compress video (reused when the same video was compressed with the same quality)
+        result = await result_cache.get_or_compute(
+            upload.sha256,
+            "video.compress",
+            {"quality": quality},
+            output_path,
+            lambda: run_blocking(compress_video, input_path, output_path, quality),
+        )
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message)
@@ -79,7 +106,10 @@ async def compress_video_endpoint(
 async def convert_video_endpoint(
     file: UploadFile = File(..., description="Video file to convert"),
     output_format: str = Form(..., description="Target format (mp4, avi, mov, etc.)"),
-    quality: str = Form("medium", description="Conversion quality (low, medium, high)"),
+    quality: Optional[str] = Form(
+        None,
+        description="Conversion quality (low, medium, high), omit to remux compatible streams",
+    ),
 ):
     """
     Convert a video to a different format
@@ -101,7 +131,8 @@ async def convert_video_endpoint(
 
     try:
         # Save uploaded file
-        input_path = await save_upload_file(file)
+        upload = await save_upload_stream(file, content_check=is_video_content)
+        input_path = upload.path
 
         # Create output path with new extension
         base_name = Path(file.filename).stem
@@ -109,7 +140,13 @@ async def convert_video_endpoint(
         output_path = TEMP_DIR / output_filename
 
         # Convert video
-        result = convert_video(input_path, output_path, output_format, quality)
+        result = await result_cache.get_or_compute(
+            upload.sha256,
+            "video.convert",
+            {"output_format": output_format.lower(), "quality": quality},
+            output_path,
+            lambda: run_blocking(convert_video, input_path, output_path, output_format, quality),
+        )
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message)
@@ -148,14 +185,14 @@ async def rotate_video_endpoint(
 
     try:
         # Save uploaded file
-        input_path = await save_upload_file(file)
+        input_path = await save_upload_file(file, content_check=is_video_content)
 
         # Create output path
         output_filename = generate_unique_filename(f"rotated_{angle}_{file.filename}")
         output_path = TEMP_DIR / output_filename
 
         # Rotate video
-        result = rotate_video(input_path, output_path, angle)
+        result = await run_blocking(rotate_video, input_path, output_path, angle)
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message)
@@ -176,40 +213,43 @@ async def video_to_gif_endpoint(
     width: int | None = Form(None, description="Target width in pixels"),
     fps: int = Form(12, description="Frames per second for GIF"),
     loop: bool = Form(True, description="Loop GIF indefinitely"),
+    output_format: str = Form("gif", description="Animation format (gif, webp, apng)"),
+    dither: str = Form(
+        "sierra2_4a", description="GIF dithering (sierra2_4a, floyd_steinberg, bayer, none)"
+    ),
+    sparse_palette: bool = Form(
+        False, description="Build the GIF palette from a few frames per second (faster)"
+    ),
 ):
     """
     Convert a segment of a video to an animated GIF.
 
     Supports common video formats: MP4, AVI, MOV, MKV, FLV, WMV
+
+    output_format=webp or apng encodes much faster than GIF (no palette step). GIF palettes
+    are cached per upload and segment, so re-rendering with another loop or dither setting
+    skips palette generation.
     """
     if not validate_video_format(file.filename):
         raise HTTPException(status_code=400, detail="Unsupported video format")
 
-    if start_time < 0:
-        raise HTTPException(status_code=400, detail="start_time must be non-negative")
-
-    if duration is not None and duration <= 0:
-        raise HTTPException(status_code=400, detail="duration must be greater than 0")
-
-    if fps < 1 or fps > 60:
-        raise HTTPException(status_code=400, detail="fps must be between 1 and 60")
-
-    if width is not None and width < 32:
-        raise HTTPException(status_code=400, detail="width must be at least 32 pixels")
+    error = check_gif_params(None, start_time, duration, width, fps, output_format, dither)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
 
     input_path = None
     output_path = None
 
     try:
         # Save uploaded file
-        input_path = await save_upload_file(file)
+        input_path = await save_upload_file(file, content_check=is_video_content)
 
         # Create output path
-        output_filename = generate_unique_filename(f"gif_{Path(file.filename).stem}.gif")
-        output_path = TEMP_DIR / output_filename
+        output_path = TEMP_DIR / animation_filename(file.filename, output_format)
 
         # Convert video to GIF
-        result = video_to_gif(
+        result = await run_blocking(
+            video_to_gif,
             input_path=input_path,
             output_path=output_path,
             start_time=start_time,
@@ -217,6 +257,9 @@ async def video_to_gif_endpoint(
             width=width,
             fps=fps,
             loop=loop,
+            output_format=output_format,
+            dither=dither,
+            sparse_palette=sparse_palette,
         )
 
         if not result.success:
@@ -250,14 +293,15 @@ async def extract_audio_endpoint(
 
     try:
         # Save uploaded file
-        input_path = await save_upload_file(file)
+        input_path = await save_upload_file(file, content_check=is_video_content)
 
         # Build output filename
         base_name = Path(file.filename).stem
         output_filename = generate_unique_filename(f"{base_name}_audio.{output_format}")
         output_path = TEMP_DIR / output_filename
 
-        result = extract_audio(
+        result = await run_blocking(
+            extract_audio,
             input_path=input_path,
             output_path=output_path,
             output_format=output_format,
@@ -274,11 +318,57 @@ async def extract_audio_endpoint(
             delete_file(input_path)
 
 
+@router.post("/thumbnails", response_model=VideoThumbnailsResponse)
+async def extract_thumbnails_endpoint(
+    file: UploadFile = File(..., description="Video file to extract thumbnails from"),
+    count: int = Form(10, description="Number of evenly spaced thumbnails (1-100)"),
+    width: int = Form(160, description="Thumbnail width in pixels (32-640)"),
+    columns: int | None = Form(None, description="Sprite sheet columns (default: square grid)"),
+):
+    """
+    Extract evenly spaced thumbnails into a JPEG sprite sheet with a WebVTT index
+
+    Each thumbnail is a keyframe reached by seeking (only keyframes are decoded), so the
+    cost does not grow with the video length. The WebVTT track maps each time interval to
+    its sprite cell (sprite.jpg#xywh=x,y,w,h), as used by video player preview strips.
+    """
+    if not validate_video_format(file.filename):
+        raise HTTPException(status_code=400, detail="Unsupported video format")
+
+    error = check_thumbnail_params(count, width, columns)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+
+    input_path = None
+
+    try:
+        input_path = await save_upload_file(file, content_check=is_video_content)
+
+        sprite_path = TEMP_DIR / generate_unique_filename(f"thumbs_{Path(file.filename).stem}.jpg")
+        vtt_path = sprite_path.with_suffix(".vtt")
+
+        result = await run_blocking(
+            extract_thumbnails, input_path, sprite_path, vtt_path, count, width, columns
+        )
+
+        if not result.success:
+            raise HTTPException(status_code=500, detail=result.message)
+
+        return result
+
+    finally:
+        if input_path:
+            delete_file(input_path)
+
+
 @router.post("/merge", response_model=VideoProcessingResponse)
 async def merge_videos_endpoint(
     files: List[UploadFile] = File(..., description="Video files to merge (in order)"),
     output_format: str = Form("mp4", description="Output format (mp4, avi, mov, etc.)"),
-    quality: str = Form("medium", description="Output quality (low, medium, high)"),
+    quality: Optional[str] = Form(
+        None,
+        description="Output quality (low, medium, high), omit to join matching inputs as-is",
+    ),
     merge_mode: str = Form(
         "quality",
         description="Merge mode: 'fast' (copy without re-encoding) or 'quality' (re-encode for compatibility)",
@@ -319,7 +409,7 @@ async def merge_videos_endpoint(
     try:
         # Save all uploaded files
         for file in files:
-            input_path = await save_upload_file(file)
+            input_path = await save_upload_file(file, content_check=is_video_content)
             input_paths.append(input_path)
 
         # Create output path
@@ -327,7 +417,9 @@ async def merge_videos_endpoint(
         output_path = TEMP_DIR / output_filename
 
         # Merge videos
-        result = merge_videos(input_paths, output_path, output_format, quality, merge_mode)
+        result = await run_blocking(
+            merge_videos, input_paths, output_path, output_format, quality, merge_mode
+        )
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message)
@@ -346,21 +438,37 @@ async def merge_videos_endpoint(
 # ============================================
 
 
-async def run_compress_task(task_id: str, input_path: Path, output_path: Path, quality: str):
+async def run_compress_task(
+    task_id: str,
+    input_path: Path,
+    output_path: Path,
+    quality: str,
+    chunked: bool = False,
+    target_size_mb: float | None = None,
+):
     """Background task for video compression with progress"""
     try:
-        await compress_video_with_progress(task_id, input_path, output_path, quality)
+        await compress_video_with_progress(
+            task_id, input_path, output_path, quality, chunked, target_size_mb
+        )
     finally:
         # Clean up input file after processing
         delete_file(input_path)
 
 
 async def run_convert_task(
-    task_id: str, input_path: Path, output_path: Path, output_format: str, quality: str
+    task_id: str,
+    input_path: Path,
+    output_path: Path,
+    output_format: str,
+    quality: str,
+    chunked: bool = False,
 ):
     """Background task for video conversion with progress"""
     try:
-        await convert_video_with_progress(task_id, input_path, output_path, output_format, quality)
+        await convert_video_with_progress(
+            task_id, input_path, output_path, output_format, quality, chunked
+        )
     finally:
         delete_file(input_path)
 
@@ -385,11 +493,61 @@ async def run_merge_task(
                 delete_file(input_path)
 
 
+async def run_rotate_task(task_id: str, input_path: Path, output_path: Path, angle: int):
+    """Background task for video rotation with progress"""
+    try:
+        await rotate_video_with_progress(task_id, input_path, output_path, angle)
+    finally:
+        delete_file(input_path)
+
+
+async def run_gif_task(task_id: str, input_path: Path, output_path: Path, **options):
+    """Background task for video to GIF conversion with progress"""
+    try:
+        await video_to_gif_with_progress(task_id, input_path, output_path, **options)
+    finally:
+        delete_file(input_path)
+
+
+async def run_extract_audio_task(
+    task_id: str, input_path: Path, output_path: Path, output_format: str, bitrate: str
+):
+    """Background task for audio extraction with progress"""
+    try:
+        await extract_audio_with_progress(task_id, input_path, output_path, output_format, bitrate)
+    finally:
+        delete_file(input_path)
+
+
+async def run_thumbnails_task(
+    task_id: str,
+    input_path: Path,
+    sprite_path: Path,
+    vtt_path: Path,
+    count: int,
+    width: int,
+    columns: int | None,
+):
+    """Background task for thumbnail extraction with progress"""
+    try:
+        await extract_thumbnails_with_progress(
+            task_id, input_path, sprite_path, vtt_path, count, width, columns
+        )
+    finally:
+        delete_file(input_path)
+
+
 @router.post("/compress/async")
 async def compress_video_async(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(..., description="Video file to compress"),
     quality: str = Form("medium", description="Compression quality (low, medium, high)"),
+    chunked: bool = Form(
+        False, description="Split at keyframes and encode the segments in parallel (long videos)"
+    ),
+    target_size_mb: float | None = Form(
+        None, description="Wanted output size in MB (two-pass encode, replaces quality)"
+    ),
 ):
     """
     Start async video compression with progress tracking
@@ -399,13 +557,28 @@ async def compress_video_async(
     - Stream progress: GET /api/v1/tasks/{task_id}/stream (SSE)
 
     Progress events include: analyzing, encoding, finalizing stages
+
+    chunked=true splits the video at keyframes and encodes the segments in parallel,
+    which keeps all cores busy on long videos (short ones are encoded in one run)
+
+    target_size_mb computes the bitrate from the video duration and encodes in two passes
+    so the output lands at the wanted size, scaling the video down when the bitrate is too
+    low for its resolution
     """
     # Validate file format
     if not validate_video_format(file.filename):
         raise HTTPException(status_code=400, detail="Unsupported video format")
 
+    if target_size_mb is not None:
+        if target_size_mb <= 0:
+            raise HTTPException(status_code=400, detail="target_size_mb must be greater than 0")
+        if chunked:
+            raise HTTPException(
+                status_code=400, detail="target_size_mb cannot be combined with chunked"
+            )
+
     # Save uploaded file
-    input_path = await save_upload_file(file)
+    input_path = await save_upload_file(file, content_check=is_video_content)
 
     # Create output path
     output_filename = generate_unique_filename(f"compressed_{file.filename}")
@@ -417,11 +590,19 @@ async def compress_video_async(
         metadata={
             "filename": file.filename,
             "quality": quality,
+            "chunked": chunked,
+            "target_size_mb": target_size_mb,
         },
     )
-
-    # Start background processing
-    asyncio.create_task(run_compress_task(task.id, input_path, output_path, quality))
+    expiry_manager.track_task(task.id, outputs=[output_path])
+
+    # Queue background processing (runs once an ffmpeg slot is free)
+    scheduler.submit(
+        task.id,
+        FFMPEG_JOB,
+        run_compress_task(task.id, input_path, output_path, quality, chunked, target_size_mb),
+        inputs=[input_path],
+    )
 
     return {"task_id": task.id}
 
@@ -430,12 +611,20 @@ async def compress_video_async(
 async def convert_video_async(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(..., description="Video file to convert"),
-    output_format: str = Form(..., description="Target format (mp4, avi, mov, etc.)"),
+    output_format: str = Form(
+        ..., description="Target format (mp4, avi, mov, etc.), or hls/dash for streaming"
+    ),
     quality: str = Form("medium", description="Conversion quality (low, medium, high)"),
+    chunked: bool = Form(
+        False, description="Split at keyframes and encode the segments in parallel (long videos)"
+    ),
 ):
     """
     Start async video conversion with progress tracking
 
+    output_format "hls" or "dash" produces a rendition ladder of fMP4 segments; the task's
+    download_url is then the master playlist, served with the segments next to it.
+
     Returns a task_id for progress tracking via SSE
     """
     # Validate input file format
@@ -443,15 +632,24 @@ async def convert_video_async(
         raise HTTPException(status_code=400, detail="Unsupported input video format")
 
     # Validate output format
-    if output_format.lower() not in ["mp4", "avi", "mov", "mkv", "flv", "wmv"]:
+    streaming = output_format.lower() in STREAMING_FORMATS
+    if output_format.lower() not in ["mp4", "avi", "mov", "mkv", "flv", "wmv"] and not streaming:
         raise HTTPException(status_code=400, detail="Unsupported output format")
 
+    if streaming and chunked:
+        raise HTTPException(
+            status_code=400, detail="chunked cannot be combined with HLS/DASH output"
+        )
+
     # Save uploaded file
-    input_path = await save_upload_file(file)
+    input_path = await save_upload_file(file, content_check=is_video_content)
 
-    # Create output path
+    # Create output path (a directory of playlists and segments for streaming formats)
     base_name = Path(file.filename).stem
-    output_filename = generate_unique_filename(f"{base_name}_converted.{output_format}")
+    if streaming:
+        output_filename = generate_unique_filename(base_name) + STREAMING_DIR_SUFFIX
+    else:
+        output_filename = generate_unique_filename(f"{base_name}_converted.{output_format}")
     output_path = TEMP_DIR / output_filename
 
     # Create task
@@ -461,11 +659,18 @@ async def convert_video_async(
             "filename": file.filename,
             "output_format": output_format,
             "quality": quality,
+            "chunked": chunked,
         },
     )
-
-    # Start background processing
-    asyncio.create_task(run_convert_task(task.id, input_path, output_path, output_format, quality))
+    expiry_manager.track_task(task.id, outputs=[output_path])
+
+    # Queue background processing (runs once an ffmpeg slot is free)
+    scheduler.submit(
+        task.id,
+        FFMPEG_JOB,
+        run_convert_task(task.id, input_path, output_path, output_format, quality, chunked),
+        inputs=[input_path],
+    )
 
     return {"task_id": task.id}
 
@@ -517,7 +722,7 @@ async def merge_videos_async(
     # Save all uploaded files
     input_paths = []
     for file in files:
-        input_path = await save_upload_file(file)
+        input_path = await save_upload_file(file, content_check=is_video_content)
         input_paths.append(input_path)
 
     # Create output path
@@ -534,10 +739,188 @@ async def merge_videos_async(
             "merge_mode": merge_mode,
         },
     )
+    expiry_manager.track_task(task.id, outputs=[output_path])
+
+    # Queue background processing (runs once an ffmpeg slot is free)
+    scheduler.submit(
+        task.id,
+        FFMPEG_JOB,
+        run_merge_task(task.id, input_paths, output_path, output_format, quality, merge_mode),
+        inputs=input_paths,
+    )
+
+    return {"task_id": task.id}
+
+
+@router.post("/rotate/async")
+async def rotate_video_async(
+    file: UploadFile = File(..., description="Video file to rotate"),
+    angle: int = Form(..., description="Rotation angle in degrees (90, 180, or 270)"),
+):
+    """
+    Start async video rotation with progress tracking
+
+    Returns a task_id for progress tracking via SSE
+    """
+    if not validate_video_format(file.filename):
+        raise HTTPException(status_code=400, detail="Unsupported video format")
+
+    if angle not in [90, 180, 270]:
+        raise HTTPException(status_code=400, detail="Invalid angle. Supported angles: 90, 180, 270")
+
+    input_path = await save_upload_file(file, content_check=is_video_content)
+
+    output_filename = generate_unique_filename(f"rotated_{angle}_{file.filename}")
+    output_path = TEMP_DIR / output_filename
+
+    task = task_store.create_task(
+        task_type="video_rotate",
+        metadata={"filename": file.filename, "angle": angle},
+    )
+    expiry_manager.track_task(task.id, outputs=[output_path])
+
+    scheduler.submit(
+        task.id,
+        FFMPEG_JOB,
+        run_rotate_task(task.id, input_path, output_path, angle),
+        inputs=[input_path],
+    )
+
+    return {"task_id": task.id}
+
+
+@router.post("/to-gif/async")
+async def video_to_gif_async(
+    file: UploadFile = File(..., description="Video file to convert to GIF"),
+    start_time: float = Form(0.0, description="Start time in seconds"),
+    duration: float | None = Form(None, description="Duration in seconds"),
+    width: int | None = Form(None, description="Target width in pixels"),
+    fps: int = Form(12, description="Frames per second for GIF"),
+    loop: bool = Form(True, description="Loop GIF indefinitely"),
+    output_format: str = Form("gif", description="Animation format (gif, webp, apng)"),
+    dither: str = Form(
+        "sierra2_4a", description="GIF dithering (sierra2_4a, floyd_steinberg, bayer, none)"
+    ),
+    sparse_palette: bool = Form(
+        False, description="Build the GIF palette from a few frames per second (faster)"
+    ),
+):
+    """
+    Start async video to GIF conversion with progress tracking
+
+    Returns a task_id for progress tracking via SSE
+    """
+    if not validate_video_format(file.filename):
+        raise HTTPException(status_code=400, detail="Unsupported video format")
+
+    error = check_gif_params(None, start_time, duration, width, fps, output_format, dither)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+
+    input_path = await save_upload_file(file, content_check=is_video_content)
+
+    output_path = TEMP_DIR / animation_filename(file.filename, output_format)
+
+    options = {
+        "start_time": start_time,
+        "duration": duration,
+        "width": width,
+        "fps": fps,
+        "loop": loop,
+        "output_format": output_format,
+        "dither": dither,
+        "sparse_palette": sparse_palette,
+    }
+    task = task_store.create_task(
+        task_type="video_gif",
+        metadata={"filename": file.filename, **options},
+    )
+    expiry_manager.track_task(task.id, outputs=[output_path])
+
+    scheduler.submit(
+        task.id,
+        FFMPEG_JOB,
+        run_gif_task(task.id, input_path, output_path, **options),
+        inputs=[input_path],
+    )
+
+    return {"task_id": task.id}
+
+
+@router.post("/extract-audio/async")
+async def extract_audio_async(
+    file: UploadFile = File(..., description="Video file to extract audio from"),
+    output_format: str = Form("mp3", description="Output audio format (mp3, wav, flac, ogg)"),
+    bitrate: str = Form("192k", description="Audio bitrate, e.g., 128k, 192k"),
+):
+    """
+    Start async audio extraction with progress tracking
+
+    Returns a task_id for progress tracking via SSE
+    """
+    if not validate_video_format(file.filename):
+        raise HTTPException(status_code=400, detail="Unsupported video format")
+
+    if output_format.lower() not in {"mp3", "wav", "flac", "ogg"}:
+        raise HTTPException(status_code=400, detail="Unsupported output audio format")
+
+    input_path = await save_upload_file(file, content_check=is_video_content)
+
+    base_name = Path(file.filename).stem
+    output_filename = generate_unique_filename(f"{base_name}_audio.{output_format}")
+    output_path = TEMP_DIR / output_filename
+
+    task = task_store.create_task(
+        task_type="video_extract_audio",
+        metadata={"filename": file.filename, "output_format": output_format, "bitrate": bitrate},
+    )
+    expiry_manager.track_task(task.id, outputs=[output_path])
+
+    scheduler.submit(
+        task.id,
+        FFMPEG_JOB,
+        run_extract_audio_task(task.id, input_path, output_path, output_format, bitrate),
+        inputs=[input_path],
+    )
+
+    return {"task_id": task.id}
+
+
+@router.post("/thumbnails/async")
+async def extract_thumbnails_async(
+    file: UploadFile = File(..., description="Video file to extract thumbnails from"),
+    count: int = Form(10, description="Number of evenly spaced thumbnails (1-100)"),
+    width: int = Form(160, description="Thumbnail width in pixels (32-640)"),
+    columns: int | None = Form(None, description="Sprite sheet columns (default: square grid)"),
+):
+    """
+    Start async thumbnail sprite extraction with progress tracking
+
+    The task result's download_urls lists the sprite sheet and its WebVTT index
+    """
+    if not validate_video_format(file.filename):
+        raise HTTPException(status_code=400, detail="Unsupported video format")
+
+    error = check_thumbnail_params(count, width, columns)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+
+    input_path = await save_upload_file(file, content_check=is_video_content)
+
+    sprite_path = TEMP_DIR / generate_unique_filename(f"thumbs_{Path(file.filename).stem}.jpg")
+    vtt_path = sprite_path.with_suffix(".vtt")
+
+    task = task_store.create_task(
+        task_type="video_thumbnails",
+        metadata={"filename": file.filename, "count": count, "width": width, "columns": columns},
+    )
+    expiry_manager.track_task(task.id, outputs=[sprite_path, vtt_path])
 
-    # Start background processing
-    asyncio.create_task(
-        run_merge_task(task.id, input_paths, output_path, output_format, quality, merge_mode)
+    scheduler.submit(
+        task.id,
+        FFMPEG_JOB,
+        run_thumbnails_task(task.id, input_path, sprite_path, vtt_path, count, width, columns),
+        inputs=[input_path],
     )
 
     return {"task_id": task.id}
@@ -21,6 +21,17 @@ DEBUG = os.getenv("DEBUG", "True").lower() == "true"
 
 # File upload limits
 MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 100)) * 1024 * 1024  # Convert MB to bytes
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))  # Bytes read per chunk
+# Full-size files one multi-file request (merge, batch) is allowed to carry; smaller files can
+# come in greater numbers, only the total below is enforced
+MAX_REQUEST_FILES = int(os.getenv("MAX_REQUEST_FILES", 10))
+# Whole request body, aborted while it is still arriving. Defaults to MAX_REQUEST_FILES files of
+# MAX_FILE_SIZE plus 1 MB for the multipart boundaries, part headers and form fields, so it never
+# cuts off a request the per-file limit would accept; set in MB to override
+MAX_REQUEST_SIZE = (
+    int(os.getenv("MAX_REQUEST_SIZE") or 0) * 1024 * 1024
+    or MAX_FILE_SIZE * MAX_REQUEST_FILES + 1024 * 1024
+)
 
 # Temporary file storage
 TEMP_DIR = Path(os.getenv("TEMP_DIR", BASE_DIR / "temp"))
@@ -28,9 +39,73 @@ TEMP_FILE_CLEANUP_MINUTES = int(
     os.getenv("TEMP_FILE_CLEANUP_MINUTES", 10)
 )  # Files kept for 10 minutes
 
+# Expired tasks and their outputs are evicted every EXPIRY_SWEEP_SECONDS; the full TEMP_DIR
+# scan for files no task owns runs every TEMP_DIR_SCAN_MINUTES
+EXPIRY_SWEEP_SECONDS = int(os.getenv("EXPIRY_SWEEP_SECONDS", 30))
+TEMP_DIR_SCAN_MINUTES = int(os.getenv("TEMP_DIR_SCAN_MINUTES", 30))
+
 # Create temp directory if it doesn't exist
 TEMP_DIR.mkdir(exist_ok=True)
 
+# Content-addressed cache of processing results, least recently used outputs go first (0 = off)
+RESULT_CACHE_DIR = TEMP_DIR / "cache"
+RESULT_CACHE_MAX_MB = int(os.getenv("RESULT_CACHE_MAX_MB", 512))
+# ffprobe results (streams, duration, keyframe index) kept per input file (0 = off)
+MEDIA_PROBE_CACHE_SIZE = int(os.getenv("MEDIA_PROBE_CACHE_SIZE", 256))
+# Intermediate files reused between requests (e.g. GIF palettes)
+ARTIFACT_CACHE_DIR = TEMP_DIR / "artifacts"
+# GIF palettes kept per (video, segment, width, fps), a few KB each (0 = off)
+GIF_PALETTE_CACHE_SIZE = int(os.getenv("GIF_PALETTE_CACHE_SIZE", 128))
+# Frames per second sampled for a GIF palette when sparse_palette is set
+GIF_PALETTE_SAMPLE_FPS = float(os.getenv("GIF_PALETTE_SAMPLE_FPS", 2))
+# Audio waveform peaks kept per (upload, peaks, zoom levels), a few KB each (0 = off)
+WAVEFORM_CACHE_SIZE = int(os.getenv("WAVEFORM_CACHE_SIZE", 256))
+# Sample rate audio is decoded at for waveform peaks (mono mix)
+WAVEFORM_SAMPLE_RATE = int(os.getenv("WAVEFORM_SAMPLE_RATE", 16000))
+
+# Executor pools for blocking work
+# Process pool: CPU-bound Pillow / PyMuPDF / cryptography calls (0 = run them in the thread pool)
+PROCESS_POOL_WORKERS = int(os.getenv("PROCESS_POOL_WORKERS", os.cpu_count() or 2))
+# Thread pool: subprocess-bound FFmpeg / Tesseract calls and blocking file I/O
+THREAD_POOL_WORKERS = int(os.getenv("THREAD_POOL_WORKERS", 8))
+# Threads one image job uses for independent decodes / encodes (collage tiles, srcset
+# variants), 1 = sequential
+IMAGE_JOB_THREADS = int(os.getenv("IMAGE_JOB_THREADS", min(4, os.cpu_count() or 2)))
+
+# Background task storage
+# "memory" keeps tasks in the worker process; "sqlite" shares them across workers and restarts
+TASK_STORE_BACKEND = os.getenv("TASK_STORE_BACKEND", "memory").lower()
+TASK_STORE_PATH = Path(os.getenv("TASK_STORE_PATH", BASE_DIR / "tasks.db"))
+TASK_STORE_POLL_INTERVAL = float(os.getenv("TASK_STORE_POLL_INTERVAL", 0.25))  # seconds
+TASK_TTL_MINUTES = int(os.getenv("TASK_TTL_MINUTES", 30))
+# sqlite backend: active tasks of a worker silent for this long (crashed or restarted) are failed
+TASK_WORKER_TIMEOUT = float(os.getenv("TASK_WORKER_TIMEOUT", EXPIRY_SWEEP_SECONDS * 3))
+# Progress events sent to SSE subscribers: at most one per interval unless percent moves by the delta
+TASK_PROGRESS_MIN_INTERVAL = float(os.getenv("TASK_PROGRESS_MIN_INTERVAL", 0.25))  # seconds
+TASK_PROGRESS_MIN_DELTA = float(os.getenv("TASK_PROGRESS_MIN_DELTA", 1.0))  # percent
+# Seconds a cancelled task's subprocess gets to exit after SIGTERM before it is killed
+TASK_CANCEL_KILL_TIMEOUT = float(os.getenv("TASK_CANCEL_KILL_TIMEOUT", 5))
+# With the sqlite backend, how often a worker looks for its tasks cancelled through another one
+TASK_CANCEL_POLL_INTERVAL = float(os.getenv("TASK_CANCEL_POLL_INTERVAL", 1.0))  # seconds
+
+# Background job scheduler: concurrent jobs per job type, extra jobs wait in a queue
+SCHEDULER_FFMPEG_SLOTS = int(os.getenv("SCHEDULER_FFMPEG_SLOTS", 2))
+SCHEDULER_OCR_SLOTS = int(os.getenv("SCHEDULER_OCR_SLOTS", os.cpu_count() or 2))
+# Segment encodes of chunked video jobs (shared by all chunked jobs, also the segments per job)
+SCHEDULER_SEGMENT_SLOTS = int(os.getenv("SCHEDULER_SEGMENT_SLOTS", os.cpu_count() or 2))
+# Chunked encoding is skipped for videos that would give segments shorter than this
+VIDEO_SEGMENT_MIN_SECONDS = float(os.getenv("VIDEO_SEGMENT_MIN_SECONDS", 10))
+# Target-size compression: share of the size budget kept for container overhead (percent)
+VIDEO_TARGET_SIZE_OVERHEAD = float(os.getenv("VIDEO_TARGET_SIZE_OVERHEAD", 3))
+# Target-size compression is refused when the video would get less than this (kbps)
+VIDEO_TARGET_SIZE_MIN_KBPS = int(os.getenv("VIDEO_TARGET_SIZE_MIN_KBPS", 100))
+# HLS/DASH output: target segment length in seconds (keyframes are forced on this grid)
+VIDEO_STREAMING_SEGMENT_SECONDS = int(os.getenv("VIDEO_STREAMING_SEGMENT_SECONDS", 4))
+# Batch audio conversion: files converted at once per batch (also bounded by the segment slots)
+AUDIO_BATCH_CONCURRENCY = int(os.getenv("AUDIO_BATCH_CONCURRENCY", os.cpu_count() or 2))
+# Batch audio conversion: most files a batch accepts (uploads plus zip members)
+AUDIO_BATCH_MAX_FILES = int(os.getenv("AUDIO_BATCH_MAX_FILES", 500))
+
 # API Configuration
 API_TITLE = os.getenv("API_TITLE", "AnyTools API")
 API_VERSION = os.getenv("API_VERSION", "1.0.0")
@@ -51,6 +126,24 @@ VIDEO_COMPRESSION_PRESETS = {
     "high": {"crf": 18, "preset": "slow"},
 }
 
+# Target-size compression: (minimum video kbps, output height), the first row the computed
+# bitrate reaches gives the height (videos are never upscaled)
+VIDEO_TARGET_SIZE_LADDER = [
+    (2500, 1080),
+    (1200, 720),
+    (600, 480),
+    (350, 360),
+    (0, 240),
+]
+
+# HLS/DASH rendition ladder: (height, video kbps), rows taller than the source are skipped
+VIDEO_STREAMING_LADDER = [
+    (1080, 5000),
+    (720, 2800),
+    (480, 1400),
+    (360, 800),
+]
+
 # Image compression quality
 IMAGE_COMPRESSION_QUALITY = {
     "low": 50,
@@ -8,7 +8,7 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
 import uvicorn
 
 from app.api import (
@@ -62,24 +62,58 @@ from app.config import (
     API_TITLE,
     API_VERSION,
     DEBUG,
+    EXPIRY_SWEEP_SECONDS,
     HOST,
     PORT,
+    TASK_STORE_BACKEND,
+    TASK_TTL_MINUTES,
     TEMP_DIR,
+    TEMP_DIR_SCAN_MINUTES,
 )
-from app.tasks import tasks_router
-from app.utils.file_handler import cleanup_temp_files
+from app.tasks import expiry_manager, scheduler, task_store, tasks_router
+from app.tasks.cancellation import cancellation_registry
+from app.utils.artifact_cache import palette_cache, waveform_cache
+from app.utils.capabilities import capabilities
+from app.utils.executors import get_executor_stats, run_blocking, shutdown_executors
+from app.utils.file_handler import (
+    STREAMING_DIR_SUFFIX,
+    RequestSizeLimitMiddleware,
+    cleanup_temp_files,
+    etag_matches,
+    get_file_etag,
+    get_upload_stats,
+)
+from app.utils.media_probe import media_probe
+from app.utils.result_cache import result_cache
 
 
 # Background task for periodic cleanup
 async def periodic_cleanup():
     """
-    Background task that runs every 5 minutes to clean up old temporary files
+    Background task that evicts expired tasks with their output files every
+    EXPIRY_SWEEP_SECONDS, and scans TEMP_DIR for other old files every TEMP_DIR_SCAN_MINUTES
+
+    Each sweep also marks this worker alive, fails tasks left behind by stopped workers and
+    drops stored tasks past their TTL that the expiry heap does not know (e.g. from before a
+    restart).
     """
+    sweeps_per_scan = max(1, (TEMP_DIR_SCAN_MINUTES * 60) // EXPIRY_SWEEP_SECONDS)
+    sweeps = 0
     while True:
-        await asyncio.sleep(300)  # Wait 5 minutes
+        await asyncio.sleep(EXPIRY_SWEEP_SECONDS)
+        sweeps += 1
         try:
-            cleanup_temp_files()
-            print("🧹 Periodic cleanup: Old temporary files removed")
+            task_store.heartbeat()
+            orphaned = task_store.fail_orphaned_tasks()
+            if orphaned:
+                print(f"🧹 Failed {orphaned} task(s) left behind by a stopped worker")
+            expired = expiry_manager.expire()
+            expired += task_store.cleanup_old_tasks()
+            if expired:
+                print(f"🧹 Expired {expired} task(s) and their files")
+            if sweeps % sweeps_per_scan == 0:
+                cleanup_temp_files()
+                print("🧹 Periodic cleanup: Old temporary files removed")
         except Exception as e:
             print(f"❌ Error during periodic cleanup: {e}")
 
@@ -93,20 +127,42 @@ async def lifespan(app: FastAPI):
     print("🚀 Starting AnyTools API...")
     cleanup_temp_files()
     print("✅ Temporary files cleaned up (files older than 10 minutes removed)")
+    result_cache.clear()  # Its index lives in memory, files from a previous run are orphans
+    # Tasks a previous run left pending or processing would keep their subscribers waiting
+    task_store.heartbeat()
+    orphaned = task_store.fail_orphaned_tasks()
+    if orphaned:
+        print(f"🧹 Failed {orphaned} task(s) interrupted by the last shutdown")
+    palette_cache.clear()
+    waveform_cache.clear()
+    await run_blocking(capabilities.refresh)
+    print(
+        f"🔎 Capabilities: {capabilities.ffmpeg_version or 'FFmpeg not found'}, "
+        f"H.264 encoder {capabilities.h264_encoder() or 'none'}, "
+        f"Tesseract languages {', '.join(capabilities.tesseract_languages) or 'none'}, "
+        f"Poppler {'found' if capabilities.poppler else 'not found'}"
+    )
 
     # Start background cleanup task
     cleanup_task = asyncio.create_task(periodic_cleanup())
-    print("🔄 Periodic cleanup task started (runs every 5 minutes)")
+    print(f"🔄 Periodic cleanup task started (runs every {EXPIRY_SWEEP_SECONDS} seconds)")
+
+    background_tasks = [cleanup_task]
+    if TASK_STORE_BACKEND == "sqlite":
+        # A cancel request can be served by another worker than the one running the task
+        background_tasks.append(asyncio.create_task(cancellation_registry.watch(task_store)))
 
     yield
 
-    # Shutdown: Cancel background task and clean up temp files
+    # Shutdown: Cancel background tasks and clean up temp files
     print("🛑 Shutting down AnyTools API...")
-    cleanup_task.cancel()
-    try:
-        await cleanup_task
-    except asyncio.CancelledError:
-        pass
+    for task in background_tasks:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    shutdown_executors(wait=False)
     cleanup_temp_files()
     print("✅ Cleanup completed")
 
@@ -121,6 +177,9 @@ app = FastAPI(
     redoc_url="/redoc",
 )
 
+# Abort oversized uploads before they are spooled to disk
+app.add_middleware(RequestSizeLimitMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -185,6 +244,15 @@ async def health_check():
             "palette-generator": "/api/v1/palette-generator",
             "gradient-generator": "/api/v1/gradient-generator",
         },
+        "executors": get_executor_stats(),
+        "scheduler": scheduler.stats(),
+        "expiry": expiry_manager.stats(),
+        "uploads": get_upload_stats(),
+        "result_cache": result_cache.stats(),
+        "media_probe_cache": media_probe.stats(),
+        "palette_cache": palette_cache.stats(),
+        "waveform_cache": waveform_cache.stats(),
+        "capabilities": capabilities.summary(),
     }
 
 
@@ -238,16 +306,37 @@ app.include_router(tasks_router, prefix="/api/v1")
 
 # Download endpoint for processed files
 @app.get("/api/v1/download/{filename:path}", tags=["Download"])
-async def download_file(filename: str):
+async def download_file(filename: str, request: Request):
     """
     Download a processed file from temporary storage
+
+    Supports byte ranges (Range, multi-range, If-Range) for resumable downloads and
+    conditional requests (If-None-Match) against a strong ETag of the file content
     """
     file_path = TEMP_DIR / filename
-    if not file_path.exists():
+    if not file_path.is_file() or not file_path.resolve().is_relative_to(TEMP_DIR.resolve()):
         return JSONResponse(
             status_code=404, content={"success": False, "message": "File not found"}
         )
-    return FileResponse(path=file_path, filename=filename, media_type="application/octet-stream")
+
+    etag = await run_blocking(get_file_etag, file_path)
+    headers = {"ETag": etag}
+
+    # HLS/DASH files are fetched by players: served inline, segments never change while they
+    # exist, playlists are revalidated against their ETag
+    parts = file_path.relative_to(TEMP_DIR).parts
+    streaming = len(parts) > 1 and parts[0].endswith(STREAMING_DIR_SUFFIX)
+    if streaming:
+        if file_path.suffix in (".m3u8", ".mpd"):
+            headers["Cache-Control"] = "no-cache"
+        else:
+            headers["Cache-Control"] = f"public, max-age={TASK_TTL_MINUTES * 60}, immutable"
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    # Media type is guessed from the extension; ranges and If-Range are handled by FileResponse
+    return FileResponse(path=file_path, filename=None if streaming else filename, headers=headers)
 
 
 # Global exception handler
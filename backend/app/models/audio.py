@@ -2,6 +2,8 @@
 Audio processing models
 """
 
+from typing import List, Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -15,6 +17,10 @@ class AudioProcessingResponse(BaseModel):
     original_size: int = 0
     processed_size: int = 0
     compression_ratio: float = 0.0
+    strategy: Optional[str] = Field(
+        default=None,
+        description="How a merge was produced: stream_copy, partial_reencode or reencode",
+    )
 
 
 class AudioConvertRequest(BaseModel):
@@ -34,3 +40,26 @@ class AudioMetadataResponse(BaseModel):
     message: str
     filename: str = ""
     metadata: dict = Field(default_factory=dict, description="Extracted audio metadata")
+
+
+class WaveformLevel(BaseModel):
+    """Peaks of one waveform zoom level"""
+
+    samples_per_peak: int
+    length: int
+    data: List[int] = Field(
+        default_factory=list, description="Interleaved min/max pairs, 8-bit (-128 to 127)"
+    )
+
+
+class AudioWaveformResponse(BaseModel):
+    """Response model for audio waveform peaks"""
+
+    success: bool
+    message: str
+    sample_rate: int = 0
+    duration: float = 0.0
+    bits: int = 8
+    levels: List[WaveformLevel] = Field(
+        default_factory=list, description="Zoom levels, finest first, each half the previous"
+    )
@@ -37,6 +37,32 @@ class ImageProcessingResponse(BaseModel):
     dimensions: Optional[dict] = None
 
 
+class ImageVariant(BaseModel):
+    """One width / format variant of a responsive image"""
+
+    filename: str = Field(..., description="File name inside the ZIP archive")
+    width: int
+    height: int
+    format: str = Field(..., description="Image format (jpg, webp, avif)")
+    size: int = Field(..., description="File size in bytes")
+
+
+class ResponsiveImageResponse(BaseModel):
+    """Response model for responsive image variant generation"""
+
+    success: bool
+    message: str
+    filename: str
+    download_url: Optional[str] = None
+    original_size: Optional[int] = None
+    processed_size: Optional[int] = None
+    dimensions: Optional[dict] = None
+    variants: list[ImageVariant] = Field(default_factory=list)
+    srcset: dict[str, str] = Field(
+        default_factory=dict, description="srcset attribute value per format"
+    )
+
+
 class ColorInfo(BaseModel):
     """Color information with hex value and ratio in the image"""
 
@@ -34,6 +34,28 @@ class VideoProcessingResponse(BaseModel):
     original_size: Optional[int] = None
     processed_size: Optional[int] = None
     compression_ratio: Optional[float] = None
+    strategy: Optional[str] = Field(
+        default=None,
+        description="How the output was produced: reencode, remux, rotation_metadata or stream_copy",
+    )
+
+
+class VideoThumbnailsResponse(BaseModel):
+    """Response model for thumbnail sprite sheets"""
+
+    success: bool
+    message: str
+    filename: Optional[str] = None
+    download_url: Optional[str] = None
+    vtt_filename: Optional[str] = None
+    vtt_download_url: Optional[str] = None
+    count: Optional[int] = None
+    columns: Optional[int] = None
+    rows: Optional[int] = None
+    thumbnail_width: Optional[int] = None
+    thumbnail_height: Optional[int] = None
+    original_size: Optional[int] = None
+    processed_size: Optional[int] = None
 
 
 class VideoToGifRequest(BaseModel):
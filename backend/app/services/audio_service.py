@@ -2,15 +2,375 @@
 Audio processing service using FFmpeg
 """
 
+from array import array
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import math
+import os
 from pathlib import Path
-from typing import Any
+import shutil
+import struct
+import subprocess
+from typing import Any, List, Optional, Tuple
+import zipfile
 
 import ffmpeg
 from mutagen import File as MutagenFile
 from mutagen.id3 import ID3NoHeaderError
+import numpy as np
+
+from app.config import AUDIO_BATCH_MAX_FILES, MAX_FILE_SIZE, WAVEFORM_SAMPLE_RATE
+from app.models.audio import (
+    AudioMetadataResponse,
+    AudioProcessingResponse,
+    AudioWaveformResponse,
+    WaveformLevel,
+)
+from app.utils.artifact_cache import waveform_cache
+from app.utils.file_handler import calculate_compression_ratio, get_file_size, get_known_hash
+from app.utils.media_probe import media_probe
+from app.utils.result_cache import ResultCache
+
+# Input file extensions accepted by the audio endpoints
+AUDIO_INPUT_EXTENSIONS = {
+    ".mp3",
+    ".wav",
+    ".flac",
+    ".ogg",
+    ".aac",
+    ".m4a",
+    ".wma",
+    ".opus",
+    ".mp4",  # Can contain audio
+    ".m4v",  # Can contain audio
+}
+
+# Audio codec per output format
+AUDIO_CODECS = {
+    "mp3": "libmp3lame",
+    "wav": "pcm_s16le",
+    "flac": "flac",
+    "ogg": "libvorbis",
+    "aac": "aac",
+    "m4a": "aac",
+}
+
+
+# Codec ffprobe reports for files a merge can join without re-encoding, per output format
+# (Vorbis and FLAC carry per-file headers the concat demuxer cannot splice)
+CONCAT_COPY_CODECS = {
+    "mp3": "mp3",
+    "wav": "pcm_s16le",
+    "aac": "aac",
+    "m4a": "aac",
+}
+
+# ffprobe format_name entry a copied input must have (ADTS .aac and MP4 .m4a cannot be mixed)
+CONCAT_COPY_CONTAINERS = {
+    "mp3": "mp3",
+    "wav": "wav",
+    "aac": "aac",
+    "m4a": "mp4",
+}
+
+# Lossy codecs whose inputs are only copied when their bit rate matches the requested one
+LOSSY_COPY_CODECS = {"mp3", "aac"}
+# Relative difference between an input's bit rate and the requested one still copied as-is
+COPY_BITRATE_TOLERANCE = 0.05
+
+# How merge_audio produced its output
+STRATEGY_STREAM_COPY = "stream_copy"  # Every input joined as-is
+STRATEGY_PARTIAL_REENCODE = "partial_reencode"  # Mismatched inputs re-encoded, then joined
+STRATEGY_REENCODE = "reencode"  # Concat filter, everything decoded and encoded again
+
+
+def audio_output_options(output_format: str, quality: str, bitrate: str) -> dict:
+    """FFmpeg output options of a convert or merge (output_format in AUDIO_CODECS)"""
+    output_format = output_format.lower()
+    output_kwargs = {"acodec": AUDIO_CODECS[output_format]}
+
+    # Set bitrate for lossy formats
+    if output_format in ["mp3", "ogg", "aac", "m4a"]:
+        output_kwargs["b:a"] = bitrate
+
+    # For WAV and FLAC, we can set sample rate based on quality
+    if output_format in ["wav", "flac"]:
+        quality_sample_rates = {
+            "low": "22050",
+            "medium": "44100",
+            "high": "48000",
+        }
+        output_kwargs["ar"] = quality_sample_rates.get(quality, "44100")
+
+    # For MP3, adjust quality based on preset
+    if output_format == "mp3":
+        quality_presets = {
+            "low": "7",  # Lower quality, smaller file
+            "medium": "4",  # Medium quality
+            "high": "0",  # High quality, larger file
+        }
+        output_kwargs["q:a"] = quality_presets.get(quality, "4")
+
+    return output_kwargs
+
+
+def build_convert_output(
+    input_path: Path, output_path: Path, output_format: str, quality: str, bitrate: str
+):
+    """FFmpeg graph converting an audio file"""
+    stream = ffmpeg.input(str(input_path))
+    return ffmpeg.output(
+        stream, str(output_path), **audio_output_options(output_format, quality, bitrate)
+    )
+
+
+def compressed_audio_format(input_path: Path) -> str:
+    """
+    Output format of a compression: lossless inputs (WAV, FLAC) become MP3,
+    lossy ones keep their format at a lower bitrate
+    """
+    input_ext = input_path.suffix.lower()
+    if input_ext == ".ogg":
+        return "ogg"
+    if input_ext in [".aac", ".m4a"]:
+        return "aac"
+    # WAV, FLAC, MP3 and unknown formats
+    return "mp3"
+
+
+def build_compress_output(
+    input_path: Path, output_path: Path, quality: str, target_bitrate: str
+) -> Tuple[Any, str]:
+    """
+    FFmpeg graph compressing an audio file
+
+    Returns:
+        (output graph, bitrate used)
+    """
+    output_format = compressed_audio_format(input_path)
+    stream = ffmpeg.input(str(input_path))
+
+    # Build output options for compression
+    output_kwargs = {"acodec": AUDIO_CODECS[output_format]}
+
+    # Set bitrate based on quality preset if target_bitrate not explicitly set
+    quality_bitrates = {
+        "low": "96k",
+        "medium": "128k",
+        "high": "192k",
+    }
+
+    # Use target_bitrate if provided, otherwise use quality preset
+    final_bitrate = target_bitrate if target_bitrate else quality_bitrates.get(quality, "128k")
+    output_kwargs["b:a"] = final_bitrate
+
+    # For MP3, adjust quality preset for better compression
+    if output_format == "mp3":
+        quality_presets = {
+            "low": "7",  # Lower quality, smaller file
+            "medium": "5",  # Medium quality
+            "high": "3",  # Higher quality
+        }
+        output_kwargs["q:a"] = quality_presets.get(quality, "5")
+
+    return ffmpeg.output(stream, str(output_path), **output_kwargs), final_bitrate
+
 
-from app.models.audio import AudioMetadataResponse, AudioProcessingResponse
-from app.utils.file_handler import calculate_compression_ratio, get_file_size
+def build_merge_output(
+    input_paths: list[Path], output_path: Path, output_format: str, quality: str, bitrate: str
+):
+    """FFmpeg graph concatenating audio files (concat filter, inputs may differ in codec)"""
+    # Use concat filter instead of concat demuxer for better compatibility
+    # This method works even when files have different codecs/sample rates
+    # The filter normalizes all inputs before concatenating
+    input_streams = [ffmpeg.input(str(path)) for path in input_paths]
+
+    # Extract audio streams (in case some files have video tracks)
+    # Use ['a'] to get the first audio stream from each input
+    audio_streams = [stream["a"] for stream in input_streams]
+
+    # n=number of inputs, v=0 (no video), a=1 (audio only)
+    merged_stream = ffmpeg.filter(audio_streams, "concat", n=len(input_paths), v=0, a=1)
+
+    return ffmpeg.output(
+        merged_stream, str(output_path), **audio_output_options(output_format, quality, bitrate)
+    )
+
+
+def parse_bitrate(value: Optional[str]) -> Optional[int]:
+    """Bits per second of an FFmpeg bit rate such as "192k" or "1M" (None if not a bit rate)"""
+    if not value:
+        return None
+    value = str(value).strip().lower()
+    multiplier = {"k": 1000, "m": 1000_000}.get(value[-1:], 1)
+    try:
+        return int(float(value.rstrip("km")) * multiplier)
+    except ValueError:
+        return None
+
+
+def _audio_signature(path: Path) -> Optional[tuple]:
+    """
+    (codec, sample rate, channels, container names, bit rate) of a file's first audio stream
+
+    Returns:
+        Signature tuple (bit rate in bps or None), None if the file cannot be probed
+    """
+    info = media_probe.get(path)
+    stream = (
+        next((s for s in info.streams if s.get("codec_type") == "audio"), None) if info else None
+    )
+    if stream is None:
+        return None
+    containers = tuple(info.probe.get("format", {}).get("format_name", "").split(","))
+    return (
+        stream.get("codec_name"),
+        stream.get("sample_rate"),
+        stream.get("channels"),
+        containers,
+        parse_bitrate(stream.get("bit_rate") or info.probe.get("format", {}).get("bit_rate")),
+    )
+
+
+def plan_merge(
+    input_paths: List[Path], output_format: str, quality: str, bitrate: Optional[str] = None
+) -> Tuple[str, Optional[tuple], List[int]]:
+    """
+    Choose how to merge audio files
+
+    Inputs already in the output codec and container (and, for lossy codecs, at the requested
+    bit rate) that share the most common (sample rate, channels) are joined as-is by the
+    concat demuxer, the others are re-encoded to match them first.
+
+    Args:
+        input_paths: Input files (in order)
+        output_format: Output audio format
+        quality: Output quality preset (sets the sample rate of WAV output)
+        bitrate: Requested bit rate (lossy inputs at another bit rate are re-encoded)
+
+    Returns:
+        (strategy, reference (codec, sample rate, channels), indexes of the inputs to re-encode)
+    """
+    output_format = output_format.lower()
+    copy_codec = CONCAT_COPY_CODECS.get(output_format)
+    if copy_codec is None:
+        return STRATEGY_REENCODE, None, list(range(len(input_paths)))
+
+    options = audio_output_options(output_format, quality, bitrate or "")
+    # WAV output takes its sample rate from the quality preset
+    required_rate = options.get("ar")
+    required_bitrate = (
+        parse_bitrate(options.get("b:a")) if copy_codec in LOSSY_COPY_CODECS else None
+    )
+
+    def copyable(sig: Optional[tuple]) -> bool:
+        if sig is None or sig[0] != copy_codec:
+            return False
+        if CONCAT_COPY_CONTAINERS[output_format] not in sig[3]:
+            return False
+        if required_rate and str(sig[1]) != required_rate:
+            return False
+        if required_bitrate:
+            return (
+                sig[4] is not None
+                and abs(sig[4] - required_bitrate) <= required_bitrate * COPY_BITRATE_TOLERANCE
+            )
+        return True
+
+    signatures = [_audio_signature(path) for path in input_paths]
+    keys = [sig[:3] if copyable(sig) else None for sig in signatures]
+    candidates = [key for key in keys if key is not None]
+    if not candidates:
+        return STRATEGY_REENCODE, None, list(range(len(input_paths)))
+
+    reference = Counter(candidates).most_common(1)[0][0]
+    mismatched = [i for i, key in enumerate(keys) if key != reference]
+    if not mismatched:
+        return STRATEGY_STREAM_COPY, reference, []
+    return STRATEGY_PARTIAL_REENCODE, reference, mismatched
+
+
+def build_merge_part_output(
+    input_path: Path,
+    output_path: Path,
+    output_format: str,
+    quality: str,
+    bitrate: str,
+    reference: tuple,
+):
+    """FFmpeg graph re-encoding one merge input to the codec parameters of the others"""
+    _, sample_rate, channels = reference
+    options = audio_output_options(output_format, quality, bitrate)
+    options.update({"ar": str(sample_rate), "ac": channels})
+    return ffmpeg.output(ffmpeg.input(str(input_path))["a"], str(output_path), **options)
+
+
+def write_concat_list(paths: List[Path], list_path: Path):
+    """Write an FFmpeg concat demuxer list (absolute paths, single quotes escaped)"""
+    with open(list_path, "w") as f:
+        for path in paths:
+            escaped_path = str(path.resolve()).replace("'", "'\\''")
+            f.write(f"file '{escaped_path}'\n")
+
+
+def build_concat_copy_output(list_path: Path, output_path: Path):
+    """FFmpeg graph joining the files of a concat list without re-encoding"""
+    stream = ffmpeg.input(str(list_path), format="concat", safe=0)
+    return ffmpeg.output(stream["a"], str(output_path), acodec="copy")
+
+
+def collect_batch_inputs(uploads: List[Tuple[str, Path]], work_dir: Path) -> List[Tuple[str, Path]]:
+    """
+    Inputs of a batch conversion, with the audio files of zip uploads extracted to work_dir
+
+    Zip members keep their base name only (no directories are created from the archive),
+    other members are skipped.
+
+    Args:
+        uploads: (original filename, saved path) of each upload, zips included
+        work_dir: Directory zip members are extracted to
+
+    Returns:
+        (display name, path) of each audio file, in upload then archive order
+
+    Raises:
+        ValueError: A zip is unreadable, the batch is too large or a member is over the upload
+            size limit
+    """
+    inputs = []
+    for filename, path in uploads:
+        if Path(filename).suffix.lower() != ".zip":
+            inputs.append((filename, path))
+            continue
+
+        try:
+            archive = zipfile.ZipFile(path)
+        except zipfile.BadZipFile:
+            raise ValueError(f"Not a valid zip archive: {filename}")
+
+        with archive:
+            for member in archive.infolist():
+                name = Path(member.filename).name
+                if member.is_dir() or Path(name).suffix.lower() not in AUDIO_INPUT_EXTENSIONS:
+                    continue
+                if len(inputs) >= AUDIO_BATCH_MAX_FILES:
+                    raise ValueError(f"A batch accepts at most {AUDIO_BATCH_MAX_FILES} files")
+
+                work_dir.mkdir(parents=True, exist_ok=True)
+                target = work_dir / f"{len(inputs):04d}{Path(name).suffix.lower()}"
+                with archive.open(member) as source, open(target, "wb") as f:
+                    # The declared size can lie, count what is actually decompressed
+                    copied = 0
+                    while chunk := source.read(1024 * 1024):
+                        copied += len(chunk)
+                        if copied > MAX_FILE_SIZE:
+                            raise ValueError(f"{name} in {filename} exceeds the upload size limit")
+                        f.write(chunk)
+                inputs.append((name, target))
+
+    if len(inputs) > AUDIO_BATCH_MAX_FILES:
+        raise ValueError(f"A batch accepts at most {AUDIO_BATCH_MAX_FILES} files")
+    return inputs
 
 
 def convert_audio(
@@ -36,55 +396,15 @@ def convert_audio(
     try:
         original_size = get_file_size(input_path)
 
-        # Map codecs per format
-        codec_map = {
-            "mp3": "libmp3lame",
-            "wav": "pcm_s16le",
-            "flac": "flac",
-            "ogg": "libvorbis",
-            "aac": "aac",
-            "m4a": "aac",
-        }
-
-        codec = codec_map.get(output_format.lower())
-        if codec is None:
+        if output_format.lower() not in AUDIO_CODECS:
             return AudioProcessingResponse(
                 success=False,
                 message=f"Unsupported output audio format: {output_format}",
                 filename=output_path.name if output_path else None,
             )
 
-        # Build FFmpeg input
-        stream = ffmpeg.input(str(input_path))
-
-        # Build output options
-        output_kwargs = {"acodec": codec}
-
-        # Set bitrate for lossy formats
-        if output_format.lower() in ["mp3", "ogg", "aac", "m4a"]:
-            output_kwargs["b:a"] = bitrate
-
-        # For WAV and FLAC, we can set sample rate based on quality
-        if output_format.lower() in ["wav", "flac"]:
-            quality_sample_rates = {
-                "low": "22050",
-                "medium": "44100",
-                "high": "48000",
-            }
-            sample_rate = quality_sample_rates.get(quality, "44100")
-            output_kwargs["ar"] = sample_rate
-
-        # For MP3, adjust quality based on preset
-        if output_format.lower() == "mp3":
-            quality_presets = {
-                "low": "7",  # Lower quality, smaller file
-                "medium": "4",  # Medium quality
-                "high": "0",  # High quality, larger file
-            }
-            output_kwargs["q:a"] = quality_presets.get(quality, "4")
-
         # Run FFmpeg conversion
-        stream = ffmpeg.output(stream, str(output_path), **output_kwargs)
+        stream = build_convert_output(input_path, output_path, output_format, quality, bitrate)
         ffmpeg.run(stream, overwrite_output=True, capture_stdout=True, capture_stderr=True)
 
         # Get converted file size
@@ -138,57 +458,10 @@ def compress_audio(
     try:
         original_size = get_file_size(input_path)
 
-        # Detect input format
-        input_ext = input_path.suffix.lower()
-
-        # Determine output format based on input
-        # For lossless formats (WAV, FLAC), convert to MP3 for compression
-        # For lossy formats, keep the same format but reduce bitrate
-        if input_ext in [".wav", ".flac"]:
-            output_format = "mp3"
-            codec = "libmp3lame"
-        elif input_ext in [".mp3"]:
-            output_format = "mp3"
-            codec = "libmp3lame"
-        elif input_ext in [".ogg"]:
-            output_format = "ogg"
-            codec = "libvorbis"
-        elif input_ext in [".aac", ".m4a"]:
-            output_format = "aac"
-            codec = "aac"
-        else:
-            # Default to MP3 for unknown formats
-            output_format = "mp3"
-            codec = "libmp3lame"
-
-        # Build FFmpeg input
-        stream = ffmpeg.input(str(input_path))
-
-        # Build output options for compression
-        output_kwargs = {"acodec": codec}
-
-        # Set bitrate based on quality preset if target_bitrate not explicitly set
-        quality_bitrates = {
-            "low": "96k",
-            "medium": "128k",
-            "high": "192k",
-        }
-
-        # Use target_bitrate if provided, otherwise use quality preset
-        final_bitrate = target_bitrate if target_bitrate else quality_bitrates.get(quality, "128k")
-        output_kwargs["b:a"] = final_bitrate
-
-        # For MP3, adjust quality preset for better compression
-        if output_format == "mp3":
-            quality_presets = {
-                "low": "7",  # Lower quality, smaller file
-                "medium": "5",  # Medium quality
-                "high": "3",  # Higher quality
-            }
-            output_kwargs["q:a"] = quality_presets.get(quality, "5")
-
         # Run FFmpeg compression
-        stream = ffmpeg.output(stream, str(output_path), **output_kwargs)
+        stream, final_bitrate = build_compress_output(
+            input_path, output_path, quality, target_bitrate
+        )
         ffmpeg.run(stream, overwrite_output=True, capture_stdout=True, capture_stderr=True)
 
         # Get compressed file size
@@ -229,7 +502,11 @@ def merge_audio(
     bitrate: str = "192k",
 ) -> AudioProcessingResponse:
     """
-    Merge multiple audio files into one using FFmpeg concat demuxer
+    Merge multiple audio files into one
+
+    Inputs sharing the output codec, sample rate and channels are joined without re-encoding
+    (concat demuxer). Mismatched inputs are re-encoded in parallel to match the others first,
+    and the concat filter re-encodes everything when no input can be copied.
 
     Args:
         input_paths: List of paths to input audio files (in order)
@@ -252,68 +529,52 @@ def merge_audio(
         # Calculate total original size
         total_original_size = sum(get_file_size(path) for path in input_paths)
 
-        # Map codecs per format
-        codec_map = {
-            "mp3": "libmp3lame",
-            "wav": "pcm_s16le",
-            "flac": "flac",
-            "ogg": "libvorbis",
-            "aac": "aac",
-            "m4a": "aac",
-        }
-
-        codec = codec_map.get(output_format.lower())
-        if codec is None:
+        if output_format.lower() not in AUDIO_CODECS:
             return AudioProcessingResponse(
                 success=False,
                 message=f"Unsupported output audio format: {output_format}",
                 filename=output_path.name if output_path else None,
             )
 
-        # Use concat filter instead of concat demuxer for better compatibility
-        # This method works even when files have different codecs/sample rates
-        # The filter normalizes all inputs before concatenating
-        # Create input streams for all audio files
-        input_streams = [ffmpeg.input(str(path)) for path in input_paths]
-
-        # Extract audio streams (in case some files have video tracks)
-        # Use ['a'] to get the first audio stream from each input
-        audio_streams = [stream["a"] for stream in input_streams]
-
-        # Use concat filter to merge audio streams
-        # The concat filter requires all streams to be passed as a list
-        # n=number of inputs, v=0 (no video), a=1 (audio only)
-        # This syntax is similar to how paletteuse filter works in video_service.py
-        merged_stream = ffmpeg.filter(audio_streams, "concat", n=len(input_paths), v=0, a=1)
-
-        # Build output options
-        output_kwargs = {"acodec": codec}
-
-        # Set bitrate for lossy formats
-        if output_format.lower() in ["mp3", "ogg", "aac", "m4a"]:
-            output_kwargs["b:a"] = bitrate
-
-        # For WAV and FLAC, set sample rate based on quality
-        if output_format.lower() in ["wav", "flac"]:
-            quality_sample_rates = {
-                "low": "22050",
-                "medium": "44100",
-                "high": "48000",
-            }
-            sample_rate = quality_sample_rates.get(quality, "44100")
-            output_kwargs["ar"] = sample_rate
-
-        # For MP3, adjust quality based on preset
-        if output_format.lower() == "mp3":
-            quality_presets = {
-                "low": "7",
-                "medium": "4",
-                "high": "0",
-            }
-            output_kwargs["q:a"] = quality_presets.get(quality, "4")
-
-        stream = ffmpeg.output(merged_stream, str(output_path), **output_kwargs)
-        ffmpeg.run(stream, overwrite_output=True, capture_stdout=True, capture_stderr=True)
+        strategy, reference, mismatched = plan_merge(input_paths, output_format, quality, bitrate)
+
+        if strategy == STRATEGY_REENCODE:
+            stream = build_merge_output(input_paths, output_path, output_format, quality, bitrate)
+            ffmpeg.run(stream, overwrite_output=True, capture_stdout=True, capture_stderr=True)
+        else:
+            work_dir = output_path.parent / f"merge_{output_path.stem}"
+            work_dir.mkdir(exist_ok=True)
+            try:
+                parts = list(input_paths)
+                streams = []
+                for index in mismatched:
+                    parts[index] = work_dir / f"part_{index:03d}{output_path.suffix}"
+                    streams.append(
+                        build_merge_part_output(
+                            input_paths[index],
+                            parts[index],
+                            output_format,
+                            quality,
+                            bitrate,
+                            reference,
+                        )
+                    )
+
+                def encode(stream):
+                    ffmpeg.run(
+                        stream, overwrite_output=True, capture_stdout=True, capture_stderr=True
+                    )
+
+                if streams:
+                    workers = min(len(streams), os.cpu_count() or 2)
+                    with ThreadPoolExecutor(max_workers=workers) as pool:
+                        list(pool.map(encode, streams))
+
+                list_path = work_dir / "inputs.txt"
+                write_concat_list(parts, list_path)
+                encode(build_concat_copy_output(list_path, output_path))
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
 
         # Get merged file size
         merged_size = get_file_size(output_path)
@@ -327,6 +588,7 @@ def merge_audio(
             original_size=total_original_size,
             processed_size=merged_size,
             compression_ratio=compression_ratio,
+            strategy=strategy,
         )
 
     except ffmpeg.Error as e:
@@ -365,7 +627,8 @@ def extract_audio_metadata(input_path: Path) -> AudioMetadataResponse:
 
         # Use ffprobe to get technical information
         try:
-            probe = ffmpeg.probe(str(input_path))
+            info = media_probe.get(input_path)
+            probe = info.probe if info else {}
             audio_stream = next(
                 (
                     stream
@@ -517,6 +780,215 @@ def extract_audio_metadata(input_path: Path) -> AudioMetadataResponse:
         )
 
 
+# Waveform peaks: finest level size and number of zoom levels accepted
+MAX_WAVEFORM_PEAKS = 16384
+MAX_WAVEFORM_ZOOM_LEVELS = 8
+
+# Binary waveform format, little-endian: header, then per level a (samples per peak, length)
+# header followed by length interleaved int8 min/max pairs
+WAVEFORM_MAGIC = b"WAVP"
+_WAVEFORM_HEADER = struct.Struct("<4sBBHIf")  # magic, version, bits, levels, sample rate, duration
+_WAVEFORM_LEVEL = struct.Struct("<II")
+
+# Bytes of PCM read from FFmpeg at a time (bounds memory whatever the file length)
+_WAVEFORM_READ_SIZE = 1024 * 1024
+
+
+def check_waveform_params(peaks: int, zoom_levels: int) -> Optional[str]:
+    """Error message for out of range waveform options, None if they are valid"""
+    if not 16 <= peaks <= MAX_WAVEFORM_PEAKS:
+        return f"peaks must be between 16 and {MAX_WAVEFORM_PEAKS}"
+    if not 1 <= zoom_levels <= MAX_WAVEFORM_ZOOM_LEVELS:
+        return f"zoom_levels must be between 1 and {MAX_WAVEFORM_ZOOM_LEVELS}"
+    return None
+
+
+def bucket_peaks(samples: bytes, samples_per_peak: int) -> Tuple[List[int], List[int]]:
+    """
+    Min and max of each bucket of 16-bit PCM samples, scaled to 8 bits
+
+    Args:
+        samples: Signed 16-bit little-endian mono samples (the last bucket may be partial)
+        samples_per_peak: Samples per bucket
+
+    Returns:
+        (minimums, maximums), one value per bucket
+    """
+    data = np.frombuffer(samples, dtype="<i2")
+    full = len(data) // samples_per_peak * samples_per_peak
+    buckets = data[:full].reshape(-1, samples_per_peak)
+    mins = (buckets.min(axis=1) >> 8).tolist()
+    maxs = (buckets.max(axis=1) >> 8).tolist()
+    if full < len(data):
+        mins.append(int(data[full:].min()) >> 8)
+        maxs.append(int(data[full:].max()) >> 8)
+    return mins, maxs
+
+
+def read_waveform_peaks(
+    input_path: Path, samples_per_peak: int, sample_rate: int = WAVEFORM_SAMPLE_RATE
+) -> Tuple[List[int], List[int]]:
+    """
+    Decode the first audio stream to mono PCM through a pipe and reduce it to peaks
+
+    PCM is read in fixed-size chunks cut on bucket boundaries, so memory use does not depend
+    on the length of the file.
+
+    Raises:
+        RuntimeError: FFmpeg could not decode the file
+    """
+    cmd = ["ffmpeg", "-v", "error", "-nostdin", "-i", str(input_path), "-map", "0:a:0"]
+    cmd.extend(["-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "pipe:1"])
+    chunk_size = max(1, _WAVEFORM_READ_SIZE // (samples_per_peak * 2)) * samples_per_peak * 2
+
+    mins: List[int] = []
+    maxs: List[int] = []
+    pending = b""
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while chunk := process.stdout.read(chunk_size):
+            pending += chunk
+            usable = len(pending) - len(pending) % (samples_per_peak * 2)
+            if usable:
+                chunk_mins, chunk_maxs = bucket_peaks(pending[:usable], samples_per_peak)
+                mins.extend(chunk_mins)
+                maxs.extend(chunk_maxs)
+                pending = pending[usable:]
+        stderr = process.stderr.read()
+    finally:
+        process.stdout.close()
+        process.stderr.close()
+        returncode = process.wait()
+
+    if returncode != 0:
+        raise RuntimeError(stderr.decode(errors="replace") or "FFmpeg error")
+    # Trailing partial bucket (an odd byte would be half a sample)
+    pending = pending[: len(pending) // 2 * 2]
+    if pending:
+        chunk_mins, chunk_maxs = bucket_peaks(pending, samples_per_peak)
+        mins.extend(chunk_mins)
+        maxs.extend(chunk_maxs)
+    return mins, maxs
+
+
+def build_peak_levels(
+    mins: List[int], maxs: List[int], samples_per_peak: int, zoom_levels: int
+) -> List[WaveformLevel]:
+    """Zoom levels from the finest peaks, each merging pairs of the previous level"""
+    levels = []
+    for _ in range(zoom_levels):
+        data = [value for pair in zip(mins, maxs) for value in pair]
+        levels.append(WaveformLevel(samples_per_peak=samples_per_peak, length=len(mins), data=data))
+        if len(mins) <= 1:
+            break
+        mins = [min(mins[i : i + 2]) for i in range(0, len(mins), 2)]
+        maxs = [max(maxs[i : i + 2]) for i in range(0, len(maxs), 2)]
+        samples_per_peak *= 2
+    return levels
+
+
+def encode_waveform(result: AudioWaveformResponse) -> bytes:
+    """Binary form of waveform peaks (see WAVEFORM_MAGIC)"""
+    parts = [
+        _WAVEFORM_HEADER.pack(
+            WAVEFORM_MAGIC, 1, result.bits, len(result.levels), result.sample_rate, result.duration
+        )
+    ]
+    for level in result.levels:
+        parts.append(_WAVEFORM_LEVEL.pack(level.samples_per_peak, level.length))
+        parts.append(array("b", level.data).tobytes())
+    return b"".join(parts)
+
+
+def decode_waveform(content: bytes) -> AudioWaveformResponse:
+    """Waveform peaks from their binary form"""
+    magic, _, bits, level_count, sample_rate, duration = _WAVEFORM_HEADER.unpack_from(content)
+    if magic != WAVEFORM_MAGIC:
+        raise ValueError("Not a waveform peaks file")
+
+    offset = _WAVEFORM_HEADER.size
+    levels = []
+    for _ in range(level_count):
+        samples_per_peak, length = _WAVEFORM_LEVEL.unpack_from(content, offset)
+        offset += _WAVEFORM_LEVEL.size
+        data = array("b", content[offset : offset + length * 2]).tolist()
+        offset += length * 2
+        levels.append(WaveformLevel(samples_per_peak=samples_per_peak, length=length, data=data))
+
+    return AudioWaveformResponse(
+        success=True,
+        message="Waveform peaks extracted successfully",
+        sample_rate=sample_rate,
+        duration=round(duration, 3),
+        bits=bits,
+        levels=levels,
+    )
+
+
+def extract_waveform(
+    input_path: Path, peaks: int = 2048, zoom_levels: int = 4
+) -> AudioWaveformResponse:
+    """
+    Extract min/max waveform peaks of an audio file at several zoom levels
+
+    Results are cached per upload content, so a player asking again skips the decode.
+
+    Args:
+        input_path: Path to the audio file
+        peaks: Number of peaks of the finest zoom level
+        zoom_levels: Number of levels, each with half the peaks of the previous one
+
+    Returns:
+        AudioWaveformResponse with the peaks, finest level first
+    """
+    error = check_waveform_params(peaks, zoom_levels)
+    if error:
+        return AudioWaveformResponse(success=False, message=error)
+
+    input_hash = get_known_hash(input_path)
+    cache_key = None
+    if input_hash is not None:
+        cache_key = ResultCache.make_key(
+            input_hash,
+            "audio.waveform",
+            {"peaks": peaks, "zoom_levels": zoom_levels, "sample_rate": WAVEFORM_SAMPLE_RATE},
+        )
+    peaks_path = input_path.with_name(f"{input_path.stem}_peaks.bin")
+
+    try:
+        if waveform_cache.get(cache_key, peaks_path):
+            return decode_waveform(peaks_path.read_bytes())
+
+        info = media_probe.get(input_path)
+        if info is None or not info.has_audio or not info.duration:
+            return AudioWaveformResponse(
+                success=False, message="Could not read an audio stream and its duration"
+            )
+
+        samples_per_peak = max(1, math.ceil(info.duration * WAVEFORM_SAMPLE_RATE / peaks))
+        mins, maxs = read_waveform_peaks(input_path, samples_per_peak)
+        if not mins:
+            return AudioWaveformResponse(success=False, message="No audio samples decoded")
+
+        result = AudioWaveformResponse(
+            success=True,
+            message="Waveform peaks extracted successfully",
+            sample_rate=WAVEFORM_SAMPLE_RATE,
+            duration=round(info.duration, 3),
+            levels=build_peak_levels(mins, maxs, samples_per_peak, zoom_levels),
+        )
+
+        peaks_path.write_bytes(encode_waveform(result))
+        waveform_cache.put(cache_key, peaks_path)
+        return result
+
+    except Exception as e:
+        return AudioWaveformResponse(success=False, message=f"Error extracting waveform: {str(e)}")
+
+    finally:
+        peaks_path.unlink(missing_ok=True)
+
+
 def format_duration(seconds: float) -> str:
     """
     Format duration in seconds to human-readable string (MM:SS or HH:MM:SS)
@@ -0,0 +1,405 @@
+"""
+Async audio processing service with progress tracking
+Runs the same FFmpeg graphs as audio_service, reporting -progress output to the task
+"""
+
+import asyncio
+from pathlib import Path
+import shutil
+from typing import List, Optional, Tuple
+import zipfile
+
+from app.config import AUDIO_BATCH_CONCURRENCY
+from app.services.audio_service import (
+    AUDIO_CODECS,
+    STRATEGY_REENCODE,
+    build_compress_output,
+    build_concat_copy_output,
+    build_convert_output,
+    build_merge_output,
+    build_merge_part_output,
+    collect_batch_inputs,
+    plan_merge,
+    write_concat_list,
+)
+from app.tasks.cancellation import cancellation_registry
+from app.tasks.models import TaskResult
+from app.tasks.scheduler import SEGMENT_JOB, scheduler
+from app.tasks.store import task_store
+from app.utils.executors import run_blocking
+from app.utils.ffmpeg_progress import run_ffmpeg_graph
+from app.utils.file_handler import calculate_compression_ratio, get_file_size
+from app.utils.media_probe import media_probe
+
+
+def get_audio_duration(input_path: Path) -> Optional[float]:
+    """Get audio duration in seconds (cached ffprobe result)"""
+    info = media_probe.get(input_path)
+    return info.duration if info else None
+
+
+def _complete(
+    task_id: str,
+    output_path: Path,
+    original_size: int,
+    message: str,
+    strategy: Optional[str] = None,
+) -> TaskResult:
+    """Mark the task completed with the output's size and compression ratio"""
+    processed_size = get_file_size(output_path)
+    result = TaskResult(
+        success=True,
+        download_url=f"/api/v1/download/{output_path.name}",
+        filename=output_path.name,
+        original_size=original_size,
+        processed_size=processed_size,
+        compression_ratio=calculate_compression_ratio(original_size, processed_size),
+        message=message,
+        strategy=strategy,
+    )
+    task_store.complete_task(task_id, result)
+    return result
+
+
+async def convert_audio_with_progress(
+    task_id: str,
+    input_path: Path,
+    output_path: Path,
+    output_format: str = "mp3",
+    quality: str = "medium",
+    bitrate: str = "192k",
+) -> TaskResult:
+    """Convert an audio file to a different format with real-time progress updates"""
+    try:
+        if output_format.lower() not in AUDIO_CODECS:
+            error_msg = f"Unsupported output audio format: {output_format}"
+            task_store.fail_task(task_id, error_msg)
+            return TaskResult(success=False, error=error_msg)
+
+        cancellation_registry.register_output(task_id, output_path)
+        task_store.update_progress(task_id, 0, "Analyzing audio...", "analyzing")
+
+        original_size = get_file_size(input_path)
+        duration = await run_blocking(get_audio_duration, input_path)
+
+        task_store.update_progress(task_id, 5, "Starting conversion...", "encoding")
+
+        stream = build_convert_output(input_path, output_path, output_format, quality, bitrate)
+        error_msg = await run_ffmpeg_graph(task_id, stream, duration, "Converting")
+        if error_msg:
+            task_store.fail_task(task_id, error_msg[:500])
+            return TaskResult(success=False, error=error_msg[:500])
+
+        return _complete(
+            task_id,
+            output_path,
+            original_size,
+            f"Audio converted to {output_format.upper()} successfully",
+        )
+
+    except asyncio.CancelledError:
+        task_store.cancel_task(task_id)
+        raise
+    except Exception as e:
+        error_msg = str(e)[:500]
+        task_store.fail_task(task_id, error_msg)
+        return TaskResult(success=False, error=error_msg)
+
+
+async def compress_audio_with_progress(
+    task_id: str,
+    input_path: Path,
+    output_path: Path,
+    quality: str = "medium",
+    target_bitrate: str = "128k",
+) -> TaskResult:
+    """Compress an audio file with real-time progress updates"""
+    try:
+        cancellation_registry.register_output(task_id, output_path)
+        task_store.update_progress(task_id, 0, "Analyzing audio...", "analyzing")
+
+        original_size = get_file_size(input_path)
+        duration = await run_blocking(get_audio_duration, input_path)
+
+        task_store.update_progress(task_id, 5, "Starting compression...", "encoding")
+
+        stream, final_bitrate = build_compress_output(
+            input_path, output_path, quality, target_bitrate
+        )
+        error_msg = await run_ffmpeg_graph(task_id, stream, duration, "Compressing")
+        if error_msg:
+            task_store.fail_task(task_id, error_msg[:500])
+            return TaskResult(success=False, error=error_msg[:500])
+
+        return _complete(
+            task_id,
+            output_path,
+            original_size,
+            f"Audio compressed successfully (bitrate: {final_bitrate})",
+        )
+
+    except asyncio.CancelledError:
+        task_store.cancel_task(task_id)
+        raise
+    except Exception as e:
+        error_msg = str(e)[:500]
+        task_store.fail_task(task_id, error_msg)
+        return TaskResult(success=False, error=error_msg)
+
+
+async def _merge_by_copy(
+    task_id: str,
+    input_paths: list[Path],
+    output_path: Path,
+    output_format: str,
+    quality: str,
+    bitrate: str,
+    reference: tuple,
+    mismatched: list[int],
+    durations: list[Optional[float]],
+) -> Optional[str]:
+    """
+    Re-encode the mismatched inputs in parallel, then join all parts without re-encoding
+
+    Returns:
+        Error message on failure, None on success
+    """
+    work_dir = output_path.parent / f"merge_{output_path.stem}"
+    work_dir.mkdir(exist_ok=True)
+    try:
+        parts = list(input_paths)
+        for index in mismatched:
+            parts[index] = work_dir / f"part_{index:03d}{output_path.suffix}"
+
+        done = 0
+
+        async def encode_part(index: int):
+            nonlocal done
+            stream = build_merge_part_output(
+                input_paths[index], parts[index], output_format, quality, bitrate, reference
+            )
+            async with scheduler.slot(SEGMENT_JOB):
+                error_msg = await run_ffmpeg_graph(task_id, stream, None, "Re-encoding")
+            if error_msg:
+                raise RuntimeError(error_msg)
+            done += 1
+            task_store.update_progress(
+                task_id,
+                5 + 85 * done / len(mismatched),
+                f"Re-encoding mismatched inputs... {done}/{len(mismatched)}",
+                "encoding",
+            )
+
+        if mismatched:
+            try:
+                async with asyncio.TaskGroup() as group:
+                    for index in mismatched:
+                        group.create_task(encode_part(index))
+            except ExceptionGroup as errors:
+                # The first failure cancelled the other parts
+                return str(errors.exceptions[0])
+
+        list_path = work_dir / "inputs.txt"
+        write_concat_list(parts, list_path)
+        total_duration = sum(durations) if all(durations) else None
+        return await run_ffmpeg_graph(
+            task_id,
+            build_concat_copy_output(list_path, output_path),
+            total_duration,
+            "Joining",
+            start_percent=90 if mismatched else 5,
+        )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+async def merge_audio_with_progress(
+    task_id: str,
+    input_paths: list[Path],
+    output_path: Path,
+    output_format: str = "mp3",
+    quality: str = "medium",
+    bitrate: str = "192k",
+) -> TaskResult:
+    """Merge multiple audio files into one with real-time progress updates"""
+    try:
+        if len(input_paths) < 2:
+            error_msg = "At least 2 audio files are required for merging"
+            task_store.fail_task(task_id, error_msg)
+            return TaskResult(success=False, error=error_msg)
+
+        if output_format.lower() not in AUDIO_CODECS:
+            error_msg = f"Unsupported output audio format: {output_format}"
+            task_store.fail_task(task_id, error_msg)
+            return TaskResult(success=False, error=error_msg)
+
+        cancellation_registry.register_output(task_id, output_path)
+        task_store.update_progress(task_id, 0, "Analyzing audio files...", "analyzing")
+
+        total_original_size = sum(get_file_size(path) for path in input_paths)
+
+        # Output length is the sum of the inputs, unknown if any of them cannot be probed
+        durations = [await run_blocking(get_audio_duration, path) for path in input_paths]
+        total_duration = sum(durations) if all(durations) else None
+
+        strategy, reference, mismatched = await run_blocking(
+            plan_merge, input_paths, output_format, quality, bitrate
+        )
+
+        task_store.update_progress(task_id, 5, "Starting merge...", "encoding")
+
+        if strategy == STRATEGY_REENCODE:
+            stream = build_merge_output(input_paths, output_path, output_format, quality, bitrate)
+            error_msg = await run_ffmpeg_graph(task_id, stream, total_duration, "Merging")
+        else:
+            error_msg = await _merge_by_copy(
+                task_id,
+                input_paths,
+                output_path,
+                output_format,
+                quality,
+                bitrate,
+                reference,
+                mismatched,
+                durations,
+            )
+        if error_msg:
+            task_store.fail_task(task_id, error_msg[:500])
+            return TaskResult(success=False, error=error_msg[:500])
+
+        return _complete(
+            task_id,
+            output_path,
+            total_original_size,
+            f"Successfully merged {len(input_paths)} audio files",
+            strategy,
+        )
+
+    except asyncio.CancelledError:
+        task_store.cancel_task(task_id)
+        raise
+    except Exception as e:
+        error_msg = str(e)[:500]
+        task_store.fail_task(task_id, error_msg)
+        return TaskResult(success=False, error=error_msg)
+
+
+async def convert_audio_batch_with_progress(
+    task_id: str,
+    uploads: List[Tuple[str, Path]],
+    output_path: Path,
+    output_format: str = "mp3",
+    quality: str = "medium",
+    bitrate: str = "192k",
+) -> TaskResult:
+    """
+    Convert many audio files concurrently into one zip archive with per-file progress
+
+    Zip uploads are expanded to their audio files. Conversions run AUDIO_BATCH_CONCURRENCY at
+    a time and each output is appended to the archive as soon as it is ready. A file that
+    fails is left out and named in the result message, the task fails only if all of them do.
+
+    Args:
+        task_id: Task to report progress to
+        uploads: (original filename, saved path) of each upload, zips included
+        output_path: Zip archive to write
+        output_format: Output audio format
+        quality: Output quality preset
+        bitrate: Audio bitrate of lossy formats
+    """
+    work_dir = output_path.parent / f"batch_{output_path.stem}"
+    try:
+        output_format = output_format.lower()
+        if output_format not in AUDIO_CODECS:
+            error_msg = f"Unsupported output audio format: {output_format}"
+            task_store.fail_task(task_id, error_msg)
+            return TaskResult(success=False, error=error_msg)
+
+        cancellation_registry.register_output(task_id, output_path)
+        task_store.update_progress(task_id, 0, "Reading input files...", "analyzing")
+
+        try:
+            inputs = await run_blocking(collect_batch_inputs, uploads, work_dir)
+        except ValueError as e:
+            task_store.fail_task(task_id, str(e)[:500])
+            return TaskResult(success=False, error=str(e)[:500])
+        if not inputs:
+            error_msg = "No audio files to convert"
+            task_store.fail_task(task_id, error_msg)
+            return TaskResult(success=False, error=error_msg)
+
+        work_dir.mkdir(exist_ok=True)
+        total = len(inputs)
+        original_size = sum(get_file_size(path) for _, path in inputs)
+        failed: List[str] = []
+        done = 0
+        used_names: set = set()
+        bound = asyncio.Semaphore(AUDIO_BATCH_CONCURRENCY)
+        archive_lock = asyncio.Lock()
+
+        def archive_name(filename: str) -> str:
+            """Unique name of an output in the archive (track.mp3, track (2).mp3, ...)"""
+            stem = Path(filename).stem or "audio"
+            name, copy = f"{stem}.{output_format}", 1
+            while name in used_names:
+                copy += 1
+                name = f"{stem} ({copy}).{output_format}"
+            used_names.add(name)
+            return name
+
+        task_store.update_progress(task_id, 5, f"Converting 0/{total} files...", "encoding")
+
+        with zipfile.ZipFile(output_path, "w", zipfile.ZIP_STORED) as archive:
+
+            async def convert(index: int, filename: str, input_path: Path):
+                nonlocal done
+                converted = work_dir / f"out_{index:04d}.{output_format}"
+                stream = build_convert_output(
+                    input_path, converted, output_format, quality, bitrate
+                )
+                # Per-batch bound, and the host-wide bound shared with other split jobs
+                async with bound, scheduler.slot(SEGMENT_JOB):
+                    error_msg = await run_ffmpeg_graph(task_id, stream, None, "Converting")
+
+                if error_msg:
+                    failed.append(filename)
+                else:
+                    # Audio is already compressed, stored entries keep writing cheap
+                    async with archive_lock:
+                        await run_blocking(archive.write, converted, archive_name(filename))
+                converted.unlink(missing_ok=True)
+
+                done += 1
+                task_store.update_progress(
+                    task_id,
+                    5 + 94 * done / total,
+                    f"Converted {done}/{total} files ({filename})",
+                    "encoding",
+                )
+
+            try:
+                async with asyncio.TaskGroup() as group:
+                    for index, (filename, input_path) in enumerate(inputs):
+                        group.create_task(convert(index, filename, input_path))
+            except ExceptionGroup as errors:
+                raise errors.exceptions[0]
+
+        if len(failed) == total:
+            error_msg = f"No file could be converted ({total} failed)"
+            task_store.fail_task(task_id, error_msg)
+            return TaskResult(success=False, error=error_msg)
+
+        message = f"Converted {total - len(failed)} of {total} files to {output_format.upper()}"
+        if failed:
+            message += f" (failed: {', '.join(sorted(failed))})"[:400]
+        return _complete(task_id, output_path, original_size, message)
+
+    except asyncio.CancelledError:
+        task_store.cancel_task(task_id)
+        raise
+    except Exception as e:
+        error_msg = str(e)[:500]
+        task_store.fail_task(task_id, error_msg)
+        return TaskResult(success=False, error=error_msg)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -2,13 +2,28 @@
 Image processing service using Pillow
 """
 
+from concurrent.futures import Future, ThreadPoolExecutor
+import io
+import json
 from pathlib import Path
+import struct
+from typing import BinaryIO, List, Tuple
+import zipfile
+import zlib
 
+import numpy as np
 from PIL import Image, ImageEnhance, ImageFilter, ImageOps
 
-from app.config import IMAGE_COMPRESSION_QUALITY
-from app.models.image import ColorExtractionResponse, ColorInfo, ImageProcessingResponse
-from app.utils.file_handler import calculate_compression_ratio, get_file_size
+from app.config import IMAGE_COMPRESSION_QUALITY, IMAGE_JOB_THREADS
+from app.models.image import (
+    ColorExtractionResponse,
+    ColorInfo,
+    ImageProcessingResponse,
+    ImageVariant,
+    ResponsiveImageResponse,
+)
+from app.utils.file_handler import calculate_compression_ratio, delete_file, get_file_size
+from app.utils.image_loader import contain_size, cover_size, load_image, oriented_size
 
 
 def compress_image(
@@ -71,6 +86,38 @@ def compress_image(
         )
 
 
+def save_image(
+    img: Image.Image, target: Path | BinaryIO, output_format: str, quality: str = "medium"
+):
+    """
+    Save an image in another format with a quality preset
+
+    Args:
+        img: Image to save
+        target: Output path or binary file object
+        output_format: Target format (jpg, png, webp, avif, etc.)
+        quality: Quality preset for lossy formats (low, medium, high)
+    """
+    # Normalize format for Pillow (jpg -> JPEG)
+    pillow_format = output_format.upper()
+    if pillow_format == "JPG":
+        pillow_format = "JPEG"
+
+    # Convert RGBA to RGB if saving as JPEG
+    if output_format.lower() in ["jpg", "jpeg"] and img.mode == "RGBA":
+        rgb_img = Image.new("RGB", img.size, (255, 255, 255))
+        rgb_img.paste(img, mask=img.split()[3] if len(img.split()) == 4 else None)
+        img = rgb_img
+
+    # Get quality value
+    quality_value = IMAGE_COMPRESSION_QUALITY.get(quality, IMAGE_COMPRESSION_QUALITY["medium"])
+
+    if output_format.lower() in ["jpg", "jpeg", "webp", "avif"]:
+        img.save(target, format=pillow_format, quality=quality_value, optimize=True)
+    else:
+        img.save(target, format=pillow_format, optimize=True)
+
+
 def convert_image(
     input_path: Path, output_path: Path, output_format: str, quality: str = "medium"
 ) -> ImageProcessingResponse:
@@ -90,37 +137,13 @@ def convert_image(
         # Get original file size
         original_size = get_file_size(input_path)
 
-        # Normalize format for Pillow (jpg -> JPEG)
-        pillow_format = output_format.upper()
-        if pillow_format == "JPG":
-            pillow_format = "JPEG"
-
         # Open and convert image
         with Image.open(input_path) as img:
-            # Convert RGBA to RGB if saving as JPEG
-            if output_format.lower() in ["jpg", "jpeg"] and img.mode == "RGBA":
-                rgb_img = Image.new("RGB", img.size, (255, 255, 255))
-                rgb_img.paste(img, mask=img.split()[3] if len(img.split()) == 4 else None)
-                img = rgb_img
-
             # Get dimensions
             dimensions = {"width": img.width, "height": img.height}
 
-            # Get quality value
-            quality_value = IMAGE_COMPRESSION_QUALITY.get(
-                quality, IMAGE_COMPRESSION_QUALITY["medium"]
-            )
-
             # Save in new format
-            if output_format.lower() in ["jpg", "jpeg", "webp"]:
-                img.save(
-                    output_path,
-                    format=pillow_format,
-                    quality=quality_value,
-                    optimize=True,
-                )
-            else:
-                img.save(output_path, format=pillow_format, optimize=True)
+            save_image(img, output_path, output_format, quality)
 
         # Get converted file size
         converted_size = get_file_size(output_path)
@@ -209,6 +232,116 @@ def rotate_image(input_path: Path, output_path: Path, angle: int) -> ImageProces
         )
 
 
+# Upper bound for max_colors in extract_colors
+MAX_EXTRACT_COLORS = 32
+
+# Bits kept per channel when binning pixels for clustering (32 levels, 32768 bins)
+COLOR_HISTOGRAM_BITS = 5
+
+# Clusters closer than this CIE76 distance look like the same color and are merged
+COLOR_MERGE_DISTANCE = 10.0
+
+KMEANS_MAX_ITERATIONS = 20
+
+RGB = Tuple[int, int, int]
+
+
+def _rgb_to_lab(color: RGB) -> Tuple[float, float, float]:
+    """sRGB (0-255) to CIELAB (D65)"""
+
+    def linear(channel: int) -> float:
+        c = channel / 255
+        return c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+
+    r, g, b = (linear(c) for c in color)
+    x = (0.4124 * r + 0.3576 * g + 0.1805 * b) / 0.95047
+    y = 0.2126 * r + 0.7152 * g + 0.0722 * b
+    z = (0.0193 * r + 0.1192 * g + 0.9505 * b) / 1.08883
+
+    def f(t: float) -> float:
+        return t ** (1 / 3) if t > 0.008856 else 7.787 * t + 16 / 116
+
+    fx, fy, fz = f(x), f(y), f(z)
+    return 116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)
+
+
+def merge_similar_colors(clusters: List[Tuple[RGB, int]]) -> List[Tuple[RGB, int]]:
+    """
+    Fold clusters into a larger one closer than COLOR_MERGE_DISTANCE
+
+    Args:
+        clusters: (color, pixel count) pairs
+
+    Returns:
+        (color, pixel count) pairs, most frequent first
+    """
+    merged: List[list] = []
+    for color, count in sorted(clusters, key=lambda c: c[1], reverse=True):
+        lab = _rgb_to_lab(color)
+        for kept in merged:
+            if sum((p - q) ** 2 for p, q in zip(lab, kept[2])) < COLOR_MERGE_DISTANCE**2:
+                kept[1] += count
+                break
+        else:
+            merged.append([color, count, lab])
+    return [(color, count) for color, count, _ in merged]
+
+
+def _kmeans_clusters(img: Image.Image, k: int) -> List[Tuple[RGB, int]]:
+    """
+    Weighted k-means over a color histogram of an RGB image
+
+    Pixels are binned first, so the clustering runs on at most 2^(3*COLOR_HISTOGRAM_BITS)
+    weighted points whatever the image size
+    """
+    pixels = np.frombuffer(img.tobytes(), dtype=np.uint8).reshape(-1, 3)
+    bins = 1 << (3 * COLOR_HISTOGRAM_BITS)
+    quantized = (pixels >> (8 - COLOR_HISTOGRAM_BITS)).astype(np.int32)
+    index = (
+        (quantized[:, 0] << (2 * COLOR_HISTOGRAM_BITS))
+        | (quantized[:, 1] << COLOR_HISTOGRAM_BITS)
+        | quantized[:, 2]
+    )
+    counts = np.bincount(index, minlength=bins)
+    sums = np.stack(
+        [np.bincount(index, weights=pixels[:, c], minlength=bins) for c in range(3)], axis=1
+    )
+    occupied = counts > 0
+    weights = counts[occupied].astype(np.float64)
+    points = sums[occupied] / weights[:, None]
+    k = min(k, len(points))
+
+    # Deterministic k-means++ style seeding: heaviest bin, then the bin with the most weight
+    # far from every chosen center
+    centers = [points[np.argmax(weights)]]
+    nearest = ((points - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        centers.append(points[np.argmax(weights * nearest)])
+        nearest = np.minimum(nearest, ((points - centers[-1]) ** 2).sum(axis=1))
+    centers = np.array(centers)
+
+    labels = None
+    for _ in range(KMEANS_MAX_ITERATIONS):
+        distances = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        new_labels = distances.argmin(axis=1)
+        if labels is not None and np.array_equal(labels, new_labels):
+            break
+        labels = new_labels
+        cluster_weights = np.bincount(labels, weights=weights, minlength=k)
+        for c in range(3):
+            totals = np.bincount(labels, weights=points[:, c] * weights, minlength=k)
+            centers[:, c] = np.where(
+                cluster_weights > 0, totals / np.maximum(cluster_weights, 1), centers[:, c]
+            )
+
+    cluster_counts = np.bincount(labels, weights=weights, minlength=k)
+    return [
+        (tuple(int(round(v)) for v in center), int(count))
+        for center, count in zip(centers, cluster_counts)
+        if count > 0
+    ]
+
+
 def extract_colors(
     input_path: Path,
     max_colors: int = 6,
@@ -217,27 +350,24 @@ def extract_colors(
     """
     Extract dominant colors from an image.
 
+    Pixels are clustered (k-means over a color histogram), then clusters that look alike are merged, so fewer than max_colors may be returned.
+
     Args:
         input_path: Path to input image.
-        max_colors: Number of top colors to return.
+        max_colors: Number of top colors to return (up to MAX_EXTRACT_COLORS).
         sample_size: Image is resized to max(sample_size, sample_size) to speed up extraction.
     """
     try:
         with Image.open(input_path) as img:
-            img = img.convert("RGB")
-            # Downscale for performance
+            # Decode close to the sample size, then downscale for performance
+            img = load_image(img, (sample_size, sample_size)).convert("RGB")
             img.thumbnail((sample_size, sample_size), Image.LANCZOS)
-            pixels = list(img.getdata())
-
-        total = len(pixels)
-        # Count colors
-        from collections import Counter
 
-        counts = Counter(pixels)
-        most_common = counts.most_common(max_colors)
+        total = img.width * img.height
+        clusters = _kmeans_clusters(img, max_colors)
 
         colors = []
-        for (r, g, b), count in most_common:
+        for (r, g, b), count in merge_similar_colors(clusters)[:max_colors]:
             ratio = count / total if total else 0
             hex_value = f"#{r:02x}{g:02x}{b:02x}"
             colors.append(ColorInfo(hex=hex_value, ratio=ratio))
@@ -417,9 +547,11 @@ def resize_image(
 
         # Open and resize image
         with Image.open(input_path) as img:
-            # Get original dimensions
-            original_dimensions = {"width": img.width, "height": img.height}
-            original_width, original_height = img.size
+            # Keep the format before decoding (upright copies have none)
+            output_format = img.format or "PNG"
+
+            # Get original dimensions (as displayed, EXIF orientation applied)
+            original_width, original_height = oriented_size(img)
 
             # Calculate target dimensions
             if maintain_aspect_ratio:
@@ -449,14 +581,14 @@ def resize_image(
                 target_width = width if width is not None else original_width
                 target_height = height if height is not None else original_height
 
-            # Resize image
+            # Decode at a reduced scale when the target is much smaller, then resize
+            img = load_image(img, (target_width, target_height))
             resized_img = img.resize((target_width, target_height), resample=resample_filter)
 
             # Get new dimensions
             new_dimensions = {"width": target_width, "height": target_height}
 
             # Preserve original format
-            output_format = img.format or "PNG"
             if output_format == "JPEG":
                 # Convert RGBA to RGB if saving as JPEG
                 if resized_img.mode == "RGBA":
@@ -568,22 +700,115 @@ def flip_image(
         )
 
 
+# Collage output formats (form value -> Pillow format)
+COLLAGE_FORMATS = {"png": "PNG", "jpg": "JPEG", "webp": "WEBP"}
+COLLAGE_MIN_CELL_SIZE = 64
+COLLAGE_MAX_CELL_SIZE = 2000
+# Largest width or height a WebP image can have
+WEBP_MAX_DIMENSION = 16383
+
+_WHITE = (255, 255, 255)
+
+
+def _collage_tile(image_path: Path, cell_width: int, cell_height: int) -> Image.Image:
+    """Decode an image no larger than needed and cover-crop it to one cell (RGB on white)"""
+    with Image.open(image_path) as img:
+        img = load_image(img, cover_size(oriented_size(img), (cell_width, cell_height)))
+        if img.mode != "RGB":
+            rgba_img = img.convert("RGBA")
+            img = Image.new("RGB", rgba_img.size, _WHITE)
+            img.paste(rgba_img, mask=rgba_img.getchannel("A"))
+        # Resize to cover the cell, then center crop (like CSS object-fit: cover)
+        return ImageOps.fit(img, (cell_width, cell_height), Image.LANCZOS)
+
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    return (
+        struct.pack(">I", len(data))
+        + tag
+        + data
+        + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+    )
+
+
+class PngBandWriter:
+    """
+    RGB PNG written band by band, so the full image never has to be in memory
+
+    Features:
+    - Each band's rows are deflated as they arrive (one IDAT chunk per band)
+    - Rows use PNG filter type 0 (none)
+    """
+
+    def __init__(self, output_path: Path, width: int, height: int):
+        self._file = open(output_path, "wb")
+        self._width = width
+        self._compressor = zlib.compressobj(6)
+        self._file.write(b"\x89PNG\r\n\x1a\n")
+        self._file.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+
+    def write(self, band: Image.Image):
+        stride = self._width * 3
+        data = band.tobytes()
+        rows = b"".join(
+            b"\0" + data[offset : offset + stride] for offset in range(0, len(data), stride)
+        )
+        compressed = self._compressor.compress(rows)
+        if compressed:
+            self._file.write(_png_chunk(b"IDAT", compressed))
+
+    def close(self):
+        self._file.write(_png_chunk(b"IDAT", self._compressor.flush()))
+        self._file.write(_png_chunk(b"IEND", b""))
+        self._file.close()
+
+
+class CanvasBandWriter:
+    """Bands pasted into a full canvas, encoded on close (formats Pillow cannot stream)"""
+
+    def __init__(
+        self, output_path: Path, width: int, height: int, pillow_format: str, quality: int
+    ):
+        self._output_path = output_path
+        self._canvas = Image.new("RGB", (width, height), _WHITE)
+        self._top = 0
+        self._format = pillow_format
+        self._quality = quality
+
+    def write(self, band: Image.Image):
+        self._canvas.paste(band, (0, self._top))
+        self._top += band.height
+
+    def close(self):
+        self._canvas.save(self._output_path, format=self._format, quality=self._quality)
+
+
 def create_collage(
     image_paths: list[Path],
     output_path: Path,
     rows: int,
     cols: int,
     image_order: list[int],
+    cell_size: int = 800,
+    output_format: str = "png",
+    quality: str = "medium",
 ) -> ImageProcessingResponse:
     """
     Create a collage from multiple images arranged in a grid
 
+    Tiles are decoded and cropped in parallel (IMAGE_JOB_THREADS), one row ahead of the row
+    being written, and dropped after their last use. PNG output is streamed row band by row
+    band, JPEG and WebP are encoded from a canvas once all bands are in.
+
     Args:
         image_paths: List of paths to input images
         output_path: Path to save the collage
         rows: Number of rows in the grid
         cols: Number of columns in the grid
         image_order: Order of images in the grid (indices from 0 to len(image_paths)-1)
+        cell_size: Width and height of each cell in pixels
+        output_format: Output format (png, jpg, webp)
+        quality: JPEG / WebP quality preset
 
     Returns:
         ImageProcessingResponse with collage creation results
@@ -617,82 +842,95 @@ def create_collage(
                     filename=output_path.name if output_path else None,
                 )
 
-        # Open all images and get their dimensions
-        images = []
-        for img_path in image_paths:
-            try:
-                with Image.open(img_path) as img:
-                    # Convert to RGB if necessary
-                    if img.mode != "RGB":
-                        rgb_img = Image.new("RGB", img.size, (255, 255, 255))
-                        if img.mode == "RGBA":
-                            rgb_img.paste(
-                                img, mask=img.split()[3] if len(img.split()) == 4 else None
-                            )
-                        else:
-                            rgb_img.paste(img)
-                        images.append(rgb_img.copy())
-                    else:
-                        images.append(img.copy())
-            except Exception as e:
-                return ImageProcessingResponse(
-                    success=False,
-                    message=f"Error opening image {img_path.name}: {str(e)}",
-                    filename=output_path.name if output_path else None,
-                )
+        if cell_size < COLLAGE_MIN_CELL_SIZE or cell_size > COLLAGE_MAX_CELL_SIZE:
+            return ImageProcessingResponse(
+                success=False,
+                message=(
+                    f"Cell size must be between {COLLAGE_MIN_CELL_SIZE} "
+                    f"and {COLLAGE_MAX_CELL_SIZE} pixels"
+                ),
+                filename=output_path.name if output_path else None,
+            )
 
-        # Calculate cell size based on the first image's aspect ratio
-        # We'll use a standard size and let images fill their cells
-        # Use a reasonable default size (e.g., 800x800 per cell)
-        cell_width = 800
-        cell_height = 800
+        pillow_format = COLLAGE_FORMATS.get(output_format.lower())
+        if pillow_format is None:
+            return ImageProcessingResponse(
+                success=False,
+                message=f"Unsupported collage format: {output_format}",
+                filename=output_path.name if output_path else None,
+            )
 
-        # Create the collage canvas
+        cell_width = cell_height = cell_size
         collage_width = cell_width * cols
         collage_height = cell_height * rows
-        collage = Image.new("RGB", (collage_width, collage_height), (255, 255, 255))
-
-        # Place images in the grid according to image_order
-        for grid_idx, image_idx in enumerate(image_order):
-            row = grid_idx // cols
-            col = grid_idx % cols
-
-            # Get the image to place
-            img = images[image_idx]
-
-            # Resize image to cover the cell while preserving aspect ratio
-            # Then crop to exact cell size (cover behavior - like CSS object-fit: cover)
-            img_aspect = img.width / img.height
-            cell_aspect = cell_width / cell_height
 
-            if img_aspect > cell_aspect:
-                # Image is wider than cell - fit to height, then crop width
-                new_height = cell_height
-                new_width = int(cell_height * img_aspect)
-            else:
-                # Image is taller than cell - fit to width, then crop height
-                new_width = cell_width
-                new_height = int(cell_width / img_aspect)
+        if pillow_format == "WEBP" and max(collage_width, collage_height) > WEBP_MAX_DIMENSION:
+            return ImageProcessingResponse(
+                success=False,
+                message=f"WebP collages cannot exceed {WEBP_MAX_DIMENSION} pixels per side",
+                filename=output_path.name if output_path else None,
+            )
 
-            # Resize image to cover size
-            resized_img = img.resize((new_width, new_height), Image.LANCZOS)
+        # Row in which each image is placed for the last time (its tile is dropped after it)
+        grid_rows = [image_order[row * cols : (row + 1) * cols] for row in range(rows)]
+        last_row = {idx: row for row, row_order in enumerate(grid_rows) for idx in row_order}
 
-            # Crop to exact cell dimensions (center crop)
-            left = (new_width - cell_width) // 2
-            top = (new_height - cell_height) // 2
-            right = left + cell_width
-            bottom = top + cell_height
-            cropped_img = resized_img.crop((left, top, right, bottom))
+        if pillow_format == "PNG":
+            writer = PngBandWriter(output_path, collage_width, collage_height)
+        else:
+            quality_value = IMAGE_COMPRESSION_QUALITY.get(
+                quality, IMAGE_COMPRESSION_QUALITY["medium"]
+            )
+            writer = CanvasBandWriter(
+                output_path, collage_width, collage_height, pillow_format, quality_value
+            )
 
-            # Calculate position
-            x_offset = col * cell_width
-            y_offset = row * cell_height
+        completed = False
+        tiles: dict[int, Future] = {}
+        with ThreadPoolExecutor(max_workers=max(1, IMAGE_JOB_THREADS)) as pool:
 
-            # Paste image onto collage (fills cell exactly, no white spaces)
-            collage.paste(cropped_img, (x_offset, y_offset))
+            def submit_row(row: int):
+                for idx in grid_rows[row]:
+                    if idx not in tiles:
+                        tiles[idx] = pool.submit(
+                            _collage_tile, image_paths[idx], cell_width, cell_height
+                        )
 
-        # Save the collage
-        collage.save(output_path, format="PNG", quality=95, optimize=True)
+            try:
+                submit_row(0)
+                for row, row_order in enumerate(grid_rows):
+                    # Decode the next row while this one is assembled and written
+                    if row + 1 < rows:
+                        submit_row(row + 1)
+
+                    band = Image.new("RGB", (collage_width, cell_height), _WHITE)
+                    for col, idx in enumerate(row_order):
+                        try:
+                            tile = tiles[idx].result()
+                        except Exception as e:
+                            return ImageProcessingResponse(
+                                success=False,
+                                message=f"Error opening image {image_paths[idx].name}: {str(e)}",
+                                filename=output_path.name if output_path else None,
+                            )
+                        band.paste(tile, (col * cell_width, 0))
+                    writer.write(band)
+
+                    for idx in set(row_order):
+                        if last_row[idx] == row:
+                            del tiles[idx]
+
+                writer.close()
+                completed = True
+            finally:
+                for future in tiles.values():
+                    future.cancel()
+                if not completed:
+                    try:
+                        writer.close()
+                    except Exception:
+                        pass
+                    delete_file(output_path)
 
         # Get file size
         collage_size = get_file_size(output_path)
@@ -744,6 +982,9 @@ def create_icon(
 
         # Open input image
         with Image.open(input_path) as img:
+            # Decode at a reduced scale when the icon is much smaller
+            img = load_image(img, (size, size))
+
             # Convert to RGBA if necessary (ICO format supports transparency)
             if img.mode not in ("RGBA", "RGB"):
                 if img.mode == "P" and "transparency" in img.info:
@@ -758,9 +999,6 @@ def create_icon(
                     rgba_img.paste(img)
                     img = rgba_img
 
-            # Get original dimensions
-            original_dimensions = {"width": img.width, "height": img.height}
-
             # Resize image to square (ICO files typically use square icons)
             icon_img = img.resize((size, size), Image.LANCZOS)
 
@@ -786,3 +1024,280 @@ def create_icon(
             message=f"Error creating icon: {str(e)}",
             filename=output_path.name if output_path else None,
         )
+
+
+# Sizes packed into the favicon pack's favicon.ico
+FAVICON_ICO_SIZES = [16, 32, 48, 64, 128, 256]
+
+# PNG files of a favicon pack (file name -> size)
+FAVICON_PNG_FILES = {
+    "favicon-16x16.png": 16,
+    "favicon-32x32.png": 32,
+    "favicon-48x48.png": 48,
+    "apple-touch-icon.png": 180,
+    "android-chrome-192x192.png": 192,
+    "android-chrome-512x512.png": 512,
+}
+
+# PNGs listed in site.webmanifest
+FAVICON_MANIFEST_SIZES = [192, 512]
+
+
+def build_icon_pyramid(img: Image.Image, sizes: list[int]) -> dict[int, Image.Image]:
+    """
+    Square RGBA icons of each size, every level resized from the next larger one
+
+    The image is centered on a transparent square first (no cropping or stretching).
+
+    Args:
+        img: Loaded source image
+        sizes: Icon sizes in pixels
+
+    Returns:
+        Size -> icon image
+    """
+    largest = max(sizes)
+    img = img.convert("RGBA")
+    fitted_size = contain_size(img.size, (largest, largest))
+    if img.size != fitted_size:
+        img = img.resize(fitted_size, Image.LANCZOS)
+    level = Image.new("RGBA", (largest, largest), (0, 0, 0, 0))
+    level.paste(img, ((largest - img.width) // 2, (largest - img.height) // 2))
+
+    pyramid = {}
+    for size in sorted(set(sizes), reverse=True):
+        if level.width != size:
+            level = level.resize((size, size), Image.LANCZOS)
+        pyramid[size] = level
+    return pyramid
+
+
+def create_favicon_pack(
+    input_path: Path,
+    output_path: Path,
+    name: str = "",
+) -> ImageProcessingResponse:
+    """
+    Build a favicon pack (multi-size ICO, PNG icons and a web manifest) as a ZIP file
+
+    The image is decoded once, at a reduced scale when it is much larger than the biggest icon.
+
+    Args:
+        input_path: Path to input image
+        output_path: Path to save the ZIP file
+        name: Application name written to site.webmanifest
+
+    Returns:
+        ImageProcessingResponse with favicon pack results
+    """
+    try:
+        # Get original file size
+        original_size = get_file_size(input_path)
+
+        sizes = FAVICON_ICO_SIZES + list(FAVICON_PNG_FILES.values())
+        largest = max(sizes)
+
+        with Image.open(input_path) as img:
+            original_width, original_height = oriented_size(img)
+            img = load_image(
+                img, contain_size((original_width, original_height), (largest, largest))
+            )
+            pyramid = build_icon_pyramid(img, sizes)
+
+        ico_buffer = io.BytesIO()
+        ico_images = [pyramid[size] for size in sorted(FAVICON_ICO_SIZES, reverse=True)]
+        ico_images[0].save(
+            ico_buffer,
+            format="ICO",
+            sizes=[icon.size for icon in ico_images],
+            append_images=ico_images[1:],
+        )
+
+        manifest = {
+            "name": name,
+            "short_name": name,
+            "icons": [
+                {
+                    "src": f"/android-chrome-{size}x{size}.png",
+                    "sizes": f"{size}x{size}",
+                    "type": "image/png",
+                }
+                for size in FAVICON_MANIFEST_SIZES
+            ],
+            "display": "standalone",
+        }
+
+        with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("favicon.ico", ico_buffer.getvalue())
+            for filename, size in FAVICON_PNG_FILES.items():
+                png_buffer = io.BytesIO()
+                pyramid[size].save(png_buffer, format="PNG", optimize=True)
+                archive.writestr(filename, png_buffer.getvalue())
+            archive.writestr("site.webmanifest", json.dumps(manifest, indent=2))
+
+        # Get pack file size
+        pack_size = get_file_size(output_path)
+
+        return ImageProcessingResponse(
+            success=True,
+            message=f"Favicon pack created successfully ({len(FAVICON_PNG_FILES) + 2} files)",
+            filename=output_path.name,
+            download_url=f"/api/v1/download/{output_path.name}",
+            original_size=original_size,
+            processed_size=pack_size,
+            dimensions={"width": original_width, "height": original_height},
+        )
+
+    except Exception as e:
+        if output_path:
+            delete_file(output_path)
+        return ImageProcessingResponse(
+            success=False,
+            message=f"Error creating favicon pack: {str(e)}",
+            filename=output_path.name if output_path else None,
+        )
+
+
+# Responsive variant formats (form value -> Pillow format), AVIF only where Pillow can write it
+RESPONSIVE_FORMATS = {"jpg": "JPEG", "webp": "WEBP", "avif": "AVIF"}
+RESPONSIVE_MIN_WIDTH = 16
+RESPONSIVE_MAX_WIDTH = 8192
+RESPONSIVE_MAX_WIDTHS = 12
+
+
+def supported_responsive_formats() -> list[str]:
+    """Responsive variant formats this Pillow build can encode"""
+    Image.init()
+    return [
+        name for name, pillow_format in RESPONSIVE_FORMATS.items() if pillow_format in Image.SAVE
+    ]
+
+
+def build_width_pyramid(img: Image.Image, widths: list[int]) -> dict[int, Image.Image]:
+    """
+    The image at each width (aspect ratio kept), every level resized from the next wider one
+
+    Args:
+        img: Loaded source image, at least as wide as the largest width
+        widths: Target widths in pixels
+
+    Returns:
+        Width -> image
+    """
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+
+    pyramid = {}
+    level = img
+    for width in sorted(set(widths), reverse=True):
+        size = (width, max(1, round(img.height * width / img.width)))
+        if level.size != size:
+            level = level.resize(size, Image.LANCZOS)
+        pyramid[width] = level
+    return pyramid
+
+
+def _encode_variant(img: Image.Image, output_format: str, quality: str) -> bytes:
+    buffer = io.BytesIO()
+    save_image(img, buffer, output_format, quality)
+    return buffer.getvalue()
+
+
+def create_responsive_images(
+    input_path: Path,
+    output_path: Path,
+    widths: list[int],
+    formats: list[str],
+    quality: str = "medium",
+    base_name: str = "image",
+) -> ResponsiveImageResponse:
+    """
+    Build width / format variants of an image into a ZIP file, with srcset values
+
+    The image is decoded once (at a reduced scale when much larger than the widest variant),
+    widths are downscaled from one another and the variants are encoded in parallel
+    (IMAGE_JOB_THREADS). Widths above the image's own width give one variant at that width.
+
+    Args:
+        input_path: Path to input image
+        output_path: Path to save the ZIP file
+        widths: Target widths in pixels
+        formats: Output formats (jpg, webp, avif)
+        quality: Quality preset (low, medium, high)
+        base_name: Variant file name prefix ("{base_name}-{width}w.{format}")
+
+    Returns:
+        ResponsiveImageResponse with the variants and a srcset value per format
+    """
+    try:
+        # Get original file size
+        original_size = get_file_size(input_path)
+
+        with Image.open(input_path) as img:
+            original_width, original_height = oriented_size(img)
+
+            # Never upscale, larger targets become one variant at the original width
+            kept_widths = sorted({min(w, original_width) for w in widths}, reverse=True)
+
+            widest = kept_widths[0]
+            img = load_image(
+                img, (widest, max(1, round(original_height * widest / original_width)))
+            )
+            pyramid = build_width_pyramid(img, kept_widths)
+
+        jobs = [(width, output_format) for width in kept_widths for output_format in formats]
+        with ThreadPoolExecutor(max_workers=max(1, IMAGE_JOB_THREADS)) as pool:
+            encoded = list(
+                pool.map(lambda job: _encode_variant(pyramid[job[0]], job[1], quality), jobs)
+            )
+
+        variants = []
+        with zipfile.ZipFile(output_path, "w", zipfile.ZIP_STORED) as archive:
+            for (width, output_format), data in zip(jobs, encoded):
+                filename = f"{base_name}-{width}w.{output_format}"
+                archive.writestr(filename, data)
+                variants.append(
+                    ImageVariant(
+                        filename=filename,
+                        width=width,
+                        height=pyramid[width].height,
+                        format=output_format,
+                        size=len(data),
+                    )
+                )
+
+        srcset = {
+            output_format: ", ".join(
+                f"{v.filename} {v.width}w"
+                for v in sorted(variants, key=lambda v: v.width)
+                if v.format == output_format
+            )
+            for output_format in formats
+        }
+
+        # Get archive file size
+        archive_size = get_file_size(output_path)
+
+        return ResponsiveImageResponse(
+            success=True,
+            message=(
+                f"Created {len(variants)} variants "
+                f"({len(kept_widths)} widths x {len(formats)} formats)"
+            ),
+            filename=output_path.name,
+            download_url=f"/api/v1/download/{output_path.name}",
+            original_size=original_size,
+            processed_size=archive_size,
+            dimensions={"width": original_width, "height": original_height},
+            variants=variants,
+            srcset=srcset,
+        )
+
+    except Exception as e:
+        if output_path:
+            delete_file(output_path)
+        return ResponsiveImageResponse(
+            success=False,
+            message=f"Error creating responsive images: {str(e)}",
+            filename=output_path.name if output_path else None,
+        )
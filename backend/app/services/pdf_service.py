@@ -18,6 +18,7 @@ except ImportError:
     OCR_AVAILABLE = False
 
 from app.models.pdf import PDFInfoResponse, PDFProcessingResponse
+from app.utils.capabilities import capabilities
 from app.utils.file_handler import get_file_size
 
 
@@ -411,6 +412,29 @@ def remove_password_pdf(
         )
 
 
+def check_ocr_capabilities(language: str) -> Optional[str]:
+    """
+    Check that Tesseract, its language data and Poppler are installed
+
+    Args:
+        language: Tesseract language code, several joined with "+" (e.g. "eng+fra")
+
+    Returns:
+        Error message, None if OCR can run
+    """
+    if not capabilities.has_tesseract():
+        return "Tesseract OCR not found. Please install Tesseract on your system."
+    missing = capabilities.missing_tesseract_languages(language)
+    if missing:
+        return (
+            f"Tesseract language data not installed: {', '.join(missing)}. "
+            f"Available: {', '.join(capabilities.tesseract_languages)}"
+        )
+    if not capabilities.has_poppler():
+        return "Poppler not installed. Please install poppler-utils (Linux) or poppler (macOS/Windows)."
+    return None
+
+
 def extract_text_with_ocr(
     input_path: Path, output_path: Path, language: str = "eng"
 ) -> PDFProcessingResponse:
@@ -433,14 +457,10 @@ def extract_text_with_ocr(
         )
 
     try:
-        # Check if Tesseract is installed
-        try:
-            pytesseract.get_tesseract_version()
-        except Exception as e:
-            return PDFProcessingResponse(
-                success=False,
-                message=f"Tesseract OCR not found. Please install Tesseract on your system. Error: {str(e)}",
-            )
+        # Tools and languages were probed once at startup
+        error = check_ocr_capabilities(language)
+        if error:
+            return PDFProcessingResponse(success=False, message=error)
 
         # Convert PDF pages to images
         try:
@@ -3,7 +3,6 @@ Async PDF OCR service with progress tracking
 Uses Tesseract OCR with progress updates for real-time feedback
 """
 
-import asyncio
 from pathlib import Path
 from typing import Optional
 
@@ -15,8 +14,11 @@ try:
 except ImportError:
     OCR_AVAILABLE = False
 
+from app.services.pdf_service import check_ocr_capabilities
+from app.tasks.cancellation import cancellation_registry
 from app.tasks.models import TaskResult
 from app.tasks.store import task_store
+from app.utils.executors import run_blocking
 from app.utils.file_handler import get_file_size
 
 
@@ -41,22 +43,21 @@ async def extract_text_with_ocr_async(
         )
 
     try:
-        # Check if Tesseract is installed
-        try:
-            pytesseract.get_tesseract_version()
-        except Exception as e:
-            error_msg = (
-                f"Tesseract OCR not found. Please install Tesseract on your system. Error: {str(e)}"
-            )
+        # Tools and languages were probed once at startup
+        error_msg = check_ocr_capabilities(language)
+        if error_msg:
             task_store.fail_task(task_id, error_msg)
             return TaskResult(success=False, error=error_msg)
 
+        # Partial output is deleted if the task is cancelled
+        cancellation_registry.register_output(task_id, output_path)
+
         # Update task: Starting
         task_store.update_progress(task_id, 0, "Converting PDF to images...", "converting")
 
         # Convert PDF pages to images
         try:
-            images = convert_from_path(str(input_path), dpi=300)
+            images = await run_blocking(convert_from_path, str(input_path), dpi=300)
         except Exception as e:
             error_msg = str(e)
             if "poppler" in error_msg.lower() or "pdftoppm" in error_msg.lower():
@@ -87,11 +88,8 @@ async def extract_text_with_ocr_async(
             )
 
             try:
-                # Run OCR in executor to avoid blocking
-                loop = asyncio.get_event_loop()
-                text = await loop.run_in_executor(
-                    None, pytesseract.image_to_string, image, language
-                )
+                # Run OCR in the shared thread pool to avoid blocking
+                text = await run_blocking(pytesseract.image_to_string, image, language)
 
                 if text.strip():
                     extracted_text.append(f"--- Page {i + 1} ---\n{text}\n")
@@ -2,43 +2,219 @@
 Video processing service using FFmpeg
 """
 
+import math
 from pathlib import Path
-import subprocess
-from typing import Optional
+import shutil
+from typing import List, Optional, Tuple
 
 import ffmpeg
 
-from app.config import VIDEO_COMPRESSION_PRESETS
-from app.models.video import VideoProcessingResponse
-from app.utils.file_handler import calculate_compression_ratio, get_file_size
-
-
-def get_available_h264_encoder():
+from app.config import GIF_PALETTE_SAMPLE_FPS, VIDEO_COMPRESSION_PRESETS
+from app.models.video import VideoProcessingResponse, VideoThumbnailsResponse
+from app.utils.artifact_cache import palette_cache
+from app.utils.capabilities import capabilities
+from app.utils.file_handler import (
+    calculate_compression_ratio,
+    delete_file,
+    get_file_size,
+    get_known_hash,
+)
+from app.utils.media_probe import media_probe
+from app.utils.result_cache import ResultCache
+
+
+def get_available_h264_encoder() -> Optional[str]:
     """
     Detect available H.264 encoder on the system
-    Returns the best available encoder in order of preference
+    Returns the best available encoder in order of preference (probed once per process)
+    """
+    return capabilities.h264_encoder()
+
+
+# How an output was produced (VideoProcessingResponse.strategy)
+STRATEGY_REENCODE = "reencode"
+STRATEGY_REMUX = "remux"
+STRATEGY_ROTATION_METADATA = "rotation_metadata"
+STRATEGY_STREAM_COPY = "stream_copy"
+
+# Video and audio codecs each output container takes as-is (None = any codec)
+CONTAINER_CODECS = {
+    "mp4": ({"h264", "hevc", "mpeg4", "av1"}, {"aac", "mp3", "ac3", "eac3", "opus", "alac"}),
+    "mov": (
+        {"h264", "hevc", "mpeg4", "prores", "mjpeg"},
+        {"aac", "mp3", "ac3", "alac", "pcm_s16le"},
+    ),
+    "mkv": (None, None),
+    "avi": ({"h264", "mpeg4", "mjpeg", "msmpeg4v3"}, {"mp3", "ac3", "pcm_s16le"}),
+    "flv": ({"h264", "flv1"}, {"aac", "mp3"}),
+    "wmv": ({"wmv1", "wmv2", "wmv3", "vc1"}, {"wmav1", "wmav2"}),
+}
+
+# Containers whose players apply display-matrix rotation
+ROTATION_METADATA_CONTAINERS = {"mp4", "mov"}
+
+# Video bit rate each quality preset aims for (the bitrate-based encoders' targets). A source
+# already at or below it is copied when its streams fit, re-encoding could only lose quality.
+VIDEO_QUALITY_BITRATES = {"low": 1_000_000, "medium": 2_500_000, "high": 5_000_000}
+
+
+def probe_video(input_path: Path) -> Optional[dict]:
+    """Streams and format of a file from ffprobe, None if it cannot be probed"""
+    info = media_probe.get(input_path)
+    return info.probe if info else None
+
+
+def _main_streams(probe: dict) -> Tuple[Optional[dict], Optional[dict]]:
+    """First video stream (cover art excluded) and first audio stream of a probe"""
+    video = audio = None
+    for stream in probe.get("streams", []):
+        codec_type = stream.get("codec_type")
+        if codec_type == "video" and video is None:
+            if not stream.get("disposition", {}).get("attached_pic"):
+                video = stream
+        elif codec_type == "audio" and audio is None:
+            audio = stream
+    return video, audio
+
+
+def can_copy_streams(probe: Optional[dict], container: str) -> bool:
+    """Whether the main video and audio streams fit a container without re-encoding"""
+    if not probe or container not in CONTAINER_CODECS:
+        return False
+
+    video, audio = _main_streams(probe)
+    if video is None:
+        return False
+
+    video_codecs, audio_codecs = CONTAINER_CODECS[container]
+    if video_codecs is not None and video.get("codec_name") not in video_codecs:
+        return False
+    if audio is not None and audio_codecs is not None:
+        return audio.get("codec_name") in audio_codecs
+    return True
+
+
+def meets_quality(probe: Optional[dict], quality: Optional[str]) -> bool:
     """
-    # Simplified list of common encoders
-    encoders = [
-        "libx264",  # Most common, best quality
-        "libopenh264",  # Open source alternative
-        "h264_vaapi",  # Linux hardware encoder
-    ]
+    Whether the source's main video already meets a quality preset, so it can be copied
 
+    Without a preset any source does. Otherwise its bit rate (the stream's, or the whole file's
+    when the container does not store it) must not exceed the preset's VIDEO_QUALITY_BITRATES.
+    """
+    if quality is None:
+        return True
+    video, _ = _main_streams(probe or {})
+    if video is None:
+        return False
+
+    limit = VIDEO_QUALITY_BITRATES.get(quality, VIDEO_QUALITY_BITRATES["medium"])
+    for bitrate in (video.get("bit_rate"), probe.get("format", {}).get("bit_rate")):
+        try:
+            return int(bitrate) <= limit
+        except (TypeError, ValueError):
+            continue
+    return False
+
+
+def get_rotation(probe: Optional[dict]) -> int:
+    """Clockwise display rotation of the main video stream in degrees (0, 90, 180 or 270)"""
+    video, _ = _main_streams(probe or {})
+    if video is None:
+        return 0
+
+    for side_data in video.get("side_data_list", []):
+        if "rotation" in side_data:
+            # The display matrix stores a counter-clockwise angle
+            return round(-float(side_data["rotation"])) % 360
     try:
-        # Get list of available encoders from ffmpeg
-        result = subprocess.run(["ffmpeg", "-encoders"], capture_output=True, text=True)
-        available_encoders = result.stdout
+        return round(float(video.get("tags", {}).get("rotate", 0))) % 360
+    except ValueError:
+        return 0
+
+
+def can_concat_copy(probes: List[Optional[dict]], container: str) -> bool:
+    """Whether inputs share codec parameters, so the concat demuxer can join them as-is"""
+    if not probes or not all(can_copy_streams(probe, container) for probe in probes):
+        return False
+
+    signatures = set()
+    for probe in probes:
+        video, audio = _main_streams(probe)
+        video_keys = ("codec_name", "profile", "width", "height", "pix_fmt", "r_frame_rate")
+        audio_keys = ("codec_name", "sample_rate", "channels")
+        signatures.add(
+            (
+                tuple(video.get(key) for key in video_keys),
+                tuple(audio.get(key) for key in audio_keys) if audio else None,
+                get_rotation(probe),
+            )
+        )
+    return len(signatures) == 1
 
-        # Find first available encoder
-        for encoder in encoders:
-            if encoder in available_encoders:
-                return encoder
 
-        # If none found, return None
-        return None
-    except Exception:
-        return None
+def build_copy_output(
+    input_path: Path,
+    output_path: Path,
+    probe: dict,
+    container: str,
+    input_options: Optional[dict] = None,
+    output_options: Optional[dict] = None,
+):
+    """FFmpeg output node copying the main video and audio streams without re-encoding"""
+    source = ffmpeg.input(str(input_path), **(input_options or {}))
+    video, audio = _main_streams(probe)
+    streams = [source[str(video["index"])]]
+    if audio is not None:
+        streams.append(source[str(audio["index"])])
+
+    options = {"c": "copy", **(output_options or {})}
+    if container in ("mp4", "mov"):
+        options["movflags"] = "+faststart"
+
+    return ffmpeg.output(*streams, str(output_path), **options)
+
+
+def build_concat_copy_output(concat_file: Path, output_path: Path):
+    """
+    FFmpeg output node joining a concat list as-is
+
+    Only the streams can_concat_copy compared are copied.
+    """
+    source = ffmpeg.input(str(concat_file), format="concat", safe=0)
+    return ffmpeg.output(source["v:0"], source["a:0?"], str(output_path), c="copy")
+
+
+def _copy_streams(
+    input_path: Path,
+    output_path: Path,
+    probe: dict,
+    container: str,
+    input_options: Optional[dict] = None,
+    output_options: Optional[dict] = None,
+):
+    """Copy the main video and audio streams into output_path without re-encoding"""
+    stream = build_copy_output(
+        input_path, output_path, probe, container, input_options, output_options
+    )
+    ffmpeg.run(stream, overwrite_output=True, capture_stdout=True, capture_stderr=True)
+
+
+def _rewrite_rotation(
+    input_path: Path, output_path: Path, probe: dict, container: str, rotation: int
+) -> bool:
+    """Stream-copy with a new clockwise display rotation, True if the output carries it"""
+    attempts = (
+        ({"display_rotation": (360 - rotation) % 360}, {}),  # FFmpeg 6+
+        ({}, {"metadata:s:v:0": f"rotate={rotation}"}),  # Older FFmpeg
+    )
+    for input_options, output_options in attempts:
+        try:
+            _copy_streams(input_path, output_path, probe, container, input_options, output_options)
+        except ffmpeg.Error:
+            continue
+        if get_rotation(probe_video(output_path)) == rotation:
+            return True
+    return False
 
 
 def compress_video(
@@ -122,7 +298,7 @@ def compress_video(
 
 
 def convert_video(
-    input_path: Path, output_path: Path, output_format: str, quality: str = "medium"
+    input_path: Path, output_path: Path, output_format: str, quality: Optional[str] = None
 ) -> VideoProcessingResponse:
     """
     Convert a video to a different format
@@ -131,15 +307,39 @@ def convert_video(
         input_path: Path to input video
         output_path: Path to save converted video
         output_format: Target format (mp4, avi, mov, etc.)
-        quality: Conversion quality preset
+        quality: Conversion quality preset (None keeps the source quality, medium if re-encoded)
 
     Returns:
         VideoProcessingResponse with conversion results
+
+    Streams that already fit the target container (e.g. H.264/AAC from MKV to MP4) and meet
+    the quality preset are remuxed without re-encoding.
     """
     try:
         # Get original file size
         original_size = get_file_size(input_path)
 
+        # Remux when the codecs can stay as they are and the source meets the quality
+        container = output_format.lower()
+        probe = probe_video(input_path)
+        if can_copy_streams(probe, container) and meets_quality(probe, quality):
+            try:
+                _copy_streams(input_path, output_path, probe, container)
+                return VideoProcessingResponse(
+                    success=True,
+                    message=f"Video converted to {output_format.upper()} successfully "
+                    "(remuxed without re-encoding)",
+                    filename=output_path.name,
+                    download_url=f"/api/v1/download/{output_path.name}",
+                    original_size=original_size,
+                    processed_size=get_file_size(output_path),
+                    strategy=STRATEGY_REMUX,
+                )
+            except ffmpeg.Error:
+                delete_file(output_path)  # Fall back to re-encoding
+
+        quality = quality or "medium"
+
         # Get compression preset
         preset = VIDEO_COMPRESSION_PRESETS.get(quality, VIDEO_COMPRESSION_PRESETS["medium"])
 
@@ -182,6 +382,7 @@ def convert_video(
             download_url=f"/api/v1/download/{output_path.name}",
             original_size=original_size,
             processed_size=converted_size,
+            strategy=STRATEGY_REENCODE,
         )
 
     except ffmpeg.Error as e:
@@ -200,6 +401,52 @@ def convert_video(
         )
 
 
+def rotate_by_metadata(input_path: Path, output_path: Path, angle: int) -> bool:
+    """
+    Rotate by rewriting the display matrix of an MP4/MOV whose streams can be copied
+
+    Returns:
+        True if output_path was written with the new rotation, False if a re-encode is needed
+    """
+    container = output_path.suffix.lstrip(".").lower()
+    if angle not in (90, 180, 270) or container not in ROTATION_METADATA_CONTAINERS:
+        return False
+    probe = probe_video(input_path)
+    if not can_copy_streams(probe, container):
+        return False
+    rotation = (get_rotation(probe) + angle) % 360
+    return _rewrite_rotation(input_path, output_path, probe, container, rotation)
+
+
+def build_rotate_output(input_path: Path, output_path: Path, angle: int, encoder: str):
+    """FFmpeg graph re-encoding a video through the transpose filter (angle 90, 180 or 270)"""
+    stream = ffmpeg.input(str(input_path))
+
+    # Map angle to FFmpeg transpose filter
+    # transpose=1: 90° clockwise
+    # transpose=2: 90° counter-clockwise
+    # For 180°, we apply transpose twice
+    if angle == 90:
+        stream = ffmpeg.filter(stream, "transpose", "1")
+    elif angle == 180:
+        stream = ffmpeg.filter(stream, "transpose", "1")
+        stream = ffmpeg.filter(stream, "transpose", "1")
+    elif angle == 270:
+        stream = ffmpeg.filter(stream, "transpose", "2")
+
+    # Build output options with encoder
+    output_options = {"c:v": encoder, "c:a": "aac", "b:a": "128k"}
+
+    # Add quality parameters based on encoder type
+    if encoder == "libx264":
+        output_options["crf"] = "23"  # Good quality
+        output_options["preset"] = "medium"
+    elif encoder in ["libopenh264", "h264_vaapi"]:
+        output_options["b:v"] = "2.5M"
+
+    return ffmpeg.output(stream, str(output_path), **output_options)
+
+
 def rotate_video(input_path: Path, output_path: Path, angle: int) -> VideoProcessingResponse:
     """
     Rotate a video by a specified angle
@@ -211,11 +458,27 @@ def rotate_video(input_path: Path, output_path: Path, angle: int) -> VideoProces
 
     Returns:
         VideoProcessingResponse with rotation results
+
+    MP4 and MOV outputs are rotated by rewriting their display matrix when the streams
+    can be copied, other files are re-encoded through the transpose filter.
     """
     try:
         # Get original file size
         original_size = get_file_size(input_path)
 
+        # Rotation metadata rewrite: no re-encode, players apply the rotation on display
+        if rotate_by_metadata(input_path, output_path, angle):
+            return VideoProcessingResponse(
+                success=True,
+                message=f"Video rotated {angle} degrees successfully "
+                "(rotation metadata, no re-encoding)",
+                filename=output_path.name,
+                download_url=f"/api/v1/download/{output_path.name}",
+                original_size=original_size,
+                processed_size=get_file_size(output_path),
+                strategy=STRATEGY_ROTATION_METADATA,
+            )
+
         # Detect available H.264 encoder (needed for re-encoding after rotation)
         encoder = get_available_h264_encoder()
         if encoder is None:
@@ -225,39 +488,15 @@ def rotate_video(input_path: Path, output_path: Path, angle: int) -> VideoProces
                 filename=output_path.name if output_path else None,
             )
 
-        # Rotate video using FFmpeg
-        # We need to re-encode because rotation changes video dimensions
-        stream = ffmpeg.input(str(input_path))
-
-        # Map angle to FFmpeg transpose filter
-        # transpose=1: 90° clockwise
-        # transpose=2: 90° counter-clockwise
-        # For 180°, we apply transpose twice
-        if angle == 90:
-            stream = ffmpeg.filter(stream, "transpose", "1")
-        elif angle == 180:
-            stream = ffmpeg.filter(stream, "transpose", "1")
-            stream = ffmpeg.filter(stream, "transpose", "1")
-        elif angle == 270:
-            stream = ffmpeg.filter(stream, "transpose", "2")
-        else:
+        if angle not in (90, 180, 270):
             return VideoProcessingResponse(
                 success=False,
                 message=f"Unsupported rotation angle: {angle}. Supported angles: 90, 180, 270",
                 filename=output_path.name if output_path else None,
             )
 
-        # Build output options with encoder
-        output_options = {"c:v": encoder, "c:a": "aac", "b:a": "128k"}
-
-        # Add quality parameters based on encoder type
-        if encoder == "libx264":
-            output_options["crf"] = "23"  # Good quality
-            output_options["preset"] = "medium"
-        elif encoder in ["libopenh264", "h264_vaapi"]:
-            output_options["b:v"] = "2.5M"
-
-        stream = ffmpeg.output(stream, str(output_path), **output_options)
+        # We need to re-encode because rotation changes video dimensions
+        stream = build_rotate_output(input_path, output_path, angle, encoder)
         ffmpeg.run(stream, overwrite_output=True, capture_stdout=True, capture_stderr=True)
 
         # Get rotated file size
@@ -270,6 +509,7 @@ def rotate_video(input_path: Path, output_path: Path, angle: int) -> VideoProces
             download_url=f"/api/v1/download/{output_path.name}",
             original_size=original_size,
             processed_size=rotated_size,
+            strategy=STRATEGY_REENCODE,
         )
 
     except ffmpeg.Error as e:
@@ -288,6 +528,28 @@ def rotate_video(input_path: Path, output_path: Path, angle: int) -> VideoProces
         )
 
 
+# Audio codec per extract_audio output format
+EXTRACT_AUDIO_CODECS = {
+    "mp3": "libmp3lame",
+    "wav": "pcm_s16le",
+    "flac": "flac",
+    "ogg": "libvorbis",
+}
+
+
+def build_extract_audio_output(
+    input_path: Path, output_path: Path, output_format: str, bitrate: str
+):
+    """FFmpeg graph writing the audio track of a video (output_format in EXTRACT_AUDIO_CODECS)"""
+    stream = ffmpeg.input(str(input_path))
+    output_kwargs = {"vn": None, "acodec": EXTRACT_AUDIO_CODECS[output_format.lower()]}
+    # Bitrate only if relevant
+    if output_format.lower() in ["mp3", "ogg"]:
+        output_kwargs["b:a"] = bitrate
+
+    return ffmpeg.output(stream, str(output_path), **output_kwargs)
+
+
 def extract_audio(
     input_path: Path, output_path: Path, output_format: str = "mp3", bitrate: str = "192k"
 ) -> VideoProcessingResponse:
@@ -297,29 +559,14 @@ def extract_audio(
     try:
         original_size = get_file_size(input_path)
 
-        # Map codecs per format
-        codec_map = {
-            "mp3": "libmp3lame",
-            "wav": "pcm_s16le",
-            "flac": "flac",
-            "ogg": "libvorbis",
-        }
-
-        codec = codec_map.get(output_format.lower())
-        if codec is None:
+        if output_format.lower() not in EXTRACT_AUDIO_CODECS:
             return VideoProcessingResponse(
                 success=False,
                 message="Unsupported output audio format",
                 filename=output_path.name if output_path else None,
             )
 
-        stream = ffmpeg.input(str(input_path))
-        output_kwargs = {"vn": None, "acodec": codec}
-        # Bitrate only if relevant
-        if output_format.lower() in ["mp3", "ogg"]:
-            output_kwargs["b:a"] = bitrate
-
-        stream = ffmpeg.output(stream, str(output_path), **output_kwargs)
+        stream = build_extract_audio_output(input_path, output_path, output_format, bitrate)
         ffmpeg.run(stream, overwrite_output=True, capture_stdout=True, capture_stderr=True)
 
         processed_size = get_file_size(output_path)
@@ -349,6 +596,161 @@ def extract_audio(
         )
 
 
+# Animated outputs of video_to_gif (format -> display name), only GIF needs a palette
+ANIMATION_FORMATS = {"gif": "GIF", "webp": "Animated WebP", "apng": "APNG"}
+# File extension of each animated output
+ANIMATION_EXTENSIONS = {"gif": "gif", "webp": "webp", "apng": "png"}
+# paletteuse dithering modes
+GIF_DITHER_MODES = ("sierra2_4a", "floyd_steinberg", "bayer", "none")
+
+
+def get_webp_encoder() -> Optional[str]:
+    """Animated WebP encoder of this FFmpeg build, None without libwebp"""
+    for encoder in ("libwebp_anim", "libwebp"):
+        if capabilities.has_encoder(encoder):
+            return encoder
+    return None
+
+
+def check_gif_params(
+    input_path: Optional[Path],
+    start_time: float,
+    duration: Optional[float],
+    width: Optional[int],
+    fps: int,
+    output_format: str = "gif",
+    dither: str = "sierra2_4a",
+) -> Optional[str]:
+    """
+    Error message for GIF parameters FFmpeg would fail on (or waste a run on), None if valid
+
+    start_time is only checked against the video's length when input_path is given.
+    """
+    if start_time < 0:
+        return "start_time must be non-negative"
+    if duration is not None and duration <= 0:
+        return "duration must be greater than 0 when provided"
+    if fps < 1 or fps > 60:
+        return "fps must be between 1 and 60"
+    if width is not None and width < 32:
+        return "width must be at least 32 pixels"
+    if output_format not in ANIMATION_FORMATS:
+        return f"output_format must be one of: {', '.join(ANIMATION_FORMATS)}"
+    if dither not in GIF_DITHER_MODES:
+        return f"dither must be one of: {', '.join(GIF_DITHER_MODES)}"
+    if output_format == "webp" and not get_webp_encoder():
+        return "WebP output needs FFmpeg built with libwebp"
+
+    info = media_probe.get(input_path) if input_path else None
+    if info and info.duration is not None and start_time >= info.duration:
+        return f"start_time is beyond the end of the video ({info.duration:.2f}s)"
+    return None
+
+
+def _gif_frames(
+    input_path: Path,
+    start_time: float,
+    duration: Optional[float],
+    width: Optional[int],
+    fps: float,
+):
+    """Frames of a video segment at the GIF's rate and width"""
+    # -ss/-t as input options: FFmpeg seeks to the keyframe before start_time and only
+    # decodes from there, instead of decoding the whole video up to it
+    input_kwargs = {}
+    if start_time:
+        input_kwargs["ss"] = start_time
+    if duration:
+        input_kwargs["t"] = duration
+
+    stream = ffmpeg.input(str(input_path), **input_kwargs)
+    stream = ffmpeg.filter(stream, "fps", fps)
+    if width:
+        stream = ffmpeg.filter(stream, "scale", width, -1, flags="lanczos")
+    return stream
+
+
+def gif_palette_key(
+    input_path: Path,
+    start_time: float,
+    duration: Optional[float],
+    width: Optional[int],
+    fps: int,
+    sparse_palette: bool,
+) -> Optional[str]:
+    """Palette cache key of a GIF segment, None when the input's hash is unknown"""
+    content_hash = get_known_hash(input_path)
+    if not content_hash:
+        return None
+    params = {
+        "start_time": start_time,
+        "duration": duration,
+        "width": width,
+        "fps": fps,
+        "sparse": sparse_palette,
+    }
+    return ResultCache.make_key(content_hash, "video.gif_palette", params)
+
+
+def build_palette_output(
+    input_path: Path,
+    palette_path: Path,
+    start_time: float,
+    duration: Optional[float],
+    width: Optional[int],
+    fps: int,
+    sparse_palette: bool = False,
+):
+    """
+    FFmpeg graph writing the palette of a GIF segment to a PNG
+
+    With sparse_palette the colors are sampled from GIF_PALETTE_SAMPLE_FPS frames per
+    second instead of every frame of the GIF
+    """
+    sample_fps = min(fps, GIF_PALETTE_SAMPLE_FPS) if sparse_palette else fps
+    stream = _gif_frames(input_path, start_time, duration, width, sample_fps)
+    return ffmpeg.output(stream.filter("palettegen"), str(palette_path))
+
+
+def build_gif_output(
+    input_path: Path,
+    output_path: Path,
+    start_time: float,
+    duration: Optional[float],
+    width: Optional[int],
+    fps: int,
+    loop: bool,
+    palette_path: Optional[Path] = None,
+    dither: str = "sierra2_4a",
+    output_format: str = "gif",
+):
+    """
+    FFmpeg graph rendering a video segment to an animated GIF, WebP or APNG
+
+    GIFs are mapped onto a palette PNG made by build_palette_output, so frames stream
+    through instead of being buffered until the palette of the whole segment is known
+    """
+    stream = _gif_frames(input_path, start_time, duration, width, fps)
+
+    if output_format == "webp":
+        return ffmpeg.output(
+            stream,
+            str(output_path),
+            vcodec=get_webp_encoder(),
+            quality=75,
+            loop=0 if loop else 1,
+        )
+    if output_format == "apng":
+        # plays=0 => infinite loop
+        return ffmpeg.output(stream, str(output_path), f="apng", plays=0 if loop else 1)
+
+    palette = ffmpeg.input(str(palette_path))
+    palette_use = ffmpeg.filter([stream, palette], "paletteuse", dither=dither)
+
+    # loop=0 => infinite loop, loop=1 => play once then stop
+    return ffmpeg.output(palette_use, str(output_path), loop=0 if loop else 1)
+
+
 def video_to_gif(
     input_path: Path,
     output_path: Path,
@@ -357,10 +759,16 @@ def video_to_gif(
     width: Optional[int] = None,
     fps: int = 12,
     loop: bool = True,
+    output_format: str = "gif",
+    dither: str = "sierra2_4a",
+    sparse_palette: bool = False,
 ) -> VideoProcessingResponse:
     """
     Convert a video segment to an animated GIF using FFmpeg with palette optimization.
 
+    The palette is generated in its own run (or reused from the palette cache when the
+    same segment of the same upload was rendered before), then applied while streaming.
+
     Args:
         input_path: Path to input video.
         output_path: Path to save generated GIF.
@@ -369,68 +777,57 @@ def video_to_gif(
         width: Target width in pixels (maintains aspect ratio).
         fps: Frames per second for the GIF.
         loop: Whether the GIF should loop indefinitely.
+        output_format: gif, webp or apng (WebP and APNG need no palette).
+        dither: paletteuse dithering mode (GIF only).
+        sparse_palette: Sample the palette from a few frames per second (GIF only).
 
     Returns:
         VideoProcessingResponse with conversion results.
     """
+    palette_path = None
     try:
         # Basic validation to avoid expensive FFmpeg runs for invalid params
-        if start_time < 0:
-            return VideoProcessingResponse(
-                success=False,
-                message="start_time must be non-negative",
-                filename=output_path.name if output_path else None,
-            )
-
-        if duration is not None and duration <= 0:
-            return VideoProcessingResponse(
-                success=False,
-                message="duration must be greater than 0 when provided",
-                filename=output_path.name if output_path else None,
-            )
-
-        if fps < 1 or fps > 60:
-            return VideoProcessingResponse(
-                success=False,
-                message="fps must be between 1 and 60",
-                filename=output_path.name if output_path else None,
-            )
-
-        if width is not None and width < 32:
+        error = check_gif_params(
+            input_path, start_time, duration, width, fps, output_format, dither
+        )
+        if error:
             return VideoProcessingResponse(
                 success=False,
-                message="width must be at least 32 pixels",
+                message=error,
                 filename=output_path.name if output_path else None,
             )
 
         original_size = get_file_size(input_path)
 
-        input_kwargs = {}
-        if start_time:
-            input_kwargs["ss"] = start_time
-        if duration:
-            input_kwargs["t"] = duration
-
-        # Build the FFmpeg pipeline with palette optimization
-        stream = ffmpeg.input(str(input_path), **input_kwargs)
-        stream = ffmpeg.filter(stream, "fps", fps)
-
-        if width:
-            stream = ffmpeg.filter(stream, "scale", width, -1, flags="lanczos")
-
-        split_streams = stream.filter_multi_output("split")
-        palette = split_streams[0].filter("palettegen")
-        palette_use = ffmpeg.filter([split_streams[1], palette], "paletteuse")
-
-        # loop=0 => infinite loop, loop=1 => play once then stop
-        output = ffmpeg.output(palette_use, str(output_path), loop=0 if loop else 1)
+        if output_format == "gif":
+            palette_path = output_path.with_name(f"palette_{output_path.stem}.png")
+            key = gif_palette_key(input_path, start_time, duration, width, fps, sparse_palette)
+            if not palette_cache.get(key, palette_path):
+                palette = build_palette_output(
+                    input_path, palette_path, start_time, duration, width, fps, sparse_palette
+                )
+                ffmpeg.run(palette, overwrite_output=True, capture_stdout=True, capture_stderr=True)
+                palette_cache.put(key, palette_path)
+
+        output = build_gif_output(
+            input_path,
+            output_path,
+            start_time,
+            duration,
+            width,
+            fps,
+            loop,
+            palette_path=palette_path,
+            dither=dither,
+            output_format=output_format,
+        )
         ffmpeg.run(output, overwrite_output=True, capture_stdout=True, capture_stderr=True)
 
         processed_size = get_file_size(output_path)
 
         return VideoProcessingResponse(
             success=True,
-            message="GIF created successfully",
+            message=f"{ANIMATION_FORMATS[output_format]} created successfully",
             filename=output_path.name,
             download_url=f"/api/v1/download/{output_path.name}",
             original_size=original_size,
@@ -452,22 +849,205 @@ def video_to_gif(
             filename=output_path.name if output_path else None,
         )
 
+    finally:
+        if palette_path:
+            delete_file(palette_path)
+
+
+# Thumbnail sprite sheet limits
+MAX_THUMBNAILS = 100
+MAX_THUMBNAIL_WIDTH = 640
+
+
+def check_thumbnail_params(count: int, width: int, columns: Optional[int]) -> Optional[str]:
+    """Error message for thumbnail parameters, None if valid"""
+    if count < 1 or count > MAX_THUMBNAILS:
+        return f"count must be between 1 and {MAX_THUMBNAILS}"
+    if width < 32 or width > MAX_THUMBNAIL_WIDTH:
+        return f"width must be between 32 and {MAX_THUMBNAIL_WIDTH} pixels"
+    if columns is not None and (columns < 1 or columns > count):
+        return "columns must be between 1 and count"
+    return None
+
+
+def plan_thumbnails(
+    input_path: Path, count: int, width: int, columns: Optional[int] = None
+) -> Optional[dict]:
+    """
+    Seek times and sprite layout of evenly spaced thumbnails
+
+    Thumbnail i stands for [i, i + 1) * duration / count and is taken at the middle of
+    that interval. The height keeps the displayed aspect ratio (rotation applied).
+
+    Returns:
+        {"times", "interval", "duration", "width", "height", "columns", "rows"},
+        None if the file has no video stream or duration
+    """
+    info = media_probe.get(input_path)
+    if not info or not info.duration:
+        return None
+    probe = info.probe
+    video, _ = _main_streams(probe)
+    if not video or not video.get("width") or not video.get("height"):
+        return None
+
+    source_width, source_height = int(video["width"]), int(video["height"])
+    if get_rotation(probe) in (90, 270):
+        source_width, source_height = source_height, source_width
+    height = max(2, round(width * source_height / source_width / 2) * 2)
+
+    interval = info.duration / count
+    columns = columns or math.ceil(math.sqrt(count))
+    return {
+        "times": [(i + 0.5) * interval for i in range(count)],
+        "interval": interval,
+        "duration": info.duration,
+        "width": width,
+        "height": height,
+        "columns": columns,
+        "rows": math.ceil(count / columns),
+    }
+
+
+def build_thumbnail_output(input_path: Path, frame_path: Path, time: float, plan: dict):
+    """
+    FFmpeg graph grabbing one thumbnail near a timestamp
+
+    The input is seeked to the keyframe before the timestamp and only keyframes are decoded
+    (-skip_frame nokey), so each thumbnail costs one frame decode whatever the video length
+    """
+    stream = ffmpeg.input(
+        str(input_path), ss=f"{time:.3f}", skip_frame="nokey", noaccurate_seek=None
+    )
+    stream = ffmpeg.filter(stream, "scale", plan["width"], plan["height"])
+    return ffmpeg.output(stream, str(frame_path), **{"frames:v": 1, "q:v": 2})
+
+
+def build_sprite_output(frames_dir: Path, sprite_path: Path, plan: dict):
+    """FFmpeg graph tiling the grabbed thumbnails into one sprite sheet"""
+    stream = ffmpeg.input(str(frames_dir / "thumb_%04d.jpg"), start_number=0)
+    stream = ffmpeg.filter(stream, "tile", f"{plan['columns']}x{plan['rows']}")
+    return ffmpeg.output(stream, str(sprite_path), **{"frames:v": 1, "q:v": 3})
+
+
+def _vtt_timestamp(seconds: float) -> str:
+    milliseconds = round(seconds * 1000)
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+
+def build_thumbnails_vtt(plan: dict, sprite_name: str) -> str:
+    """
+    WebVTT thumbnail track pointing each interval at its cell of the sprite
+
+    Cues use media fragments (sprite.jpg#xywh=x,y,w,h) relative to the VTT's own URL
+    """
+    width, height, columns = plan["width"], plan["height"], plan["columns"]
+    lines = ["WEBVTT", ""]
+    for i in range(len(plan["times"])):
+        start = i * plan["interval"]
+        end = plan["duration"] if i == len(plan["times"]) - 1 else (i + 1) * plan["interval"]
+        x, y = (i % columns) * width, (i // columns) * height
+        lines.append(f"{_vtt_timestamp(start)} --> {_vtt_timestamp(end)}")
+        lines.append(f"{sprite_name}#xywh={x},{y},{width},{height}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def extract_thumbnails(
+    input_path: Path,
+    sprite_path: Path,
+    vtt_path: Path,
+    count: int = 10,
+    width: int = 160,
+    columns: Optional[int] = None,
+) -> VideoThumbnailsResponse:
+    """
+    Extract evenly spaced thumbnails into a sprite sheet with a WebVTT index
+
+    Args:
+        input_path: Path to input video
+        sprite_path: Path to save the JPEG sprite sheet
+        vtt_path: Path to save the WebVTT thumbnail track
+        count: Number of thumbnails
+        width: Thumbnail width in pixels (height keeps the aspect ratio)
+        columns: Sprite columns (default: square-ish grid)
+
+    Returns:
+        VideoThumbnailsResponse with the sprite and VTT download URLs
+    """
+    frames_dir = sprite_path.parent / f"frames_{sprite_path.stem}"
+    try:
+        error = check_thumbnail_params(count, width, columns)
+        if error:
+            return VideoThumbnailsResponse(success=False, message=error)
+
+        plan = plan_thumbnails(input_path, count, width, columns)
+        if not plan:
+            return VideoThumbnailsResponse(
+                success=False, message="Could not read the video stream or its duration"
+            )
+
+        frames_dir.mkdir(exist_ok=True)
+        for i, time in enumerate(plan["times"]):
+            output = build_thumbnail_output(
+                input_path, frames_dir / f"thumb_{i:04d}.jpg", time, plan
+            )
+            ffmpeg.run(output, overwrite_output=True, capture_stdout=True, capture_stderr=True)
+
+        output = build_sprite_output(frames_dir, sprite_path, plan)
+        ffmpeg.run(output, overwrite_output=True, capture_stdout=True, capture_stderr=True)
+        vtt_path.write_text(build_thumbnails_vtt(plan, sprite_path.name))
+
+        return VideoThumbnailsResponse(
+            success=True,
+            message=f"{count} thumbnails extracted successfully",
+            filename=sprite_path.name,
+            download_url=f"/api/v1/download/{sprite_path.name}",
+            vtt_filename=vtt_path.name,
+            vtt_download_url=f"/api/v1/download/{vtt_path.name}",
+            count=count,
+            columns=plan["columns"],
+            rows=plan["rows"],
+            thumbnail_width=plan["width"],
+            thumbnail_height=plan["height"],
+            original_size=get_file_size(input_path),
+            processed_size=get_file_size(sprite_path),
+        )
+
+    except ffmpeg.Error as e:
+        error_message = e.stderr.decode() if e.stderr else str(e)
+        return VideoThumbnailsResponse(success=False, message=f"FFmpeg error: {error_message}")
+
+    except Exception as e:
+        return VideoThumbnailsResponse(
+            success=False, message=f"Error extracting thumbnails: {str(e)}"
+        )
+
+    finally:
+        shutil.rmtree(frames_dir, ignore_errors=True)
+
 
 def merge_videos(
     input_paths: list[Path],
     output_path: Path,
     output_format: str = "mp4",
-    quality: str = "medium",
+    quality: Optional[str] = None,
     merge_mode: str = "quality",
 ) -> VideoProcessingResponse:
     """
     Merge multiple video files into one using FFmpeg concat demuxer
 
+    A quality-mode merge of inputs that share codec parameters and meet the quality preset
+    joins them without re-encoding.
+
     Args:
         input_paths: List of paths to input videos (in order)
         output_path: Path to save merged video
         output_format: Output video format (mp4, avi, mov, etc.)
-        quality: Output quality preset (low, medium, high)
+        quality: Output quality preset (None keeps the source quality, medium if re-encoded)
 
     Returns:
         VideoProcessingResponse with merge results
@@ -504,11 +1084,38 @@ def merge_videos(
             # Use concat demuxer for merging
             stream = ffmpeg.input(str(concat_file), format="concat", safe=0)
 
+            # Quality mode also copies when ffprobe shows the inputs share codec parameters
+            # and already meet the quality
+            probes = [probe_video(path) for path in input_paths] if merge_mode != "fast" else []
+
+            if can_concat_copy(probes, output_format.lower()) and all(
+                meets_quality(probe, quality) for probe in probes
+            ):
+                # Re-encode if FFmpeg still rejects them (e.g. differing extradata or time base)
+                copy_stream = build_concat_copy_output(concat_file, output_path)
+                try:
+                    ffmpeg.run(
+                        copy_stream, overwrite_output=True, capture_stdout=True, capture_stderr=True
+                    )
+                    return VideoProcessingResponse(
+                        success=True,
+                        message=f"Successfully merged {len(input_paths)} videos",
+                        filename=output_path.name,
+                        download_url=f"/api/v1/download/{output_path.name}",
+                        original_size=total_original_size,
+                        processed_size=get_file_size(output_path),
+                        strategy=STRATEGY_STREAM_COPY,
+                    )
+                except ffmpeg.Error:
+                    delete_file(output_path)
+
             if merge_mode == "fast":
                 # Fast mode: copy streams without re-encoding (very fast)
                 # Warning: requires all videos to have identical codecs, resolution, fps, etc.
                 output_options = {"c": "copy"}  # Copy all streams without re-encoding
+                strategy = STRATEGY_STREAM_COPY
             else:
+                strategy = STRATEGY_REENCODE
                 # Quality mode: re-encode for compatibility (slower but more reliable)
                 # Detect available H.264 encoder
                 encoder = get_available_h264_encoder()
@@ -520,6 +1127,7 @@ def merge_videos(
                     )
 
                 # Get compression preset
+                quality = quality or "medium"
                 preset = VIDEO_COMPRESSION_PRESETS.get(quality, VIDEO_COMPRESSION_PRESETS["medium"])
 
                 # Build output options based on encoder
@@ -546,6 +1154,7 @@ def merge_videos(
                 download_url=f"/api/v1/download/{output_path.name}",
                 original_size=total_original_size,
                 processed_size=merged_size,
+                strategy=strategy,
             )
 
         finally:
@@ -4,54 +4,487 @@ Uses FFmpeg with progress parsing for real-time updates
 """
 
 import asyncio
+import bisect
 import os
 from pathlib import Path
-import re
-import subprocess
-from typing import Callable, Optional
-
-from app.config import VIDEO_COMPRESSION_PRESETS
+import shutil
+from typing import Callable, List, Optional, Tuple
+
+import ffmpeg
+
+from app.config import (
+    VIDEO_COMPRESSION_PRESETS,
+    VIDEO_SEGMENT_MIN_SECONDS,
+    VIDEO_STREAMING_LADDER,
+    VIDEO_STREAMING_SEGMENT_SECONDS,
+    VIDEO_TARGET_SIZE_LADDER,
+    VIDEO_TARGET_SIZE_MIN_KBPS,
+    VIDEO_TARGET_SIZE_OVERHEAD,
+)
+from app.services.video_service import (
+    ANIMATION_FORMATS,
+    EXTRACT_AUDIO_CODECS,
+    STRATEGY_REENCODE,
+    STRATEGY_REMUX,
+    STRATEGY_ROTATION_METADATA,
+    STRATEGY_STREAM_COPY,
+    build_concat_copy_output,
+    build_copy_output,
+    build_extract_audio_output,
+    build_gif_output,
+    build_palette_output,
+    build_rotate_output,
+    build_sprite_output,
+    build_thumbnail_output,
+    build_thumbnails_vtt,
+    can_concat_copy,
+    can_copy_streams,
+    check_gif_params,
+    check_thumbnail_params,
+    get_available_h264_encoder,
+    gif_palette_key,
+    meets_quality,
+    plan_thumbnails,
+    probe_video,
+    rotate_by_metadata,
+)
+from app.tasks.cancellation import cancellation_registry
 from app.tasks.models import TaskResult, TaskStatus
+from app.tasks.scheduler import SEGMENT_JOB, scheduler
 from app.tasks.store import task_store
-from app.utils.file_handler import calculate_compression_ratio, get_file_size
+from app.utils.artifact_cache import palette_cache
+from app.utils.executors import run_blocking
+from app.utils.ffmpeg_progress import run_ffmpeg, run_ffmpeg_graph
+from app.utils.file_handler import calculate_compression_ratio, delete_file, get_file_size
+from app.utils.media_probe import media_probe
 
+# Segmented output formats and the playlist clients open first
+STREAMING_FORMATS = {"hls": "master.m3u8", "dash": "manifest.mpd"}
 
-def get_available_h264_encoder() -> Optional[str]:
-    """Detect available H.264 encoder on the system"""
-    encoders = ["libx264", "libopenh264", "h264_vaapi"]
 
-    try:
-        result = subprocess.run(["ffmpeg", "-encoders"], capture_output=True, text=True)
-        available_encoders = result.stdout
+def get_video_duration(input_path: Path) -> Optional[float]:
+    """Get video duration in seconds (cached ffprobe result)"""
+    info = media_probe.get(input_path)
+    return info.duration if info else None
+
+
+def get_keyframe_times(input_path: Path) -> List[float]:
+    """Keyframe timestamps (seconds from the first keyframe), cached with the file's probe"""
+    return media_probe.keyframes(input_path)
 
-        for encoder in encoders:
-            if encoder in available_encoders:
-                return encoder
+
+def has_audio_stream(input_path: Path) -> bool:
+    """Whether the file has at least one audio stream"""
+    info = media_probe.get(input_path)
+    return info.has_audio if info else False
+
+
+def get_video_height(input_path: Path) -> Optional[int]:
+    """Height in pixels of the first video stream"""
+    info = media_probe.get(input_path)
+    if not info:
         return None
-    except Exception:
+    video = next((s for s in info.streams if s.get("codec_type") == "video"), None)
+    return int(video["height"]) if video and video.get("height") else None
+
+
+def plan_target_size(
+    target_size_mb: float, duration: float, with_audio: bool, source_height: Optional[int]
+) -> Optional[dict]:
+    """
+    Bitrates and output height that make a video fit a size budget
+
+    Args:
+        target_size_mb: Wanted output size in megabytes
+        duration: Video duration in seconds
+        with_audio: Whether an audio track has to fit in the budget
+        source_height: Input height in pixels (None if unknown)
+
+    Returns:
+        {"video_kbps", "audio_kbps", "height"} (height None keeps the input size),
+        None if the video would get less than VIDEO_TARGET_SIZE_MIN_KBPS
+    """
+    budget_kbits = target_size_mb * 8 * 1024 * (1 - VIDEO_TARGET_SIZE_OVERHEAD / 100)
+    total_kbps = budget_kbits / duration
+
+    audio_kbps = 0
+    if with_audio:
+        audio_kbps = 128 if total_kbps >= 1000 else 64
+    video_kbps = int(total_kbps - audio_kbps)
+    if video_kbps < VIDEO_TARGET_SIZE_MIN_KBPS:
         return None
 
+    # Too few bits for the input resolution look worse than a smaller frame
+    height = next(h for min_kbps, h in VIDEO_TARGET_SIZE_LADDER if video_kbps >= min_kbps)
+    if source_height is None or height >= source_height:
+        height = None
 
-def get_video_duration(input_path: Path) -> Optional[float]:
-    """Get video duration in seconds using ffprobe"""
-    try:
-        result = subprocess.run(
+    return {"video_kbps": video_kbps, "audio_kbps": audio_kbps, "height": height}
+
+
+def plan_segments(
+    keyframes: List[float], duration: float, max_segments: int, min_seconds: float
+) -> List[Tuple[float, Optional[float]]]:
+    """
+    Split a video into segments that start on keyframes
+
+    Args:
+        keyframes: Sorted keyframe timestamps in seconds
+        duration: Video duration in seconds
+        max_segments: Upper bound on the number of segments
+        min_seconds: Segments shorter than this are not created
+
+    Returns:
+        (start, end) pairs, the last end is None (encode to the end of the file)
+    """
+    count = min(max_segments, int(duration // min_seconds)) if min_seconds > 0 else max_segments
+    cuts = [0.0]
+    for i in range(1, max(count, 1)):
+        target = duration * i / count
+        # Nearest keyframe to the ideal cut point
+        index = bisect.bisect_left(keyframes, target)
+        candidates = keyframes[max(index - 1, 0) : index + 1]
+        if not candidates:
+            continue
+        cut = min(candidates, key=lambda t: abs(t - target))
+        if cut - cuts[-1] >= min_seconds and duration - cut >= min_seconds:
+            cuts.append(cut)
+
+    ends: List[Optional[float]] = [*cuts[1:], None]
+    return list(zip(cuts, ends))
+
+
+def plan_renditions(source_height: Optional[int]) -> List[Tuple[int, int]]:
+    """
+    Rungs of the HLS/DASH ladder for a source video
+
+    Args:
+        source_height: Height of the source in pixels (None if unknown)
+
+    Returns:
+        (height, video kbps) per rendition, tallest first. Sources shorter than the lowest
+        rung get a single rendition at their own height, unknown sizes stop at 720p.
+    """
+    max_height = source_height or 720
+    renditions = [(height, kbps) for height, kbps in VIDEO_STREAMING_LADDER if height <= max_height]
+    if not renditions:
+        lowest_kbps = min(kbps for _, kbps in VIDEO_STREAMING_LADDER)
+        renditions = [(max(2, max_height // 2 * 2), lowest_kbps)]
+    return renditions
+
+
+def _video_codec_args(encoder: str, quality: str) -> List[str]:
+    """FFmpeg video encoder arguments for a quality level"""
+    args = ["-c:v", encoder]
+    if encoder == "libx264":
+        preset = VIDEO_COMPRESSION_PRESETS.get(quality, VIDEO_COMPRESSION_PRESETS["medium"])
+        args.extend(["-crf", str(preset["crf"]), "-preset", preset["preset"]])
+    else:
+        quality_map = {"low": "1M", "medium": "2.5M", "high": "5M"}
+        args.extend(["-b:v", quality_map.get(quality, "2.5M")])
+    return args
+
+
+async def _encode_single(
+    task_id: str,
+    input_path: Path,
+    output_path: Path,
+    encoder: str,
+    quality: str,
+    duration: float,
+    label: str,
+) -> Optional[str]:
+    """Encode a video in one FFmpeg run, returns an error message on failure"""
+
+    def report(seconds: float):
+        percent = min((seconds / duration) * 100, 99)
+        task_store.update_progress(task_id, percent, f"{label}... {percent:.0f}%", "encoding")
+
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-i",
+        str(input_path),
+        *_video_codec_args(encoder, quality),
+        "-c:a",
+        "aac",
+        "-b:a",
+        "128k",
+        "-progress",
+        "pipe:1",  # Output progress to stdout
+        "-nostats",
+        str(output_path),
+    ]
+
+    returncode, stderr = await run_ffmpeg(task_id, cmd, report)
+    if returncode != 0:
+        return stderr or "FFmpeg error"
+    return None
+
+
+async def _encode_segmented(
+    task_id: str,
+    input_path: Path,
+    output_path: Path,
+    encoder: str,
+    quality: str,
+    duration: float,
+    label: str,
+) -> Optional[str]:
+    """
+    Encode keyframe-aligned segments in parallel, then join them without re-encoding
+
+    Segments run in SEGMENT_JOB scheduler slots and audio is encoded once alongside them
+    (encoding it per segment would add AAC priming gaps at every join). Videos too short
+    to split fall back to a single encode.
+
+    Returns:
+        Error message on failure, None on success
+    """
+    keyframes = await run_blocking(get_keyframe_times, input_path)
+    segments = plan_segments(
+        keyframes, duration, scheduler.limit(SEGMENT_JOB), VIDEO_SEGMENT_MIN_SECONDS
+    )
+    if len(segments) < 2:
+        return await _encode_single(
+            task_id, input_path, output_path, encoder, quality, duration, label
+        )
+
+    with_audio = await run_blocking(has_audio_stream, input_path)
+    # Split the cores between concurrent segment encoders
+    threads = max(1, (os.cpu_count() or 2) // scheduler.limit(SEGMENT_JOB))
+    work_dir = output_path.parent / f"segments_{output_path.stem}"
+    work_dir.mkdir(exist_ok=True)
+    encoded = [0.0] * len(segments)
+
+    def report(index: int, seconds: float):
+        encoded[index] = seconds
+        percent = min(5 + sum(encoded) / duration * 90, 95)
+        task_store.update_progress(
+            task_id,
+            percent,
+            f"{label}... {percent:.0f}% ({len(segments)} segments)",
+            "encoding",
+        )
+
+    async def encode_segment(index: int, start: float, end: Optional[float]) -> Path:
+        path = work_dir / f"segment_{index:04d}.mkv"
+        cmd = ["ffmpeg", "-y", "-v", "error", "-ss", f"{start:.6f}", "-i", str(input_path)]
+        if end is not None:
+            cmd.extend(["-t", f"{end - start:.6f}"])
+        cmd.extend(
             [
-                "ffprobe",
-                "-v",
-                "error",
-                "-show_entries",
-                "format=duration",
-                "-of",
-                "default=noprint_wrappers=1:nokey=1",
-                str(input_path),
-            ],
-            capture_output=True,
-            text=True,
+                "-map",
+                "0:v:0",
+                *_video_codec_args(encoder, quality),
+                "-threads",
+                str(threads),
+                "-progress",
+                "pipe:1",
+                "-nostats",
+                str(path),
+            ]
+        )
+        async with scheduler.slot(SEGMENT_JOB):
+            returncode, stderr = await run_ffmpeg(
+                task_id, cmd, lambda seconds: report(index, seconds)
+            )
+        if returncode != 0:
+            raise RuntimeError(stderr or f"FFmpeg error in segment {index + 1}")
+        return path
+
+    async def encode_audio() -> Path:
+        path = work_dir / "audio.m4a"
+        cmd = ["ffmpeg", "-y", "-v", "error", "-i", str(input_path)]
+        cmd.extend(["-map", "0:a:0", "-c:a", "aac", "-b:a", "128k", str(path)])
+        async with scheduler.slot(SEGMENT_JOB):
+            returncode, stderr = await run_ffmpeg(task_id, cmd)
+        if returncode != 0:
+            raise RuntimeError(stderr or "FFmpeg error while encoding audio")
+        return path
+
+    try:
+        try:
+            async with asyncio.TaskGroup() as group:
+                jobs = [
+                    group.create_task(encode_segment(i, start, end))
+                    for i, (start, end) in enumerate(segments)
+                ]
+                audio_job = group.create_task(encode_audio()) if with_audio else None
+        except ExceptionGroup as errors:
+            # The first failure cancelled the other segments
+            return str(errors.exceptions[0])
+
+        task_store.update_progress(task_id, 96, "Joining segments...", "finalizing")
+
+        # Concat demuxer list, paths relative to the list file
+        concat_file = work_dir / "segments.txt"
+        concat_file.write_text("".join(f"file '{job.result().name}'\n" for job in jobs))
+
+        cmd = ["ffmpeg", "-y", "-v", "error", "-f", "concat", "-safe", "0"]
+        cmd.extend(["-i", str(concat_file)])
+        if audio_job:
+            cmd.extend(["-i", str(audio_job.result()), "-map", "0:v:0", "-map", "1:a:0"])
+        cmd.extend(["-c", "copy", str(output_path)])
+
+        returncode, stderr = await run_ffmpeg(task_id, cmd)
+        if returncode != 0:
+            return stderr or "FFmpeg error while joining segments"
+        return None
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+async def _encode_target_size(
+    task_id: str,
+    input_path: Path,
+    output_path: Path,
+    encoder: str,
+    quality: str,
+    duration: float,
+    plan: dict,
+) -> Optional[str]:
+    """
+    Encode at the bitrate of a target size plan
+
+    libx264 runs two passes (analysis, then encode), each reported over half of the
+    progress range. Other encoders get a single constrained-bitrate pass.
+
+    Returns:
+        Error message on failure, None on success
+    """
+    video_args = ["-c:v", encoder, "-b:v", f"{plan['video_kbps']}k"]
+    if plan["height"]:
+        video_args.extend(["-vf", f"scale=-2:{plan['height']}"])
+    if plan["audio_kbps"]:
+        audio_args = ["-c:a", "aac", "-b:a", f"{plan['audio_kbps']}k"]
+    else:
+        audio_args = ["-an"]
+
+    def reporter(start: float, end: float, label: str) -> Callable[[float], None]:
+        def report(seconds: float):
+            done = min(seconds / duration, 1.0)
+            percent = start + done * (end - start)
+            task_store.update_progress(
+                task_id, percent, f"{label}... {done * 100:.0f}%", "encoding"
+            )
+
+        return report
+
+    if encoder != "libx264":
+        video_args.extend(
+            ["-maxrate", f"{plan['video_kbps']}k", "-bufsize", f"{plan['video_kbps'] * 2}k"]
+        )
+        cmd = ["ffmpeg", "-y", "-i", str(input_path), *video_args, *audio_args]
+        cmd.extend(["-progress", "pipe:1", "-nostats", str(output_path)])
+        returncode, stderr = await run_ffmpeg(task_id, cmd, reporter(5, 99, "Encoding"))
+        return (stderr or "FFmpeg error") if returncode != 0 else None
+
+    preset = VIDEO_COMPRESSION_PRESETS.get(quality, VIDEO_COMPRESSION_PRESETS["medium"])
+    video_args.extend(["-preset", preset["preset"]])
+    passlog = output_path.parent / f"passlog_{output_path.stem}"
+
+    try:
+        first_pass = ["ffmpeg", "-y", "-i", str(input_path), *video_args]
+        first_pass.extend(["-pass", "1", "-passlogfile", str(passlog), "-an", "-f", "null"])
+        first_pass.extend(["-progress", "pipe:1", "-nostats", os.devnull])
+        returncode, stderr = await run_ffmpeg(
+            task_id, first_pass, reporter(5, 50, "Analyzing (pass 1/2)")
+        )
+        if returncode != 0:
+            return stderr or "FFmpeg error in the first pass"
+
+        second_pass = ["ffmpeg", "-y", "-i", str(input_path), *video_args]
+        second_pass.extend(["-pass", "2", "-passlogfile", str(passlog), *audio_args])
+        second_pass.extend(["-progress", "pipe:1", "-nostats", str(output_path)])
+        returncode, stderr = await run_ffmpeg(
+            task_id, second_pass, reporter(50, 99, "Encoding (pass 2/2)")
         )
-        return float(result.stdout.strip())
-    except Exception:
+        if returncode != 0:
+            return stderr or "FFmpeg error in the second pass"
         return None
+    finally:
+        # x264 writes <passlog>-0.log and <passlog>-0.log.mbtree
+        for path in passlog.parent.glob(f"{passlog.name}*"):
+            path.unlink(missing_ok=True)
+
+
+async def _encode_streaming(
+    task_id: str,
+    input_path: Path,
+    output_dir: Path,
+    encoder: str,
+    quality: str,
+    duration: float,
+    streaming_format: str,
+    renditions: List[Tuple[int, int]],
+    with_audio: bool,
+) -> Optional[str]:
+    """
+    Encode a rendition ladder into fMP4 segments and playlists in one FFmpeg run
+
+    The source is decoded once and split into one scaled stream per rendition. Keyframes are
+    forced every segment length so segments line up across renditions, and the audio is
+    encoded once and shared by all of them.
+
+    Returns:
+        Error message on failure, None on success
+    """
+    segment_seconds = str(VIDEO_STREAMING_SEGMENT_SECONDS)
+    count = len(renditions)
+    graph = f"[0:v]split={count}" + "".join(f"[s{i}]" for i in range(count))
+    for i, (height, _) in enumerate(renditions):
+        graph += f";[s{i}]scale=-2:{height}[v{i}]"
+
+    # The muxers log every segment they open, which would fill the unread stderr pipe
+    cmd = ["ffmpeg", "-y", "-v", "error", "-i", str(input_path), "-filter_complex", graph]
+    for i in range(count):
+        cmd.extend(["-map", f"[v{i}]"])
+    if with_audio:
+        cmd.extend(["-map", "0:a:0"])
+
+    cmd.extend(["-c:v", encoder])
+    if encoder == "libx264":
+        preset = VIDEO_COMPRESSION_PRESETS.get(quality, VIDEO_COMPRESSION_PRESETS["medium"])
+        # Scene-cut keyframes would make segment boundaries differ between renditions
+        cmd.extend(["-preset", preset["preset"], "-sc_threshold", "0"])
+    for i, (_, kbps) in enumerate(renditions):
+        cmd.extend([f"-b:v:{i}", f"{kbps}k", f"-maxrate:v:{i}", f"{kbps * 107 // 100}k"])
+        cmd.extend([f"-bufsize:v:{i}", f"{kbps * 3 // 2}k"])
+    cmd.extend(["-force_key_frames", f"expr:gte(t,n_forced*{segment_seconds})"])
+    if with_audio:
+        cmd.extend(["-c:a", "aac", "-b:a", "128k", "-ac", "2"])
+
+    if streaming_format == "hls":
+        names = [f"v:{i},name:{height}p" for i, (height, _) in enumerate(renditions)]
+        if with_audio:
+            names = ["a:0,agroup:audio,name:audio"] + [f"{n},agroup:audio" for n in names]
+        cmd.extend(["-f", "hls", "-hls_time", segment_seconds, "-hls_playlist_type", "vod"])
+        cmd.extend(["-hls_segment_type", "fmp4", "-hls_fmp4_init_filename", "init.mp4"])
+        cmd.extend(["-hls_segment_filename", str(output_dir / "stream_%v" / "seg_%05d.m4s")])
+        cmd.extend(["-master_pl_name", STREAMING_FORMATS["hls"]])
+        cmd.extend(["-var_stream_map", " ".join(names)])
+        target = output_dir / "stream_%v" / "index.m3u8"
+    else:
+        adaptation_sets = "id=0,streams=v id=1,streams=a" if with_audio else "id=0,streams=v"
+        cmd.extend(["-f", "dash", "-seg_duration", segment_seconds])
+        cmd.extend(["-use_template", "1", "-use_timeline", "1"])
+        cmd.extend(["-adaptation_sets", adaptation_sets])
+        # HLS playlists of the same segments, for players without DASH support
+        cmd.extend(["-hls_playlist", "1"])
+        target = output_dir / STREAMING_FORMATS["dash"]
+
+    def report(seconds: float):
+        percent = 5 + min(seconds / duration, 1.0) * 94
+        task_store.update_progress(task_id, percent, f"Packaging... {percent:.0f}%", "encoding")
+
+    cmd.extend(["-progress", "pipe:1", "-nostats", str(target)])
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    returncode, stderr = await run_ffmpeg(task_id, cmd, report)
+    if returncode != 0:
+        return stderr or "FFmpeg error"
+    return None
 
 
 async def compress_video_with_progress(
@@ -59,13 +492,21 @@ async def compress_video_with_progress(
     input_path: Path,
     output_path: Path,
     quality: str = "medium",
+    chunked: bool = False,
+    target_size_mb: Optional[float] = None,
 ) -> TaskResult:
     """
     Compress video with real-time progress updates via FFmpeg
 
-    Progress is tracked by parsing FFmpeg stderr output
+    Progress is tracked by parsing FFmpeg stderr output. With chunked=True the video is
+    split at keyframes and the segments are encoded in parallel. With target_size_mb the
+    bitrate is computed from the duration and libx264 encodes in two passes, scaling the
+    video down when the bitrate is too low for its resolution.
     """
     try:
+        # Partial output is deleted if the task is cancelled
+        cancellation_registry.register_output(task_id, output_path)
+
         # Update task: Starting
         task_store.update_progress(task_id, 0, "Analyzing video...", "analyzing")
 
@@ -73,15 +514,31 @@ async def compress_video_with_progress(
         original_size = get_file_size(input_path)
 
         # Get video duration for progress calculation
-        duration = get_video_duration(input_path)
+        duration = await run_blocking(get_video_duration, input_path)
+
+        plan = None
+        if target_size_mb:
+            if not duration:
+                error_msg = "Could not determine the video duration needed for a target size"
+                task_store.fail_task(task_id, error_msg)
+                return TaskResult(success=False, error=error_msg)
+
+            with_audio = await run_blocking(has_audio_stream, input_path)
+            source_height = await run_blocking(get_video_height, input_path)
+            plan = plan_target_size(target_size_mb, duration, with_audio, source_height)
+            if not plan:
+                error_msg = (
+                    f"{target_size_mb:g} MB is too small for a {duration:.0f}s video "
+                    f"(below {VIDEO_TARGET_SIZE_MIN_KBPS} kbps)"
+                )
+                task_store.fail_task(task_id, error_msg)
+                return TaskResult(success=False, error=error_msg)
+
         if not duration:
             duration = 100  # Fallback if we can't determine duration
 
-        # Get compression preset
-        preset = VIDEO_COMPRESSION_PRESETS.get(quality, VIDEO_COMPRESSION_PRESETS["medium"])
-
         # Detect encoder
-        encoder = get_available_h264_encoder()
+        encoder = await run_blocking(get_available_h264_encoder)
         if not encoder:
             task_store.fail_task(task_id, "No H.264 encoder available")
             return TaskResult(
@@ -91,69 +548,17 @@ async def compress_video_with_progress(
 
         task_store.update_progress(task_id, 5, "Starting compression...", "encoding")
 
-        # Build FFmpeg command
-        cmd = [
-            "ffmpeg",
-            "-y",
-            "-i",
-            str(input_path),
-            "-c:v",
-            encoder,
-            "-c:a",
-            "aac",
-            "-b:a",
-            "128k",
-            "-progress",
-            "pipe:1",  # Output progress to stdout
-            "-nostats",
-        ]
-
-        # Add quality parameters
-        if encoder == "libx264":
-            cmd.extend(["-crf", str(preset["crf"]), "-preset", preset["preset"]])
+        if plan:
+            error_msg = await _encode_target_size(
+                task_id, input_path, output_path, encoder, quality, duration, plan
+            )
         else:
-            quality_map = {"low": "1M", "medium": "2.5M", "high": "5M"}
-            cmd.extend(["-b:v", quality_map.get(quality, "2.5M")])
-
-        cmd.append(str(output_path))
-
-        # Run FFmpeg with progress tracking
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-
-        # Parse progress from stdout
-        current_time = 0
-        while True:
-            line = await process.stdout.readline()
-            if not line:
-                break
-
-            line_str = line.decode().strip()
-
-            # Parse out_time_ms from FFmpeg progress
-            if line_str.startswith("out_time_ms="):
-                try:
-                    time_ms = int(line_str.split("=")[1])
-                    current_time = time_ms / 1_000_000  # Convert to seconds
-                    percent = min((current_time / duration) * 100, 99)
-                    task_store.update_progress(
-                        task_id, percent, f"Encoding... {percent:.0f}%", "encoding"
-                    )
-                except (ValueError, ZeroDivisionError):
-                    pass
-
-            # Check for end of progress
-            if line_str.startswith("progress=end"):
-                break
-
-        # Wait for process to complete
-        _, stderr = await process.communicate()
-
-        if process.returncode != 0:
-            error_msg = stderr.decode() if stderr else "FFmpeg error"
+            # Encode in one FFmpeg run, or in parallel keyframe-aligned segments
+            encode = _encode_segmented if chunked else _encode_single
+            error_msg = await encode(
+                task_id, input_path, output_path, encoder, quality, duration, "Encoding"
+            )
+        if error_msg:
             task_store.fail_task(task_id, error_msg[:500])
             return TaskResult(success=False, error=error_msg[:500])
 
@@ -164,6 +569,11 @@ async def compress_video_with_progress(
         compressed_size = get_file_size(output_path)
         compression_ratio = calculate_compression_ratio(original_size, compressed_size)
 
+        message = "Video compressed successfully"
+        if plan:
+            message += f" ({plan['video_kbps']} kbps video"
+            message += f", scaled to {plan['height']}p)" if plan["height"] else ")"
+
         result = TaskResult(
             success=True,
             download_url=f"/api/v1/download/{output_path.name}",
@@ -171,7 +581,7 @@ async def compress_video_with_progress(
             original_size=original_size,
             processed_size=compressed_size,
             compression_ratio=compression_ratio,
-            message="Video compressed successfully",
+            message=message,
         )
 
         task_store.complete_task(task_id, result)
@@ -192,18 +602,49 @@ async def convert_video_with_progress(
     output_path: Path,
     output_format: str,
     quality: str = "medium",
+    chunked: bool = False,
 ) -> TaskResult:
     """
     Convert video to different format with real-time progress updates
+
+    Streams that already fit the target container and meet the quality preset are remuxed
+    without re-encoding. Otherwise, with chunked=True the video is split at keyframes and the
+    segments are encoded in parallel.
+    With output_format "hls" or "dash", output_path is a directory that receives a rendition
+    ladder of fMP4 segments and its playlists (DASH also gets HLS playlists).
     """
     try:
+        cancellation_registry.register_output(task_id, output_path)
         task_store.update_progress(task_id, 0, "Analyzing video...", "analyzing")
 
         original_size = get_file_size(input_path)
-        duration = get_video_duration(input_path) or 100
+        duration = await run_blocking(get_video_duration, input_path) or 100
 
-        preset = VIDEO_COMPRESSION_PRESETS.get(quality, VIDEO_COMPRESSION_PRESETS["medium"])
-        encoder = get_available_h264_encoder()
+        container = output_format.lower()
+        probe = (
+            await run_blocking(probe_video, input_path)
+            if container not in STREAMING_FORMATS
+            else None
+        )
+        if can_copy_streams(probe, container) and meets_quality(probe, quality):
+            task_store.update_progress(task_id, 5, "Remuxing...", "encoding")
+            stream = build_copy_output(input_path, output_path, probe, container)
+            if await run_ffmpeg_graph(task_id, stream, duration, "Remuxing") is None:
+                result = TaskResult(
+                    success=True,
+                    download_url=f"/api/v1/download/{output_path.name}",
+                    filename=output_path.name,
+                    original_size=original_size,
+                    processed_size=get_file_size(output_path),
+                    message=f"Video converted to {output_format.upper()} successfully "
+                    "(remuxed without re-encoding)",
+                    strategy=STRATEGY_REMUX,
+                )
+                task_store.complete_task(task_id, result)
+                return result
+            delete_file(output_path)  # Fall back to re-encoding
+
+        encoder = await run_blocking(get_available_h264_encoder)
 
         if not encoder:
             task_store.fail_task(task_id, "No H.264 encoder available")
@@ -211,61 +652,27 @@ async def convert_video_with_progress(
 
         task_store.update_progress(task_id, 5, "Starting conversion...", "encoding")
 
-        cmd = [
-            "ffmpeg",
-            "-y",
-            "-i",
-            str(input_path),
-            "-c:v",
-            encoder,
-            "-c:a",
-            "aac",
-            "-b:a",
-            "128k",
-            "-progress",
-            "pipe:1",
-            "-nostats",
-        ]
-
-        if encoder == "libx264":
-            cmd.extend(["-crf", str(preset["crf"]), "-preset", preset["preset"]])
+        streaming_format = output_format.lower()
+        if streaming_format in STREAMING_FORMATS:
+            renditions = plan_renditions(await run_blocking(get_video_height, input_path))
+            with_audio = await run_blocking(has_audio_stream, input_path)
+            error_msg = await _encode_streaming(
+                task_id,
+                input_path,
+                output_path,
+                encoder,
+                quality,
+                duration,
+                streaming_format,
+                renditions,
+                with_audio,
+            )
         else:
-            quality_map = {"low": "1M", "medium": "2.5M", "high": "5M"}
-            cmd.extend(["-b:v", quality_map.get(quality, "2.5M")])
-
-        cmd.append(str(output_path))
-
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-
-        while True:
-            line = await process.stdout.readline()
-            if not line:
-                break
-
-            line_str = line.decode().strip()
-
-            if line_str.startswith("out_time_ms="):
-                try:
-                    time_ms = int(line_str.split("=")[1])
-                    current_time = time_ms / 1_000_000
-                    percent = min((current_time / duration) * 100, 99)
-                    task_store.update_progress(
-                        task_id, percent, f"Converting... {percent:.0f}%", "encoding"
-                    )
-                except (ValueError, ZeroDivisionError):
-                    pass
-
-            if line_str.startswith("progress=end"):
-                break
-
-        _, stderr = await process.communicate()
-
-        if process.returncode != 0:
-            error_msg = stderr.decode() if stderr else "FFmpeg error"
+            encode = _encode_segmented if chunked else _encode_single
+            error_msg = await encode(
+                task_id, input_path, output_path, encoder, quality, duration, "Converting"
+            )
+        if error_msg:
             task_store.fail_task(task_id, error_msg[:500])
             return TaskResult(success=False, error=error_msg[:500])
 
@@ -273,14 +680,33 @@ async def convert_video_with_progress(
 
         converted_size = get_file_size(output_path)
 
-        result = TaskResult(
-            success=True,
-            download_url=f"/api/v1/download/{output_path.name}",
-            filename=output_path.name,
-            original_size=original_size,
-            processed_size=converted_size,
-            message=f"Video converted to {output_format.upper()} successfully",
-        )
+        if streaming_format in STREAMING_FORMATS:
+            playlists = [STREAMING_FORMATS[streaming_format]]
+            if streaming_format == "dash":
+                playlists.append(STREAMING_FORMATS["hls"])
+            urls = [f"/api/v1/download/{output_path.name}/{name}" for name in playlists]
+            result = TaskResult(
+                success=True,
+                download_url=urls[0],
+                download_urls=urls,
+                filename=f"{output_path.name}/{playlists[0]}",
+                original_size=original_size,
+                processed_size=converted_size,
+                message=(
+                    f"Video converted to {output_format.upper()} successfully "
+                    f"({', '.join(f'{height}p' for height, _ in renditions)})"
+                ),
+            )
+        else:
+            result = TaskResult(
+                success=True,
+                download_url=f"/api/v1/download/{output_path.name}",
+                filename=output_path.name,
+                original_size=original_size,
+                processed_size=converted_size,
+                message=f"Video converted to {output_format.upper()} successfully",
+                strategy=STRATEGY_REENCODE,
+            )
 
         task_store.complete_task(task_id, result)
         return result
@@ -305,7 +731,8 @@ async def merge_videos_with_progress(
     """
     Merge multiple videos with real-time progress updates via FFmpeg
 
-    Progress is tracked by parsing FFmpeg stdout output
+    In quality mode, inputs that share codec parameters and meet the quality preset are
+    joined without re-encoding. Progress is tracked by parsing FFmpeg stdout output
     """
     concat_file = None
     try:
@@ -315,6 +742,9 @@ async def merge_videos_with_progress(
                 success=False, error="At least 2 video files are required for merging"
             )
 
+        # Partial output is deleted if the task is cancelled
+        cancellation_registry.register_output(task_id, output_path)
+
         # Update task: Starting
         task_store.update_progress(task_id, 0, "Analyzing videos...", "analyzing")
 
@@ -324,7 +754,7 @@ async def merge_videos_with_progress(
         # Calculate total duration for progress calculation
         total_duration = 0
         for input_path in input_paths:
-            duration = get_video_duration(input_path)
+            duration = await run_blocking(get_video_duration, input_path)
             if duration:
                 total_duration += duration
         if not total_duration:
@@ -342,7 +772,27 @@ async def merge_videos_with_progress(
             task_store.fail_task(task_id, f"Error creating concat file: {str(e)}")
             return TaskResult(success=False, error=f"Error creating concat file: {str(e)}")
 
-        if merge_mode == "fast":
+        # Quality mode also copies when ffprobe shows the inputs share codec parameters
+        # and already meet the quality
+        copied = False
+        if merge_mode != "fast":
+            probes = [await run_blocking(probe_video, path) for path in input_paths]
+            if can_concat_copy(probes, output_format.lower()) and all(
+                meets_quality(probe, quality) for probe in probes
+            ):
+                task_store.update_progress(
+                    task_id, 5, "Merging without re-encoding...", "encoding"
+                )
+                stream = build_concat_copy_output(concat_file, output_path)
+                copied = await run_ffmpeg_graph(task_id, stream, total_duration, "Merging") is None
+                if not copied:
+                    # FFmpeg still rejected the inputs (e.g. differing extradata), re-encode
+                    delete_file(output_path)
+
+        if copied:
+            task_store.update_progress(task_id, 99, "Finalizing...", "finalizing")
+
+        elif merge_mode == "fast":
             # Fast mode: copy streams without re-encoding (very fast)
             task_store.update_progress(task_id, 10, "Merging videos (fast mode)...", "encoding")
 
@@ -366,6 +816,7 @@ async def merge_videos_with_progress(
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
             )
+            cancellation_registry.register_process(task_id, process)
 
             # Wait for process to complete, checking for cancellation
             try:
@@ -410,7 +861,7 @@ async def merge_videos_with_progress(
         else:
             # Quality mode: re-encode for compatibility (slower but more reliable)
             # Detect encoder
-            encoder = get_available_h264_encoder()
+            encoder = await run_blocking(get_available_h264_encoder)
             if not encoder:
                 task_store.fail_task(task_id, "No H.264 encoder available")
                 return TaskResult(
@@ -459,6 +910,7 @@ async def merge_videos_with_progress(
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
             )
+            cancellation_registry.register_process(task_id, process)
 
             # Parse progress from stdout
             current_time = 0
@@ -532,6 +984,9 @@ async def merge_videos_with_progress(
             original_size=total_original_size,
             processed_size=merged_size,
             message=f"Successfully merged {len(input_paths)} videos",
+            strategy=(
+                STRATEGY_STREAM_COPY if copied or merge_mode == "fast" else STRATEGY_REENCODE
+            ),
         )
 
         task_store.complete_task(task_id, result)
@@ -551,3 +1006,308 @@ async def merge_videos_with_progress(
                 concat_file.unlink()
             except Exception:
                 pass
+
+
+async def rotate_video_with_progress(
+    task_id: str, input_path: Path, output_path: Path, angle: int
+) -> TaskResult:
+    """
+    Rotate a video with real-time progress updates
+
+    MP4/MOV outputs whose streams can be copied only get new rotation metadata,
+    other videos are re-encoded through the transpose filter.
+    """
+    try:
+        cancellation_registry.register_output(task_id, output_path)
+        task_store.update_progress(task_id, 0, "Analyzing video...", "analyzing")
+
+        original_size = get_file_size(input_path)
+
+        if await run_blocking(rotate_by_metadata, input_path, output_path, angle):
+            result = TaskResult(
+                success=True,
+                download_url=f"/api/v1/download/{output_path.name}",
+                filename=output_path.name,
+                original_size=original_size,
+                processed_size=get_file_size(output_path),
+                message=f"Video rotated {angle} degrees successfully "
+                "(rotation metadata, no re-encoding)",
+                strategy=STRATEGY_ROTATION_METADATA,
+            )
+            task_store.complete_task(task_id, result)
+            return result
+
+        encoder = await run_blocking(get_available_h264_encoder)
+        if not encoder:
+            task_store.fail_task(task_id, "No H.264 encoder available")
+            return TaskResult(success=False, error="No H.264 encoder available")
+
+        duration = await run_blocking(get_video_duration, input_path)
+        task_store.update_progress(task_id, 5, "Starting rotation...", "encoding")
+
+        stream = build_rotate_output(input_path, output_path, angle, encoder)
+        error_msg = await run_ffmpeg_graph(task_id, stream, duration, "Rotating")
+        if error_msg:
+            task_store.fail_task(task_id, error_msg[:500])
+            return TaskResult(success=False, error=error_msg[:500])
+
+        result = TaskResult(
+            success=True,
+            download_url=f"/api/v1/download/{output_path.name}",
+            filename=output_path.name,
+            original_size=original_size,
+            processed_size=get_file_size(output_path),
+            message=f"Video rotated {angle} degrees successfully",
+            strategy=STRATEGY_REENCODE,
+        )
+        task_store.complete_task(task_id, result)
+        return result
+
+    except asyncio.CancelledError:
+        task_store.cancel_task(task_id)
+        raise
+    except Exception as e:
+        error_msg = str(e)[:500]
+        task_store.fail_task(task_id, error_msg)
+        return TaskResult(success=False, error=error_msg)
+
+
+async def video_to_gif_with_progress(
+    task_id: str,
+    input_path: Path,
+    output_path: Path,
+    start_time: float = 0.0,
+    duration: Optional[float] = None,
+    width: Optional[int] = None,
+    fps: int = 12,
+    loop: bool = True,
+    output_format: str = "gif",
+    dither: str = "sierra2_4a",
+    sparse_palette: bool = False,
+) -> TaskResult:
+    """Convert a video segment to an animated GIF, WebP or APNG with real-time progress updates"""
+    palette_path = None
+    try:
+        cancellation_registry.register_output(task_id, output_path)
+        task_store.update_progress(task_id, 0, "Analyzing video...", "analyzing")
+
+        error_msg = await run_blocking(
+            check_gif_params, input_path, start_time, duration, width, fps, output_format, dither
+        )
+        if error_msg:
+            task_store.fail_task(task_id, error_msg)
+            return TaskResult(success=False, error=error_msg)
+
+        original_size = get_file_size(input_path)
+
+        # Output runs from 0 to the segment length
+        video_duration = await run_blocking(get_video_duration, input_path)
+        gif_duration = duration
+        if video_duration:
+            remaining = video_duration - start_time
+            gif_duration = min(duration, remaining) if duration else remaining
+
+        render_start = 5
+        if output_format == "gif":
+            palette_path = output_path.with_name(f"palette_{output_path.stem}.png")
+            key = gif_palette_key(input_path, start_time, duration, width, fps, sparse_palette)
+            if not await run_blocking(palette_cache.get, key, palette_path):
+                task_store.update_progress(task_id, 5, "Generating palette...", "encoding")
+                stream = build_palette_output(
+                    input_path, palette_path, start_time, duration, width, fps, sparse_palette
+                )
+                error_msg = await run_ffmpeg_graph(
+                    task_id, stream, gif_duration, "Generating palette", 5, 25
+                )
+                if error_msg:
+                    task_store.fail_task(task_id, error_msg[:500])
+                    return TaskResult(success=False, error=error_msg[:500])
+                await run_blocking(palette_cache.put, key, palette_path)
+            render_start = 25
+
+        label = f"Rendering {ANIMATION_FORMATS[output_format]}"
+        task_store.update_progress(task_id, render_start, f"{label}...", "encoding")
+
+        stream = build_gif_output(
+            input_path,
+            output_path,
+            start_time,
+            duration,
+            width,
+            fps,
+            loop,
+            palette_path=palette_path,
+            dither=dither,
+            output_format=output_format,
+        )
+        error_msg = await run_ffmpeg_graph(task_id, stream, gif_duration, label, render_start)
+        if error_msg:
+            task_store.fail_task(task_id, error_msg[:500])
+            return TaskResult(success=False, error=error_msg[:500])
+
+        result = TaskResult(
+            success=True,
+            download_url=f"/api/v1/download/{output_path.name}",
+            filename=output_path.name,
+            original_size=original_size,
+            processed_size=get_file_size(output_path),
+            message=f"{ANIMATION_FORMATS[output_format]} created successfully",
+        )
+        task_store.complete_task(task_id, result)
+        return result
+
+    except asyncio.CancelledError:
+        task_store.cancel_task(task_id)
+        raise
+    except Exception as e:
+        error_msg = str(e)[:500]
+        task_store.fail_task(task_id, error_msg)
+        return TaskResult(success=False, error=error_msg)
+    finally:
+        if palette_path:
+            delete_file(palette_path)
+
+
+async def extract_audio_with_progress(
+    task_id: str,
+    input_path: Path,
+    output_path: Path,
+    output_format: str = "mp3",
+    bitrate: str = "192k",
+) -> TaskResult:
+    """Extract the audio track of a video with real-time progress updates"""
+    try:
+        if output_format.lower() not in EXTRACT_AUDIO_CODECS:
+            task_store.fail_task(task_id, "Unsupported output audio format")
+            return TaskResult(success=False, error="Unsupported output audio format")
+
+        cancellation_registry.register_output(task_id, output_path)
+        task_store.update_progress(task_id, 0, "Analyzing video...", "analyzing")
+
+        original_size = get_file_size(input_path)
+        duration = await run_blocking(get_video_duration, input_path)
+
+        task_store.update_progress(task_id, 5, "Extracting audio...", "encoding")
+
+        stream = build_extract_audio_output(input_path, output_path, output_format, bitrate)
+        error_msg = await run_ffmpeg_graph(task_id, stream, duration, "Extracting audio")
+        if error_msg:
+            task_store.fail_task(task_id, error_msg[:500])
+            return TaskResult(success=False, error=error_msg[:500])
+
+        result = TaskResult(
+            success=True,
+            download_url=f"/api/v1/download/{output_path.name}",
+            filename=output_path.name,
+            original_size=original_size,
+            processed_size=get_file_size(output_path),
+            message="Audio extracted successfully",
+        )
+        task_store.complete_task(task_id, result)
+        return result
+
+    except asyncio.CancelledError:
+        task_store.cancel_task(task_id)
+        raise
+    except Exception as e:
+        error_msg = str(e)[:500]
+        task_store.fail_task(task_id, error_msg)
+        return TaskResult(success=False, error=error_msg)
+
+
+async def extract_thumbnails_with_progress(
+    task_id: str,
+    input_path: Path,
+    sprite_path: Path,
+    vtt_path: Path,
+    count: int = 10,
+    width: int = 160,
+    columns: Optional[int] = None,
+) -> TaskResult:
+    """
+    Extract a thumbnail sprite sheet and WebVTT index with real-time progress updates
+
+    Thumbnails are grabbed concurrently in SEGMENT_JOB scheduler slots, progress counts
+    the grabbed thumbnails
+    """
+    frames_dir = sprite_path.parent / f"frames_{sprite_path.stem}"
+    try:
+        error_msg = check_thumbnail_params(count, width, columns)
+        if error_msg:
+            task_store.fail_task(task_id, error_msg)
+            return TaskResult(success=False, error=error_msg)
+
+        cancellation_registry.register_output(task_id, sprite_path)
+        cancellation_registry.register_output(task_id, vtt_path)
+        task_store.update_progress(task_id, 0, "Analyzing video...", "analyzing")
+
+        plan = await run_blocking(plan_thumbnails, input_path, count, width, columns)
+        if not plan:
+            error_msg = "Could not read the video stream or its duration"
+            task_store.fail_task(task_id, error_msg)
+            return TaskResult(success=False, error=error_msg)
+
+        frames_dir.mkdir(exist_ok=True)
+        grabbed = 0
+
+        async def grab(index: int, time: float):
+            nonlocal grabbed
+            frame_path = frames_dir / f"thumb_{index:04d}.jpg"
+            cmd = ffmpeg.compile(
+                build_thumbnail_output(input_path, frame_path, time, plan), overwrite_output=True
+            )
+            async with scheduler.slot(SEGMENT_JOB):
+                returncode, stderr = await run_ffmpeg(task_id, cmd)
+            if returncode != 0:
+                raise RuntimeError(stderr or f"FFmpeg error at {time:.1f}s")
+            grabbed += 1
+            percent = 5 + grabbed / count * 85
+            task_store.update_progress(
+                task_id, percent, f"Extracting thumbnails... {grabbed}/{count}", "encoding"
+            )
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                for i, time in enumerate(plan["times"]):
+                    group.create_task(grab(i, time))
+        except ExceptionGroup as errors:
+            error_msg = str(errors.exceptions[0])[:500]
+            task_store.fail_task(task_id, error_msg)
+            return TaskResult(success=False, error=error_msg)
+
+        task_store.update_progress(task_id, 92, "Building sprite sheet...", "finalizing")
+        cmd = ffmpeg.compile(
+            build_sprite_output(frames_dir, sprite_path, plan), overwrite_output=True
+        )
+        returncode, stderr = await run_ffmpeg(task_id, cmd)
+        if returncode != 0:
+            error_msg = (stderr or "FFmpeg error while building the sprite sheet")[:500]
+            task_store.fail_task(task_id, error_msg)
+            return TaskResult(success=False, error=error_msg)
+        vtt_path.write_text(build_thumbnails_vtt(plan, sprite_path.name))
+
+        result = TaskResult(
+            success=True,
+            download_url=f"/api/v1/download/{sprite_path.name}",
+            filename=sprite_path.name,
+            original_size=get_file_size(input_path),
+            processed_size=get_file_size(sprite_path),
+            message=f"{count} thumbnails extracted successfully "
+            f"({plan['columns']}x{plan['rows']} grid of {plan['width']}x{plan['height']})",
+            download_urls=[
+                f"/api/v1/download/{sprite_path.name}",
+                f"/api/v1/download/{vtt_path.name}",
+            ],
+        )
+        task_store.complete_task(task_id, result)
+        return result
+
+    except asyncio.CancelledError:
+        task_store.cancel_task(task_id)
+        raise
+    except Exception as e:
+        error_msg = str(e)[:500]
+        task_store.fail_task(task_id, error_msg)
+        return TaskResult(success=False, error=error_msg)
+    finally:
+        shutil.rmtree(frames_dir, ignore_errors=True)
@@ -2,12 +2,23 @@
 Task management module for long-running background operations
 """
 
+from .base import BaseTaskStore
+from .expiry import ExpiryManager, expiry_manager
 from .models import Task, TaskProgress, TaskResult, TaskStatus
 from .router import router as tasks_router
-from .store import TaskStore, task_store
+from .scheduler import JobScheduler, scheduler
+from .sqlite_store import SQLiteTaskStore
+from .store import TaskStore, create_task_store, task_store
 
 __all__ = [
+    "BaseTaskStore",
     "TaskStore",
+    "SQLiteTaskStore",
+    "create_task_store",
+    "JobScheduler",
+    "ExpiryManager",
+    "expiry_manager",
+    "scheduler",
     "task_store",
     "Task",
     "TaskStatus",
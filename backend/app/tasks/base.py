@@ -0,0 +1,79 @@
+"""
+Task store interface shared by all storage backends
+"""
+
+from abc import ABC, abstractmethod
+from typing import AsyncGenerator, Dict, Optional
+
+from .models import Task, TaskResult
+
+
+class BaseTaskStore(ABC):
+    """
+    Interface for task storage backends
+
+    Backends must:
+    - Persist task state (status, progress, result)
+    - Deliver progress/complete/error/cancelled events to subscribers (for SSE)
+    - Expire tasks older than their TTL
+    """
+
+    @abstractmethod
+    def create_task(self, task_type: str, metadata: Optional[dict] = None) -> Task:
+        """Create a new task and return it"""
+
+    @abstractmethod
+    def get_task(self, task_id: str) -> Optional[Task]:
+        """Get a task by ID"""
+
+    @abstractmethod
+    def update_progress(
+        self, task_id: str, percent: float, message: str = "", stage: str = ""
+    ) -> bool:
+        """Update task progress, returns False if the task does not exist or has finished"""
+
+    @abstractmethod
+    def set_queue_position(self, task_id: str, position: int) -> bool:
+        """Report the queue position of a pending task, returns False if it is not pending"""
+
+    @abstractmethod
+    def complete_task(self, task_id: str, result: TaskResult) -> bool:
+        """Mark task as completed with result, returns False if it does not exist or has finished"""
+
+    @abstractmethod
+    def fail_task(self, task_id: str, error: str) -> bool:
+        """Mark task as failed with error, returns False if it does not exist or has finished"""
+
+    @abstractmethod
+    def cancel_task(self, task_id: str) -> bool:
+        """Cancel a task, returns False if it does not exist or has finished"""
+
+    @abstractmethod
+    def subscribe(self, task_id: str) -> AsyncGenerator[dict, None]:
+        """
+        Subscribe to task updates via async generator
+        Yields {"event": ..., "data": ...} dicts until the task reaches a final state
+        """
+
+    @abstractmethod
+    def remove_task(self, task_id: str) -> bool:
+        """Delete a task, returns False if it does not exist"""
+
+    @abstractmethod
+    def cleanup_old_tasks(self) -> int:
+        """Remove tasks older than TTL, returns the number of removed tasks"""
+
+    @abstractmethod
+    def get_all_tasks(self) -> Dict[str, Task]:
+        """Get all tasks (for debugging)"""
+
+    def heartbeat(self):
+        """Record that this worker is alive (stores shared between processes only)"""
+
+    def fail_orphaned_tasks(self) -> int:
+        """
+        Fail active tasks left behind by a worker that stopped, returns how many were failed
+
+        In-process stores lose their tasks together with the worker, so there is nothing to do.
+        """
+        return 0
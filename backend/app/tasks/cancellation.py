@@ -0,0 +1,133 @@
+"""
+Cancellation registry for running background tasks
+Tracks the asyncio job, FFmpeg subprocesses and partial outputs of each task so they can be stopped
+"""
+
+import asyncio
+import contextlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.config import TASK_CANCEL_KILL_TIMEOUT, TASK_CANCEL_POLL_INTERVAL
+from app.utils.file_handler import delete_output
+
+from .base import BaseTaskStore
+from .models import TaskStatus
+
+
+@dataclass
+class _RunningTask:
+    """Everything that has to be stopped or removed when a task is cancelled"""
+
+    job: Optional[asyncio.Task] = None
+    processes: List[asyncio.subprocess.Process] = field(default_factory=list)
+    outputs: List[Path] = field(default_factory=list)
+
+
+class CancellationRegistry:
+    """
+    Map task ids to their running work
+
+    Cancelling a task:
+    - Cancels its asyncio job, which frees its scheduler slot and drops queued executor calls
+    - Sends SIGTERM to its subprocesses, then SIGKILL after a grace period
+    - Deletes partial output files
+
+    Only the worker running a task holds its work. With a store shared across workers, watch()
+    stops work whose task another worker marked cancelled.
+    """
+
+    def __init__(self, kill_timeout: float = TASK_CANCEL_KILL_TIMEOUT):
+        self._kill_timeout = kill_timeout
+        self._running: Dict[str, _RunningTask] = {}
+
+    def _entry(self, task_id: str) -> _RunningTask:
+        return self._running.setdefault(task_id, _RunningTask())
+
+    def register_job(self, task_id: str, job: asyncio.Task):
+        """Track the asyncio task running a job, forgotten once it finishes"""
+        self._entry(task_id).job = job
+        job.add_done_callback(lambda _: self.discard(task_id))
+
+    def register_process(self, task_id: str, process: asyncio.subprocess.Process):
+        """Track a subprocess started for a task"""
+        self._entry(task_id).processes.append(process)
+
+    def register_output(self, task_id: str, path: Path):
+        """Track an output file to delete if the task is cancelled before it completes"""
+        self._entry(task_id).outputs.append(path)
+
+    def discard(self, task_id: str):
+        """Forget a task (its work has finished)"""
+        self._running.pop(task_id, None)
+
+    def is_running(self, task_id: str) -> bool:
+        """Whether work is registered for a task"""
+        return task_id in self._running
+
+    async def _terminate(self, process: asyncio.subprocess.Process):
+        """Stop a subprocess with SIGTERM, then SIGKILL if it does not exit in time"""
+        if process.returncode is not None:
+            return
+        with contextlib.suppress(ProcessLookupError):
+            process.terminate()
+        try:
+            await asyncio.wait_for(process.wait(), timeout=self._kill_timeout)
+        except asyncio.TimeoutError:
+            with contextlib.suppress(ProcessLookupError):
+                process.kill()
+            await process.wait()
+
+    async def cancel(self, task_id: str) -> bool:
+        """
+        Stop all work registered for a task
+
+        Returns:
+            True if the task had running work, False otherwise
+        """
+        entry = self._running.pop(task_id, None)
+        if entry is None:
+            return False
+
+        # Cancel the job first so it does not report the killed process as a failure
+        if entry.job and not entry.job.done():
+            entry.job.cancel()
+
+        await asyncio.gather(*(self._terminate(process) for process in entry.processes))
+
+        if entry.job:
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await entry.job
+
+        for path in entry.outputs:
+            delete_output(path)
+
+        return True
+
+    async def cancel_stopped(self, store: BaseTaskStore) -> int:
+        """
+        Stop the registered work of tasks the store shows as cancelled
+
+        Returns:
+            Number of tasks stopped
+        """
+        stopped = 0
+        for task_id in list(self._running):
+            task = store.get_task(task_id)
+            if task and task.status == TaskStatus.CANCELLED and await self.cancel(task_id):
+                stopped += 1
+        return stopped
+
+    async def watch(self, store: BaseTaskStore, interval: float = TASK_CANCEL_POLL_INTERVAL):
+        """Call cancel_stopped() every interval seconds until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.cancel_stopped(store)
+            except Exception as e:
+                print(f"❌ Error while checking for cancelled tasks: {e}")
+
+
+# Global cancellation registry instance
+cancellation_registry = CancellationRegistry()
@@ -0,0 +1,126 @@
+"""
+Deadline-driven expiry of background tasks and the files they produced
+Keeps deadlines in a min-heap so each sweep only touches what has actually expired
+"""
+
+from dataclasses import dataclass, field
+import heapq
+import itertools
+from pathlib import Path
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+from app.config import TASK_TTL_MINUTES
+from app.utils.file_handler import delete_output, get_file_size
+
+from .base import BaseTaskStore
+from .store import task_store
+
+
+@dataclass(order=True)
+class _Deadline:
+    """Heap entry, stale entries are skipped when their deadline no longer matches"""
+
+    at: float
+    seq: int
+    task_id: str = field(compare=False)
+
+
+class ExpiryManager:
+    """
+    Expire tasks and their linked output files together
+
+    Features:
+    - Min-heap of task deadlines, a sweep pops only expired entries
+    - Tasks still running when their deadline comes are pushed back instead of evicted
+    - Output files are linked to their task and deleted with it
+    - Counts of live tasks and bytes held by linked files
+    """
+
+    def __init__(self, store: BaseTaskStore, ttl_seconds: float):
+        self._store = store
+        self._ttl = ttl_seconds
+        self._heap: List[_Deadline] = []
+        self._deadlines: Dict[str, float] = {}  # task_id -> current deadline
+        self._files: Dict[str, Set[Path]] = {}  # task_id -> linked files
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def _push(self, task_id: str, deadline: float):
+        """Schedule a deadline (call within lock)"""
+        self._deadlines[task_id] = deadline
+        heapq.heappush(self._heap, _Deadline(deadline, next(self._seq), task_id))
+
+    def track_task(self, task_id: str, outputs: Optional[List[Path]] = None):
+        """
+        Start tracking a task and link its output files
+
+        Args:
+            task_id: Task to expire TTL seconds after its last update
+            outputs: Files deleted together with the task
+        """
+        with self._lock:
+            self._push(task_id, time.time() + self._ttl)
+            if outputs:
+                self._files.setdefault(task_id, set()).update(outputs)
+
+    def link_file(self, task_id: str, path: Path):
+        """Link another output file to a tracked task"""
+        with self._lock:
+            if task_id in self._deadlines:
+                self._files.setdefault(task_id, set()).add(path)
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """
+        Evict tasks whose deadline has passed, with their files
+
+        Returns:
+            Number of evicted tasks
+        """
+        now = time.time() if now is None else now
+        evicted = []
+
+        with self._lock:
+            while self._heap and self._heap[0].at <= now:
+                entry = heapq.heappop(self._heap)
+                if self._deadlines.get(entry.task_id) != entry.at:
+                    continue  # Superseded by a later deadline
+
+                task = self._store.get_task(entry.task_id)
+                if task is not None:
+                    last_update = task.updated_at.timestamp()
+                    active = task.is_active
+                    if active or last_update + self._ttl > now:
+                        # Still in use: check again one TTL after its last update
+                        self._push(entry.task_id, max(last_update, now) + self._ttl)
+                        continue
+
+                del self._deadlines[entry.task_id]
+                evicted.append((entry.task_id, self._files.pop(entry.task_id, set())))
+
+        for task_id, files in evicted:
+            self._store.remove_task(task_id)
+            for path in files:
+                delete_output(path)
+
+        return len(evicted)
+
+    def stats(self) -> dict:
+        """Live tasks, linked files and bytes they hold (for the health endpoint)"""
+        with self._lock:
+            files = [path for paths in self._files.values() for path in paths]
+            live_tasks = len(self._deadlines)
+
+        bytes_held = 0
+        for path in files:
+            try:
+                bytes_held += get_file_size(path)  # Directories count the files they hold
+            except OSError:
+                pass  # Not written yet or already removed
+
+        return {"live_tasks": live_tasks, "files": len(files), "bytes_held": bytes_held}
+
+
+# Global expiry manager instance
+expiry_manager = ExpiryManager(task_store, ttl_seconds=TASK_TTL_MINUTES * 60)
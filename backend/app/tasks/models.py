@@ -5,7 +5,7 @@ Task models for background processing
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, List, Optional
 import uuid
 
 
@@ -26,13 +26,17 @@ class TaskProgress:
     percent: float = 0.0
     message: str = ""
     stage: str = ""
+    queue_position: Optional[int] = None  # Set while the task waits for a scheduler slot
 
     def to_dict(self) -> dict:
-        return {
+        progress = {
             "percent": self.percent,
             "message": self.message,
             "stage": self.stage,
         }
+        if self.queue_position is not None:
+            progress["queue_position"] = self.queue_position
+        return progress
 
 
 @dataclass
@@ -48,6 +52,8 @@ class TaskResult:
     message: Optional[str] = None
     error: Optional[str] = None
     total_pages: Optional[int] = None  # For PDF operations
+    download_urls: Optional[List[str]] = None  # Companion files (e.g. a sprite's WebVTT index)
+    strategy: Optional[str] = None  # How the output was produced (e.g. stream_copy)
 
     def to_dict(self) -> dict:
         result = {
@@ -63,6 +69,10 @@ class TaskResult:
         # Add optional fields if they exist
         if self.total_pages is not None:
             result["total_pages"] = self.total_pages
+        if self.download_urls is not None:
+            result["download_urls"] = self.download_urls
+        if self.strategy is not None:
+            result["strategy"] = self.strategy
         return result
 
 
@@ -79,11 +89,24 @@ class Task:
     updated_at: datetime = field(default_factory=datetime.now)
     metadata: dict = field(default_factory=dict)
 
+    @property
+    def is_active(self) -> bool:
+        """Whether the task is still pending or processing (final states never change)"""
+        return self.status in (TaskStatus.PENDING, TaskStatus.PROCESSING)
+
     def update_progress(self, percent: float, message: str = "", stage: str = ""):
         """Update task progress"""
         self.progress.percent = min(max(percent, 0), 100)
         self.progress.message = message
         self.progress.stage = stage
+        self.progress.queue_position = None
+        self.updated_at = datetime.now()
+
+    def set_queue_position(self, position: int):
+        """Update the position of a pending task in the scheduler queue"""
+        self.progress.queue_position = position
+        self.progress.message = f"Waiting in queue (position {position})"
+        self.progress.stage = "queued"
         self.updated_at = datetime.now()
 
     def complete(self, result: TaskResult):
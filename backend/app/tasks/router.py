@@ -7,6 +7,7 @@ import json
 from fastapi import APIRouter, HTTPException
 from sse_starlette.sse import EventSourceResponse
 
+from .cancellation import cancellation_registry
 from .store import task_store
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
@@ -55,14 +56,19 @@ async def stream_task_progress(task_id: str):
 async def cancel_task(task_id: str):
     """
     Cancel a running task
+
+    Stops its FFmpeg/OCR work, deletes partial output and frees its scheduler slot
     """
     task = task_store.get_task(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
+    # Only pending or processing tasks can be cancelled, a finished one keeps its result
     success = task_store.cancel_task(task_id)
     if not success:
-        raise HTTPException(status_code=400, detail="Failed to cancel task")
+        raise HTTPException(status_code=400, detail=f"Task is already {task.status.value}")
+
+    await cancellation_registry.cancel(task_id)
 
     return {"success": True, "message": "Task cancelled"}
 
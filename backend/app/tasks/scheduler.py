@@ -0,0 +1,204 @@
+"""
+Bounded job scheduler for background tasks
+Limits how many jobs of each type (ffmpeg encodes, OCR runs) run at once and queues the rest
+"""
+
+import asyncio
+import bisect
+import contextlib
+from dataclasses import dataclass, field
+import itertools
+from pathlib import Path
+from typing import Coroutine, Dict, Iterable, List, Optional
+
+from app.config import SCHEDULER_FFMPEG_SLOTS, SCHEDULER_OCR_SLOTS, SCHEDULER_SEGMENT_SLOTS
+from app.utils.file_handler import delete_file
+
+from .base import BaseTaskStore
+from .cancellation import CancellationRegistry, cancellation_registry
+from .store import task_store
+
+# Job types
+FFMPEG_JOB = "ffmpeg"
+OCR_JOB = "ocr"
+SEGMENT_JOB = "ffmpeg_segment"  # Parts of a chunked encode, run inside an ffmpeg job
+
+# Priorities (lower runs first)
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+
+@dataclass(order=True)
+class _QueuedJob:
+    """A job waiting for a slot, ordered by priority then submission order"""
+
+    priority: int
+    seq: int
+    task_id: Optional[str] = field(compare=False)
+    ready: asyncio.Future = field(compare=False)
+
+
+class JobScheduler:
+    """
+    Run background jobs with a per-type concurrency limit
+
+    Features:
+    - Configurable number of slots per job type
+    - Priorities, FIFO order within a priority
+    - Waiting tasks stay PENDING and report their queue position to subscribers
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, int],
+        store: BaseTaskStore,
+        registry: Optional[CancellationRegistry] = None,
+        default_limit: int = 1,
+    ):
+        self._limits = dict(limits)
+        self._default_limit = default_limit
+        self._store = store
+        self._registry = registry
+        self._running: Dict[str, int] = {}
+        self._waiting: Dict[str, List[_QueuedJob]] = {}
+        self._seq = itertools.count()
+
+    def limit(self, job_type: str) -> int:
+        """Number of jobs of this type allowed to run at once"""
+        return max(1, self._limits.get(job_type, self._default_limit))
+
+    def submit(
+        self,
+        task_id: str,
+        job_type: str,
+        coro: Coroutine,
+        priority: int = PRIORITY_NORMAL,
+        inputs: Iterable[Path] = (),
+    ) -> asyncio.Task:
+        """
+        Schedule a coroutine for a task
+
+        Args:
+            task_id: Task the job reports progress for
+            job_type: Slot pool the job runs in (e.g. "ffmpeg", "ocr")
+            coro: Coroutine doing the work, started once a slot is free
+            priority: Lower values run first
+            inputs: Uploaded files the coroutine deletes when done, deleted here instead if
+                the job is cancelled before it starts
+
+        Returns:
+            The asyncio task wrapping the queued job
+        """
+        job = asyncio.create_task(self._run(task_id, job_type, coro, priority, list(inputs)))
+        if self._registry:
+            # Lets POST /tasks/{id}/cancel stop the job and free its slot
+            self._registry.register_job(task_id, job)
+        return job
+
+    async def _run(
+        self, task_id: str, job_type: str, coro: Coroutine, priority: int, inputs: List[Path]
+    ):
+        try:
+            await self._acquire(task_id, job_type, priority)
+        except asyncio.CancelledError:
+            # The coroutine never started, so its own cleanup will not run
+            coro.close()
+            for path in inputs:
+                delete_file(path)
+            raise
+
+        try:
+            return await coro
+        finally:
+            self._release(job_type)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, job_type: str, priority: int = PRIORITY_NORMAL):
+        """
+        Hold a slot for part of a job that is already running (e.g. one segment of an encode)
+
+        Waiting here does not publish a queue position, the owning task is already processing.
+        """
+        await self._acquire(None, job_type, priority)
+        try:
+            yield
+        finally:
+            self._release(job_type)
+
+    async def _acquire(self, task_id: Optional[str], job_type: str, priority: int):
+        """Take a slot, waiting in the queue if all slots are busy"""
+        waiting = self._waiting.setdefault(job_type, [])
+        running = self._running.get(job_type, 0)
+        if not waiting and running < self.limit(job_type):
+            self._running[job_type] = running + 1
+            return
+
+        entry = _QueuedJob(
+            priority=priority,
+            seq=next(self._seq),
+            task_id=task_id,
+            ready=asyncio.get_running_loop().create_future(),
+        )
+        bisect.insort(waiting, entry)
+        self._publish_positions(job_type)
+
+        try:
+            await entry.ready
+        except asyncio.CancelledError:
+            if entry in waiting:
+                waiting.remove(entry)
+                self._publish_positions(job_type)
+            elif entry.ready.done() and not entry.ready.cancelled():
+                # A slot was handed over just as we were cancelled, pass it on
+                self._release(job_type)
+            raise
+
+    def _release(self, job_type: str):
+        """Free a slot, handing it straight to the next queued job if any"""
+        waiting = self._waiting.get(job_type, [])
+        while waiting:
+            entry = waiting.pop(0)
+            if not entry.ready.done():
+                entry.ready.set_result(None)
+                self._publish_positions(job_type)
+                return
+        self._running[job_type] = self._running.get(job_type, 1) - 1
+
+    def _publish_positions(self, job_type: str):
+        """Send the current queue position to every waiting task of a type"""
+        for position, entry in enumerate(self._waiting.get(job_type, []), start=1):
+            if entry.task_id is not None:
+                self._store.set_queue_position(entry.task_id, position)
+
+    def queue_position(self, task_id: str) -> Optional[int]:
+        """Position of a task in its queue (1-based), None if it is not waiting"""
+        for waiting in self._waiting.values():
+            for position, entry in enumerate(waiting, start=1):
+                if entry.task_id == task_id:
+                    return position
+        return None
+
+    def stats(self) -> Dict[str, dict]:
+        """Slot usage per job type (for the health endpoint)"""
+        job_types = set(self._limits) | set(self._running) | set(self._waiting)
+        return {
+            job_type: {
+                "limit": self.limit(job_type),
+                "running": self._running.get(job_type, 0),
+                "queued": len(self._waiting.get(job_type, [])),
+            }
+            for job_type in sorted(job_types)
+        }
+
+
+# Global scheduler instance
+scheduler = JobScheduler(
+    {
+        FFMPEG_JOB: SCHEDULER_FFMPEG_SLOTS,
+        OCR_JOB: SCHEDULER_OCR_SLOTS,
+        SEGMENT_JOB: SCHEDULER_SEGMENT_SLOTS,
+    },
+    store=task_store,
+    registry=cancellation_registry,
+)
@@ -0,0 +1,375 @@
+"""
+SQLite-backed task store for managing background tasks
+Tasks survive restarts and are shared by every uvicorn worker using the same database file
+"""
+
+import asyncio
+from dataclasses import asdict
+from datetime import datetime, timedelta
+import json
+import os
+from pathlib import Path
+import socket
+import sqlite3
+import threading
+import time
+from typing import AsyncGenerator, Dict, Optional, Tuple
+import uuid
+
+from app.config import TASK_STORE_POLL_INTERVAL, TASK_WORKER_TIMEOUT
+
+from .base import BaseTaskStore
+from .models import Task, TaskProgress, TaskResult, TaskStatus
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    task_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    percent REAL NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    stage TEXT NOT NULL DEFAULT '',
+    queue_position INTEGER,
+    result TEXT,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    owner TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_updated_at ON tasks (updated_at);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    heartbeat REAL NOT NULL
+);
+"""
+
+# Message of tasks whose worker stopped before finishing them
+ORPHANED_TASK_ERROR = "Task interrupted: the server restarted before it finished"
+
+_COLUMNS = (
+    "id, task_type, status, percent, message, stage, queue_position, result, metadata, "
+    "created_at, updated_at, version"
+)
+
+
+class SQLiteTaskStore(BaseTaskStore):
+    """
+    Task store persisted in an SQLite database (WAL mode)
+
+    Features:
+    - Tasks survive restarts and are visible to every process sharing the file
+    - Every write bumps a per-task version, used as a change cursor by subscribers
+    - Subscribers poll for rows whose version moved past their cursor, so progress
+      published by one worker reaches SSE streams served by another
+    - Each task records the worker running it, active tasks of workers that stopped sending
+      heartbeats are failed by fail_orphaned_tasks()
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        task_ttl_minutes: int = 30,
+        poll_interval: float = TASK_STORE_POLL_INTERVAL,
+    ):
+        self._db_path = Path(db_path)
+        self._task_ttl = timedelta(minutes=task_ttl_minutes)
+        self._poll_interval = poll_interval
+        self._local = threading.local()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connection()
+        conn.executescript(_SCHEMA)
+        # Databases created before tasks recorded their worker
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(tasks)")}
+        if "owner" not in columns:
+            conn.execute("ALTER TABLE tasks ADD COLUMN owner TEXT")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the calling thread's connection (sqlite3 connections are not thread-safe)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._db_path, timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close the calling thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @staticmethod
+    def _row_to_task(row: tuple) -> Tuple[Task, int]:
+        """Convert a tasks row into a Task and its version"""
+        (
+            task_id,
+            task_type,
+            status,
+            percent,
+            message,
+            stage,
+            queue_position,
+            result,
+            metadata,
+            created_at,
+            updated_at,
+            version,
+        ) = row
+        task = Task(
+            id=task_id,
+            task_type=task_type,
+            status=TaskStatus(status),
+            progress=TaskProgress(
+                percent=percent, message=message, stage=stage, queue_position=queue_position
+            ),
+            result=TaskResult(**json.loads(result)) if result else None,
+            created_at=datetime.fromtimestamp(created_at),
+            updated_at=datetime.fromtimestamp(updated_at),
+            metadata=json.loads(metadata),
+        )
+        return task, version
+
+    def _fetch(self, task_id: str, after_version: int = -1) -> Optional[Tuple[Task, int]]:
+        """Fetch a task if its version is greater than after_version"""
+        row = (
+            self._connection()
+            .execute(
+                f"SELECT {_COLUMNS} FROM tasks WHERE id = ? AND version > ?",
+                (task_id, after_version),
+            )
+            .fetchone()
+        )
+        return self._row_to_task(row) if row else None
+
+    def _exists(self, task_id: str) -> bool:
+        row = self._connection().execute("SELECT 1 FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return row is not None
+
+    def create_task(self, task_type: str, metadata: Optional[dict] = None) -> Task:
+        """Create a new task and return it"""
+        task = Task(
+            task_type=task_type,
+            status=TaskStatus.PENDING,
+            metadata=metadata or {},
+        )
+        self._connection().execute(
+            f"INSERT INTO tasks ({_COLUMNS}, owner) "
+            "VALUES (?, ?, ?, ?, ?, ?, NULL, ?, ?, ?, ?, 0, ?)",
+            (
+                task.id,
+                task.task_type,
+                task.status.value,
+                task.progress.percent,
+                task.progress.message,
+                task.progress.stage,
+                None,
+                json.dumps(task.metadata, default=str),
+                task.created_at.timestamp(),
+                task.updated_at.timestamp(),
+                self.worker_id,
+            ),
+        )
+        return task
+
+    def get_task(self, task_id: str) -> Optional[Task]:
+        """Get a task by ID"""
+        fetched = self._fetch(task_id)
+        return fetched[0] if fetched else None
+
+    def update_progress(
+        self, task_id: str, percent: float, message: str = "", stage: str = ""
+    ) -> bool:
+        """
+        Update task progress
+        Returns False if the task does not exist or has finished (a late update must not
+        revive a cancelled or completed task)
+        """
+        cursor = self._connection().execute(
+            "UPDATE tasks SET status = ?, percent = ?, message = ?, stage = ?, queue_position = NULL, "
+            "updated_at = ?, version = version + 1 WHERE id = ? AND status IN (?, ?)",
+            (
+                TaskStatus.PROCESSING.value,
+                min(max(percent, 0), 100),
+                message,
+                stage,
+                time.time(),
+                task_id,
+                TaskStatus.PENDING.value,
+                TaskStatus.PROCESSING.value,
+            ),
+        )
+        return cursor.rowcount > 0
+
+    def set_queue_position(self, task_id: str, position: int) -> bool:
+        """
+        Report the queue position of a pending task
+        Returns False if the task does not exist or is no longer pending
+        """
+        cursor = self._connection().execute(
+            "UPDATE tasks SET queue_position = ?, message = ?, stage = 'queued', updated_at = ?, "
+            "version = version + 1 WHERE id = ? AND status = ?",
+            (
+                position,
+                f"Waiting in queue (position {position})",
+                time.time(),
+                task_id,
+                TaskStatus.PENDING.value,
+            ),
+        )
+        return cursor.rowcount > 0
+
+    def _finish(self, task_id: str, status: TaskStatus, result: Optional[TaskResult]) -> bool:
+        """Move a still active task to a final state"""
+        percent_sql = "100" if status == TaskStatus.COMPLETED else "percent"
+        cursor = self._connection().execute(
+            f"UPDATE tasks SET status = ?, percent = {percent_sql}, result = ?, updated_at = ?, "
+            "version = version + 1 WHERE id = ? AND status IN (?, ?)",
+            (
+                status.value,
+                json.dumps(asdict(result)) if result else None,
+                time.time(),
+                task_id,
+                TaskStatus.PENDING.value,
+                TaskStatus.PROCESSING.value,
+            ),
+        )
+        return cursor.rowcount > 0
+
+    def complete_task(self, task_id: str, result: TaskResult) -> bool:
+        """Mark task as completed with result, returns False if it does not exist or has finished"""
+        return self._finish(task_id, TaskStatus.COMPLETED, result)
+
+    def fail_task(self, task_id: str, error: str) -> bool:
+        """Mark task as failed with error, returns False if it does not exist or has finished"""
+        return self._finish(task_id, TaskStatus.FAILED, TaskResult(success=False, error=error))
+
+    def cancel_task(self, task_id: str) -> bool:
+        """Cancel a still active task (keeps any partial result already stored)"""
+        cursor = self._connection().execute(
+            "UPDATE tasks SET status = ?, updated_at = ?, version = version + 1 "
+            "WHERE id = ? AND status IN (?, ?)",
+            (
+                TaskStatus.CANCELLED.value,
+                time.time(),
+                task_id,
+                TaskStatus.PENDING.value,
+                TaskStatus.PROCESSING.value,
+            ),
+        )
+        return cursor.rowcount > 0
+
+    @staticmethod
+    def _event_for(task: Task) -> dict:
+        """Build the SSE event describing a task's current state"""
+        if task.status == TaskStatus.COMPLETED:
+            return {"event": "complete", "data": task.result.to_dict() if task.result else {}}
+        if task.status == TaskStatus.FAILED:
+            return {
+                "event": "error",
+                "data": {"message": task.result.error if task.result else "Task failed"},
+            }
+        if task.status == TaskStatus.CANCELLED:
+            return {"event": "cancelled", "data": {"message": "Task cancelled"}}
+        return {"event": "progress", "data": task.progress.to_dict()}
+
+    async def subscribe(self, task_id: str) -> AsyncGenerator[dict, None]:
+        """
+        Subscribe to task updates via async generator
+        Polls the database for changes past the subscriber's version cursor
+        """
+        fetched = self._fetch(task_id)
+        if not fetched:
+            yield {"event": "error", "data": {"message": "Task not found"}}
+            return
+
+        task, cursor = fetched
+        message = self._event_for(task)
+        yield message
+        if message["event"] != "progress":
+            return
+
+        idle = 0.0
+        while True:
+            await asyncio.sleep(self._poll_interval)
+            fetched = self._fetch(task_id, after_version=cursor)
+
+            if fetched is None:
+                if not self._exists(task_id):
+                    # Task expired while we were streaming it
+                    break
+
+                idle += self._poll_interval
+                if idle >= 30.0:
+                    # Send keepalive
+                    idle = 0.0
+                    task = self.get_task(task_id)
+                    if task and task.is_active:
+                        yield {"event": "progress", "data": task.progress.to_dict()}
+                    else:
+                        break
+                continue
+
+            idle = 0.0
+            task, cursor = fetched
+            message = self._event_for(task)
+            yield message
+
+            # Stop if task completed, failed, or cancelled
+            if message["event"] in ("complete", "error", "cancelled"):
+                break
+
+    def remove_task(self, task_id: str) -> bool:
+        """Delete a task"""
+        cursor = self._connection().execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        return cursor.rowcount > 0
+
+    def cleanup_old_tasks(self) -> int:
+        """Remove tasks older than TTL"""
+        cutoff = (datetime.now() - self._task_ttl).timestamp()
+        cursor = self._connection().execute("DELETE FROM tasks WHERE updated_at < ?", (cutoff,))
+        return cursor.rowcount
+
+    def heartbeat(self):
+        """Record that this worker is alive (its active tasks are not orphans)"""
+        self._connection().execute(
+            "INSERT INTO workers (id, heartbeat) VALUES (?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET heartbeat = excluded.heartbeat",
+            (self.worker_id, time.time()),
+        )
+
+    def fail_orphaned_tasks(self, worker_timeout: float = TASK_WORKER_TIMEOUT) -> int:
+        """
+        Fail pending or processing tasks whose worker has not sent a heartbeat for
+        worker_timeout seconds (it crashed or was restarted), so their subscribers stop waiting
+
+        Returns:
+            Number of tasks failed
+        """
+        conn = self._connection()
+        cutoff = time.time() - worker_timeout
+        conn.execute("DELETE FROM workers WHERE heartbeat < ?", (cutoff,))
+        cursor = conn.execute(
+            "UPDATE tasks SET status = ?, result = ?, updated_at = ?, version = version + 1 "
+            "WHERE status IN (?, ?) AND (owner IS NULL OR owner != ?) "
+            "AND (owner IS NULL OR owner NOT IN (SELECT id FROM workers))",
+            (
+                TaskStatus.FAILED.value,
+                json.dumps(asdict(TaskResult(success=False, error=ORPHANED_TASK_ERROR))),
+                time.time(),
+                TaskStatus.PENDING.value,
+                TaskStatus.PROCESSING.value,
+                self.worker_id,
+            ),
+        )
+        return cursor.rowcount
+
+    def get_all_tasks(self) -> Dict[str, Task]:
+        """Get all tasks (for debugging)"""
+        rows = self._connection().execute(f"SELECT {_COLUMNS} FROM tasks").fetchall()
+        tasks = (self._row_to_task(row)[0] for row in rows)
+        return {task.id: task for task in tasks}
@@ -1,32 +1,79 @@
 """
 In-memory task store for managing background tasks
-In production, this could be replaced with Redis or a database
+Use the SQLite backend (TASK_STORE_BACKEND=sqlite) to share tasks across workers and restarts
 """
 
 import asyncio
 from datetime import datetime, timedelta
 import threading
-from typing import AsyncGenerator, Dict, Optional
+import time
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
 
-from .models import Task, TaskProgress, TaskResult, TaskStatus
+from app.config import (
+    TASK_PROGRESS_MIN_DELTA,
+    TASK_PROGRESS_MIN_INTERVAL,
+    TASK_STORE_BACKEND,
+    TASK_STORE_PATH,
+    TASK_TTL_MINUTES,
+)
 
+from .base import BaseTaskStore
+from .models import Task, TaskResult, TaskStatus
 
-class TaskStore:
+
+class Subscription:
+    """
+    Latest-value-wins mailbox for one subscriber
+
+    A slow subscriber never falls behind: progress events overwrite each other and
+    only the most recent one is delivered. Final events are never overwritten.
+    """
+
+    __slots__ = ("_message", "_event")
+
+    def __init__(self):
+        self._message: Optional[dict] = None
+        self._event = asyncio.Event()
+
+    def publish(self, message: dict):
+        """Replace the pending message unless a final event is already waiting"""
+        if self._message is None or self._message["event"] == "progress":
+            self._message = message
+        self._event.set()
+
+    async def get(self, timeout: float) -> dict:
+        """Wait for the next message (raises asyncio.TimeoutError)"""
+        await asyncio.wait_for(self._event.wait(), timeout=timeout)
+        self._event.clear()
+        message, self._message = self._message, None
+        return message
+
+
+class TaskStore(BaseTaskStore):
     """
     Thread-safe in-memory store for managing background tasks
 
     Features:
     - Create and track tasks
-    - Update progress
+    - Update progress (coalesced and rate-limited for subscribers)
     - Subscribe to task updates via async generators (for SSE)
     - Automatic cleanup of old tasks
     """
 
-    def __init__(self, task_ttl_minutes: int = 30):
+    def __init__(
+        self,
+        task_ttl_minutes: int = 30,
+        min_publish_interval: float = TASK_PROGRESS_MIN_INTERVAL,
+        min_percent_delta: float = TASK_PROGRESS_MIN_DELTA,
+    ):
         self._tasks: Dict[str, Task] = {}
-        self._subscribers: Dict[str, list] = {}  # task_id -> list of asyncio.Queue
+        self._subscribers: Dict[str, List[Subscription]] = {}
         self._lock = threading.Lock()
         self._task_ttl = timedelta(minutes=task_ttl_minutes)
+        self._min_publish_interval = min_publish_interval
+        self._min_percent_delta = min_percent_delta
+        # task_id -> (monotonic time, percent, stage) of the last published progress event
+        self._last_published: Dict[str, Tuple[float, float, str]] = {}
 
     def create_task(self, task_type: str, metadata: Optional[dict] = None) -> Task:
         """Create a new task and return it"""
@@ -45,139 +92,151 @@ class TaskStore:
         with self._lock:
             return self._tasks.get(task_id)
 
+    def _should_publish(self, task_id: str, percent: float, stage: str) -> bool:
+        """Rate-limit progress events: publish on stage change, big jumps or after the interval"""
+        now = time.monotonic()
+        last = self._last_published.get(task_id)
+        if (
+            last is not None
+            and stage == last[2]
+            and now - last[0] < self._min_publish_interval
+            and abs(percent - last[1]) < self._min_percent_delta
+        ):
+            return False
+        self._last_published[task_id] = (now, percent, stage)
+        return True
+
     def update_progress(
         self, task_id: str, percent: float, message: str = "", stage: str = ""
     ) -> bool:
         """
         Update task progress and notify subscribers
-        Returns True if task exists, False otherwise
+        Returns False if the task does not exist or has finished (a late update must not
+        revive a cancelled or completed task)
         """
         with self._lock:
             task = self._tasks.get(task_id)
-            if not task:
+            if not task or not task.is_active:
                 return False
 
             task.status = TaskStatus.PROCESSING
             task.update_progress(percent, message, stage)
 
-            # Notify all subscribers
-            self._notify_subscribers(
-                task_id,
-                {
-                    "event": "progress",
-                    "data": task.progress.to_dict(),
-                },
-            )
+            if not self._should_publish(task_id, task.progress.percent, stage):
+                return True
+            subscribers = list(self._subscribers.get(task_id, []))
+            progress = task.progress.to_dict()
+
+        # Notify all subscribers
+        self._publish(subscribers, {"event": "progress", "data": progress})
+        return True
+
+    def set_queue_position(self, task_id: str, position: int) -> bool:
+        """
+        Report the queue position of a pending task and notify subscribers
+        Returns False if the task does not exist or is no longer pending
+        """
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if not task or task.status != TaskStatus.PENDING:
+                return False
+
+            task.set_queue_position(position)
+            subscribers = list(self._subscribers.get(task_id, []))
+            progress = task.progress.to_dict()
 
-            return True
+        self._publish(subscribers, {"event": "progress", "data": progress})
+        return True
 
     def complete_task(self, task_id: str, result: TaskResult) -> bool:
-        """Mark task as completed with result"""
+        """Mark task as completed with result, returns False if it does not exist or has finished"""
         with self._lock:
             task = self._tasks.get(task_id)
-            if not task:
+            if not task or not task.is_active:
                 return False
 
             task.complete(result)
+            subscribers = self._finish_subscribers(task_id)
 
-            # Notify all subscribers
-            self._notify_subscribers(
-                task_id,
-                {
-                    "event": "complete",
-                    "data": result.to_dict(),
-                },
-            )
-
-            return True
+        # Notify all subscribers
+        self._publish(subscribers, {"event": "complete", "data": result.to_dict()})
+        return True
 
     def fail_task(self, task_id: str, error: str) -> bool:
-        """Mark task as failed with error"""
+        """Mark task as failed with error, returns False if it does not exist or has finished"""
         with self._lock:
             task = self._tasks.get(task_id)
-            if not task:
+            if not task or not task.is_active:
                 return False
 
             task.fail(error)
+            subscribers = self._finish_subscribers(task_id)
 
-            # Notify all subscribers
-            self._notify_subscribers(
-                task_id,
-                {
-                    "event": "error",
-                    "data": {"message": error},
-                },
-            )
-
-            return True
+        # Notify all subscribers
+        self._publish(subscribers, {"event": "error", "data": {"message": error}})
+        return True
 
     def cancel_task(self, task_id: str) -> bool:
-        """Cancel a task"""
+        """Cancel a task, returns False if it does not exist or has finished"""
         with self._lock:
             task = self._tasks.get(task_id)
-            if not task:
+            if not task or not task.is_active:
                 return False
 
             task.cancel()
+            subscribers = self._finish_subscribers(task_id)
+
+        # Notify all subscribers
+        self._publish(subscribers, {"event": "cancelled", "data": {"message": "Task cancelled"}})
+        return True
 
-            # Notify all subscribers
-            self._notify_subscribers(
-                task_id,
-                {
-                    "event": "cancelled",
-                    "data": {"message": "Task cancelled"},
-                },
-            )
-
-            return True
-
-    def _notify_subscribers(self, task_id: str, message: dict):
-        """Send message to all subscribers of a task (call within lock)"""
-        subscribers = self._subscribers.get(task_id, [])
-        for queue in subscribers:
-            try:
-                queue.put_nowait(message)
-            except asyncio.QueueFull:
-                pass  # Skip if queue is full
+    def _finish_subscribers(self, task_id: str) -> List[Subscription]:
+        """Snapshot subscribers for a final event and drop rate-limit state (call within lock)"""
+        self._last_published.pop(task_id, None)
+        return list(self._subscribers.get(task_id, []))
+
+    @staticmethod
+    def _publish(subscribers: List[Subscription], message: dict):
+        """Send message to subscribers (called outside the lock to keep it short)"""
+        for subscription in subscribers:
+            subscription.publish(message)
 
     async def subscribe(self, task_id: str) -> AsyncGenerator[dict, None]:
         """
         Subscribe to task updates via async generator
         Used for SSE streaming
         """
-        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        subscription = Subscription()
 
+        # Build the first message under the lock, but never yield while holding it
         with self._lock:
             task = self._tasks.get(task_id)
             if not task:
-                yield {"event": "error", "data": {"message": "Task not found"}}
-                return
-
-            # If task is already completed or failed, send final status immediately
-            if task.status == TaskStatus.COMPLETED:
-                yield {"event": "complete", "data": task.result.to_dict() if task.result else {}}
-                return
+                first = {"event": "error", "data": {"message": "Task not found"}}
+            elif task.status == TaskStatus.COMPLETED:
+                # If task is already completed or failed, send final status immediately
+                first = {"event": "complete", "data": task.result.to_dict() if task.result else {}}
             elif task.status == TaskStatus.FAILED:
-                yield {
+                first = {
                     "event": "error",
                     "data": {"message": task.result.error if task.result else "Task failed"},
                 }
-                return
             elif task.status == TaskStatus.CANCELLED:
-                yield {"event": "cancelled", "data": {"message": "Task cancelled"}}
-                return
-
-            # Send current progress
-            yield {"event": "progress", "data": task.progress.to_dict()}
-
-            # Add subscriber
-            self._subscribers[task_id].append(queue)
+                first = {"event": "cancelled", "data": {"message": "Task cancelled"}}
+            else:
+                # Send current progress and add subscriber
+                first = {"event": "progress", "data": task.progress.to_dict()}
+                self._subscribers[task_id].append(subscription)
 
         try:
+            yield first
+            if first["event"] != "progress":
+                return
+
             while True:
                 try:
                     # Wait for updates with timeout
-                    message = await asyncio.wait_for(queue.get(), timeout=30.0)
+                    message = await subscription.get(timeout=30.0)
                     yield message
 
                     # Stop if task completed, failed, or cancelled
@@ -187,7 +246,7 @@ class TaskStore:
                 except asyncio.TimeoutError:
                     # Send keepalive
                     task = self.get_task(task_id)
-                    if task and task.status == TaskStatus.PROCESSING:
+                    if task and task.is_active:
                         yield {"event": "progress", "data": task.progress.to_dict()}
                     else:
                         break
@@ -197,10 +256,17 @@ class TaskStore:
             with self._lock:
                 if task_id in self._subscribers:
                     try:
-                        self._subscribers[task_id].remove(queue)
+                        self._subscribers[task_id].remove(subscription)
                     except ValueError:
                         pass
 
+    def remove_task(self, task_id: str) -> bool:
+        """Delete a task and its subscribers"""
+        with self._lock:
+            self._subscribers.pop(task_id, None)
+            self._last_published.pop(task_id, None)
+            return self._tasks.pop(task_id, None) is not None
+
     def cleanup_old_tasks(self):
         """Remove tasks older than TTL"""
         cutoff = datetime.now() - self._task_ttl
@@ -210,6 +276,7 @@ class TaskStore:
             ]
             for task_id in old_task_ids:
                 del self._tasks[task_id]
+                self._last_published.pop(task_id, None)
                 if task_id in self._subscribers:
                     del self._subscribers[task_id]
 
@@ -221,5 +288,14 @@ class TaskStore:
             return dict(self._tasks)
 
 
+def create_task_store() -> BaseTaskStore:
+    """Create the task store selected by TASK_STORE_BACKEND (memory or sqlite)"""
+    if TASK_STORE_BACKEND == "sqlite":
+        from .sqlite_store import SQLiteTaskStore
+
+        return SQLiteTaskStore(TASK_STORE_PATH, task_ttl_minutes=TASK_TTL_MINUTES)
+    return TaskStore(task_ttl_minutes=TASK_TTL_MINUTES)
+
+
 # Global task store instance
-task_store = TaskStore()
+task_store = create_task_store()
@@ -0,0 +1,113 @@
+"""
+LRU cache of intermediate files (e.g. GIF palettes) addressed by a key
+Unlike result_cache, entries are building blocks of an operation rather than its final output
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+import shutil
+import threading
+from typing import List, Optional
+
+from app.config import ARTIFACT_CACHE_DIR, GIF_PALETTE_CACHE_SIZE, WAVEFORM_CACHE_SIZE
+from app.utils.file_handler import delete_file, link_or_copy
+
+
+class ArtifactCache:
+    """
+    Small files kept between requests to skip the step that produces them
+
+    Features:
+    - Entries are hard-linked (or copied) in and out, callers always own their own copy
+    - Bounded by entry count, least recently used entries are deleted first
+    - A file removed behind the cache's back counts as a miss
+    - Hit and miss counters
+    """
+
+    def __init__(self, cache_dir: Path, max_entries: int):
+        self._dir = cache_dir
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, Path]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_entries > 0
+
+    def get(self, key: Optional[str], target: Path) -> bool:
+        """
+        Copy a cached file to target
+
+        Args:
+            key: Entry key (None is always a miss)
+            target: Path the cached file is linked to
+
+        Returns:
+            True on a hit, False if target was not created
+        """
+        if key is None or not self.enabled:
+            return False
+
+        with self._lock:
+            path = self._entries.get(key)
+            if path is not None:
+                self._entries.move_to_end(key)
+
+        if path is not None:
+            try:
+                link_or_copy(path, target)
+                with self._lock:
+                    self._hits += 1
+                return True
+            except OSError:
+                with self._lock:
+                    self._entries.pop(key, None)
+
+        with self._lock:
+            self._misses += 1
+        return False
+
+    def put(self, key: Optional[str], source: Path):
+        """Keep a copy of source under key (ignored when disabled or source is missing)"""
+        if key is None or not self.enabled or not source.is_file():
+            return
+
+        self._dir.mkdir(parents=True, exist_ok=True)
+        path = self._dir / f"{key}{source.suffix}"
+        path.unlink(missing_ok=True)
+        link_or_copy(source, path)
+
+        evicted: List[Path] = []
+        with self._lock:
+            self._entries[key] = path
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                evicted.append(self._entries.popitem(last=False)[1])
+
+        for old_path in evicted:
+            delete_file(old_path)
+
+    def clear(self):
+        """Forget all entries and delete the cache directory"""
+        with self._lock:
+            self._entries.clear()
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def stats(self) -> dict:
+        """Entries and hit/miss counters (for the health endpoint)"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+# GIF palettes per (video, segment, width, fps)
+palette_cache = ArtifactCache(ARTIFACT_CACHE_DIR / "palettes", GIF_PALETTE_CACHE_SIZE)
+
+# Audio waveform peak pyramids per (audio, peaks, zoom levels)
+waveform_cache = ArtifactCache(ARTIFACT_CACHE_DIR / "waveforms", WAVEFORM_CACHE_SIZE)
@@ -0,0 +1,167 @@
+"""
+Registry of the external tools and codecs available on this host
+Probed once (at startup or on first use) instead of shelling out on every request
+"""
+
+import re
+import shutil
+import subprocess
+import threading
+from typing import FrozenSet, List, Optional
+
+# H.264 encoders in order of preference
+H264_ENCODERS = ("libx264", "libopenh264", "h264_vaapi")
+
+# Flag column of `ffmpeg -encoders/-decoders/-filters` entries (e.g. "V....D", "TSC")
+_FLAGS = re.compile(r"^[A-Z.]{3,6}$")
+
+
+def _run(cmd: List[str]) -> Optional[subprocess.CompletedProcess]:
+    """Run a probe command, None if the tool is missing or hangs"""
+    try:
+        return subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _first_line(result: Optional[subprocess.CompletedProcess]) -> Optional[str]:
+    """First output line of a successful command (version banners)"""
+    if result is None or result.returncode != 0:
+        return None
+    output = (result.stdout or result.stderr).strip()
+    return output.splitlines()[0] if output else None
+
+
+def parse_ffmpeg_list(output: str) -> FrozenSet[str]:
+    """
+    Names listed by `ffmpeg -encoders`, `-decoders` or `-filters`
+
+    Args:
+        output: Standard output of the command
+
+    Returns:
+        Set of encoder, decoder or filter names
+    """
+    names = set()
+    for line in output.splitlines():
+        parts = line.split()
+        # Legend lines look like "V..... = Video", entries like "V....D libx264  description"
+        if len(parts) >= 2 and _FLAGS.match(parts[0]) and parts[1] != "=":
+            names.add(parts[1])
+    return frozenset(names)
+
+
+def parse_tesseract_languages(output: str) -> List[str]:
+    """Language codes listed by `tesseract --list-langs`"""
+    return [
+        line.strip()
+        for line in output.splitlines()
+        if line.strip() and not line.startswith("List of available languages")
+    ]
+
+
+class CapabilityRegistry:
+    """
+    What FFmpeg, Tesseract and Poppler can do on this host
+
+    Features:
+    - FFmpeg encoders, decoders and filters, Tesseract languages, Poppler presence
+    - Probed once, lazily on first use or explicitly at startup with refresh()
+    - Missing tools give empty capabilities instead of errors
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._probed = False
+        self.ffmpeg_version: Optional[str] = None
+        self.encoders: FrozenSet[str] = frozenset()
+        self.decoders: FrozenSet[str] = frozenset()
+        self.filters: FrozenSet[str] = frozenset()
+        self.tesseract_version: Optional[str] = None
+        self.tesseract_languages: List[str] = []
+        self.poppler = False
+
+    def refresh(self):
+        """Probe every tool (again)"""
+        ffmpeg_version = _first_line(_run(["ffmpeg", "-hide_banner", "-version"]))
+        lists = {}
+        for kind in ("encoders", "decoders", "filters"):
+            result = _run(["ffmpeg", "-hide_banner", f"-{kind}"])
+            lists[kind] = parse_ffmpeg_list(result.stdout) if result else frozenset()
+
+        tesseract_version = _first_line(_run(["tesseract", "--version"]))
+        languages = _run(["tesseract", "--list-langs"])
+        if languages and languages.returncode == 0:
+            # Tesseract 3 prints the list to stderr
+            tesseract_languages = parse_tesseract_languages(languages.stdout or languages.stderr)
+        else:
+            tesseract_languages = []
+
+        with self._lock:
+            self.ffmpeg_version = ffmpeg_version
+            self.encoders = lists["encoders"]
+            self.decoders = lists["decoders"]
+            self.filters = lists["filters"]
+            self.tesseract_version = tesseract_version
+            self.tesseract_languages = tesseract_languages
+            self.poppler = shutil.which("pdftoppm") is not None
+            self._probed = True
+
+    def _ensure_probed(self):
+        if not self._probed:
+            self.refresh()
+
+    def has_encoder(self, name: str) -> bool:
+        self._ensure_probed()
+        return name in self.encoders
+
+    def has_decoder(self, name: str) -> bool:
+        self._ensure_probed()
+        return name in self.decoders
+
+    def has_filter(self, name: str) -> bool:
+        self._ensure_probed()
+        return name in self.filters
+
+    def h264_encoder(self) -> Optional[str]:
+        """Best available H.264 encoder, None if FFmpeg has none"""
+        self._ensure_probed()
+        return next((name for name in H264_ENCODERS if name in self.encoders), None)
+
+    def has_tesseract(self) -> bool:
+        self._ensure_probed()
+        return self.tesseract_version is not None
+
+    def missing_tesseract_languages(self, language: str) -> List[str]:
+        """
+        Languages of a Tesseract spec (e.g. "eng+fra") that are not installed
+
+        Returns:
+            Missing language codes, empty when all are installed or the list is unknown
+        """
+        self._ensure_probed()
+        if not self.tesseract_languages:
+            return []
+        return [lang for lang in language.split("+") if lang not in self.tesseract_languages]
+
+    def has_poppler(self) -> bool:
+        self._ensure_probed()
+        return self.poppler
+
+    def summary(self) -> dict:
+        """Tool versions and capability counts (for the health endpoint)"""
+        self._ensure_probed()
+        return {
+            "ffmpeg": self.ffmpeg_version,
+            "encoders": len(self.encoders),
+            "decoders": len(self.decoders),
+            "filters": len(self.filters),
+            "h264_encoder": self.h264_encoder(),
+            "tesseract": self.tesseract_version,
+            "tesseract_languages": self.tesseract_languages,
+            "poppler": self.poppler,
+        }
+
+
+# Global capability registry instance
+capabilities = CapabilityRegistry()
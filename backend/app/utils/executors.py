@@ -0,0 +1,118 @@
+"""
+Shared executor pools for blocking service calls
+Keeps CPU-bound and subprocess-bound work off the event loop
+"""
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+import multiprocessing
+import threading
+from typing import Any, Callable, Optional, TypeVar
+
+from app.config import PROCESS_POOL_WORKERS, THREAD_POOL_WORKERS
+
+T = TypeVar("T")
+
+
+class WorkerPool:
+    """
+    Lazily created executor that keeps track of its queue depth
+
+    Features:
+    - Process or thread backed (process pools fall back to threads when max_workers is 0)
+    - Counts queued, running and completed jobs for monitoring
+    - Safe to shut down and recreate (e.g. between test sessions)
+    """
+
+    def __init__(self, name: str, kind: str, max_workers: int):
+        self.name = name
+        self.kind = kind if max_workers > 0 else "thread"
+        self.max_workers = max_workers if max_workers > 0 else THREAD_POOL_WORKERS
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+
+    def _get_executor(self) -> Executor:
+        """Create the underlying executor on first use"""
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    # spawn avoids forking a process that already runs the event loop and threads
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix=f"{self.name}-pool"
+                    )
+            return self._executor
+
+    def _on_done(self, _future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run func(*args, **kwargs) in the pool and await its result
+
+        For process pools, func, its arguments and its return value must be picklable
+        (module-level service functions and Pydantic responses are).
+        """
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            self._in_flight += 1
+        future = loop.run_in_executor(executor, partial(func, *args, **kwargs))
+        future.add_done_callback(self._on_done)
+        return await future
+
+    def stats(self) -> dict:
+        """Return queue depth information for this pool"""
+        with self._lock:
+            running = min(self._in_flight, self.max_workers)
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "running": running,
+                "queued": self._in_flight - running,
+                "completed": self._completed,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down the underlying executor (a new one is created on next use)"""
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+# Global pool instances
+cpu_pool = WorkerPool("cpu", "process", PROCESS_POOL_WORKERS)
+io_pool = WorkerPool("io", "thread", THREAD_POOL_WORKERS)
+
+
+async def run_cpu_bound(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a CPU-bound call (Pillow, PyMuPDF, cryptography) in the process pool"""
+    return await cpu_pool.run(func, *args, **kwargs)
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking call that mostly waits on a subprocess or disk in the thread pool"""
+    return await io_pool.run(func, *args, **kwargs)
+
+
+def get_executor_stats() -> dict:
+    """Queue depth of every shared pool, keyed by pool name"""
+    return {pool.name: pool.stats() for pool in (cpu_pool, io_pool)}
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """Shut down all shared pools (called on application shutdown)"""
+    for pool in (cpu_pool, io_pool):
+        pool.shutdown(wait=wait)
@@ -0,0 +1,107 @@
+"""
+FFmpeg runs that report progress to a background task
+Parses `-progress pipe:1` output and registers the process for cancellation
+"""
+
+import asyncio
+from typing import Callable, List, Optional, Tuple
+
+import ffmpeg
+
+from app.tasks.cancellation import cancellation_registry
+from app.tasks.store import task_store
+
+
+async def run_ffmpeg(
+    task_id: str, cmd: List[str], on_time: Optional[Callable[[float], None]] = None
+) -> Tuple[int, str]:
+    """
+    Run an FFmpeg command that writes -progress to stdout
+
+    stderr is only read once the progress ends, so commands whose log grows with the input
+    (e.g. segment muxers) must lower it with -v error.
+
+    Args:
+        task_id: Task the process is registered to (stopped if the task is cancelled)
+        cmd: FFmpeg command line
+        on_time: Called with the encoded output time in seconds as it advances
+
+    Returns:
+        (return code, stderr output)
+    """
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    cancellation_registry.register_process(task_id, process)
+
+    try:
+        while True:
+            line = await process.stdout.readline()
+            if not line:
+                break
+
+            line_str = line.decode().strip()
+
+            # Parse out_time_ms from FFmpeg progress
+            if on_time and line_str.startswith("out_time_ms="):
+                try:
+                    on_time(int(line_str.split("=")[1]) / 1_000_000)
+                except ValueError:
+                    pass
+
+            # Check for end of progress
+            if line_str.startswith("progress=end"):
+                break
+
+        _, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        # A failed sibling segment cancels this one, do not leave the encoder running
+        if process.returncode is None:
+            try:
+                process.kill()
+                await process.wait()
+            except ProcessLookupError:
+                pass
+        raise
+
+    return process.returncode, stderr.decode() if stderr else ""
+
+
+async def run_ffmpeg_graph(
+    task_id: str,
+    stream,
+    duration: Optional[float],
+    label: str,
+    start_percent: float = 5,
+    end_percent: float = 99,
+) -> Optional[str]:
+    """
+    Run an ffmpeg-python output graph, mapping its output time onto the task's progress
+
+    Args:
+        task_id: Task to report progress to
+        stream: Output node built with ffmpeg.output()
+        duration: Expected output duration in seconds (progress stays at start_percent if unknown)
+        label: Progress message prefix (e.g. "Converting")
+        start_percent: Progress when FFmpeg starts
+        end_percent: Progress when the output is complete
+
+    Returns:
+        Error message on failure, None on success
+    """
+
+    def report(seconds: float):
+        if not duration:
+            return
+        done = min(seconds / duration, 1.0)
+        percent = start_percent + done * (end_percent - start_percent)
+        task_store.update_progress(task_id, percent, f"{label}... {done * 100:.0f}%", "encoding")
+
+    stream = stream.global_args("-progress", "pipe:1", "-nostats")
+    cmd = ffmpeg.compile(stream, overwrite_output=True)
+    returncode, stderr = await run_ffmpeg(task_id, cmd, report)
+    if returncode != 0:
+        return stderr or "FFmpeg error"
+    return None
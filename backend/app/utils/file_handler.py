@@ -2,14 +2,51 @@
 File handling utilities for upload, download, and temporary file management
 """
 
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import lru_cache
+import hashlib
+import mimetypes
+import os
 from pathlib import Path
 import shutil
+import time
+from typing import BinaryIO, Callable, Optional, Tuple
 import uuid
 
-from fastapi import UploadFile
-
-from app.config import TEMP_DIR, TEMP_FILE_CLEANUP_MINUTES
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+from app.config import (
+    MAX_FILE_SIZE,
+    MAX_REQUEST_SIZE,
+    TEMP_DIR,
+    TEMP_FILE_CLEANUP_MINUTES,
+    UPLOAD_CHUNK_SIZE,
+)
+from app.utils.executors import run_blocking
+from app.utils.validators import SNIFF_HEADER_SIZE, sniff_format
+
+# Media types for downloads that are missing from some platforms' mimetypes tables
+for _media_type, _extension in (
+    ("image/webp", ".webp"),
+    ("image/avif", ".avif"),
+    ("video/x-matroska", ".mkv"),
+    ("video/x-flv", ".flv"),
+    ("video/x-ms-wmv", ".wmv"),
+    ("audio/flac", ".flac"),
+    ("audio/ogg", ".ogg"),
+    ("audio/mp4", ".m4a"),
+    ("application/vnd.apple.mpegurl", ".m3u8"),
+    ("application/dash+xml", ".mpd"),
+    ("video/iso.segment", ".m4s"),
+    ("text/vtt", ".vtt"),
+):
+    mimetypes.add_type(_media_type, _extension)
+
+# Directories of HLS/DASH playlists and segments written to TEMP_DIR end with this
+STREAMING_DIR_SUFFIX = "_stream"
 
 
 def generate_unique_filename(original_filename: str) -> str:
@@ -36,25 +73,215 @@ def generate_unique_filename(original_filename: str) -> str:
     return f"{timestamp}_{unique_id}_{sanitized_name}{extension}"
 
 
-async def save_upload_file(upload_file: UploadFile, custom_filename: str = None) -> Path:
+@dataclass
+class UploadInfo:
+    """Result of streaming an upload to disk"""
+
+    path: Path
+    size: int
+    sha256: str
+    detected_format: Optional[str]
+    elapsed: float  # seconds
+
+
+# Upload counters reported by get_upload_stats()
+_upload_stats = {"uploads": 0, "bytes": 0, "seconds": 0.0, "rejected": 0}
+
+# SHA-256 of recent uploads: path -> (mtime_ns, size, digest)
+_upload_hashes: "OrderedDict[str, Tuple[int, int, str]]" = OrderedDict()
+_UPLOAD_HASHES_MAX = 1024
+
+
+def _copy_chunk(source: BinaryIO, buffer: BinaryIO, hasher, chunk_size: int) -> bytes:
+    """Read, hash and write one chunk (runs in the I/O thread pool)"""
+    chunk = source.read(chunk_size)
+    if chunk:
+        hasher.update(chunk)
+        buffer.write(chunk)
+    return chunk
+
+
+def _reject_upload(file_path: Path, status_code: int, detail: str):
+    """Remove a partial upload and abort the request"""
+    _upload_stats["rejected"] += 1
+    delete_file(file_path)
+    raise HTTPException(status_code=status_code, detail=detail)
+
+
+class RequestSizeLimitMiddleware:
     """
-    Save an uploaded file to the temporary directory
+    Abort request bodies above a size limit while they are still being received
+
+    Starlette spools a whole multipart body to disk before an endpoint runs, so the per-file
+    check of save_upload_stream only happens afterwards. This guard answers 413 straight away
+    when Content-Length is too large, and stops reading a body (chunked or with a wrong
+    Content-Length) as soon as it grows past the limit.
+    """
+
+    def __init__(self, app, max_size: int = MAX_REQUEST_SIZE):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        too_large = f"Request exceeds the maximum size of {self.max_size // (1024 * 1024)} MB"
+        headers = dict(scope.get("headers", []))
+        try:
+            declared = int(headers.get(b"content-length", b""))
+        except ValueError:
+            declared = None
+        if declared is not None and declared > self.max_size:
+            _upload_stats["rejected"] += 1
+            response = JSONResponse({"detail": too_large}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    _upload_stats["rejected"] += 1
+                    # Raised while the body is parsed, FastAPI turns it into the response
+                    raise HTTPException(status_code=413, detail=too_large)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+async def save_upload_stream(
+    upload_file: UploadFile,
+    custom_filename: str = None,
+    max_size: int = MAX_FILE_SIZE,
+    content_check: Optional[Callable[[bytes], bool]] = None,
+) -> UploadInfo:
+    """
+    Stream an uploaded file to the temporary directory
+
+    Reads, hashes and writes in UPLOAD_CHUNK_SIZE chunks off the event loop. The file has
+    already been spooled by Starlette at this point, so max_size rejects it after the upload;
+    RequestSizeLimitMiddleware is what stops an oversized body while it arrives.
 
     Args:
         upload_file: FastAPI UploadFile object
         custom_filename: Optional custom filename to use
+        max_size: Maximum size in bytes (HTTP 413 above it)
+        content_check: Optional check of the file's leading bytes (HTTP 400 if it fails)
 
     Returns:
-        Path to the saved file
+        UploadInfo with the saved path, size, SHA-256 and sniffed format
     """
     filename = custom_filename or generate_unique_filename(upload_file.filename)
     file_path = TEMP_DIR / filename
+    too_large = f"File exceeds the maximum size of {max_size // (1024 * 1024)} MB"
+
+    # Reject early when the client announced the size
+    declared_size = getattr(upload_file, "size", None)
+    if isinstance(declared_size, int) and declared_size > max_size:
+        _upload_stats["rejected"] += 1
+        raise HTTPException(status_code=413, detail=too_large)
+
+    hasher = hashlib.sha256()
+    size = 0
+    header = b""
+    start = time.perf_counter()
 
-    # Write file in chunks to handle large files
     with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(upload_file.file, buffer)
+        while True:
+            chunk = await run_blocking(
+                _copy_chunk, upload_file.file, buffer, hasher, UPLOAD_CHUNK_SIZE
+            )
+            if not chunk:
+                break
+
+            if len(header) < SNIFF_HEADER_SIZE:
+                header += chunk[: SNIFF_HEADER_SIZE - len(header)]
+                if content_check and len(header) >= SNIFF_HEADER_SIZE:
+                    if not content_check(header):
+                        buffer.close()
+                        _reject_upload(file_path, 400, "File content does not match its format")
+
+            size += len(chunk)
+            if size > max_size:
+                buffer.close()
+                _reject_upload(file_path, 413, too_large)
+
+    # Files shorter than the sniff window are checked once fully read
+    if content_check and len(header) < SNIFF_HEADER_SIZE and not content_check(header):
+        _reject_upload(file_path, 400, "File content does not match its format")
+
+    elapsed = time.perf_counter() - start
+    _upload_stats["uploads"] += 1
+    _upload_stats["bytes"] += size
+    _upload_stats["seconds"] += elapsed
+
+    digest = hasher.hexdigest()
+    stat_result = file_path.stat()
+    _upload_hashes[str(file_path)] = (stat_result.st_mtime_ns, size, digest)
+    while len(_upload_hashes) > _UPLOAD_HASHES_MAX:
+        _upload_hashes.popitem(last=False)
+
+    return UploadInfo(
+        path=file_path,
+        size=size,
+        sha256=digest,
+        detected_format=sniff_format(header),
+        elapsed=elapsed,
+    )
+
+
+async def save_upload_file(
+    upload_file: UploadFile,
+    custom_filename: str = None,
+    content_check: Optional[Callable[[bytes], bool]] = None,
+) -> Path:
+    """
+    Save an uploaded file to the temporary directory
 
-    return file_path
+    Args:
+        upload_file: FastAPI UploadFile object
+        custom_filename: Optional custom filename to use
+        content_check: Optional check of the file's leading bytes (e.g. is_video_content)
+
+    Returns:
+        Path to the saved file
+    """
+    info = await save_upload_stream(upload_file, custom_filename, content_check=content_check)
+    return info.path
+
+
+def get_known_hash(file_path: Path) -> Optional[str]:
+    """
+    SHA-256 computed while the file was uploaded
+
+    Args:
+        file_path: Path returned by save_upload_stream / save_upload_file
+
+    Returns:
+        Hex digest, None if the file was not uploaded recently or has changed since
+    """
+    known = _upload_hashes.get(str(file_path))
+    if known is None:
+        return None
+    try:
+        stat_result = file_path.stat()
+    except OSError:
+        return None
+    mtime_ns, size, digest = known
+    return digest if (stat_result.st_mtime_ns, stat_result.st_size) == (mtime_ns, size) else None
+
+
+def get_upload_stats() -> dict:
+    """Upload counters and average throughput (for the health endpoint)"""
+    seconds = _upload_stats["seconds"]
+    throughput = _upload_stats["bytes"] / seconds / (1024 * 1024) if seconds else 0.0
+    return {**_upload_stats, "throughput_mb_s": round(throughput, 2)}
 
 
 def save_processed_file(content: bytes, original_filename: str, suffix: str = "_processed") -> Path:
@@ -84,21 +311,35 @@ def save_processed_file(content: bytes, original_filename: str, suffix: str = "_
 def cleanup_temp_files():
     """
     Clean up temporary files older than TEMP_FILE_CLEANUP_MINUTES
-    Should be called periodically
+    Safety net for files no task owns (task outputs are evicted by the expiry manager)
     """
     if not TEMP_DIR.exists():
         return
 
-    cutoff_time = datetime.now() - timedelta(minutes=TEMP_FILE_CLEANUP_MINUTES)
-
-    for file_path in TEMP_DIR.iterdir():
-        if file_path.is_file():
-            file_modified = datetime.fromtimestamp(file_path.stat().st_mtime)
-            if file_modified < cutoff_time:
-                try:
-                    file_path.unlink()
-                except Exception as e:
-                    print(f"Error deleting file {file_path}: {e}")
+    cutoff_time = (datetime.now() - timedelta(minutes=TEMP_FILE_CLEANUP_MINUTES)).timestamp()
+
+    # scandir reuses the directory listing's file type, so only files need a stat() call
+    with os.scandir(TEMP_DIR) as entries:
+        for entry in entries:
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff_time:
+                    Path(entry.path).unlink()
+                elif (
+                    entry.name.endswith(STREAMING_DIR_SUFFIX)
+                    and entry.is_dir()
+                    and entry.stat().st_mtime < cutoff_time
+                ):
+                    shutil.rmtree(entry.path)
+            except Exception as e:
+                print(f"Error deleting file {entry.path}: {e}")
+
+
+def link_or_copy(source: Path, target: Path):
+    """Hard-link a file, copying it when links are not supported (e.g. across filesystems)"""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
 
 
 def delete_file(file_path: Path):
@@ -115,16 +356,60 @@ def delete_file(file_path: Path):
         print(f"Error deleting file {file_path}: {e}")
 
 
+def delete_output(output_path: Path):
+    """
+    Delete a task output: a file, or a directory of files (HLS/DASH renditions)
+
+    Args:
+        output_path: Path to the file or directory to delete
+    """
+    if output_path.is_dir():
+        shutil.rmtree(output_path, ignore_errors=True)
+    else:
+        delete_file(output_path)
+
+
+@lru_cache(maxsize=1024)
+def _hash_file(path: str, mtime_ns: int, size: int) -> str:
+    """SHA-256 of a file, cached per (path, mtime, size) so a rewritten file is rehashed"""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def get_file_etag(file_path: Path) -> str:
+    """
+    Strong ETag derived from the file's content hash
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        Quoted ETag value
+    """
+    stat_result = file_path.stat()
+    return f'"{_hash_file(str(file_path), stat_result.st_mtime_ns, stat_result.st_size)}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag (RFC 9110)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
 def get_file_size(file_path: Path) -> int:
     """
     Get file size in bytes
 
     Args:
-        file_path: Path to the file
+        file_path: Path to the file (or directory, e.g. HLS renditions)
 
     Returns:
-        File size in bytes
+        File size in bytes (total of the files in a directory)
     """
+    if file_path.is_dir():
+        return sum(path.stat().st_size for path in file_path.rglob("*") if path.is_file())
     return file_path.stat().st_size if file_path.exists() else 0
 
 
@@ -0,0 +1,100 @@
+"""
+Image decoding sized to the operation
+JPEGs are decoded at a reduced scale (draft), other formats are box-reduced before the final
+resample, and EXIF orientation is applied once so callers always see upright pixels
+"""
+
+import math
+from typing import Optional, Tuple
+
+from PIL import ExifTags, Image
+
+# The final resample still shrinks by at least this factor, keeping its output close to a
+# full-resolution resample (same default as Image.thumbnail)
+REDUCING_GAP = 2.0
+
+# EXIF orientation -> transpose that makes the image upright
+_ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+# Orientations stored sideways (width and height swap once upright)
+_SWAPPED_ORIENTATIONS = {5, 6, 7, 8}
+
+# Modes Image.reduce() cannot handle
+_NO_REDUCE_MODES = {"1", "P", "PA"}
+
+
+def exif_orientation(img: Image.Image) -> int:
+    """EXIF orientation tag of an opened image (1 when missing or unreadable)"""
+    try:
+        orientation = int(img.getexif().get(ExifTags.Base.Orientation, 1))
+    except Exception:
+        return 1
+    return orientation if orientation in _ORIENTATION_TRANSPOSE else 1
+
+
+def oriented_size(img: Image.Image) -> Tuple[int, int]:
+    """(width, height) of an opened image once EXIF orientation is applied, without decoding it"""
+    width, height = img.size
+    if exif_orientation(img) in _SWAPPED_ORIENTATIONS:
+        return height, width
+    return width, height
+
+
+def cover_size(size: Tuple[int, int], box: Tuple[int, int]) -> Tuple[int, int]:
+    """Smallest size with the aspect ratio of size that covers box (CSS object-fit: cover)"""
+    scale = max(box[0] / size[0], box[1] / size[1])
+    return max(box[0], math.ceil(size[0] * scale)), max(box[1], math.ceil(size[1] * scale))
+
+
+def contain_size(size: Tuple[int, int], box: Tuple[int, int]) -> Tuple[int, int]:
+    """Largest size with the aspect ratio of size that fits in box (CSS object-fit: contain)"""
+    scale = min(box[0] / size[0], box[1] / size[1])
+    return max(1, round(size[0] * scale)), max(1, round(size[1] * scale))
+
+
+def load_image(img: Image.Image, target_size: Optional[Tuple[int, int]] = None) -> Image.Image:
+    """
+    Decode an opened image, no larger than needed for target_size, upright
+
+    Must be called before anything else reads the pixels (draft only applies to undecoded
+    JPEGs). The result may be the same object as img, so use it while the file is open or
+    copy it.
+
+    Args:
+        img: Image returned by Image.open
+        target_size: Upright (width, height) the caller resizes to (None decodes at full size)
+
+    Returns:
+        Loaded image, at least REDUCING_GAP times target_size when the source is that large,
+        with EXIF orientation applied
+    """
+    orientation = exif_orientation(img)
+
+    if target_size is None:
+        img.load()
+    else:
+        width, height = target_size
+        if orientation in _SWAPPED_ORIENTATIONS:
+            width, height = height, width
+        wanted = (max(1, int(width * REDUCING_GAP)), max(1, int(height * REDUCING_GAP)))
+
+        # JPEG picks the largest 1/2, 1/4 or 1/8 scale still covering wanted, no-op elsewhere
+        img.draft(None, wanted)
+        img.load()
+
+        factor = min(img.width // wanted[0], img.height // wanted[1])
+        if factor >= 2 and img.mode not in _NO_REDUCE_MODES:
+            img = img.reduce(factor)
+
+    transpose = _ORIENTATION_TRANSPOSE.get(orientation)
+    if transpose is not None:
+        img = img.transpose(transpose)
+    return img
@@ -0,0 +1,180 @@
+"""
+Cached ffprobe results shared by the video, audio and GIF services
+Uploads are keyed by their content hash, other files by their on-disk identity
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+import subprocess
+import threading
+from typing import List, Optional
+
+import ffmpeg
+
+from app.config import MEDIA_PROBE_CACHE_SIZE
+from app.utils.file_handler import get_known_hash
+
+
+@dataclass
+class MediaInfo:
+    """What ffprobe found in a file"""
+
+    probe: dict  # Raw `ffprobe -show_format -show_streams` output
+    keyframes: Optional[List[float]] = None  # Read on first request, it scans every packet
+
+    @property
+    def streams(self) -> List[dict]:
+        return self.probe.get("streams", [])
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Container duration in seconds"""
+        try:
+            return float(self.probe["format"]["duration"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @property
+    def has_audio(self) -> bool:
+        return any(s.get("codec_type") == "audio" for s in self.streams)
+
+    @property
+    def codecs(self) -> List[str]:
+        return [s["codec_name"] for s in self.streams if s.get("codec_name")]
+
+
+def read_keyframe_times(input_path: Path) -> List[float]:
+    """Keyframe timestamps (seconds from the first keyframe) read from the packet index"""
+    try:
+        result = subprocess.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-select_streams",
+                "v:0",
+                "-show_entries",
+                "packet=pts_time,flags",
+                "-of",
+                "csv=p=0",
+                str(input_path),
+            ],
+            capture_output=True,
+            text=True,
+        )
+    except Exception:
+        return []
+
+    times = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags:
+            try:
+                times.append(float(pts_time))
+            except ValueError:
+                pass
+    times.sort()
+    return [t - times[0] for t in times] if times else []
+
+
+class MediaProbeCache:
+    """
+    LRU cache of ffprobe results per file
+
+    Features:
+    - One `ffprobe` per file instead of one per duration / stream / codec question
+    - Uploads are keyed by their SHA-256, so the same content uploaded twice is probed once
+    - Other files are keyed by path, inode, size and mtime (a rewritten file is probed again)
+    - Keyframe index read lazily and kept with the entry
+    """
+
+    def __init__(self, max_entries: int):
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[tuple, MediaInfo]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _key(input_path: Path) -> Optional[tuple]:
+        try:
+            stat_result = input_path.stat()
+        except OSError:
+            return None
+        content_hash = get_known_hash(input_path)
+        if content_hash:
+            return ("sha256", content_hash)
+        return (
+            "file",
+            str(input_path),
+            stat_result.st_dev,
+            stat_result.st_ino,
+            stat_result.st_size,
+            stat_result.st_mtime_ns,
+        )
+
+    def _lookup(self, key: Optional[tuple]) -> Optional[MediaInfo]:
+        if key is None or self._max_entries <= 0:
+            return None
+        with self._lock:
+            info = self._entries.get(key)
+            if info is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+            return info
+
+    def get(self, input_path: Path) -> Optional[MediaInfo]:
+        """
+        Probe a file, or return its cached probe
+
+        Args:
+            input_path: Media file
+
+        Returns:
+            MediaInfo, None if ffprobe cannot read the file
+        """
+        key = self._key(input_path)
+        info = self._lookup(key)
+        if info is not None:
+            return info
+
+        try:
+            info = MediaInfo(ffmpeg.probe(str(input_path)))
+        except Exception:
+            return None  # Failures are not cached, the file may still be written
+
+        if key is not None and self._max_entries > 0:
+            with self._lock:
+                self._misses += 1
+                self._entries[key] = info
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+        return info
+
+    def keyframes(self, input_path: Path) -> List[float]:
+        """Keyframe timestamps of the first video stream (empty if unknown)"""
+        info = self.get(input_path)
+        if info is None:
+            return []
+        if info.keyframes is None:
+            info.keyframes = read_keyframe_times(input_path)
+        return info.keyframes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Entries and hit/miss counters (for the health endpoint)"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+# Global media probe cache instance
+media_probe = MediaProbeCache(max_entries=MEDIA_PROBE_CACHE_SIZE)
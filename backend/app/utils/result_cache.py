@@ -0,0 +1,242 @@
+"""
+Content-addressed cache of file-processing results
+Keyed by (input hash, operation, normalized parameters), outputs are kept under TEMP_DIR with LRU eviction
+"""
+
+import asyncio
+from collections import OrderedDict
+import contextlib
+from dataclasses import dataclass
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type, TypeVar, Union
+
+from pydantic import BaseModel
+
+from app.config import RESULT_CACHE_DIR, RESULT_CACHE_MAX_MB
+from app.utils.executors import run_blocking
+from app.utils.file_handler import delete_file, link_or_copy
+
+ResponseT = TypeVar("ResponseT", bound=BaseModel)
+
+
+@dataclass
+class _CacheEntry:
+    """A cached output file and the response that described it"""
+
+    path: Path
+    size: int
+    model: Type[BaseModel]
+    response: dict
+
+
+def _normalize(value: Any) -> Any:
+    """Make equivalent parameter values hash the same (stripped strings, 2.0 == 2)"""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, Path):
+        return str(value)
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+class ResultCache:
+    """
+    Cache of processing results addressed by what produced them
+
+    Features:
+    - Key = SHA-256 of the input hash(es), the operation name and its normalized parameters
+    - Outputs are hard-linked into the cache directory, a hit links them back to a fresh output
+    - Size-bounded, least recently used entries are evicted first
+    - Concurrent requests for the same key run the operation once
+    - Hit, miss and eviction counters
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self._dir = cache_dir
+        self._max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_bytes > 0
+
+    @staticmethod
+    def make_key(
+        input_hash: Union[str, List[str]], operation: str, params: Optional[dict] = None
+    ) -> str:
+        """
+        Build the cache key of an operation
+
+        Args:
+            input_hash: SHA-256 of the input file (or list of them, in order)
+            operation: Operation name (e.g. "image.compress")
+            params: Parameters that change the output, None values are ignored
+
+        Returns:
+            Hex digest identifying the result
+        """
+        payload = json.dumps(
+            {"input": input_hash, "operation": operation, "params": _normalize(params or {})},
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get_or_compute(
+        self,
+        input_hash: Union[str, List[str]],
+        operation: str,
+        params: Optional[dict],
+        output_path: Path,
+        compute: Callable[[], Awaitable[ResponseT]],
+    ) -> ResponseT:
+        """
+        Return a cached result or run the operation and cache its output
+
+        Args:
+            input_hash: SHA-256 of the input file (or list of them, in order)
+            operation: Operation name (e.g. "image.compress")
+            params: Parameters that change the output
+            output_path: File the operation writes, a hit is linked to this path
+            compute: Runs the operation, its response must describe output_path
+
+        Returns:
+            Response model of the operation (filename and download_url point to output_path)
+        """
+        if not self.enabled:
+            return await compute()
+
+        key = self.make_key(input_hash, operation, params)
+        async with self._locked(key):
+            result = await run_blocking(self._materialize, key, output_path)
+            if result is not None:
+                return result
+
+            with self._lock:
+                self._misses += 1
+            result = await compute()
+            if result.success and output_path.is_file():
+                await run_blocking(self._store, key, output_path, result)
+            return result
+
+    @contextlib.asynccontextmanager
+    async def _locked(self, key: str):
+        """Hold the lock of one key, dropped from the table once nobody holds or waits for it"""
+        lock, users = self._key_locks.get(key, (asyncio.Lock(), 0))
+        self._key_locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._key_locks[key]
+            if users <= 1:
+                del self._key_locks[key]
+            else:
+                self._key_locks[key] = (lock, users - 1)
+
+    def _materialize(self, key: str, output_path: Path) -> Optional[BaseModel]:
+        """Link a cached output to output_path and rebuild its response (None on a miss)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+
+        try:
+            link_or_copy(entry.path, output_path)
+            os.utime(output_path)  # Give the new output a full TEMP_DIR lifetime
+        except OSError:
+            # Cached file was removed behind our back, treat as a miss
+            self._drop(key)
+            return None
+
+        with self._lock:
+            self._hits += 1
+
+        response = dict(entry.response)
+        if "filename" in response:
+            response["filename"] = output_path.name
+        if response.get("download_url"):
+            response["download_url"] = f"/api/v1/download/{output_path.name}"
+        return entry.model(**response)
+
+    def _store(self, key: str, output_path: Path, result: BaseModel):
+        """Link a fresh output into the cache and evict entries over the size limit"""
+        size = output_path.stat().st_size
+        if size > self._max_bytes:
+            return
+
+        cache_path = self._dir / f"{key}{output_path.suffix}"
+        self._dir.mkdir(parents=True, exist_ok=True)
+        cache_path.unlink(missing_ok=True)
+        link_or_copy(output_path, cache_path)
+
+        entry = _CacheEntry(cache_path, size, type(result), result.model_dump())
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous:
+                self._bytes -= previous.size
+            self._entries[key] = entry
+            self._bytes += size
+            evicted = self._evict()
+
+        for path in evicted:
+            delete_file(path)
+
+    def _evict(self) -> List[Path]:
+        """Pop least recently used entries until under the size limit (call within lock)"""
+        evicted = []
+        while self._bytes > self._max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self._evictions += 1
+            evicted.append(entry.path)
+        return evicted
+
+    def _drop(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry:
+                self._bytes -= entry.size
+
+    def clear(self):
+        """Forget all entries and delete the cache directory"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def stats(self) -> dict:
+        """Entries, bytes held and hit/miss counters (for the health endpoint)"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+# Global result cache instance
+result_cache = ResultCache(RESULT_CACHE_DIR, max_bytes=RESULT_CACHE_MAX_MB * 1024 * 1024)
@@ -3,7 +3,7 @@ Validation utilities for file formats and inputs
 """
 
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from app.config import (
     SUPPORTED_DOCX_FORMAT,
@@ -28,13 +28,72 @@ def validate_file_format(filename: str, allowed_formats: List[str]) -> bool:
     return file_extension in [fmt.lower() for fmt in allowed_formats]
 
 
-def validate_video_format(filename: str) -> bool:
-    """Validate if a file is a supported video format"""
+# Number of leading bytes needed by sniff_format
+SNIFF_HEADER_SIZE = 64
+
+
+def sniff_format(header: bytes) -> Optional[str]:
+    """
+    Detect a file format from its leading bytes
+
+    Args:
+        header: First bytes of the file (SNIFF_HEADER_SIZE is enough)
+
+    Returns:
+        Format name matching the SUPPORTED_* extensions, or None if unknown
+    """
+    if header[4:8] == b"ftyp":
+        return "mov" if header[8:12] == b"qt  " else "mp4"
+    if header[4:8] in (b"moov", b"mdat", b"wide", b"free"):
+        return "mov"
+    if header.startswith(b"\x1a\x45\xdf\xa3"):
+        return "mkv"
+    if header.startswith(b"RIFF"):
+        return {b"AVI ": "avi", b"WEBP": "webp"}.get(header[8:12])
+    if header.startswith(b"FLV"):
+        return "flv"
+    if header.startswith(b"\x30\x26\xb2\x75\x8e\x66\xcf\x11"):
+        return "wmv"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if header.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if header.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    if header.startswith(b"BM"):
+        return "bmp"
+    if header.startswith(b"%PDF-"):
+        return "pdf"
+    return None
+
+
+def is_video_content(header: bytes) -> bool:
+    """Check the leading bytes of a file for a supported video container"""
+    return sniff_format(header) in SUPPORTED_VIDEO_FORMATS
+
+
+def is_image_content(header: bytes) -> bool:
+    """Check the leading bytes of a file for a supported image format"""
+    return sniff_format(header) in SUPPORTED_IMAGE_FORMATS
+
+
+def validate_video_format(filename: str, header: Optional[bytes] = None) -> bool:
+    """
+    Validate if a file is a supported video format
+    Checks magic bytes when the file header is given, the extension otherwise
+    """
+    if header is not None:
+        return is_video_content(header)
     return validate_file_format(filename, SUPPORTED_VIDEO_FORMATS)
 
 
-def validate_image_format(filename: str) -> bool:
-    """Validate if a file is a supported image format"""
+def validate_image_format(filename: str, header: Optional[bytes] = None) -> bool:
+    """
+    Validate if a file is a supported image format
+    Checks magic bytes when the file header is given, the extension otherwise
+    """
+    if header is not None:
+        return is_image_content(header)
     return validate_file_format(filename, SUPPORTED_IMAGE_FORMATS)
 
 
@@ -0,0 +1,109 @@
+"""
+Benchmark single-run against segment-parallel (chunked) video compression
+
+Generates a synthetic clip with FFmpeg (test pattern + tone, a keyframe every
+2 seconds), then compresses it with compress_video_with_progress in both modes
+and reports wall time, output size and the number of progress events.
+
+Usage (from the backend directory, needs ffmpeg/ffprobe on PATH):
+    python -m benchmarks.bench_chunked_encode [--seconds 120] [--size 1280x720] [--quality high]
+"""
+
+import argparse
+import asyncio
+from pathlib import Path
+import subprocess
+import time
+
+from app.config import TEMP_DIR
+from app.services.video_service_async import compress_video_with_progress
+from app.tasks import task_store
+from app.tasks.scheduler import SEGMENT_JOB, scheduler
+
+
+def make_clip(seconds: int, size: str) -> Path:
+    """Encode a synthetic clip to compress"""
+    path = TEMP_DIR / f"bench_chunked_{seconds}s_{size}.mp4"
+    if path.exists():
+        return path
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-v",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            f"testsrc2=size={size}:rate=30:duration={seconds}",
+            "-f",
+            "lavfi",
+            "-i",
+            f"sine=frequency=440:duration={seconds}",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "ultrafast",
+            "-g",
+            "60",
+            "-c:a",
+            "aac",
+            str(path),
+        ],
+        check=True,
+    )
+    return path
+
+
+async def bench(input_path: Path, quality: str, chunked: bool) -> tuple[float, int, int]:
+    """Compress once, returns (seconds, output bytes, progress events)"""
+    output_path = TEMP_DIR / f"bench_chunked_out_{'chunked' if chunked else 'single'}.mp4"
+    task = task_store.create_task("bench")
+    events = 0
+
+    async def count_events():
+        nonlocal events
+        async for _ in task_store.subscribe(task.id):
+            events += 1
+
+    listener = asyncio.create_task(count_events())
+    start = time.perf_counter()
+    result = await compress_video_with_progress(
+        task.id, input_path, output_path, quality, chunked=chunked
+    )
+    elapsed = time.perf_counter() - start
+    await listener
+
+    if not result.success:
+        raise SystemExit(f"Compression failed: {result.error}")
+    size = output_path.stat().st_size
+    output_path.unlink()
+    return elapsed, size, events
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=int, default=120)
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--quality", default="high", choices=["low", "medium", "high"])
+    args = parser.parse_args()
+
+    clip = make_clip(args.seconds, args.size)
+    print(
+        f"{clip.name}: {clip.stat().st_size / (1024 * 1024):.1f} MB, "
+        f"{scheduler.limit(SEGMENT_JOB)} segment slots, quality={args.quality}"
+    )
+
+    single = await bench(clip, args.quality, chunked=False)
+    chunked = await bench(clip, args.quality, chunked=True)
+
+    for label, (elapsed, size, events) in (("single", single), ("chunked", chunked)):
+        print(
+            f"{label:>8}: {elapsed:7.2f}s  {size / (1024 * 1024):7.2f} MB  "
+            f"{events:4d} progress events"
+        )
+    print(f" speedup: {single[0] / chunked[0]:.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""
+Benchmark the download endpoint against the previous plain FileResponse
+
+Scenarios: full download, resuming the second half (Range), and revalidating an
+unchanged file (If-None-Match). The first request of the current endpoint also
+pays for hashing the file to build its ETag.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_download [--size-mb 1024]
+"""
+
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import FileResponse
+import httpx
+
+from app.config import TEMP_DIR
+from app.main import app
+
+legacy_app = FastAPI()
+
+
+@legacy_app.get("/api/v1/download/{filename:path}")
+async def legacy_download(filename: str):
+    """Previous implementation: no ETag, no conditional requests, octet-stream"""
+    return FileResponse(
+        path=TEMP_DIR / filename, filename=filename, media_type="application/octet-stream"
+    )
+
+
+async def fetch(client: httpx.AsyncClient, url: str, headers: dict) -> tuple[int, int, float]:
+    """Stream a response, returns (status, bytes received, seconds)"""
+    start = time.perf_counter()
+    received = 0
+    async with client.stream("GET", url, headers=headers) as response:
+        async for chunk in response.aiter_raw():
+            received += len(chunk)
+        status = response.status_code
+        etag = response.headers.get("etag")
+    fetch.last_etag = etag
+    return status, received, time.perf_counter() - start
+
+
+async def bench(target, name: str, url: str, size: int):
+    transport = httpx.ASGITransport(app=target)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        full = await fetch(client, url, {})
+        etag = fetch.last_etag
+        resume = await fetch(client, url, {"Range": f"bytes={size // 2}-"})
+        revalidate = await fetch(client, url, {"If-None-Match": etag} if etag else {})
+
+    for label, (status, received, elapsed) in (
+        ("full", full),
+        ("resume 2nd half", resume),
+        ("revalidate", revalidate),
+    ):
+        rate = received / elapsed / (1024 * 1024) if elapsed else 0
+        print(
+            f"{name:>8} {label:>16}: {status} {received / (1024 * 1024):>8.1f} MB "
+            f"in {elapsed:6.2f}s ({rate:>7.1f} MB/s)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=1024)
+    args = parser.parse_args()
+
+    path = TEMP_DIR / "bench_download.bin"
+    with open(path, "wb") as f:
+        block = bytes(range(256)) * 4096
+        for _ in range(args.size_mb):
+            f.write(block)
+
+    url = f"/api/v1/download/{path.name}"
+    size = path.stat().st_size
+    try:
+        asyncio.run(bench(legacy_app, "legacy", url, size))
+        asyncio.run(bench(app, "current", url, size))
+    finally:
+        path.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark decode-time downscaling for large photos
+
+Generates a camera-sized JPEG (noise, so it does not compress to nothing) and runs
+resize_image, create_icon, extract_colors and create_collage on it with load_image
+decoding at a reduced scale, then with it decoding at full size (the previous behaviour).
+Each run is a fresh process so peak RSS (Linux VmHWM) is per operation.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_image_decode [--size 6000x4000] [--runs 3]
+"""
+
+import argparse
+import multiprocessing
+from pathlib import Path
+import tempfile
+import time
+from unittest.mock import patch
+
+from PIL import Image
+
+from app.services import image_service
+from app.utils.image_loader import load_image
+
+OPERATIONS = {
+    "resize 800px": lambda src, out: image_service.resize_image(src, out / "r.jpg", width=800),
+    "icon 256px": lambda src, out: image_service.create_icon(src, out / "i.ico", size=256),
+    "colors": lambda src, out: image_service.extract_colors(src),
+    "collage 2x2": lambda src, out: image_service.create_collage(
+        [src], out / "c.png", rows=2, cols=2, image_order=[0, 0, 0, 0]
+    ),
+}
+
+
+def make_photo(path: Path, size: str):
+    """Write a noisy JPEG of the given WxH"""
+    width, height = (int(v) for v in size.split("x"))
+    noise = Image.effect_noise((width // 4, height // 4), 64).convert("RGB")
+    noise.resize((width, height), Image.BILINEAR).save(path, quality=90)
+
+
+def peak_rss_mb() -> float:
+    """Peak RSS of this process (VmHWM, unlike ru_maxrss it is not inherited over exec)"""
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _full_decode(img, target_size=None):
+    return load_image(img)
+
+
+def _run(name: str, source: Path, out_dir: Path, draft: bool, queue):
+    """Child process: run one operation, report (seconds, peak RSS in MB)"""
+    start = time.perf_counter()
+    if draft:
+        result = OPERATIONS[name](source, out_dir)
+    else:
+        with patch.object(image_service, "load_image", _full_decode):
+            result = OPERATIONS[name](source, out_dir)
+    elapsed = time.perf_counter() - start
+    if not result.success:
+        raise SystemExit(result.message)
+    queue.put((elapsed, peak_rss_mb()))
+
+
+def measure(name: str, source: Path, out_dir: Path, draft: bool, runs: int) -> tuple[float, float]:
+    """Best time and peak RSS over runs, each in a fresh process"""
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for _ in range(runs):
+        queue = context.Queue()
+        process = context.Process(target=_run, args=(name, source, out_dir, draft, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+    return min(r[0] for r in results), max(r[1] for r in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", default="6000x4000")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        source = tmp_dir / "photo.jpg"
+        make_photo(source, args.size)
+        print(f"{args.size} JPEG, {source.stat().st_size / (1024 * 1024):.1f} MB")
+        print(f"{'':>14}  {'full decode':>22}  {'draft/reduce':>22}")
+
+        for name in OPERATIONS:
+            full = measure(name, source, tmp_dir, draft=False, runs=args.runs)
+            draft = measure(name, source, tmp_dir, draft=True, runs=args.runs)
+            print(
+                f"{name:>14}  {full[0] * 1000:7.0f} ms {full[1]:8.0f} MB  "
+                f"{draft[0] * 1000:7.0f} ms {draft[1]:8.0f} MB  "
+                f"({full[0] / draft[0]:.1f}x faster)"
+            )
+
+
+if __name__ == "__main__":
+    main()
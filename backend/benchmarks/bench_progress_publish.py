@@ -0,0 +1,95 @@
+"""
+Benchmark progress publishing to many SSE subscribers of the in-memory task store
+
+Reports how long update_progress holds the store lock and how many events per
+second reach subscribers, with and without rate limiting.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_progress_publish [--subscribers 1000] [--updates 2000]
+"""
+
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+
+from app.tasks.models import TaskResult
+from app.tasks.store import TaskStore
+
+
+class TimedLock:
+    """threading.Lock wrapper recording how long each acquisition is held"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._acquired_at = 0.0
+        self.hold_times: list[float] = []
+
+    def __enter__(self):
+        self._lock.acquire()
+        self._acquired_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hold_times.append(time.perf_counter() - self._acquired_at)
+        self._lock.release()
+
+
+async def run(subscribers: int, updates: int, min_interval: float, min_delta: float) -> dict:
+    store = TaskStore(min_publish_interval=min_interval, min_percent_delta=min_delta)
+    lock = TimedLock()
+    store._lock = lock
+    task = store.create_task("bench")
+    received = 0
+
+    async def consume():
+        nonlocal received
+        async for _ in store.subscribe(task.id):
+            received += 1
+
+    consumers = [asyncio.create_task(consume()) for _ in range(subscribers)]
+    await asyncio.sleep(0.1)  # Let every subscriber register
+    lock.hold_times.clear()
+    received = 0
+
+    start = time.perf_counter()
+    for i in range(updates):
+        store.update_progress(task.id, (i * 100) / updates, "Encoding", "encoding")
+        if i % 50 == 0:
+            await asyncio.sleep(0)  # Give subscribers a chance to drain, like ffmpeg output would
+    store.complete_task(task.id, TaskResult(success=True))
+    await asyncio.gather(*consumers)
+    elapsed = time.perf_counter() - start
+
+    holds = sorted(lock.hold_times)
+    return {
+        "events": received,
+        "events_per_s": received / elapsed,
+        "lock_mean_us": statistics.mean(holds) * 1e6,
+        "lock_p99_us": holds[int(len(holds) * 0.99) - 1] * 1e6,
+        "elapsed_s": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--updates", type=int, default=2000)
+    args = parser.parse_args()
+
+    scenarios = {
+        "every update": (0.0, 0.0),
+        "rate limited": (0.25, 1.0),
+    }
+    for name, (interval, delta) in scenarios.items():
+        stats = asyncio.run(run(args.subscribers, args.updates, interval, delta))
+        print(
+            f"{name:>13}: {stats['events']:>9,} events in {stats['elapsed_s']:.2f}s "
+            f"({stats['events_per_s']:>10,.0f}/s), lock hold mean {stats['lock_mean_us']:.1f}us "
+            f"p99 {stats['lock_p99_us']:.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark progress-update throughput of the task store backends
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_task_store [--updates 5000] [--tasks 10]
+"""
+
+import argparse
+from pathlib import Path
+import tempfile
+import time
+
+from app.tasks.base import BaseTaskStore
+from app.tasks.sqlite_store import SQLiteTaskStore
+from app.tasks.store import TaskStore
+
+
+def bench_progress_updates(store: BaseTaskStore, updates: int, tasks: int) -> float:
+    """Run progress updates round-robin over tasks, returns updates per second"""
+    task_ids = [store.create_task("bench").id for _ in range(tasks)]
+
+    start = time.perf_counter()
+    for i in range(updates):
+        store.update_progress(task_ids[i % tasks], (i * 100) / updates, "Encoding", "encoding")
+    elapsed = time.perf_counter() - start
+
+    return updates / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--tasks", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_store = SQLiteTaskStore(Path(tmp) / "tasks.db")
+        results = {
+            "memory": bench_progress_updates(TaskStore(), args.updates, args.tasks),
+            "sqlite": bench_progress_updates(sqlite_store, args.updates, args.tasks),
+        }
+        sqlite_store.close()
+
+    for backend, rate in results.items():
+        print(f"{backend:>8}: {rate:>12,.0f} updates/s")
+
+
+if __name__ == "__main__":
+    main()
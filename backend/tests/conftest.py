@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 import sys
 
@@ -7,6 +8,18 @@ import pytest
 # Add backend folder to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 
+# Run CPU-bound endpoint work in threads so tests can patch service functions with mocks
+# (mocks cannot be pickled into a process pool; tests/test_executors.py covers the real pool)
+os.environ.setdefault("PROCESS_POOL_WORKERS", "0")
+# Endpoint tests patch services and expect them to run, tests/test_result_cache.py enables the cache
+os.environ.setdefault("RESULT_CACHE_MAX_MB", "0")
+# Tests patch ffmpeg.probe per case, tests/test_media_probe.py covers the probe cache
+os.environ.setdefault("MEDIA_PROBE_CACHE_SIZE", "0")
+# GIF tests expect the palette step to run, tests/test_artifact_cache.py covers the cache
+os.environ.setdefault("GIF_PALETTE_CACHE_SIZE", "0")
+# Waveform tests expect FFmpeg to run, tests/test_audio_service.py enables the cache
+os.environ.setdefault("WAVEFORM_CACHE_SIZE", "0")
+
 from app.config import TEMP_DIR
 from app.main import app
 
@@ -0,0 +1,70 @@
+"""
+Tests for the intermediate file cache
+"""
+
+from app.utils.artifact_cache import ArtifactCache
+
+
+class TestArtifactCache:
+    """Tests for ArtifactCache class"""
+
+    def test_put_then_get(self, tmp_path):
+        """Test that a stored file is copied back to a new path"""
+        cache = ArtifactCache(tmp_path / "cache", max_entries=4)
+        source = tmp_path / "palette.png"
+        source.write_bytes(b"palette")
+
+        cache.put("key", source)
+        source.unlink()  # The caller's copy goes away, the cached one stays
+        target = tmp_path / "reused.png"
+
+        assert cache.get("key", target) is True
+        assert target.read_bytes() == b"palette"
+        assert cache.stats()["hits"] == 1
+
+    def test_miss(self, tmp_path):
+        """Test that an unknown key does not create the target"""
+        cache = ArtifactCache(tmp_path / "cache", max_entries=4)
+        target = tmp_path / "target.png"
+
+        assert cache.get("missing", target) is False
+        assert cache.get(None, target) is False
+        assert not target.exists()
+        assert cache.stats()["misses"] == 1
+
+    def test_lru_eviction_deletes_files(self, tmp_path):
+        """Test that the least recently used entry and its file are dropped"""
+        cache = ArtifactCache(tmp_path / "cache", max_entries=2)
+        for name in ("a", "b", "c"):
+            source = tmp_path / f"{name}.png"
+            source.write_bytes(name.encode())
+            cache.put(name, source)
+            if name == "b":
+                cache.get("a", tmp_path / "touch.png")  # "b" becomes the least recently used
+
+        assert cache.get("b", tmp_path / "b_again.png") is False
+        assert cache.get("a", tmp_path / "a_again.png") is True
+        assert sorted(p.name for p in (tmp_path / "cache").iterdir()) == ["a.png", "c.png"]
+
+    def test_removed_file_is_a_miss(self, tmp_path):
+        """Test that a cached file deleted behind the cache's back is forgotten"""
+        cache = ArtifactCache(tmp_path / "cache", max_entries=4)
+        source = tmp_path / "palette.png"
+        source.write_bytes(b"palette")
+        cache.put("key", source)
+
+        cache.clear()
+
+        assert cache.get("key", tmp_path / "target.png") is False
+        assert cache.stats()["entries"] == 0
+
+    def test_disabled(self, tmp_path):
+        """Test that a zero size turns the cache off"""
+        cache = ArtifactCache(tmp_path / "cache", max_entries=0)
+        source = tmp_path / "palette.png"
+        source.write_bytes(b"palette")
+
+        cache.put("key", source)
+
+        assert cache.get("key", tmp_path / "target.png") is False
+        assert not (tmp_path / "cache").exists()
@@ -0,0 +1,187 @@
+"""
+Tests for async audio endpoints
+"""
+
+import io
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from fastapi.testclient import TestClient
+import pytest
+
+from app.main import app
+from app.tasks import task_store
+from app.tasks.scheduler import FFMPEG_JOB
+
+
+@pytest.fixture
+def client():
+    """Test client fixture"""
+    return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def cleanup_tasks():
+    """Clean up tasks before and after each test"""
+    task_store._tasks.clear()
+    task_store._subscribers.clear()
+    yield
+    task_store._tasks.clear()
+    task_store._subscribers.clear()
+
+
+def create_mock_audio_file(filename: str = "test_audio.wav", field: str = "file"):
+    """Create a mock audio file for testing"""
+    return (field, (filename, io.BytesIO(b"mock audio content" * 100), "audio/wav"))
+
+
+def _close_job(task_id, job_type, coro, **kwargs):
+    """scheduler.submit stand-in that closes the job's coroutine instead of running it"""
+    coro.close()
+    return MagicMock()
+
+
+class TestAudioAsyncEndpoints:
+    """Tests for POST /api/v1/audio/{convert,compress,merge}/async"""
+
+    @patch("app.api.audio.scheduler.submit", side_effect=_close_job)
+    @patch("app.api.audio.save_upload_file")
+    def test_convert_async(self, mock_save, mock_submit, client):
+        """Test that a conversion task is created"""
+        mock_save.return_value = Path("/tmp/test_audio.wav")
+
+        response = client.post(
+            "/api/v1/audio/convert/async",
+            files=[create_mock_audio_file()],
+            data={"output_format": "flac", "quality": "high"},
+        )
+
+        assert response.status_code == 200
+        task = task_store.get_task(response.json()["task_id"])
+        assert task.task_type == "audio_convert"
+        assert task.metadata["output_format"] == "flac"
+        assert mock_submit.call_args.args[:2] == (task.id, FFMPEG_JOB)
+
+    def test_convert_async_invalid_output_format(self, client):
+        """Test that unsupported output formats are rejected"""
+        response = client.post(
+            "/api/v1/audio/convert/async",
+            files=[create_mock_audio_file()],
+            data={"output_format": "xyz"},
+        )
+
+        assert response.status_code == 400
+
+    @patch("app.api.audio.scheduler.submit", side_effect=_close_job)
+    @patch("app.api.audio.save_upload_file")
+    def test_compress_async(self, mock_save, mock_submit, client):
+        """Test that lossless input gets an MP3 output name"""
+        mock_save.return_value = Path("/tmp/test_audio.wav")
+
+        with patch("app.api.audio.expiry_manager.track_task") as mock_track:
+            response = client.post(
+                "/api/v1/audio/compress/async",
+                files=[create_mock_audio_file()],
+                data={"target_bitrate": "96k"},
+            )
+
+        assert response.status_code == 200
+        task = task_store.get_task(response.json()["task_id"])
+        assert task.task_type == "audio_compress"
+        output_path = mock_track.call_args.kwargs["outputs"][0]
+        assert output_path.name.endswith("_compressed.mp3")
+
+    def test_compress_async_invalid_bitrate(self, client):
+        """Test that bitrates without a unit are rejected"""
+        response = client.post(
+            "/api/v1/audio/compress/async",
+            files=[create_mock_audio_file()],
+            data={"target_bitrate": "128"},
+        )
+
+        assert response.status_code == 400
+
+    @patch("app.api.audio.scheduler.submit", side_effect=_close_job)
+    @patch("app.api.audio.save_upload_file")
+    def test_merge_async(self, mock_save, mock_submit, client):
+        """Test that a merge task records the files in order"""
+        mock_save.side_effect = [Path("/tmp/a.mp3"), Path("/tmp/b.mp3")]
+
+        response = client.post(
+            "/api/v1/audio/merge/async",
+            files=[
+                create_mock_audio_file("a.mp3", "files"),
+                create_mock_audio_file("b.mp3", "files"),
+            ],
+        )
+
+        assert response.status_code == 200
+        task = task_store.get_task(response.json()["task_id"])
+        assert task.task_type == "audio_merge"
+        assert task.metadata["filenames"] == ["a.mp3", "b.mp3"]
+
+    def test_merge_async_requires_two_files(self, client):
+        """Test that a single file is rejected"""
+        response = client.post(
+            "/api/v1/audio/merge/async", files=[create_mock_audio_file(field="files")]
+        )
+
+        assert response.status_code == 400
+
+
+class TestAudioBatchEndpoint:
+    """Tests for POST /api/v1/audio/convert/batch"""
+
+    @patch("app.api.audio.scheduler.submit", side_effect=_close_job)
+    @patch("app.api.audio.save_upload_file")
+    def test_batch_task(self, mock_save, mock_submit, client):
+        """Test that audio files and zips are accepted into one batch task"""
+        mock_save.side_effect = [Path("/tmp/a.wav"), Path("/tmp/album.zip")]
+
+        response = client.post(
+            "/api/v1/audio/convert/batch",
+            files=[
+                create_mock_audio_file("a.wav", field="files"),
+                ("files", ("album.zip", io.BytesIO(b"PK"), "application/zip")),
+            ],
+            data={"output_format": "mp3"},
+        )
+
+        assert response.status_code == 200
+        task = task_store.get_task(response.json()["task_id"])
+        assert task.task_type == "audio_convert_batch"
+        assert task.metadata["filenames"] == ["a.wav", "album.zip"]
+
+    def test_batch_invalid_file(self, client):
+        """Test that non-audio uploads are rejected"""
+        response = client.post(
+            "/api/v1/audio/convert/batch",
+            files=[("files", ("notes.txt", io.BytesIO(b"text"), "text/plain"))],
+            data={"output_format": "mp3"},
+        )
+
+        assert response.status_code == 400
+
+    def test_batch_invalid_output_format(self, client):
+        """Test that unknown output formats are rejected"""
+        response = client.post(
+            "/api/v1/audio/convert/batch",
+            files=[create_mock_audio_file(field="files")],
+            data={"output_format": "wma"},
+        )
+
+        assert response.status_code == 400
+
+    @patch("app.api.audio.AUDIO_BATCH_MAX_FILES", 1)
+    def test_batch_too_many_files(self, client):
+        """Test the batch size limit"""
+        response = client.post(
+            "/api/v1/audio/convert/batch",
+            files=[
+                create_mock_audio_file("a.wav", "files"),
+                create_mock_audio_file("b.wav", "files"),
+            ],
+            data={"output_format": "mp3"},
+        )
+
+        assert response.status_code == 400
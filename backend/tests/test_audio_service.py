@@ -0,0 +1,380 @@
+"""
+Tests for audio_service
+Uses mocking for ffprobe and FFmpeg calls
+"""
+
+from array import array
+import io
+from pathlib import Path
+import sys
+from unittest.mock import MagicMock, patch
+
+import ffmpeg
+import pytest
+
+from app.services.audio_service import (
+    STRATEGY_PARTIAL_REENCODE,
+    STRATEGY_REENCODE,
+    STRATEGY_STREAM_COPY,
+    bucket_peaks,
+    build_peak_levels,
+    decode_waveform,
+    encode_waveform,
+    extract_waveform,
+    merge_audio,
+    plan_merge,
+    read_waveform_peaks,
+)
+from app.utils.artifact_cache import ArtifactCache
+from app.utils.media_probe import MediaInfo
+
+CONTAINERS = {"mp3": "mp3", "aac": "mov,mp4,m4a,3gp,3g2,mj2", "pcm_s16le": "wav"}
+
+
+def _audio(codec="mp3", sample_rate="44100", channels=2, bit_rate="192000", container=None):
+    """Probe of a file with one audio stream (and MP3 cover art)"""
+    return MediaInfo(
+        {
+            "streams": [
+                {"index": 0, "codec_type": "video", "disposition": {"attached_pic": 1}},
+                {
+                    "index": 1,
+                    "codec_type": "audio",
+                    "codec_name": codec,
+                    "sample_rate": sample_rate,
+                    "channels": channels,
+                    "bit_rate": bit_rate,
+                },
+            ],
+            "format": {
+                "duration": "60.0",
+                "format_name": container or CONTAINERS.get(codec, codec),
+            },
+        }
+    )
+
+
+def _probes(*infos):
+    """media_probe.get stand-in answering per input path name"""
+    by_name = {f"{i}.mp3": info for i, info in enumerate(infos)}
+    return lambda path: by_name.get(path.name)
+
+
+def _inputs(count):
+    return [Path(f"/tmp/{i}.mp3") for i in range(count)]
+
+
+def _compiled_runs(mock_run):
+    """Command lines of every ffmpeg.run call"""
+    return [" ".join(ffmpeg.compile(c.args[0])) for c in mock_run.call_args_list]
+
+
+class TestPlanMerge:
+    """Tests for plan_merge"""
+
+    @patch("app.services.audio_service.media_probe")
+    def test_matching_inputs_are_copied(self, mock_probe):
+        """Test that chaptered MP3s with one set of parameters need no re-encode"""
+        mock_probe.get.side_effect = _probes(_audio(), _audio(), _audio())
+
+        assert plan_merge(_inputs(3), "mp3", "medium") == (
+            STRATEGY_STREAM_COPY,
+            ("mp3", "44100", 2),
+            [],
+        )
+
+    @patch("app.services.audio_service.media_probe")
+    def test_mismatched_inputs_are_reencoded(self, mock_probe):
+        """Test that only inputs differing from the most common parameters are re-encoded"""
+        mock_probe.get.side_effect = _probes(
+            _audio(), _audio(sample_rate="48000"), _audio(), _audio("aac")
+        )
+
+        strategy, reference, mismatched = plan_merge(_inputs(4), "mp3", "medium")
+
+        assert strategy == STRATEGY_PARTIAL_REENCODE
+        assert reference == ("mp3", "44100", 2)
+        assert mismatched == [1, 3]
+
+    @patch("app.services.audio_service.media_probe")
+    def test_no_input_in_output_codec(self, mock_probe):
+        """Test that the concat filter is used when nothing can be copied"""
+        mock_probe.get.side_effect = _probes(_audio(), _audio())
+
+        assert plan_merge(_inputs(2), "m4a", "medium")[0] == STRATEGY_REENCODE
+
+    @patch("app.services.audio_service.media_probe")
+    def test_formats_without_copy(self, mock_probe):
+        """Test that Vorbis output is always re-encoded"""
+        mock_probe.get.side_effect = _probes(_audio("vorbis"), _audio("vorbis"))
+
+        assert plan_merge(_inputs(2), "ogg", "medium")[0] == STRATEGY_REENCODE
+
+    @patch("app.services.audio_service.media_probe")
+    def test_lossy_inputs_must_match_requested_bitrate(self, mock_probe):
+        """Test that a 320k MP3 merged at 128k is re-encoded, not copied"""
+        mock_probe.get.side_effect = _probes(
+            _audio(bit_rate="128000"), _audio(bit_rate="320000"), _audio(bit_rate="127800")
+        )
+
+        strategy, _, mismatched = plan_merge(_inputs(3), "mp3", "medium", "128k")
+        assert strategy == STRATEGY_PARTIAL_REENCODE
+        assert mismatched == [1]
+
+        assert plan_merge(_inputs(3), "mp3", "medium", "320k")[2] == [0, 2]
+
+    @patch("app.services.audio_service.media_probe")
+    def test_adts_and_mp4_aac_are_not_mixed(self, mock_probe):
+        """Test that AAC is only copied from the container the output uses"""
+        mock_probe.get.side_effect = _probes(_audio("aac", container="aac"), _audio("aac"))
+
+        assert plan_merge(_inputs(2), "aac", "medium", "192k")[2] == [1]
+        assert plan_merge(_inputs(2), "m4a", "medium", "192k")[2] == [0]
+
+    @patch("app.services.audio_service.media_probe")
+    def test_wav_sample_rate_follows_quality(self, mock_probe):
+        """Test that WAV inputs at another rate than the quality preset are not copied"""
+        mock_probe.get.side_effect = _probes(_audio("pcm_s16le"), _audio("pcm_s16le"))
+
+        assert plan_merge(_inputs(2), "wav", "medium")[0] == STRATEGY_STREAM_COPY
+        assert plan_merge(_inputs(2), "wav", "high")[0] == STRATEGY_REENCODE
+
+
+class TestMergeAudio:
+    """Tests for merge_audio"""
+
+    @patch("app.services.audio_service.get_file_size", return_value=1000)
+    @patch("app.services.audio_service.ffmpeg.run")
+    @patch("app.services.audio_service.media_probe")
+    def test_stream_copy(self, mock_probe, mock_run, mock_size, tmp_path):
+        """Test one concat demuxer run copying the audio streams"""
+        mock_probe.get.side_effect = _probes(_audio(), _audio())
+        lists = []
+        mock_run.side_effect = lambda stream, **kwargs: lists.append(
+            (tmp_path / "merge_out" / "inputs.txt").read_text()
+        )
+
+        result = merge_audio(_inputs(2), tmp_path / "out.mp3")
+
+        assert result.success is True
+        assert result.strategy == STRATEGY_STREAM_COPY
+        runs = _compiled_runs(mock_run)
+        assert len(runs) == 1
+        assert "-f concat -safe 0" in runs[0]
+        assert "-acodec copy" in runs[0]
+        assert lists == ["file '/tmp/0.mp3'\nfile '/tmp/1.mp3'\n"]
+        assert not (tmp_path / "merge_out").exists()
+
+    @patch("app.services.audio_service.get_file_size", return_value=1000)
+    @patch("app.services.audio_service.ffmpeg.run")
+    @patch("app.services.audio_service.media_probe")
+    def test_partial_reencode(self, mock_probe, mock_run, mock_size, tmp_path):
+        """Test that the mismatched input is re-encoded to the others' parameters first"""
+        mock_probe.get.side_effect = _probes(_audio(), _audio(channels=1), _audio())
+
+        result = merge_audio(_inputs(3), tmp_path / "out.mp3", bitrate="192k")
+
+        assert result.strategy == STRATEGY_PARTIAL_REENCODE
+        runs = _compiled_runs(mock_run)
+        assert len(runs) == 2
+        assert runs[0].startswith("ffmpeg -i /tmp/1.mp3 -map 0:a")
+        assert "-ac 2 -acodec libmp3lame -ar 44100 -b:a 192k" in runs[0]
+        assert runs[0].endswith(str(tmp_path / "merge_out" / "part_001.mp3"))
+        assert "-acodec copy" in runs[1]
+
+    @patch("app.services.audio_service.get_file_size", return_value=1000)
+    @patch("app.services.audio_service.ffmpeg.run")
+    @patch("app.services.audio_service.media_probe")
+    def test_reencode(self, mock_probe, mock_run, mock_size, tmp_path):
+        """Test the concat filter when no input is in the output codec"""
+        mock_probe.get.side_effect = _probes(_audio("flac"), _audio("aac"))
+
+        result = merge_audio(_inputs(2), tmp_path / "out.mp3")
+
+        assert result.strategy == STRATEGY_REENCODE
+        assert "concat=a=1:n=2" in _compiled_runs(mock_run)[0]
+
+    @patch("app.services.audio_service.get_file_size", return_value=1000)
+    @patch("app.services.audio_service.ffmpeg.run")
+    @patch("app.services.audio_service.media_probe")
+    def test_ffmpeg_error(self, mock_probe, mock_run, mock_size, tmp_path):
+        """Test that a failed re-encode is reported and the work directory removed"""
+        mock_probe.get.side_effect = _probes(_audio(), _audio("aac"))
+        mock_run.side_effect = ffmpeg.Error("ffmpeg", b"", b"Invalid data found")
+
+        result = merge_audio(_inputs(2), tmp_path / "out.mp3")
+
+        assert result.success is False
+        assert "Invalid data found" in result.message
+        assert not (tmp_path / "merge_out").exists()
+
+
+def _pcm(*samples):
+    """Signed 16-bit little-endian PCM"""
+    data = array("h", samples)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data.tobytes()
+
+
+SAMPLES = (0, 1000, -32768, 512, 32767, -256, 300)
+
+
+class TestWaveformPeaks:
+    """Tests for the waveform peak reduction"""
+
+    def test_bucket_peaks(self):
+        """Test min/max per bucket, scaled to 8 bits, with a partial last bucket"""
+        assert bucket_peaks(_pcm(*SAMPLES), 3) == ([-128, -1, 1], [3, 127, 1])
+
+    @patch("app.services.audio_service._WAVEFORM_READ_SIZE", 8)
+    @patch("app.services.audio_service.subprocess.Popen")
+    def test_read_in_chunks(self, mock_popen):
+        """Test that chunked reads give the same peaks as one pass over the samples"""
+        process = MagicMock(stdout=io.BytesIO(_pcm(*SAMPLES)), stderr=io.BytesIO(b""))
+        process.wait.return_value = 0
+        mock_popen.return_value = process
+
+        peaks = read_waveform_peaks(Path("/tmp/a.mp3"), 3, sample_rate=8000)
+
+        assert peaks == bucket_peaks(_pcm(*SAMPLES), 3)
+        cmd = mock_popen.call_args.args[0]
+        assert cmd[-7:] == ["-ac", "1", "-ar", "8000", "-f", "s16le", "pipe:1"]
+
+    @patch("app.services.audio_service.subprocess.Popen")
+    def test_read_failure(self, mock_popen):
+        """Test that an FFmpeg error is raised with its message"""
+        process = MagicMock(stdout=io.BytesIO(b""), stderr=io.BytesIO(b"Invalid data found"))
+        process.wait.return_value = 1
+        mock_popen.return_value = process
+
+        with pytest.raises(RuntimeError, match="Invalid data found"):
+            read_waveform_peaks(Path("/tmp/a.mp3"), 3)
+
+    def test_zoom_levels(self):
+        """Test that each level merges pairs of the previous one"""
+        levels = build_peak_levels([-1, -5, 0], [2, 3, 9], 100, zoom_levels=4)
+
+        assert [(lv.samples_per_peak, lv.length) for lv in levels] == [(100, 3), (200, 2), (400, 1)]
+        assert levels[0].data == [-1, 2, -5, 3, 0, 9]
+        assert levels[1].data == [-5, 3, 0, 9]
+        assert levels[2].data == [-5, 9]
+
+    def test_binary_round_trip(self):
+        """Test that the binary form decodes to the same peaks"""
+        from app.models.audio import AudioWaveformResponse
+
+        result = AudioWaveformResponse(
+            success=True,
+            message="ok",
+            sample_rate=16000,
+            duration=12.5,
+            levels=build_peak_levels([-128, 0], [127, 5], 10, zoom_levels=2),
+        )
+
+        content = encode_waveform(result)
+
+        assert content[:4] == b"WAVP"
+        assert len(content) == 16 + (8 + 4) + (8 + 2)
+        assert decode_waveform(content).levels == result.levels
+
+
+class TestExtractWaveform:
+    """Tests for extract_waveform"""
+
+    @patch("app.services.audio_service.read_waveform_peaks", return_value=([-3, -1], [4, 2]))
+    @patch("app.services.audio_service.media_probe")
+    @patch("app.services.audio_service.get_known_hash", return_value="abc123")
+    def test_cached_per_content(self, mock_hash, mock_probe, mock_read, tmp_path):
+        """Test that the same upload is decoded once"""
+        mock_probe.get.return_value = _audio()
+        cache = ArtifactCache(tmp_path / "waveforms", max_entries=4)
+        input_path = tmp_path / "a.mp3"
+
+        with patch("app.services.audio_service.waveform_cache", cache):
+            first = extract_waveform(input_path, peaks=1000, zoom_levels=2)
+            second = extract_waveform(input_path, peaks=1000, zoom_levels=2)
+
+        assert first.success is True
+        assert first.levels[0].samples_per_peak == 960  # 60 s at 16 kHz over 1000 peaks
+        assert second.levels == first.levels
+        assert second.duration == 60.0
+        assert mock_read.call_count == 1
+        assert cache.stats()["hits"] == 1
+        assert not (tmp_path / "a_peaks.bin").exists()
+
+    @patch("app.services.audio_service.media_probe")
+    def test_no_audio(self, mock_probe, tmp_path):
+        """Test that a file without audio is reported"""
+        mock_probe.get.return_value = None
+
+        result = extract_waveform(tmp_path / "a.mp3")
+
+        assert result.success is False
+
+    def test_invalid_params(self, tmp_path):
+        """Test that out of range options are rejected"""
+        assert extract_waveform(tmp_path / "a.mp3", peaks=4).success is False
+        assert extract_waveform(tmp_path / "a.mp3", zoom_levels=0).success is False
+
+
+def _zip(path, members):
+    """Write a zip archive of {name: bytes}"""
+    import zipfile
+
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return path
+
+
+class TestCollectBatchInputs:
+    """Tests for collect_batch_inputs"""
+
+    def test_zip_members_are_extracted(self, tmp_path):
+        """Test that audio members of a zip join the batch, other members are skipped"""
+        from app.services.audio_service import collect_batch_inputs
+
+        archive = _zip(
+            tmp_path / "upload.zip",
+            {"album/01 Intro.mp3": b"one", "album/cover.jpg": b"jpg", "../02 Outro.FLAC": b"two"},
+        )
+        work_dir = tmp_path / "work"
+
+        inputs = collect_batch_inputs(
+            [("single.wav", tmp_path / "single.wav"), ("album.zip", archive)], work_dir
+        )
+
+        assert [name for name, _ in inputs] == ["single.wav", "01 Intro.mp3", "02 Outro.FLAC"]
+        assert inputs[1][1] == work_dir / "0001.mp3"
+        assert inputs[2][1].read_bytes() == b"two"
+        assert sorted(p.name for p in work_dir.iterdir()) == ["0001.mp3", "0002.flac"]
+
+    def test_member_over_size_limit(self, tmp_path):
+        """Test that a member decompressing past the upload limit is refused"""
+        from app.services.audio_service import collect_batch_inputs
+
+        archive = _zip(tmp_path / "upload.zip", {"big.wav": b"\0" * 100})
+
+        with patch("app.services.audio_service.MAX_FILE_SIZE", 50):
+            with pytest.raises(ValueError, match="size limit"):
+                collect_batch_inputs([("big.zip", archive)], tmp_path / "work")
+
+    def test_too_many_files(self, tmp_path):
+        """Test the batch size limit across zip members"""
+        from app.services.audio_service import collect_batch_inputs
+
+        archive = _zip(tmp_path / "upload.zip", {f"{i}.mp3": b"x" for i in range(3)})
+
+        with patch("app.services.audio_service.AUDIO_BATCH_MAX_FILES", 2):
+            with pytest.raises(ValueError, match="at most 2"):
+                collect_batch_inputs([("album.zip", archive)], tmp_path / "work")
+
+    def test_invalid_zip(self, tmp_path):
+        """Test that a corrupt archive is reported by name"""
+        from app.services.audio_service import collect_batch_inputs
+
+        (tmp_path / "upload.zip").write_bytes(b"not a zip")
+
+        with pytest.raises(ValueError, match="album.zip"):
+            collect_batch_inputs([("album.zip", tmp_path / "upload.zip")], tmp_path / "work")
@@ -0,0 +1,328 @@
+"""
+Tests for audio_service_async
+Uses mocking for FFmpeg subprocess calls
+"""
+
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.tasks import task_store
+from app.tasks.models import TaskStatus
+
+
+@pytest.fixture(autouse=True)
+def cleanup_tasks():
+    """Clean up tasks before and after each test"""
+    task_store._tasks.clear()
+    task_store._subscribers.clear()
+    yield
+    task_store._tasks.clear()
+    task_store._subscribers.clear()
+
+
+def _ffmpeg_process(returncode=0, stderr=b""):
+    """FFmpeg subprocess stand-in that reports 3 seconds of output, then the end"""
+    process = AsyncMock()
+    process.returncode = returncode
+    process.stdout.readline = AsyncMock(
+        side_effect=[b"out_time_ms=3000000\n", b"progress=end\n", b""]
+    )
+    process.communicate = AsyncMock(return_value=(b"", stderr))
+    return process
+
+
+class TestConvertAudioWithProgress:
+    """Tests for convert_audio_with_progress"""
+
+    @pytest.mark.asyncio
+    @patch("app.utils.ffmpeg_progress.asyncio.create_subprocess_exec")
+    @patch("app.services.audio_service_async.get_audio_duration", return_value=6.0)
+    @patch("app.services.audio_service_async.get_file_size", side_effect=[1000, 400])
+    async def test_successful_conversion(self, mock_size, mock_duration, mock_subprocess):
+        """Test conversion with progress and compression ratio"""
+        from app.services.audio_service_async import convert_audio_with_progress
+
+        mock_subprocess.return_value = _ffmpeg_process()
+        task = task_store.create_task("audio_convert")
+
+        result = await convert_audio_with_progress(
+            task.id, Path("/tmp/in.wav"), Path("/tmp/out.ogg"), "ogg", "high"
+        )
+
+        assert result.success is True
+        assert result.compression_ratio == 60.0
+        cmd = mock_subprocess.call_args[0]
+        assert "libvorbis" in cmd
+        assert "-progress" in cmd
+        task = task_store.get_task(task.id)
+        assert task.status == TaskStatus.COMPLETED
+
+    @pytest.mark.asyncio
+    async def test_unsupported_format(self):
+        """Test that an unknown output format fails the task"""
+        from app.services.audio_service_async import convert_audio_with_progress
+
+        task = task_store.create_task("audio_convert")
+
+        result = await convert_audio_with_progress(
+            task.id, Path("/tmp/in.wav"), Path("/tmp/out.xyz"), "xyz"
+        )
+
+        assert result.success is False
+        assert task_store.get_task(task.id).status == TaskStatus.FAILED
+
+    @pytest.mark.asyncio
+    @patch("app.utils.ffmpeg_progress.asyncio.create_subprocess_exec")
+    @patch("app.services.audio_service_async.get_audio_duration", return_value=6.0)
+    @patch("app.services.audio_service_async.get_file_size", return_value=1000)
+    async def test_ffmpeg_error(self, mock_size, mock_duration, mock_subprocess):
+        """Test that FFmpeg's error output fails the task"""
+        from app.services.audio_service_async import convert_audio_with_progress
+
+        mock_subprocess.return_value = _ffmpeg_process(1, b"Invalid data found")
+        task = task_store.create_task("audio_convert")
+
+        result = await convert_audio_with_progress(
+            task.id, Path("/tmp/in.wav"), Path("/tmp/out.mp3"), "mp3"
+        )
+
+        assert result.success is False
+        assert result.error == "Invalid data found"
+
+
+class TestCompressAudioWithProgress:
+    """Tests for compress_audio_with_progress"""
+
+    @pytest.mark.asyncio
+    @patch("app.utils.ffmpeg_progress.asyncio.create_subprocess_exec")
+    @patch("app.services.audio_service_async.get_audio_duration", return_value=6.0)
+    @patch("app.services.audio_service_async.get_file_size", side_effect=[1000, 250])
+    async def test_successful_compression(self, mock_size, mock_duration, mock_subprocess):
+        """Test that lossless input is compressed to MP3 with progress"""
+        from app.services.audio_service_async import compress_audio_with_progress
+
+        mock_subprocess.return_value = _ffmpeg_process()
+        task = task_store.create_task("audio_compress")
+
+        result = await compress_audio_with_progress(
+            task.id, Path("/tmp/in.wav"), Path("/tmp/out.mp3"), "medium", "128k"
+        )
+
+        assert result.success is True
+        assert "libmp3lame" in mock_subprocess.call_args[0]
+        assert task_store.get_task(task.id).progress.message == "Compressing... 50%"
+
+
+class TestMergeAudioWithProgress:
+    """Tests for merge_audio_with_progress"""
+
+    @pytest.mark.asyncio
+    @patch("app.utils.ffmpeg_progress.asyncio.create_subprocess_exec")
+    @patch("app.services.audio_service_async.plan_merge", return_value=("reencode", None, [0, 1]))
+    @patch("app.services.audio_service_async.get_audio_duration", side_effect=[2.0, 4.0])
+    @patch("app.services.audio_service_async.get_file_size", return_value=1000)
+    async def test_progress_over_total_duration(
+        self, mock_size, mock_duration, mock_plan, mock_subprocess
+    ):
+        """Test that progress is measured against the summed input durations"""
+        from app.services.audio_service_async import merge_audio_with_progress
+
+        mock_subprocess.return_value = _ffmpeg_process()
+        task = task_store.create_task("audio_merge")
+
+        result = await merge_audio_with_progress(
+            task.id, [Path("/tmp/a.mp3"), Path("/tmp/b.mp3")], Path("/tmp/out.mp3")
+        )
+
+        assert result.success is True
+        assert "concat=a=1:n=2" in " ".join(mock_subprocess.call_args[0])
+        assert task_store.get_task(task.id).progress.message == "Merging... 50%"
+
+    @pytest.mark.asyncio
+    async def test_requires_two_files(self):
+        """Test that a single input fails the task"""
+        from app.services.audio_service_async import merge_audio_with_progress
+
+        task = task_store.create_task("audio_merge")
+
+        result = await merge_audio_with_progress(task.id, [Path("/tmp/a.mp3")], Path("/tmp/o.mp3"))
+
+        assert result.success is False
+        assert "At least 2" in result.error
+
+    @pytest.mark.asyncio
+    @patch("app.utils.ffmpeg_progress.asyncio.create_subprocess_exec")
+    @patch("app.services.audio_service_async.plan_merge")
+    @patch("app.services.audio_service_async.get_audio_duration", return_value=2.0)
+    @patch("app.services.audio_service_async.get_file_size", return_value=1000)
+    async def test_stream_copy(
+        self, mock_size, mock_duration, mock_plan, mock_subprocess, tmp_path
+    ):
+        """Test that matching inputs are joined by one copy run"""
+        from app.services.audio_service_async import merge_audio_with_progress
+
+        mock_plan.return_value = ("stream_copy", ("mp3", "44100", 2), [])
+        mock_subprocess.return_value = _ffmpeg_process()
+        task = task_store.create_task("audio_merge")
+
+        result = await merge_audio_with_progress(
+            task.id, [Path("/tmp/a.mp3"), Path("/tmp/b.mp3")], tmp_path / "out.mp3"
+        )
+
+        assert result.strategy == "stream_copy"
+        assert result.to_dict()["strategy"] == "stream_copy"
+        cmd = " ".join(mock_subprocess.call_args[0])
+        assert "-f concat -safe 0" in cmd
+        assert "-acodec copy" in cmd
+        assert mock_subprocess.call_count == 1
+        assert task_store.get_task(task.id).progress.message == "Joining... 75%"
+
+    @pytest.mark.asyncio
+    @patch("app.utils.ffmpeg_progress.asyncio.create_subprocess_exec")
+    @patch("app.services.audio_service_async.plan_merge")
+    @patch("app.services.audio_service_async.get_audio_duration", return_value=2.0)
+    @patch("app.services.audio_service_async.get_file_size", return_value=1000)
+    async def test_partial_reencode(
+        self, mock_size, mock_duration, mock_plan, mock_subprocess, tmp_path
+    ):
+        """Test that mismatched inputs are re-encoded before the copy run"""
+        from app.services.audio_service_async import merge_audio_with_progress
+
+        mock_plan.return_value = ("partial_reencode", ("mp3", "44100", 2), [0, 2])
+        mock_subprocess.side_effect = lambda *args, **kwargs: _ffmpeg_process()
+        task = task_store.create_task("audio_merge")
+        inputs = [Path("/tmp/a.wav"), Path("/tmp/b.mp3"), Path("/tmp/c.ogg")]
+
+        result = await merge_audio_with_progress(task.id, inputs, tmp_path / "out.mp3")
+
+        assert result.success is True
+        assert result.strategy == "partial_reencode"
+        cmds = [" ".join(c.args) for c in mock_subprocess.call_args_list]
+        assert len(cmds) == 3
+        assert sorted(cmd.split(" -i ")[1].split()[0] for cmd in cmds[:2]) == [
+            "/tmp/a.wav",
+            "/tmp/c.ogg",
+        ]
+        assert "-acodec copy" in cmds[2]
+        assert not (tmp_path / "merge_out").exists()
+
+    @pytest.mark.asyncio
+    @patch("app.utils.ffmpeg_progress.asyncio.create_subprocess_exec")
+    @patch("app.services.audio_service_async.plan_merge")
+    @patch("app.services.audio_service_async.get_audio_duration", return_value=2.0)
+    @patch("app.services.audio_service_async.get_file_size", return_value=1000)
+    async def test_failed_part_fails_task(
+        self, mock_size, mock_duration, mock_plan, mock_subprocess, tmp_path
+    ):
+        """Test that a failed re-encode stops the merge before joining"""
+        from app.services.audio_service_async import merge_audio_with_progress
+
+        mock_plan.return_value = ("partial_reencode", ("mp3", "44100", 2), [1])
+        mock_subprocess.return_value = _ffmpeg_process(1, stderr=b"Invalid data found")
+        task = task_store.create_task("audio_merge")
+
+        result = await merge_audio_with_progress(
+            task.id, [Path("/tmp/a.mp3"), Path("/tmp/b.wav")], tmp_path / "out.mp3"
+        )
+
+        assert result.success is False
+        assert "Invalid data found" in result.error
+        assert mock_subprocess.call_count == 1
+        assert task_store.get_task(task.id).status == TaskStatus.FAILED
+
+
+def _converting_process(fail_inputs=()):
+    """create_subprocess_exec stand-in writing each output, failing for some inputs"""
+
+    def create(*cmd, **kwargs):
+        source = cmd[cmd.index("-i") + 1]
+        if Path(source).name in fail_inputs:
+            return _ffmpeg_process(1, stderr=b"Invalid data found")
+        output = next(arg for arg in cmd if Path(arg).name.startswith("out_"))
+        Path(output).write_bytes(f"converted {source}".encode())
+        return _ffmpeg_process()
+
+    return create
+
+
+class TestConvertAudioBatchWithProgress:
+    """Tests for convert_audio_batch_with_progress"""
+
+    @pytest.mark.asyncio
+    @patch("app.utils.ffmpeg_progress.asyncio.create_subprocess_exec")
+    async def test_zip_output(self, mock_subprocess, tmp_path):
+        """Test that every converted file lands in the archive under a unique name"""
+        import zipfile
+
+        from app.services.audio_service_async import convert_audio_batch_with_progress
+
+        mock_subprocess.side_effect = _converting_process()
+        uploads = []
+        for name in ("a.wav", "b.flac"):
+            (tmp_path / name).write_bytes(b"audio")
+            uploads.append((f"track.{name.split('.')[1]}", tmp_path / name))
+        task = task_store.create_task("audio_convert_batch")
+        output_path = tmp_path / "batch.zip"
+
+        result = await convert_audio_batch_with_progress(task.id, uploads, output_path, "mp3")
+
+        assert result.success is True
+        assert result.message == "Converted 2 of 2 files to MP3"
+        with zipfile.ZipFile(output_path) as archive:
+            assert sorted(archive.namelist()) == ["track (2).mp3", "track.mp3"]
+            assert all(info.compress_type == zipfile.ZIP_STORED for info in archive.infolist())
+        assert task_store.get_task(task.id).progress.message.startswith("Converted 2/2 files")
+        assert not (tmp_path / "batch_batch").exists()
+
+    @pytest.mark.asyncio
+    @patch("app.services.audio_service_async.AUDIO_BATCH_CONCURRENCY", 1)
+    @patch("app.utils.ffmpeg_progress.asyncio.create_subprocess_exec")
+    async def test_failed_file_is_reported(self, mock_subprocess, tmp_path):
+        """Test that one failed file leaves the others in the archive"""
+        from app.services.audio_service_async import convert_audio_batch_with_progress
+
+        mock_subprocess.side_effect = _converting_process(fail_inputs={"bad.wav"})
+        uploads = [(name, tmp_path / name) for name in ("good.wav", "bad.wav")]
+        task = task_store.create_task("audio_convert_batch")
+
+        result = await convert_audio_batch_with_progress(
+            task.id, uploads, tmp_path / "batch.zip", "ogg"
+        )
+
+        assert result.success is True
+        assert result.message == "Converted 1 of 2 files to OGG (failed: bad.wav)"
+
+    @pytest.mark.asyncio
+    @patch("app.utils.ffmpeg_progress.asyncio.create_subprocess_exec")
+    async def test_all_failed(self, mock_subprocess, tmp_path):
+        """Test that the task fails when no file converts"""
+        from app.services.audio_service_async import convert_audio_batch_with_progress
+
+        mock_subprocess.side_effect = _converting_process(fail_inputs={"bad.wav"})
+        task = task_store.create_task("audio_convert_batch")
+
+        result = await convert_audio_batch_with_progress(
+            task.id, [("bad.wav", tmp_path / "bad.wav")], tmp_path / "batch.zip", "mp3"
+        )
+
+        assert result.success is False
+        assert task_store.get_task(task.id).status == TaskStatus.FAILED
+
+    @pytest.mark.asyncio
+    async def test_empty_zip(self, tmp_path):
+        """Test that a batch without audio files fails"""
+        import zipfile
+
+        from app.services.audio_service_async import convert_audio_batch_with_progress
+
+        with zipfile.ZipFile(tmp_path / "docs.zip", "w") as archive:
+            archive.writestr("readme.txt", "text")
+        task = task_store.create_task("audio_convert_batch")
+
+        result = await convert_audio_batch_with_progress(
+            task.id, [("docs.zip", tmp_path / "docs.zip")], tmp_path / "batch.zip", "mp3"
+        )
+
+        assert result.error == "No audio files to convert"
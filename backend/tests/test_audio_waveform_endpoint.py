@@ -0,0 +1,65 @@
+"""
+Tests for /api/v1/audio/waveform endpoint
+"""
+
+import io
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.audio import AudioWaveformResponse, WaveformLevel
+
+client = TestClient(app)
+
+WAVEFORM = AudioWaveformResponse(
+    success=True,
+    message="Waveform peaks extracted successfully",
+    sample_rate=16000,
+    duration=2.0,
+    levels=[WaveformLevel(samples_per_peak=16000, length=2, data=[-3, 4, -1, 2])],
+)
+
+
+def _upload(name="podcast.mp3"):
+    return {"file": (name, io.BytesIO(b"ID3 fake audio"), "audio/mpeg")}
+
+
+class TestWaveformEndpoint:
+    """Tests for waveform peaks endpoint"""
+
+    @patch("app.api.audio.extract_waveform", return_value=WAVEFORM)
+    @patch("app.api.audio.save_upload_file", return_value=Path("/tmp/podcast.mp3"))
+    def test_json(self, mock_save, mock_extract):
+        """Test JSON peaks"""
+        response = client.post("/api/v1/audio/waveform", files=_upload(), data={"peaks": "512"})
+
+        assert response.status_code == 200
+        assert response.json()["levels"][0]["data"] == [-3, 4, -1, 2]
+        assert mock_extract.call_args.args[1:] == (512, 4)
+
+    @patch("app.api.audio.extract_waveform", return_value=WAVEFORM)
+    @patch("app.api.audio.save_upload_file", return_value=Path("/tmp/podcast.mp3"))
+    def test_binary(self, mock_save, mock_extract):
+        """Test the compact binary format"""
+        response = client.post(
+            "/api/v1/audio/waveform", files=_upload(), data={"output_format": "binary"}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/octet-stream"
+        assert response.content[:4] == b"WAVP"
+        assert response.content[-4:] == bytes([253, 4, 255, 2])
+
+    def test_invalid_options(self):
+        """Test that bad options are rejected before upload"""
+        for data in ({"peaks": "100000"}, {"zoom_levels": "20"}, {"output_format": "csv"}):
+            response = client.post("/api/v1/audio/waveform", files=_upload(), data=data)
+            assert response.status_code == 400
+
+    def test_invalid_file(self):
+        """Test that non-audio files are rejected"""
+        response = client.post("/api/v1/audio/waveform", files=_upload("notes.txt"))
+
+        assert response.status_code == 400
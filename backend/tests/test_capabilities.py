@@ -0,0 +1,182 @@
+"""
+Tests for the host capability registry
+"""
+
+import subprocess
+from unittest.mock import MagicMock, patch
+
+from app.services.pdf_service import check_ocr_capabilities
+from app.utils.capabilities import (
+    CapabilityRegistry,
+    parse_ffmpeg_list,
+    parse_tesseract_languages,
+)
+
+ENCODERS_OUTPUT = """Encoders:
+ V..... = Video
+ A..... = Audio
+ .F.... = Frame-level multithreading
+ ------
+ V....D libopenh264          OpenH264 H.264 / AVC / MPEG-4 AVC (codec h264)
+ V....D libx264              libx264 H.264 / AVC / MPEG-4 AVC (codec h264)
+ A....D aac                  AAC (Advanced Audio Coding)
+"""
+
+FILTERS_OUTPUT = """Filters:
+  T.. = Timeline support
+  .S. = Slice threading
+  | = Source or sink filter
+ ... abench            A->A       Benchmark part of a filtergraph.
+ TSC scale             V->V       Scale the input video size and/or convert the image format.
+ ... palettegen        V->V       Find the optimal palette for a given stream.
+"""
+
+LANGS_OUTPUT = (
+    'List of available languages in "/usr/share/tesseract-ocr/5/tessdata/" (3):\neng\nfra\nosd\n'
+)
+
+
+def _fake_run(outputs):
+    """subprocess.run stand-in answering by command, missing commands raise like absent tools"""
+
+    def run(cmd, **kwargs):
+        key = " ".join(cmd)
+        if key not in outputs:
+            raise FileNotFoundError(cmd[0])
+        return MagicMock(returncode=0, stdout=outputs[key], stderr="")
+
+    return run
+
+
+FULL_HOST = {
+    "ffmpeg -hide_banner -version": "ffmpeg version 5.1.6-0+deb12u1\nbuilt with gcc 12\n",
+    "ffmpeg -hide_banner -encoders": ENCODERS_OUTPUT,
+    "ffmpeg -hide_banner -decoders": " ------\n VFS..D h264  H.264\n A....D aac  AAC\n",
+    "ffmpeg -hide_banner -filters": FILTERS_OUTPUT,
+    "tesseract --version": "tesseract 5.3.0\n leptonica-1.82.0\n",
+    "tesseract --list-langs": LANGS_OUTPUT,
+}
+
+
+class TestParsers:
+    """Tests for the tool output parsers"""
+
+    def test_parse_encoders_skips_legend(self):
+        """Test that only encoder entries are listed"""
+        assert parse_ffmpeg_list(ENCODERS_OUTPUT) == {"libopenh264", "libx264", "aac"}
+
+    def test_parse_filters(self):
+        """Test parsing the filter list"""
+        assert parse_ffmpeg_list(FILTERS_OUTPUT) == {"abench", "scale", "palettegen"}
+
+    def test_parse_tesseract_languages(self):
+        """Test that the header line is skipped"""
+        assert parse_tesseract_languages(LANGS_OUTPUT) == ["eng", "fra", "osd"]
+
+
+class TestCapabilityRegistry:
+    """Tests for CapabilityRegistry class"""
+
+    @patch("app.utils.capabilities.shutil.which", return_value="/usr/bin/pdftoppm")
+    @patch("app.utils.capabilities.subprocess.run", side_effect=_fake_run(FULL_HOST))
+    def test_refresh_reads_every_tool(self, mock_run, mock_which):
+        """Test a host with FFmpeg, Tesseract and Poppler"""
+        registry = CapabilityRegistry()
+
+        registry.refresh()
+
+        assert registry.ffmpeg_version == "ffmpeg version 5.1.6-0+deb12u1"
+        assert registry.h264_encoder() == "libx264"
+        assert registry.has_decoder("h264")
+        assert registry.has_filter("palettegen")
+        assert not registry.has_encoder("libsvtav1")
+        assert registry.has_tesseract()
+        assert registry.tesseract_languages == ["eng", "fra", "osd"]
+        assert registry.has_poppler()
+
+    @patch("app.utils.capabilities.subprocess.run", side_effect=_fake_run(FULL_HOST))
+    def test_probed_once(self, mock_run):
+        """Test that repeated lookups do not run the tools again"""
+        registry = CapabilityRegistry()
+
+        for _ in range(3):
+            registry.h264_encoder()
+            registry.has_filter("scale")
+
+        assert mock_run.call_count == 6  # ffmpeg x4, tesseract x2
+
+    @patch("app.utils.capabilities.subprocess.run")
+    def test_h264_encoder_preference(self, mock_run):
+        """Test fallback to libopenh264 and h264_vaapi"""
+        for listed, expected in (
+            (" V....D libopenh264  OpenH264\n", "libopenh264"),
+            (" V....D h264_vaapi  VAAPI\n V....D libopenh264  OpenH264\n", "libopenh264"),
+            (" V....D h264_vaapi  VAAPI\n", "h264_vaapi"),
+            (" V....D mpeg4  MPEG-4\n", None),
+        ):
+            mock_run.return_value = MagicMock(returncode=0, stdout=listed, stderr="")
+            registry = CapabilityRegistry()
+            assert registry.h264_encoder() == expected
+
+    @patch("app.utils.capabilities.shutil.which", return_value=None)
+    @patch("app.utils.capabilities.subprocess.run", side_effect=FileNotFoundError("ffmpeg"))
+    def test_missing_tools(self, mock_run, mock_which):
+        """Test that a host without the tools reports empty capabilities"""
+        registry = CapabilityRegistry()
+
+        summary = registry.summary()
+
+        assert summary["ffmpeg"] is None
+        assert summary["h264_encoder"] is None
+        assert summary["encoders"] == 0
+        assert not registry.has_tesseract()
+        assert not registry.has_poppler()
+
+    @patch("app.utils.capabilities.subprocess.run")
+    def test_hung_tool(self, mock_run):
+        """Test that a probe timing out is treated as a missing tool"""
+        mock_run.side_effect = subprocess.TimeoutExpired("tesseract", 30)
+
+        assert CapabilityRegistry().tesseract_languages == []
+
+    @patch("app.utils.capabilities.subprocess.run", side_effect=_fake_run(FULL_HOST))
+    def test_missing_tesseract_languages(self, mock_run):
+        """Test checking a multi-language spec"""
+        registry = CapabilityRegistry()
+
+        assert registry.missing_tesseract_languages("eng+fra") == []
+        assert registry.missing_tesseract_languages("eng+deu+spa") == ["deu", "spa"]
+
+
+class TestCheckOcrCapabilities:
+    """Tests for the OCR pre-flight check"""
+
+    @patch("app.utils.capabilities.shutil.which", return_value="/usr/bin/pdftoppm")
+    @patch("app.utils.capabilities.subprocess.run", side_effect=_fake_run(FULL_HOST))
+    def test_ready(self, mock_run, mock_which):
+        """Test that no error is returned when everything is installed"""
+        with patch("app.services.pdf_service.capabilities", CapabilityRegistry()):
+            assert check_ocr_capabilities("eng") is None
+
+    @patch("app.utils.capabilities.shutil.which", return_value="/usr/bin/pdftoppm")
+    @patch("app.utils.capabilities.subprocess.run", side_effect=_fake_run(FULL_HOST))
+    def test_missing_language(self, mock_run, mock_which):
+        """Test that an uninstalled language is reported with the available ones"""
+        with patch("app.services.pdf_service.capabilities", CapabilityRegistry()):
+            error = check_ocr_capabilities("deu")
+
+        assert "deu" in error
+        assert "eng, fra, osd" in error
+
+    @patch("app.utils.capabilities.shutil.which", return_value=None)
+    @patch("app.utils.capabilities.subprocess.run", side_effect=_fake_run(FULL_HOST))
+    def test_missing_poppler(self, mock_run, mock_which):
+        """Test that a host without pdftoppm is reported"""
+        with patch("app.services.pdf_service.capabilities", CapabilityRegistry()):
+            assert "Poppler" in check_ocr_capabilities("eng")
+
+    @patch("app.utils.capabilities.subprocess.run", side_effect=FileNotFoundError("tesseract"))
+    def test_missing_tesseract(self, mock_run):
+        """Test that a host without Tesseract is reported"""
+        with patch("app.services.pdf_service.capabilities", CapabilityRegistry()):
+            assert "Tesseract OCR not found" in check_ocr_capabilities("eng")
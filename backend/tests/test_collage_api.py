@@ -174,3 +174,38 @@ def test_create_collage_3x3_grid():
     assert data["success"] is True
     assert data["dimensions"]["width"] == 2400
     assert data["dimensions"]["height"] == 2400
+
+
+def test_create_collage_webp_cell_size():
+    """Test the output format and cell size options"""
+    images = [("files", ("image.png", create_test_image_bytes(), "image/png"))]
+
+    response = client.post(
+        "/api/v1/image/collage",
+        files=images,
+        data={
+            "rows": "1",
+            "cols": "2",
+            "image_order": "0,0",
+            "cell_size": "200",
+            "output_format": "webp",
+        },
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["filename"].endswith(".webp")
+    assert data["dimensions"] == {"width": 400, "height": 200}
+
+
+def test_create_collage_invalid_options():
+    """Test that unknown formats and out-of-range cell sizes are rejected"""
+    images = [("files", ("image.png", create_test_image_bytes(), "image/png"))]
+
+    for options in ({"output_format": "tiff"}, {"cell_size": "10"}, {"cell_size": "5000"}):
+        response = client.post(
+            "/api/v1/image/collage",
+            files=images,
+            data={"rows": "1", "cols": "1", "image_order": "0", **options},
+        )
+        assert response.status_code == 400
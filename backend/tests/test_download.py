@@ -1,3 +1,10 @@
+import hashlib
+
+import pytest
+
+from app.config import TEMP_DIR
+
+
 def test_download_file(client, sample_image):
     """Test file download endpoint"""
     # First create a file via compression to get a valid download URL
@@ -21,3 +28,123 @@ def test_download_not_found(client):
     """Test downloading non-existent file"""
     response = client.get("/api/v1/download/non_existent_file_12345.txt")
     assert response.status_code == 404
+
+
+@pytest.fixture
+def temp_download():
+    """File in TEMP_DIR served by the download endpoint"""
+    path = TEMP_DIR / "download_test_0123456789.png"
+    path.write_bytes(b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4)
+    yield path
+    path.unlink(missing_ok=True)
+
+
+def test_download_headers(client, temp_download):
+    """Test media type, strong ETag and Accept-Ranges"""
+    response = client.get(f"/api/v1/download/{temp_download.name}")
+
+    content = temp_download.read_bytes()
+    assert response.status_code == 200
+    assert response.content == content
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["etag"] == f'"{hashlib.sha256(content).hexdigest()}"'
+
+
+def test_download_if_none_match(client, temp_download):
+    """Test that a matching ETag returns 304 without a body"""
+    etag = client.get(f"/api/v1/download/{temp_download.name}").headers["etag"]
+
+    response = client.get(
+        f"/api/v1/download/{temp_download.name}", headers={"If-None-Match": f'"other", W/{etag}'}
+    )
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_download_single_range(client, temp_download):
+    """Test resuming a download with a byte range"""
+    content = temp_download.read_bytes()
+
+    response = client.get(f"/api/v1/download/{temp_download.name}", headers={"Range": "bytes=100-"})
+
+    assert response.status_code == 206
+    assert response.content == content[100:]
+    assert response.headers["content-range"] == f"bytes 100-{len(content) - 1}/{len(content)}"
+
+
+def test_download_multiple_ranges(client, temp_download):
+    """Test a multi-range request returns a multipart body"""
+    content = temp_download.read_bytes()
+
+    response = client.get(
+        f"/api/v1/download/{temp_download.name}", headers={"Range": "bytes=0-7,16-31"}
+    )
+
+    assert response.status_code == 206
+    assert response.headers["content-type"].startswith("multipart/byteranges")
+    assert content[0:8] in response.content
+    assert content[16:32] in response.content
+
+
+def test_download_if_range(client, temp_download):
+    """Test that If-Range only honours the range while the ETag still matches"""
+    etag = client.get(f"/api/v1/download/{temp_download.name}").headers["etag"]
+    url = f"/api/v1/download/{temp_download.name}"
+
+    matching = client.get(url, headers={"Range": "bytes=0-9", "If-Range": etag})
+    stale = client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+
+    assert matching.status_code == 206
+    assert len(matching.content) == 10
+    assert stale.status_code == 200
+    assert stale.content == temp_download.read_bytes()
+
+
+@pytest.fixture
+def temp_stream():
+    """HLS output directory in TEMP_DIR"""
+    import shutil
+
+    stream_dir = TEMP_DIR / "download_test_0123456789_stream"
+    (stream_dir / "stream_720p").mkdir(parents=True, exist_ok=True)
+    (stream_dir / "master.m3u8").write_text("#EXTM3U\nstream_720p/index.m3u8\n")
+    (stream_dir / "stream_720p" / "seg_00001.m4s").write_bytes(b"\x00" * 64)
+    yield stream_dir
+    shutil.rmtree(stream_dir, ignore_errors=True)
+
+
+def test_download_streaming_playlist(client, temp_stream):
+    """Test that playlists are served inline and revalidated"""
+    response = client.get(f"/api/v1/download/{temp_stream.name}/master.m3u8")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/vnd.apple.mpegurl")
+    assert response.headers["cache-control"] == "no-cache"
+    assert "content-disposition" not in response.headers
+
+
+def test_download_streaming_segment(client, temp_stream):
+    """Test that segments are cacheable for as long as they exist"""
+    response = client.get(f"/api/v1/download/{temp_stream.name}/stream_720p/seg_00001.m4s")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "video/iso.segment"
+    assert response.headers["cache-control"].endswith("immutable")
+
+    etag = response.headers["etag"]
+    response = client.get(
+        f"/api/v1/download/{temp_stream.name}/stream_720p/seg_00001.m4s",
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 304
+    assert "immutable" in response.headers["cache-control"]
+
+
+def test_download_outside_temp_dir(client, temp_stream):
+    """Test that paths escaping the temp directory are not served"""
+    response = client.get(f"/api/v1/download/{temp_stream.name}/%2E%2E/%2E%2E/app/config.py")
+
+    assert response.status_code == 404
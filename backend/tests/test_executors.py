@@ -0,0 +1,100 @@
+"""
+Tests for the shared executor pools
+"""
+
+import asyncio
+import math
+import threading
+
+import pytest
+
+from app.utils.executors import WorkerPool, get_executor_stats
+
+
+class TestWorkerPool:
+    """Tests for WorkerPool class"""
+
+    @pytest.mark.asyncio
+    async def test_thread_pool_runs_call(self):
+        """Test running a call with args and kwargs in a thread pool"""
+        pool = WorkerPool("test", "thread", 2)
+        try:
+            result = await pool.run(int, "ff", base=16)
+            assert result == 255
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_process_pool_runs_call(self):
+        """Test running a picklable call in a real process pool"""
+        pool = WorkerPool("test", "process", 1)
+        try:
+            result = await pool.run(math.factorial, 10)
+            assert result == 3628800
+            assert pool.stats()["kind"] == "process"
+        finally:
+            pool.shutdown()
+
+    def test_process_pool_falls_back_to_threads(self):
+        """Test that zero process workers means a thread-backed pool"""
+        pool = WorkerPool("test", "process", 0)
+
+        assert pool.kind == "thread"
+        assert pool.max_workers > 0
+
+    @pytest.mark.asyncio
+    async def test_exception_is_propagated(self):
+        """Test that exceptions raised in the pool reach the caller"""
+        pool = WorkerPool("test", "thread", 1)
+        try:
+            with pytest.raises(ValueError):
+                await pool.run(int, "not a number")
+            assert pool.stats()["completed"] == 1
+            assert pool.stats()["running"] == 0
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_queue_depth(self):
+        """Test queued and running counts while jobs wait for a worker"""
+        pool = WorkerPool("test", "thread", 1)
+        release = threading.Event()
+        try:
+            jobs = [asyncio.ensure_future(pool.run(release.wait, 5)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+
+            stats = pool.stats()
+            assert stats["running"] == 1
+            assert stats["queued"] == 2
+
+            release.set()
+            await asyncio.gather(*jobs)
+
+            stats = pool.stats()
+            assert stats["running"] == 0
+            assert stats["queued"] == 0
+            assert stats["completed"] == 3
+        finally:
+            release.set()
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_pool_recreated_after_shutdown(self):
+        """Test that a shut down pool creates a fresh executor on next use"""
+        pool = WorkerPool("test", "thread", 1)
+        await pool.run(abs, -1)
+        pool.shutdown()
+
+        result = await pool.run(abs, -2)
+
+        assert result == 2
+        pool.shutdown()
+
+
+def test_get_executor_stats():
+    """Test that stats are reported for both shared pools"""
+    stats = get_executor_stats()
+
+    assert set(stats) == {"cpu", "io"}
+    for pool_stats in stats.values():
+        assert {"kind", "max_workers", "running", "queued", "completed"} <= set(pool_stats)
@@ -32,6 +32,7 @@ class TestExtractAudioEndpoint:
             download_url="/api/v1/download/test_audio.mp3",
             original_size=1000,
             processed_size=200,
+            strategy=None,
         )
 
         with open(test_file, "rb") as f:
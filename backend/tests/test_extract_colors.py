@@ -64,6 +64,22 @@ class TestExtractColorsEndpoint:
         assert response.status_code == 400
         assert "max_colors" in response.json()["detail"]
 
+    def test_extract_colors_max_limit(self, tmp_path):
+        """Test that up to 32 colors can be requested"""
+        from PIL import Image
+
+        test_file = tmp_path / "test_image.png"
+        Image.new("RGB", (10, 10), color="red").save(test_file)
+
+        for max_colors, status_code in ((32, 200), (33, 400)):
+            with open(test_file, "rb") as f:
+                response = client.post(
+                    "/api/v1/image/extract-colors",
+                    files={"file": ("test_image.png", f, "image/png")},
+                    data={"max_colors": max_colors},
+                )
+            assert response.status_code == status_code
+
     def test_extract_colors_invalid_format(self, tmp_path):
         """Test invalid file format"""
         test_file = tmp_path / "test.txt"
@@ -4,20 +4,28 @@ Tests for file handler utilities
 
 import asyncio
 from datetime import datetime, timedelta
+import hashlib
 from io import BytesIO
 from unittest.mock import MagicMock
 
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.testclient import TestClient
 import pytest
 
 from app.utils.file_handler import (
+    RequestSizeLimitMiddleware,
     calculate_compression_ratio,
     cleanup_temp_files,
     delete_file,
+    delete_output,
     generate_unique_filename,
     get_file_size,
+    get_known_hash,
     save_processed_file,
     save_upload_file,
+    save_upload_stream,
 )
+from app.utils.validators import is_image_content
 
 
 def test_generate_unique_filename():
@@ -94,6 +102,20 @@ def test_delete_file_directory(tmp_path):
     assert test_dir.exists()
 
 
+def test_delete_output_directory(tmp_path):
+    """Test that a directory output (HLS renditions) is removed with its files"""
+    output_dir = tmp_path / "video_stream"
+    (output_dir / "stream_720p").mkdir(parents=True)
+    (output_dir / "stream_720p" / "seg_00001.m4s").write_bytes(b"x" * 10)
+    (output_dir / "master.m3u8").write_text("#EXTM3U")
+
+    assert get_file_size(output_dir) == 17
+
+    delete_output(output_dir)
+
+    assert not output_dir.exists()
+
+
 def test_calculate_compression_ratio():
     """Test compression ratio calculation"""
     # 50% compression
@@ -145,6 +167,148 @@ async def test_save_upload_file_custom_filename(tmp_path, monkeypatch):
     assert result_path.read_bytes() == b"custom content"
 
 
+@pytest.mark.asyncio
+async def test_save_upload_stream_hashes_in_chunks(tmp_path, monkeypatch):
+    """Test that a multi-chunk upload is hashed and sniffed while streaming"""
+    monkeypatch.setattr("app.utils.file_handler.TEMP_DIR", tmp_path)
+    monkeypatch.setattr("app.utils.file_handler.UPLOAD_CHUNK_SIZE", 16)
+    content = b"\x89PNG\r\n\x1a\n" + bytes(range(200))
+
+    mock_file = MagicMock()
+    mock_file.filename = "image.png"
+    mock_file.file = BytesIO(content)
+
+    info = await save_upload_stream(mock_file, content_check=is_image_content)
+
+    assert info.path.read_bytes() == content
+    assert info.size == len(content)
+    assert info.sha256 == hashlib.sha256(content).hexdigest()
+    assert info.detected_format == "png"
+
+
+@pytest.mark.asyncio
+async def test_get_known_hash_of_upload(tmp_path, monkeypatch):
+    """Test that the upload hash is remembered until the file changes"""
+    monkeypatch.setattr("app.utils.file_handler.TEMP_DIR", tmp_path)
+    mock_file = MagicMock()
+    mock_file.filename = "clip.mp4"
+    mock_file.file = BytesIO(b"video bytes")
+
+    info = await save_upload_stream(mock_file)
+
+    assert get_known_hash(info.path) == info.sha256
+    info.path.write_bytes(b"rewritten video bytes")
+    assert get_known_hash(info.path) is None
+    assert get_known_hash(tmp_path / "never_uploaded.mp4") is None
+
+
+@pytest.mark.asyncio
+async def test_save_upload_stream_enforces_max_size(tmp_path, monkeypatch):
+    """Test that an upload over the size limit is aborted and removed"""
+    monkeypatch.setattr("app.utils.file_handler.TEMP_DIR", tmp_path)
+    monkeypatch.setattr("app.utils.file_handler.UPLOAD_CHUNK_SIZE", 10)
+
+    mock_file = MagicMock()
+    mock_file.filename = "big.bin"
+    mock_file.file = BytesIO(b"x" * 100)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await save_upload_stream(mock_file, custom_filename="big.bin", max_size=50)
+
+    assert exc_info.value.status_code == 413
+    assert not (tmp_path / "big.bin").exists()
+
+
+@pytest.mark.asyncio
+async def test_save_upload_stream_rejects_declared_size(tmp_path, monkeypatch):
+    """Test that a declared size over the limit is rejected before reading"""
+    monkeypatch.setattr("app.utils.file_handler.TEMP_DIR", tmp_path)
+
+    mock_file = MagicMock()
+    mock_file.filename = "big.bin"
+    mock_file.size = 1000
+    mock_file.file = BytesIO(b"x")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await save_upload_stream(mock_file, max_size=50)
+
+    assert exc_info.value.status_code == 413
+    assert mock_file.file.tell() == 0
+
+
+@pytest.mark.asyncio
+async def test_save_upload_file_rejects_wrong_content(tmp_path, monkeypatch):
+    """Test that content not matching the expected format is rejected"""
+    monkeypatch.setattr("app.utils.file_handler.TEMP_DIR", tmp_path)
+
+    mock_file = MagicMock()
+    mock_file.filename = "fake.png"
+    mock_file.file = BytesIO(b"this is not a png")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await save_upload_file(
+            mock_file, custom_filename="fake.png", content_check=is_image_content
+        )
+
+    assert exc_info.value.status_code == 400
+    assert not (tmp_path / "fake.png").exists()
+
+
+def _limited_app(max_size: int) -> FastAPI:
+    """App with one upload endpoint behind RequestSizeLimitMiddleware"""
+    app = FastAPI()
+    app.add_middleware(RequestSizeLimitMiddleware, max_size=max_size)
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    return app
+
+
+def test_request_size_limit_passes_small_uploads():
+    """Test that bodies under the limit reach the endpoint"""
+    client = TestClient(_limited_app(1024))
+
+    response = client.post("/upload", files={"file": ("a.bin", b"x" * 100)})
+
+    assert response.status_code == 200
+    assert response.json() == {"size": 100}
+
+
+def test_request_size_limit_rejects_declared_length():
+    """Test that a too large Content-Length is answered without reading the body"""
+    client = TestClient(_limited_app(1024))
+
+    response = client.post("/upload", files={"file": ("a.bin", b"x" * 2048)})
+
+    assert response.status_code == 413
+    assert "maximum size" in response.json()["detail"]
+
+
+def test_request_size_limit_stops_streamed_body():
+    """Test that a chunked body is cut off once it grows past the limit"""
+    client = TestClient(_limited_app(1024))
+
+    def body():
+        for _ in range(10):
+            yield b"x" * 512
+
+    response = client.post(
+        "/upload", content=body(), headers={"Content-Type": "multipart/form-data; boundary=b"}
+    )
+
+    assert response.status_code == 413
+
+
+def test_request_size_limit_default_admits_full_size_files():
+    """Test that the default request limit fits MAX_REQUEST_FILES files at MAX_FILE_SIZE"""
+    from app.config import MAX_FILE_SIZE, MAX_REQUEST_FILES, MAX_REQUEST_SIZE
+
+    assert MAX_REQUEST_SIZE == MAX_FILE_SIZE * MAX_REQUEST_FILES + 1024 * 1024
+    assert RequestSizeLimitMiddleware(None).max_size == MAX_REQUEST_SIZE
+
+
 def test_cleanup_temp_files(tmp_path, monkeypatch):
     """Test cleanup of old temporary files"""
     import os
@@ -195,6 +359,23 @@ def test_cleanup_temp_files_with_subdirectory(tmp_path, monkeypatch):
     assert subdir.exists()
 
 
+def test_cleanup_temp_files_old_streaming_directory(tmp_path, monkeypatch):
+    """Test that stale HLS/DASH directories are removed, other directories are kept"""
+    import os
+
+    monkeypatch.setattr("app.utils.file_handler.TEMP_DIR", tmp_path)
+    monkeypatch.setattr("app.utils.file_handler.TEMP_FILE_CLEANUP_MINUTES", 0)
+    old_time = (datetime.now() - timedelta(hours=1)).timestamp()
+    for name in ("video_stream", "cache"):
+        (tmp_path / name).mkdir()
+        os.utime(tmp_path / name, (old_time, old_time))
+
+    cleanup_temp_files()
+
+    assert not (tmp_path / "video_stream").exists()
+    assert (tmp_path / "cache").exists()
+
+
 def test_cleanup_temp_files_handles_deletion_error(tmp_path, monkeypatch, capsys):
     """Test cleanup handles file deletion errors gracefully"""
     import os
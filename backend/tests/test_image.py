@@ -1,3 +1,6 @@
+from unittest.mock import patch
+
+
 def test_compress_image(client, sample_image):
     """Test image compression endpoint"""
     with open(sample_image, "rb") as f:
@@ -44,6 +47,18 @@ def test_invalid_image_format(client, sample_pdf):
     assert response.status_code in [400, 422]
 
 
+def test_image_with_wrong_content(client, sample_pdf):
+    """Test that a non-image file renamed to .png is rejected by its magic bytes"""
+    with open(sample_pdf, "rb") as f:
+        response = client.post(
+            "/api/v1/image/compress",
+            files={"file": ("renamed.png", f, "image/png")},
+            data={"quality": 50},
+        )
+
+    assert response.status_code == 400
+
+
 def test_convert_image_invalid_output_format(client, sample_image):
     """Test image conversion with invalid output format"""
     with open(sample_image, "rb") as f:
@@ -128,3 +143,83 @@ def test_create_icon_invalid_file(client, sample_pdf):
         )
 
     assert response.status_code in [400, 422]
+
+
+def test_create_favicon_pack(client, sample_image):
+    """Test building a favicon pack in one request"""
+    import zipfile
+
+    from app.config import TEMP_DIR
+
+    with open(sample_image, "rb") as f:
+        response = client.post(
+            "/api/v1/image/favicon-pack",
+            files={"file": ("logo.png", f, "image/png")},
+            data={"name": "TaskPlex"},
+        )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] is True
+    assert data["filename"].endswith(".zip")
+    with zipfile.ZipFile(TEMP_DIR / data["filename"]) as archive:
+        assert "favicon.ico" in archive.namelist()
+        assert "apple-touch-icon.png" in archive.namelist()
+        assert "site.webmanifest" in archive.namelist()
+
+
+def test_create_favicon_pack_invalid_format(client):
+    """Test favicon pack with a non-image file"""
+    response = client.post(
+        "/api/v1/image/favicon-pack",
+        files={"file": ("notes.txt", b"text", "text/plain")},
+    )
+
+    assert response.status_code == 400
+
+
+def test_create_responsive_images(client, sample_image):
+    """Test building width and format variants in one request"""
+    with open(sample_image, "rb") as f:
+        response = client.post(
+            "/api/v1/image/responsive",
+            files={"file": ("photo.png", f, "image/png")},
+            data={"widths": "40,80,400", "formats": "jpg,webp"},
+        )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["filename"].endswith(".zip")
+    assert len(data["variants"]) == 6
+    assert data["srcset"]["jpg"] == "photo-40w.jpg 40w, photo-80w.jpg 80w, photo-100w.jpg 100w"
+
+
+def test_create_responsive_images_invalid_options(client, sample_image):
+    """Test rejected widths and formats"""
+    for options in (
+        {"widths": "abc"},
+        {"widths": "8"},
+        {"widths": ",".join(str(w) for w in range(100, 1400, 100))},
+        {"formats": "gif"},
+    ):
+        with open(sample_image, "rb") as f:
+            response = client.post(
+                "/api/v1/image/responsive",
+                files={"file": ("photo.png", f, "image/png")},
+                data=options,
+            )
+        assert response.status_code == 400
+
+
+def test_create_responsive_images_avif_unsupported(client, sample_image):
+    """Test that AVIF is refused when Pillow cannot write it"""
+    with patch("app.api.image.supported_responsive_formats", return_value=["jpg", "webp"]):
+        with open(sample_image, "rb") as f:
+            response = client.post(
+                "/api/v1/image/responsive",
+                files={"file": ("photo.png", f, "image/png")},
+                data={"formats": "avif"},
+            )
+
+    assert response.status_code == 400
+    assert "jpg, webp" in response.json()["detail"]
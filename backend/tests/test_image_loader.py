@@ -0,0 +1,118 @@
+"""
+Tests for the size-aware image loader
+"""
+
+from PIL import ExifTags, Image
+
+from app.utils.image_loader import (
+    contain_size,
+    cover_size,
+    exif_orientation,
+    load_image,
+    oriented_size,
+)
+
+
+def _save(path, size=(1600, 1200), orientation=None, fmt="JPEG", mode="RGB"):
+    """Write a test image, the left half red and the right half blue"""
+    img = Image.new(mode, size, "red" if mode != "P" else 1)
+    img.paste("blue" if mode != "P" else 2, (size[0] // 2, 0, size[0], size[1]))
+    exif = Image.Exif()
+    if orientation is not None:
+        exif[ExifTags.Base.Orientation] = orientation
+    img.save(path, format=fmt, exif=exif.tobytes())
+    return path
+
+
+class TestOrientation:
+    """Tests for EXIF orientation handling"""
+
+    def test_sideways_size(self, tmp_path):
+        """Test that a rotated photo reports its upright size without being decoded"""
+        path = _save(tmp_path / "photo.jpg", orientation=6)
+
+        with Image.open(path) as img:
+            assert exif_orientation(img) == 6
+            assert oriented_size(img) == (1200, 1600)
+
+    def test_missing_or_invalid_tag(self, tmp_path):
+        """Test that images without a usable tag are treated as upright"""
+        with Image.open(_save(tmp_path / "plain.jpg")) as img:
+            assert exif_orientation(img) == 1
+        with Image.open(_save(tmp_path / "bad.jpg", orientation=42)) as img:
+            assert exif_orientation(img) == 1
+
+    def test_pixels_are_upright(self, tmp_path):
+        """Test that load_image applies the orientation to the pixels"""
+        path = _save(tmp_path / "photo.jpg", orientation=6)
+
+        with Image.open(path) as img:
+            loaded = load_image(img)
+
+            assert loaded.size == (1200, 1600)
+            # Rotated 90 degrees clockwise: the red left half ends up on top
+            assert loaded.getpixel((600, 100))[0] > 200
+            assert loaded.getpixel((600, 1500))[2] > 200
+
+
+class TestLoadImage:
+    """Tests for load_image"""
+
+    def test_jpeg_draft(self, tmp_path):
+        """Test that a JPEG is decoded at a reduced scale, keeping the reducing gap"""
+        path = _save(tmp_path / "photo.jpg", size=(4000, 3000))
+
+        with Image.open(path) as img:
+            loaded = load_image(img, (200, 150))
+
+        assert loaded.size == (500, 375)
+
+    def test_sideways_target(self, tmp_path):
+        """Test that the target is given upright and the draft follows the stored orientation"""
+        path = _save(tmp_path / "photo.jpg", size=(4000, 3000), orientation=8)
+
+        with Image.open(path) as img:
+            loaded = load_image(img, (150, 200))
+
+        assert loaded.size == (375, 500)
+
+    def test_png_reduce(self, tmp_path):
+        """Test that formats without draft are box-reduced"""
+        path = _save(tmp_path / "image.png", size=(1600, 1200), fmt="PNG")
+
+        with Image.open(path) as img:
+            loaded = load_image(img, (100, 75))
+
+        assert loaded.size == (200, 150)
+
+    def test_palette_is_not_reduced(self, tmp_path):
+        """Test that modes reduce() does not support are decoded at full size"""
+        path = _save(tmp_path / "image.png", size=(1600, 1200), fmt="PNG", mode="P")
+
+        with Image.open(path) as img:
+            loaded = load_image(img, (100, 75))
+
+        assert loaded.size == (1600, 1200)
+
+    def test_small_source_is_untouched(self, tmp_path):
+        """Test that nothing is reduced when the source is not much larger than the target"""
+        path = _save(tmp_path / "photo.jpg", size=(300, 200))
+
+        with Image.open(path) as img:
+            loaded = load_image(img, (200, 150))
+
+        assert loaded.size == (300, 200)
+
+
+def test_cover_size():
+    """Test the size covering a box"""
+    assert cover_size((4000, 3000), (800, 800)) == (1067, 800)
+    assert cover_size((3000, 4000), (800, 800)) == (800, 1067)
+    assert cover_size((100, 100), (800, 400)) == (800, 800)
+
+
+def test_contain_size():
+    """Test the size fitting in a box"""
+    assert contain_size((4000, 3000), (512, 512)) == (512, 384)
+    assert contain_size((30, 40), (300, 300)) == (225, 300)
+    assert contain_size((5000, 2), (100, 100)) == (100, 1)
@@ -5,14 +5,20 @@ from unittest.mock import patch
 from PIL import Image
 import pytest
 
+from app.services import image_service
 from app.services.image_service import (
+    build_icon_pyramid,
     compress_image,
     convert_image,
     create_collage,
+    create_favicon_pack,
     create_icon,
+    create_responsive_images,
     extract_colors,
+    merge_similar_colors,
     resize_image,
     rotate_image,
+    supported_responsive_formats,
 )
 
 
@@ -157,6 +163,52 @@ def test_extract_colors_error(monkeypatch, tmp_path: Path):
     assert "error" in result.message.lower()
 
 
+def _photo_like(path: Path):
+    """Three regions, each made of slightly different shades"""
+    img = Image.new("RGB", (90, 30))
+    for x in range(90):
+        for y in range(30):
+            base = ((200, 30, 30), (30, 160, 40), (20, 40, 200))[x // 30]
+            img.putpixel((x, y), tuple(c + (x + y) % 5 for c in base))
+    img.save(path)
+    return path
+
+
+def test_extract_colors_clusters_shades(tmp_path: Path):
+    input_path = _photo_like(tmp_path / "input.png")
+
+    result = extract_colors(input_path, max_colors=8)
+
+    assert result.success is True
+    # Near-identical shades collapse into one color per region
+    assert len(result.colors) == 3
+    assert all(abs(c.ratio - 1 / 3) < 0.02 for c in result.colors)
+    assert abs(sum(c.ratio for c in result.colors) - 1) < 0.01
+    reds = [int(c.hex[1:3], 16) for c in result.colors]
+    assert max(reds) > 190
+
+
+def test_extract_colors_many_colors(tmp_path: Path):
+    input_path = tmp_path / "input.png"
+    img = Image.new("RGB", (320, 10))
+    for x in range(320):
+        hue = Image.new("HSV", (1, 1), (x * 255 // 320, 255, 255)).convert("RGB")
+        img.paste(hue.getpixel((0, 0)), (x, 0, x + 1, 10))
+    img.save(input_path)
+
+    result = extract_colors(input_path, max_colors=32, sample_size=320)
+
+    assert result.success is True
+    assert 10 < len(result.colors) <= 32
+    assert abs(sum(c.ratio for c in result.colors) - 1) < 0.01
+
+
+def test_merge_similar_colors():
+    merged = merge_similar_colors([((250, 0, 0), 5), ((255, 2, 2), 10), ((0, 0, 255), 7)])
+
+    assert merged == [((255, 2, 2), 15), ((0, 0, 255), 7)]
+
+
 def test_create_collage_success(tmp_path: Path):
     """Test successful collage creation"""
     # Create 4 test images
@@ -309,3 +361,208 @@ def test_create_icon_rgba_image(tmp_path: Path):
     with Image.open(output_path) as icon:
         assert icon.format == "ICO"
         assert icon.size == (64, 64)
+
+
+def test_resize_image_applies_exif_orientation(tmp_path: Path):
+    from PIL import ExifTags
+
+    input_path = tmp_path / "photo.jpg"
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = 6
+    Image.new("RGB", (4000, 3000), color="red").save(input_path, exif=exif.tobytes())
+    output_path = tmp_path / "resized.jpg"
+
+    result = resize_image(input_path, output_path, width=300)
+
+    assert result.success is True
+    assert result.dimensions == {"width": 300, "height": 400}
+    with Image.open(output_path) as img:
+        assert img.size == (300, 400)
+        assert img.format == "JPEG"
+
+
+def test_create_collage_large_jpeg(tmp_path: Path):
+    input_path = tmp_path / "photo.jpg"
+    Image.new("RGB", (4000, 3000), color="blue").save(input_path)
+    output_path = tmp_path / "collage.png"
+
+    result = create_collage([input_path], output_path, rows=1, cols=2, image_order=[0, 0])
+
+    assert result.success is True
+    with Image.open(output_path) as img:
+        assert img.size == (1600, 800)
+        assert img.getpixel((1200, 400))[2] > 250
+
+
+def test_create_collage_streamed_png(tmp_path: Path):
+    colors = ["red", "blue", "green"]
+    paths = [create_temp_image(tmp_path / f"{c}.png", size=(120, 80), color=c) for c in colors]
+    output_path = tmp_path / "collage.png"
+
+    with patch(
+        "app.services.image_service._collage_tile", wraps=image_service._collage_tile
+    ) as tile:
+        result = create_collage(
+            paths, output_path, rows=3, cols=2, image_order=[0, 1, 2, 0, 1, 2], cell_size=64
+        )
+
+    assert result.success is True
+    # Each image is decoded once even when it appears in several rows
+    assert tile.call_count == 3
+    with Image.open(output_path) as img:
+        img.load()
+        assert img.size == (128, 192)
+        assert img.mode == "RGB"
+        expected = [(255, 0, 0), (0, 0, 255), (0, 128, 0), (255, 0, 0), (0, 0, 255), (0, 128, 0)]
+        for cell, color in enumerate(expected):
+            assert img.getpixel((cell % 2 * 64 + 32, cell // 2 * 64 + 32)) == color
+
+
+def test_create_collage_jpeg_transparent_input(tmp_path: Path):
+    input_path = tmp_path / "input.png"
+    Image.new("RGBA", (50, 50), (0, 0, 0, 0)).save(input_path)
+    output_path = tmp_path / "collage.jpg"
+
+    result = create_collage(
+        [input_path], output_path, 1, 1, [0], cell_size=64, output_format="jpg", quality="high"
+    )
+
+    assert result.success is True
+    with Image.open(output_path) as img:
+        assert img.format == "JPEG"
+        # Transparency is flattened onto white
+        assert min(img.getpixel((32, 32))) > 250
+
+
+def test_create_collage_unreadable_image(tmp_path: Path):
+    good = create_temp_image(tmp_path / "good.png")
+    bad = tmp_path / "bad.png"
+    bad.write_bytes(b"not an image")
+    output_path = tmp_path / "collage.png"
+
+    result = create_collage([good, bad], output_path, 1, 2, [0, 1], cell_size=64)
+
+    assert result.success is False
+    assert "bad.png" in result.message
+    assert not output_path.exists()
+
+
+def test_create_collage_webp_too_large(tmp_path: Path):
+    input_path = create_temp_image(tmp_path / "input.png")
+
+    result = create_collage(
+        [input_path], tmp_path / "c.webp", 1, 10, [0] * 10, cell_size=2000, output_format="webp"
+    )
+
+    assert result.success is False
+    assert "16383" in result.message
+
+
+def test_create_favicon_pack(tmp_path: Path):
+    import json
+    import zipfile
+
+    input_path = tmp_path / "logo.jpg"
+    Image.new("RGB", (2000, 1000), color="red").save(input_path)
+    output_path = tmp_path / "favicons.zip"
+
+    with patch("app.services.image_service.Image.open", wraps=Image.open) as mock_open:
+        result = create_favicon_pack(input_path, output_path, name="TaskPlex")
+
+    assert result.success is True
+    assert mock_open.call_count == 1
+    assert result.dimensions == {"width": 2000, "height": 1000}
+    with zipfile.ZipFile(output_path) as archive:
+        with Image.open(io.BytesIO(archive.read("favicon.ico"))) as ico:
+            assert ico.info["sizes"] == {(s, s) for s in (16, 32, 48, 64, 128, 256)}
+        with Image.open(io.BytesIO(archive.read("apple-touch-icon.png"))) as icon:
+            assert icon.size == (180, 180)
+            # Wide logos are centered on a transparent square
+            assert icon.getpixel((90, 5))[3] == 0
+            red, _, _, alpha = icon.getpixel((90, 90))
+            assert red > 250 and alpha == 255
+        manifest = json.loads(archive.read("site.webmanifest"))
+    assert manifest["name"] == "TaskPlex"
+    assert [icon["sizes"] for icon in manifest["icons"]] == ["192x192", "512x512"]
+
+
+def test_build_icon_pyramid_resizes_progressively(tmp_path: Path):
+    source = Image.new("RGBA", (64, 64), (0, 0, 255, 255))
+    sizes = []
+    original_resize = Image.Image.resize
+    depth = 0
+
+    def record(self, size, *args, **kwargs):
+        # RGBA resizes call resize again on a premultiplied copy, record the outer call only
+        nonlocal depth
+        if depth == 0:
+            sizes.append((self.width, size[0]))
+        depth += 1
+        try:
+            return original_resize(self, size, *args, **kwargs)
+        finally:
+            depth -= 1
+
+    with patch.object(Image.Image, "resize", record):
+        pyramid = build_icon_pyramid(source, [16, 64, 32])
+
+    assert sorted(pyramid) == [16, 32, 64]
+    # Each level comes from the one above it
+    assert sizes == [(64, 32), (32, 16)]
+
+
+def test_create_favicon_pack_error(tmp_path: Path):
+    input_path = tmp_path / "broken.png"
+    input_path.write_bytes(b"not an image")
+    output_path = tmp_path / "favicons.zip"
+
+    result = create_favicon_pack(input_path, output_path)
+
+    assert result.success is False
+    assert not output_path.exists()
+
+
+def test_create_responsive_images(tmp_path: Path):
+    import zipfile
+
+    input_path = tmp_path / "photo.jpg"
+    Image.new("RGB", (3000, 2000), color="blue").save(input_path)
+    output_path = tmp_path / "variants.zip"
+    formats = supported_responsive_formats()
+
+    with patch("app.services.image_service.Image.open", wraps=Image.open) as mock_open:
+        result = create_responsive_images(
+            input_path, output_path, [1280, 320, 640], formats, base_name="photo"
+        )
+
+    assert result.success is True
+    assert mock_open.call_count == 1
+    assert len(result.variants) == 3 * len(formats)
+    assert result.srcset["jpg"] == "photo-320w.jpg 320w, photo-640w.jpg 640w, photo-1280w.jpg 1280w"
+    with zipfile.ZipFile(output_path) as archive:
+        for variant in result.variants:
+            with Image.open(io.BytesIO(archive.read(variant.filename))) as img:
+                assert img.size == (variant.width, variant.height)
+                assert img.format == {"jpg": "JPEG", "webp": "WEBP", "avif": "AVIF"}[variant.format]
+    assert {(v.width, v.height) for v in result.variants} == {(1280, 853), (640, 427), (320, 213)}
+
+
+def test_create_responsive_images_no_upscaling(tmp_path: Path):
+    input_path = tmp_path / "small.png"
+    Image.new("RGBA", (200, 100), (0, 255, 0, 128)).save(input_path)
+
+    result = create_responsive_images(input_path, tmp_path / "v.zip", [400, 800], ["jpg", "webp"])
+
+    assert result.success is True
+    assert [(v.width, v.format) for v in result.variants] == [(200, "jpg"), (200, "webp")]
+
+
+def test_create_responsive_images_error(tmp_path: Path):
+    input_path = tmp_path / "broken.png"
+    input_path.write_bytes(b"not an image")
+    output_path = tmp_path / "v.zip"
+
+    result = create_responsive_images(input_path, output_path, [320], ["jpg"])
+
+    assert result.success is False
+    assert not output_path.exists()
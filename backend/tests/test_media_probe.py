@@ -0,0 +1,147 @@
+"""
+Tests for the cached ffprobe results
+"""
+
+from unittest.mock import MagicMock, patch
+
+from app.utils.media_probe import MediaInfo, MediaProbeCache
+
+PROBE = {
+    "streams": [
+        {"index": 0, "codec_type": "video", "codec_name": "h264"},
+        {"index": 1, "codec_type": "audio", "codec_name": "aac"},
+    ],
+    "format": {"duration": "12.500000"},
+}
+
+
+class TestMediaInfo:
+    """Tests for MediaInfo properties"""
+
+    def test_properties(self):
+        """Test duration, audio and codecs read from the probe"""
+        info = MediaInfo(PROBE)
+
+        assert info.duration == 12.5
+        assert info.has_audio is True
+        assert info.codecs == ["h264", "aac"]
+
+    def test_missing_fields(self):
+        """Test a probe without duration or audio"""
+        info = MediaInfo({"streams": [{"codec_type": "video"}], "format": {"duration": "N/A"}})
+
+        assert info.duration is None
+        assert info.has_audio is False
+        assert info.codecs == []
+
+
+class TestMediaProbeCache:
+    """Tests for MediaProbeCache class"""
+
+    @patch("app.utils.media_probe.ffmpeg.probe", return_value=PROBE)
+    def test_file_probed_once(self, mock_probe, tmp_path):
+        """Test that repeated questions about one file run ffprobe once"""
+        cache = MediaProbeCache(max_entries=8)
+        video = tmp_path / "video.mp4"
+        video.write_bytes(b"video")
+
+        assert cache.get(video).duration == 12.5
+        assert cache.get(video).has_audio is True
+
+        assert mock_probe.call_count == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    @patch("app.utils.media_probe.ffmpeg.probe", return_value=PROBE)
+    def test_rewritten_file_is_probed_again(self, mock_probe, tmp_path):
+        """Test that a changed file does not get the old probe"""
+        cache = MediaProbeCache(max_entries=8)
+        video = tmp_path / "video.mp4"
+        video.write_bytes(b"video")
+        cache.get(video)
+
+        video.write_bytes(b"another video")
+        cache.get(video)
+
+        assert mock_probe.call_count == 2
+
+    @patch("app.utils.media_probe.get_known_hash", return_value="abc123")
+    @patch("app.utils.media_probe.ffmpeg.probe", return_value=PROBE)
+    def test_same_upload_content_shares_probe(self, mock_probe, mock_hash, tmp_path):
+        """Test that two uploads of the same content are probed once"""
+        cache = MediaProbeCache(max_entries=8)
+        paths = [tmp_path / "first.mp4", tmp_path / "second.mp4"]
+        for path in paths:
+            path.write_bytes(b"video")
+
+        assert [cache.get(p).duration for p in paths] == [12.5, 12.5]
+        assert mock_probe.call_count == 1
+
+    @patch("app.utils.media_probe.ffmpeg.probe", side_effect=Exception("Invalid data"))
+    def test_failures_are_not_cached(self, mock_probe, tmp_path):
+        """Test that an unreadable file gives None and is retried"""
+        cache = MediaProbeCache(max_entries=8)
+        video = tmp_path / "broken.mp4"
+        video.write_bytes(b"broken")
+
+        assert cache.get(video) is None
+        assert cache.get(video) is None
+        assert mock_probe.call_count == 2
+        assert cache.stats()["entries"] == 0
+
+    @patch("app.utils.media_probe.ffmpeg.probe", return_value=PROBE)
+    def test_lru_eviction(self, mock_probe, tmp_path):
+        """Test that the least recently used probe is dropped over the limit"""
+        cache = MediaProbeCache(max_entries=2)
+        paths = []
+        for name in ("a", "b", "c"):
+            path = tmp_path / f"{name}.mp4"
+            path.write_bytes(name.encode())
+            paths.append(path)
+
+        cache.get(paths[0])
+        cache.get(paths[1])
+        cache.get(paths[0])  # "b" becomes the least recently used
+        cache.get(paths[2])
+        cache.get(paths[0])
+
+        assert cache.stats()["entries"] == 2
+        assert mock_probe.call_count == 3
+
+    @patch("app.utils.media_probe.ffmpeg.probe", return_value=PROBE)
+    def test_disabled_cache_always_probes(self, mock_probe, tmp_path):
+        """Test that a zero size turns the cache off"""
+        cache = MediaProbeCache(max_entries=0)
+        video = tmp_path / "video.mp4"
+        video.write_bytes(b"video")
+
+        cache.get(video)
+        cache.get(video)
+
+        assert mock_probe.call_count == 2
+        assert cache.stats()["entries"] == 0
+
+    @patch("app.utils.media_probe.subprocess.run")
+    @patch("app.utils.media_probe.ffmpeg.probe", return_value=PROBE)
+    def test_keyframes_read_once(self, mock_probe, mock_run, tmp_path):
+        """Test that the keyframe index is read lazily and kept with the probe"""
+        mock_run.return_value = MagicMock(stdout="0.040000,K__\n0.080000,___\n2.040000,K__\n")
+        cache = MediaProbeCache(max_entries=8)
+        video = tmp_path / "video.mp4"
+        video.write_bytes(b"video")
+
+        cache.get(video)
+        mock_run.assert_not_called()
+
+        assert cache.keyframes(video) == [0.0, 2.0]
+        assert cache.keyframes(video) == [0.0, 2.0]
+        assert mock_run.call_count == 1
+
+    @patch("app.utils.media_probe.ffmpeg.probe", return_value=PROBE)
+    def test_missing_file_is_not_cached(self, mock_probe, tmp_path):
+        """Test that a path that cannot be stat'ed is probed but not cached"""
+        cache = MediaProbeCache(max_entries=8)
+        missing = tmp_path / "missing.mp4"
+
+        assert cache.get(missing) is not None
+        assert cache.stats()["entries"] == 0
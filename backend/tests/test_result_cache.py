@@ -0,0 +1,245 @@
+"""
+Tests for the content-addressed result cache
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from app.config import TEMP_DIR
+from app.models.image import ImageProcessingResponse
+from app.services.image_service import compress_image, create_responsive_images
+from app.utils.result_cache import ResultCache
+
+
+def _make_output(path, content=b"output"):
+    """Write an output file and return the response describing it"""
+    path.write_bytes(content)
+    return ImageProcessingResponse(
+        success=True,
+        message="Done",
+        filename=path.name,
+        download_url=f"/api/v1/download/{path.name}",
+        processed_size=len(content),
+    )
+
+
+class TestResultCacheKey:
+    """Tests for ResultCache.make_key"""
+
+    def test_equivalent_params_share_a_key(self):
+        """Test that parameter order, whitespace and integral floats do not matter"""
+        key = ResultCache.make_key("abc", "image.compress", {"quality": "high", "dpi": 150})
+
+        assert key == ResultCache.make_key(
+            "abc", "image.compress", {"dpi": 150.0, "quality": " high"}
+        )
+
+    def test_none_params_are_ignored(self):
+        """Test that unset optional parameters do not change the key"""
+        assert ResultCache.make_key("abc", "op", {"width": None}) == ResultCache.make_key(
+            "abc", "op"
+        )
+
+    def test_different_inputs_get_different_keys(self):
+        """Test that input, operation and parameters all change the key"""
+        keys = {
+            ResultCache.make_key("abc", "image.compress", {"quality": "high"}),
+            ResultCache.make_key("abd", "image.compress", {"quality": "high"}),
+            ResultCache.make_key("abc", "image.convert", {"quality": "high"}),
+            ResultCache.make_key("abc", "image.compress", {"quality": "low"}),
+            ResultCache.make_key(["abc", "abd"], "pdf.merge"),
+            ResultCache.make_key(["abd", "abc"], "pdf.merge"),
+        }
+
+        assert len(keys) == 6
+
+
+class TestResultCache:
+    """Tests for ResultCache class"""
+
+    @pytest.mark.asyncio
+    async def test_hit_links_output_and_rewrites_response(self, tmp_path):
+        """Test that a hit returns the cached response for a new output file"""
+        cache = ResultCache(tmp_path / "cache", max_bytes=1024)
+        calls = []
+
+        async def compute(path):
+            calls.append(path)
+            return _make_output(path)
+
+        first_path = tmp_path / "first.jpg"
+        second_path = tmp_path / "second.jpg"
+        first = await cache.get_or_compute("abc", "op", {}, first_path, lambda: compute(first_path))
+        second = await cache.get_or_compute(
+            "abc", "op", {}, second_path, lambda: compute(second_path)
+        )
+
+        assert calls == [first_path]
+        assert isinstance(second, ImageProcessingResponse)
+        assert second.filename == "second.jpg"
+        assert second.download_url == "/api/v1/download/second.jpg"
+        assert second.processed_size == first.processed_size
+        assert second_path.read_bytes() == b"output"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_results_are_not_cached(self, tmp_path):
+        """Test that unsuccessful responses are recomputed"""
+        cache = ResultCache(tmp_path / "cache", max_bytes=1024)
+        output = tmp_path / "out.jpg"
+
+        async def compute():
+            return ImageProcessingResponse(success=False, message="Failed", filename="")
+
+        await cache.get_or_compute("abc", "op", {}, output, compute)
+        await cache.get_or_compute("abc", "op", {}, output, compute)
+
+        assert cache.stats()["misses"] == 2
+        assert cache.stats()["entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self, tmp_path):
+        """Test that the least recently used entry is evicted over the size limit"""
+        cache = ResultCache(tmp_path / "cache", max_bytes=20)
+
+        for name in ("a", "b"):
+            path = tmp_path / f"{name}.jpg"
+            await cache.get_or_compute(
+                name, "op", {}, path, lambda p=path: _async(_make_output(p, b"x" * 8))
+            )
+        # Touch "a" so "b" becomes the least recently used
+        await cache.get_or_compute("a", "op", {}, tmp_path / "a2.jpg", _fail)
+
+        path = tmp_path / "c.jpg"
+        await cache.get_or_compute(
+            "c", "op", {}, path, lambda: _async(_make_output(path, b"x" * 8))
+        )
+
+        stats = cache.stats()
+        assert stats["entries"] == 2
+        assert stats["bytes"] == 16
+        assert stats["evictions"] == 1
+        assert len(list((tmp_path / "cache").iterdir())) == 2
+        await cache.get_or_compute("a", "op", {}, tmp_path / "a3.jpg", _fail)
+
+    @pytest.mark.asyncio
+    async def test_missing_cache_file_is_a_miss(self, tmp_path):
+        """Test that a cached file removed from disk is recomputed"""
+        cache_dir = tmp_path / "cache"
+        cache = ResultCache(cache_dir, max_bytes=1024)
+        first = tmp_path / "first.jpg"
+        await cache.get_or_compute("abc", "op", {}, first, lambda: _async(_make_output(first)))
+        for path in cache_dir.iterdir():
+            path.unlink()
+
+        second = tmp_path / "second.jpg"
+        result = await cache.get_or_compute(
+            "abc", "op", {}, second, lambda: _async(_make_output(second, b"again"))
+        )
+
+        assert result.filename == "second.jpg"
+        assert cache.stats()["misses"] == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_compute_once(self, tmp_path):
+        """Test that identical requests in flight wait for the first one"""
+        cache = ResultCache(tmp_path / "cache", max_bytes=1024)
+        calls = 0
+
+        async def compute(path):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return _make_output(path)
+
+        paths = [tmp_path / f"out{i}.jpg" for i in range(3)]
+        results = await asyncio.gather(
+            *(cache.get_or_compute("abc", "op", {}, p, lambda p=p: compute(p)) for p in paths)
+        )
+
+        assert calls == 1
+        assert [r.filename for r in results] == [p.name for p in paths]
+        assert all(p.exists() for p in paths)
+
+    @pytest.mark.asyncio
+    async def test_disabled_cache_always_computes(self, tmp_path):
+        """Test that a zero size limit turns the cache off"""
+        cache = ResultCache(tmp_path / "cache", max_bytes=0)
+        output = tmp_path / "out.jpg"
+
+        await cache.get_or_compute("abc", "op", {}, output, lambda: _async(_make_output(output)))
+        await cache.get_or_compute("abc", "op", {}, output, lambda: _async(_make_output(output)))
+
+        assert cache.stats()["entries"] == 0
+        assert not (tmp_path / "cache").exists()
+
+
+class TestResultCacheEndpoint:
+    """Tests for the cache in front of an endpoint"""
+
+    def test_compress_image_twice_runs_once(self, client, sample_image):
+        """Test that compressing the same image twice reuses the first output"""
+        cache = ResultCache(TEMP_DIR / "test_cache", max_bytes=10 * 1024 * 1024)
+
+        with (
+            patch("app.api.image.result_cache", cache),
+            patch("app.api.image.compress_image", wraps=compress_image) as mock_compress,
+        ):
+            responses = []
+            for _ in range(2):
+                with open(sample_image, "rb") as f:
+                    responses.append(
+                        client.post(
+                            "/api/v1/image/compress",
+                            files={"file": ("test.png", f, "image/png")},
+                            data={"quality": "medium"},
+                        )
+                    )
+
+        cache.clear()
+        first, second = (r.json() for r in responses)
+        assert all(r.status_code == 200 for r in responses)
+        assert mock_compress.call_count == 1
+        assert second["filename"] != first["filename"]
+        assert second["processed_size"] == first["processed_size"]
+        assert (TEMP_DIR / second["filename"]).exists()
+        assert cache.stats()["hits"] == 1
+
+    def test_responsive_images_cached_with_variants(self, client, sample_image):
+        """Test that a cached responsive request returns its variants and srcset"""
+        cache = ResultCache(TEMP_DIR / "test_cache", max_bytes=10 * 1024 * 1024)
+
+        with (
+            patch("app.api.image.result_cache", cache),
+            patch(
+                "app.api.image.create_responsive_images", wraps=create_responsive_images
+            ) as mock_create,
+        ):
+            responses = []
+            for _ in range(2):
+                with open(sample_image, "rb") as f:
+                    responses.append(
+                        client.post(
+                            "/api/v1/image/responsive",
+                            files={"file": ("photo.png", f, "image/png")},
+                            data={"widths": "50,100", "formats": "webp"},
+                        )
+                    )
+
+        cache.clear()
+        first, second = (r.json() for r in responses)
+        assert mock_create.call_count == 1
+        assert second["filename"] != first["filename"]
+        assert second["variants"] == first["variants"]
+        assert second["srcset"] == {"webp": "photo-50w.webp 50w, photo-100w.webp 100w"}
+
+
+async def _async(value):
+    return value
+
+
+async def _fail():
+    raise AssertionError("expected a cache hit")
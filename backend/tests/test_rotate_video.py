@@ -36,6 +36,7 @@ class TestRotateVideoEndpoint:
             download_url="/api/v1/download/rotated_90_test_video.mp4",
             original_size=1000,
             processed_size=1000,
+            strategy="rotation_metadata",
         )
 
         with open(test_file, "rb") as f:
@@ -0,0 +1,132 @@
+"""
+Tests for CancellationRegistry
+"""
+
+import asyncio
+import sys
+
+import pytest
+
+from app.tasks.cancellation import CancellationRegistry
+from app.tasks.scheduler import JobScheduler
+from app.tasks.sqlite_store import SQLiteTaskStore
+from app.tasks.store import TaskStore
+
+# Child process that ignores SIGTERM, so only SIGKILL stops it
+IGNORE_SIGTERM = (
+    "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); "
+    "print('ready', flush=True); time.sleep(60)"
+)
+
+
+async def _start_process(*code: str) -> asyncio.subprocess.Process:
+    """Start a Python child process and wait until it is running"""
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-c", *code, stdout=asyncio.subprocess.PIPE
+    )
+    await process.stdout.readline()
+    return process
+
+
+class TestCancellationRegistry:
+    """Tests for CancellationRegistry class"""
+
+    @pytest.mark.asyncio
+    async def test_cancel_unknown_task(self):
+        """Test cancelling a task without registered work"""
+        registry = CancellationRegistry()
+
+        assert await registry.cancel("nonexistent") is False
+
+    @pytest.mark.asyncio
+    async def test_cancel_terminates_process(self):
+        """Test that cancelling sends SIGTERM to the task's subprocess"""
+        registry = CancellationRegistry(kill_timeout=5)
+        process = await _start_process("print('ready', flush=True); import time; time.sleep(60)")
+        registry.register_process("task-1", process)
+
+        assert await registry.cancel("task-1") is True
+
+        assert process.returncode is not None
+        assert registry.is_running("task-1") is False
+
+    @pytest.mark.asyncio
+    async def test_cancel_kills_process_ignoring_sigterm(self):
+        """Test that SIGKILL follows when the process ignores SIGTERM"""
+        registry = CancellationRegistry(kill_timeout=0.2)
+        process = await _start_process(IGNORE_SIGTERM)
+        registry.register_process("task-1", process)
+
+        await registry.cancel("task-1")
+
+        assert process.returncode == -9
+
+    @pytest.mark.asyncio
+    async def test_cancel_deletes_partial_output(self, tmp_path):
+        """Test that registered outputs are removed on cancel"""
+        registry = CancellationRegistry()
+        output = tmp_path / "partial.mp4"
+        output.write_bytes(b"partial")
+        registry.register_output("task-1", output)
+
+        await registry.cancel("task-1")
+
+        assert not output.exists()
+
+    @pytest.mark.asyncio
+    async def test_finished_job_is_forgotten(self, tmp_path):
+        """Test that outputs of a finished job survive a later cancel"""
+        registry = CancellationRegistry()
+        output = tmp_path / "result.mp4"
+        output.write_bytes(b"done")
+
+        job = asyncio.create_task(asyncio.sleep(0))
+        registry.register_job("task-1", job)
+        registry.register_output("task-1", output)
+        await job
+        await asyncio.sleep(0)
+
+        assert await registry.cancel("task-1") is False
+        assert output.exists()
+
+    @pytest.mark.asyncio
+    async def test_cancel_frees_scheduler_slot(self):
+        """Test that cancelling a running job lets the next queued job start"""
+        store = TaskStore()
+        registry = CancellationRegistry()
+        scheduler = JobScheduler({"ffmpeg": 1}, store=store, registry=registry)
+        started = asyncio.Event()
+
+        running = scheduler.submit("a", "ffmpeg", asyncio.sleep(60))
+        queued = scheduler.submit("b", "ffmpeg", started.wait())
+        await asyncio.sleep(0.01)
+        assert scheduler.stats()["ffmpeg"]["queued"] == 1
+
+        await registry.cancel("a")
+        started.set()
+        await asyncio.wait_for(queued, timeout=1)
+
+        assert running.cancelled()
+        assert scheduler.stats()["ffmpeg"] == {"limit": 1, "running": 0, "queued": 0}
+
+    @pytest.mark.asyncio
+    async def test_cancel_stopped_by_another_worker(self, tmp_path):
+        """Test that a cancel stored by another worker stops this worker's process"""
+        # Two stores on one database stand for two uvicorn workers
+        owner_store = SQLiteTaskStore(tmp_path / "tasks.db")
+        other_store = SQLiteTaskStore(tmp_path / "tasks.db")
+        registry = CancellationRegistry(kill_timeout=5)
+        cancelled = owner_store.create_task("video_compress")
+        running = owner_store.create_task("video_compress")
+        process = await _start_process("print('ready', flush=True); import time; time.sleep(60)")
+        registry.register_process(cancelled.id, process)
+        registry.register_output(running.id, tmp_path / "other.mp4")
+
+        other_store.cancel_task(cancelled.id)
+
+        assert await registry.cancel_stopped(owner_store) == 1
+        assert process.returncode is not None
+        assert registry.is_running(cancelled.id) is False
+        assert registry.is_running(running.id) is True
+        owner_store.close()
+        other_store.close()
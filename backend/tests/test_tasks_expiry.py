@@ -0,0 +1,108 @@
+"""
+Tests for ExpiryManager
+"""
+
+import time
+
+from app.tasks.expiry import ExpiryManager
+from app.tasks.models import TaskResult
+from app.tasks.store import TaskStore
+
+
+class TestExpiryManager:
+    """Tests for ExpiryManager class"""
+
+    def test_expires_finished_task_with_files(self, tmp_path):
+        """Test that an expired task is removed together with its output files"""
+        store = TaskStore()
+        manager = ExpiryManager(store, ttl_seconds=60)
+        output = tmp_path / "compressed.mp4"
+        output.write_bytes(b"x" * 10)
+
+        task = store.create_task("video_compress")
+        manager.track_task(task.id, outputs=[output])
+        store.complete_task(task.id, TaskResult(success=True))
+
+        assert manager.stats() == {"live_tasks": 1, "files": 1, "bytes_held": 10}
+
+        evicted = manager.expire(now=time.time() + 61)
+
+        assert evicted == 1
+        assert store.get_task(task.id) is None
+        assert not output.exists()
+        assert manager.stats() == {"live_tasks": 0, "files": 0, "bytes_held": 0}
+
+    def test_expires_output_directory(self, tmp_path):
+        """Test that a directory output (HLS renditions) is removed with its task"""
+        store = TaskStore()
+        manager = ExpiryManager(store, ttl_seconds=60)
+        output_dir = tmp_path / "video_stream"
+        output_dir.mkdir()
+        (output_dir / "seg_00001.m4s").write_bytes(b"x" * 10)
+
+        task = store.create_task("video_convert")
+        manager.track_task(task.id, outputs=[output_dir])
+        store.complete_task(task.id, TaskResult(success=True))
+
+        assert manager.stats()["bytes_held"] == 10
+
+        manager.expire(now=time.time() + 61)
+
+        assert not output_dir.exists()
+
+    def test_nothing_expires_before_deadline(self, tmp_path):
+        """Test that tasks within their TTL are kept"""
+        store = TaskStore()
+        manager = ExpiryManager(store, ttl_seconds=60)
+        task = store.create_task("video_compress")
+        manager.track_task(task.id)
+        store.complete_task(task.id, TaskResult(success=True))
+
+        assert manager.expire() == 0
+        assert store.get_task(task.id) is not None
+
+    def test_running_task_is_rescheduled(self):
+        """Test that a task still processing at its deadline is kept and checked later"""
+        store = TaskStore()
+        manager = ExpiryManager(store, ttl_seconds=60)
+        task = store.create_task("video_compress")
+        manager.track_task(task.id)
+        store.update_progress(task.id, 50.0)
+
+        now = time.time() + 61
+        assert manager.expire(now=now) == 0
+        assert store.get_task(task.id) is not None
+
+        store.complete_task(task.id, TaskResult(success=True))
+        assert manager.expire(now=now + 30) == 0
+        assert manager.expire(now=now + 200) == 1
+
+    def test_link_file_to_tracked_task(self, tmp_path):
+        """Test that files linked after tracking are deleted with the task"""
+        store = TaskStore()
+        manager = ExpiryManager(store, ttl_seconds=1)
+        output = tmp_path / "segment.ts"
+        output.write_bytes(b"data")
+        untracked = tmp_path / "other.ts"
+
+        task = store.create_task("video_convert")
+        store.fail_task(task.id, "Error")
+        manager.track_task(task.id)
+        manager.link_file(task.id, output)
+        manager.link_file("unknown-task", untracked)
+
+        manager.expire(now=time.time() + 5)
+
+        assert not output.exists()
+        assert manager.stats()["files"] == 0
+
+    def test_expire_forgets_removed_task(self):
+        """Test that tasks already deleted from the store are dropped"""
+        store = TaskStore()
+        manager = ExpiryManager(store, ttl_seconds=1)
+        task = store.create_task("pdf_ocr")
+        manager.track_task(task.id)
+        store.remove_task(task.id)
+
+        assert manager.expire(now=time.time() + 5) == 1
+        assert manager.stats()["live_tasks"] == 0
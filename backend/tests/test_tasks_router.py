@@ -2,6 +2,8 @@
 Tests for tasks router endpoints
 """
 
+from unittest.mock import AsyncMock, patch
+
 from fastapi.testclient import TestClient
 import pytest
 
@@ -96,6 +98,29 @@ class TestCancelTaskEndpoint:
         cancelled_task = task_store.get_task(task.id)
         assert cancelled_task.status == TaskStatus.CANCELLED
 
+    @patch("app.tasks.router.cancellation_registry.cancel", new_callable=AsyncMock)
+    def test_cancel_task_stops_running_work(self, mock_cancel, client):
+        """Test that cancelling stops the task's registered work"""
+        task = task_store.create_task("test_task")
+
+        response = client.post(f"/api/v1/tasks/{task.id}/cancel")
+
+        assert response.status_code == 200
+        mock_cancel.assert_awaited_once_with(task.id)
+
+    @patch("app.tasks.router.cancellation_registry.cancel", new_callable=AsyncMock)
+    def test_cancel_completed_task_rejected(self, mock_cancel, client):
+        """Test that a finished task keeps its result and output"""
+        task = task_store.create_task("test_task")
+        task_store.complete_task(task.id, TaskResult(success=True, filename="out.mp4"))
+
+        response = client.post(f"/api/v1/tasks/{task.id}/cancel")
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Task is already completed"
+        assert task_store.get_task(task.id).status == TaskStatus.COMPLETED
+        mock_cancel.assert_not_awaited()
+
     def test_cancel_nonexistent_task(self, client):
         """Test cancelling nonexistent task"""
         response = client.post("/api/v1/tasks/nonexistent-id/cancel")
@@ -0,0 +1,209 @@
+"""
+Tests for JobScheduler
+"""
+
+import asyncio
+
+import pytest
+
+from app.tasks.models import TaskStatus
+from app.tasks.scheduler import PRIORITY_HIGH, PRIORITY_LOW, JobScheduler
+from app.tasks.store import TaskStore
+
+
+async def _job(name: str, order: list, release: asyncio.Event):
+    """Record when the job starts, then wait to be released"""
+    order.append(name)
+    await release.wait()
+    return name
+
+
+class TestJobScheduler:
+    """Tests for JobScheduler class"""
+
+    @pytest.mark.asyncio
+    async def test_limits_concurrent_jobs(self):
+        """Test that only `limit` jobs of a type run at once"""
+        store = TaskStore()
+        scheduler = JobScheduler({"ffmpeg": 2}, store=store)
+        release = asyncio.Event()
+        started = []
+
+        tasks = [store.create_task("video_compress") for _ in range(4)]
+        jobs = [
+            scheduler.submit(task.id, "ffmpeg", _job(task.id, started, release)) for task in tasks
+        ]
+        await asyncio.sleep(0.01)
+
+        assert len(started) == 2
+        assert scheduler.stats()["ffmpeg"] == {"limit": 2, "running": 2, "queued": 2}
+
+        release.set()
+        results = await asyncio.gather(*jobs)
+
+        assert results == [task.id for task in tasks]
+        assert scheduler.stats()["ffmpeg"] == {"limit": 2, "running": 0, "queued": 0}
+
+    @pytest.mark.asyncio
+    async def test_job_types_are_independent(self):
+        """Test that a busy job type does not block another type"""
+        store = TaskStore()
+        scheduler = JobScheduler({"ffmpeg": 1, "ocr": 1}, store=store)
+        release = asyncio.Event()
+        started = []
+
+        jobs = [
+            scheduler.submit("a", "ffmpeg", _job("a", started, release)),
+            scheduler.submit("b", "ffmpeg", _job("b", started, release)),
+            scheduler.submit("c", "ocr", _job("c", started, release)),
+        ]
+        await asyncio.sleep(0.01)
+
+        assert started == ["a", "c"]
+
+        release.set()
+        await asyncio.gather(*jobs)
+
+    @pytest.mark.asyncio
+    async def test_priority_then_fifo_order(self):
+        """Test that queued jobs start by priority, then in submission order"""
+        store = TaskStore()
+        scheduler = JobScheduler({"ffmpeg": 1}, store=store)
+        releases = {name: asyncio.Event() for name in ("first", "low", "normal", "high")}
+        started = []
+
+        jobs = [scheduler.submit("first", "ffmpeg", _job("first", started, releases["first"]))]
+        await asyncio.sleep(0.01)
+        jobs.append(
+            scheduler.submit(
+                "low", "ffmpeg", _job("low", started, releases["low"]), priority=PRIORITY_LOW
+            )
+        )
+        jobs.append(
+            scheduler.submit("normal", "ffmpeg", _job("normal", started, releases["normal"]))
+        )
+        jobs.append(
+            scheduler.submit(
+                "high", "ffmpeg", _job("high", started, releases["high"]), priority=PRIORITY_HIGH
+            )
+        )
+        await asyncio.sleep(0.01)
+
+        for event in releases.values():
+            event.set()
+        await asyncio.gather(*jobs)
+
+        assert started == ["first", "high", "normal", "low"]
+
+    @pytest.mark.asyncio
+    async def test_queue_position_reported(self):
+        """Test that waiting tasks stay pending and publish their queue position"""
+        store = TaskStore()
+        scheduler = JobScheduler({"ocr": 1}, store=store)
+        release = asyncio.Event()
+        started = []
+
+        tasks = [store.create_task("pdf_ocr") for _ in range(3)]
+        jobs = [scheduler.submit(task.id, "ocr", _job(task.id, started, release)) for task in tasks]
+        await asyncio.sleep(0.01)
+
+        waiting = store.get_task(tasks[2].id)
+        assert waiting.status == TaskStatus.PENDING
+        assert waiting.progress.queue_position == 2
+        assert waiting.progress.stage == "queued"
+        assert waiting.progress.to_dict()["queue_position"] == 2
+        assert scheduler.queue_position(tasks[1].id) == 1
+        assert scheduler.queue_position(tasks[0].id) is None
+
+        release.set()
+        await asyncio.gather(*jobs)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiting_job_leaves_queue(self):
+        """Test that cancelling a queued job removes it and closes its coroutine"""
+        store = TaskStore()
+        scheduler = JobScheduler({"ffmpeg": 1}, store=store)
+        release = asyncio.Event()
+        started = []
+
+        running = scheduler.submit("a", "ffmpeg", _job("a", started, release))
+        queued = scheduler.submit("b", "ffmpeg", _job("b", started, release))
+        await asyncio.sleep(0.01)
+
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+
+        assert scheduler.stats()["ffmpeg"]["queued"] == 0
+
+        release.set()
+        await running
+        assert started == ["a"]
+        assert scheduler.stats()["ffmpeg"]["running"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiting_job_deletes_its_inputs(self, tmp_path):
+        """Test that a job cancelled before it starts still deletes its uploaded input"""
+        store = TaskStore()
+        scheduler = JobScheduler({"ffmpeg": 1}, store=store)
+        release = asyncio.Event()
+        started = []
+        running_input = tmp_path / "a.mp4"
+        queued_input = tmp_path / "b.mp4"
+        running_input.write_bytes(b"a")
+        queued_input.write_bytes(b"b")
+
+        running = scheduler.submit(
+            "a", "ffmpeg", _job("a", started, release), inputs=[running_input]
+        )
+        queued = scheduler.submit("b", "ffmpeg", _job("b", started, release), inputs=[queued_input])
+        await asyncio.sleep(0.01)
+
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+
+        assert not queued_input.exists()
+        release.set()
+        await running
+        # A job that ran cleans up its own inputs
+        assert running_input.exists()
+
+    @pytest.mark.asyncio
+    async def test_failed_job_frees_slot(self):
+        """Test that a job raising an exception releases its slot"""
+        store = TaskStore()
+        scheduler = JobScheduler({"ffmpeg": 1}, store=store)
+
+        async def failing():
+            raise RuntimeError("ffmpeg crashed")
+
+        with pytest.raises(RuntimeError):
+            await scheduler.submit("a", "ffmpeg", failing())
+
+        assert await scheduler.submit("b", "ffmpeg", asyncio.sleep(0, result="ok")) == "ok"
+
+    @pytest.mark.asyncio
+    async def test_slot_limits_parts_of_a_running_job(self):
+        """Test that slot() bounds concurrency without touching the task's progress"""
+        store = TaskStore()
+        scheduler = JobScheduler({"segment": 2}, store=store)
+        task = store.create_task("video_compress")
+        store.update_progress(task.id, 10.0, "Encoding", "encoding")
+        release = asyncio.Event()
+        started = []
+
+        async def part(name):
+            async with scheduler.slot("segment"):
+                await _job(name, started, release)
+
+        parts = [asyncio.create_task(part(i)) for i in range(3)]
+        await asyncio.sleep(0.01)
+
+        assert len(started) == 2
+        assert scheduler.stats()["segment"]["queued"] == 1
+        assert store.get_task(task.id).progress.stage == "encoding"
+
+        release.set()
+        await asyncio.gather(*parts)
+        assert scheduler.stats()["segment"] == {"limit": 2, "running": 0, "queued": 0}
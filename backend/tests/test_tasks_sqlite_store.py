@@ -0,0 +1,275 @@
+"""
+Tests for SQLiteTaskStore
+"""
+
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from app.tasks.models import TaskResult, TaskStatus
+from app.tasks.sqlite_store import _SCHEMA, ORPHANED_TASK_ERROR, SQLiteTaskStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Path of a fresh SQLite task database"""
+    return tmp_path / "tasks.db"
+
+
+@pytest.fixture
+def store(db_path):
+    """SQLite task store with a short poll interval"""
+    store = SQLiteTaskStore(db_path, poll_interval=0.01)
+    yield store
+    store.close()
+
+
+class TestSQLiteTaskStore:
+    """Tests for SQLiteTaskStore class"""
+
+    def test_create_and_get_task(self, store):
+        """Test task creation and retrieval"""
+        task = store.create_task("video_compress", {"quality": "high"})
+
+        retrieved = store.get_task(task.id)
+
+        assert retrieved is not None
+        assert retrieved.task_type == "video_compress"
+        assert retrieved.metadata == {"quality": "high"}
+        assert retrieved.status == TaskStatus.PENDING
+
+    def test_get_nonexistent_task(self, store):
+        """Test getting a task that doesn't exist"""
+        assert store.get_task("nonexistent-id") is None
+
+    def test_update_progress(self, store):
+        """Test progress update"""
+        task = store.create_task("test_task")
+
+        success = store.update_progress(task.id, 150.0, "Processing...", "encoding")
+
+        assert success is True
+        updated_task = store.get_task(task.id)
+        assert updated_task.progress.percent == 100.0
+        assert updated_task.progress.message == "Processing..."
+        assert updated_task.progress.stage == "encoding"
+        assert updated_task.status == TaskStatus.PROCESSING
+
+    def test_update_nonexistent_task(self, store):
+        """Test that writes to unknown tasks return False"""
+        assert store.update_progress("nonexistent", 50.0) is False
+        assert store.complete_task("nonexistent", TaskResult(success=True)) is False
+        assert store.fail_task("nonexistent", "Error") is False
+        assert store.cancel_task("nonexistent") is False
+
+    def test_complete_task(self, store):
+        """Test task completion stores the result"""
+        task = store.create_task("test_task")
+        result = TaskResult(success=True, filename="out.mp4", total_pages=3)
+
+        assert store.complete_task(task.id, result) is True
+
+        completed_task = store.get_task(task.id)
+        assert completed_task.status == TaskStatus.COMPLETED
+        assert completed_task.progress.percent == 100
+        assert completed_task.result == result
+
+    def test_fail_task(self, store):
+        """Test task failure"""
+        task = store.create_task("test_task")
+
+        assert store.fail_task(task.id, "Something went wrong") is True
+
+        failed_task = store.get_task(task.id)
+        assert failed_task.status == TaskStatus.FAILED
+        assert failed_task.result.error == "Something went wrong"
+
+    def test_cancel_task(self, store):
+        """Test task cancellation"""
+        task = store.create_task("test_task")
+
+        assert store.cancel_task(task.id) is True
+        assert store.get_task(task.id).status == TaskStatus.CANCELLED
+
+    def test_finished_task_stays_final(self, db_path):
+        """Test that a cancel after completion, or a completion after a cancel, is refused"""
+        # The cancel can come from another worker sharing the database
+        owner = SQLiteTaskStore(db_path)
+        other = SQLiteTaskStore(db_path)
+        completed = owner.create_task("test_task")
+        cancelled = owner.create_task("test_task")
+
+        owner.complete_task(completed.id, TaskResult(success=True))
+        assert other.cancel_task(completed.id) is False
+        assert owner.get_task(completed.id).status == TaskStatus.COMPLETED
+
+        other.cancel_task(cancelled.id)
+        assert owner.complete_task(cancelled.id, TaskResult(success=True)) is False
+        assert owner.fail_task(cancelled.id, "Killed") is False
+        assert owner.get_task(cancelled.id).status == TaskStatus.CANCELLED
+        assert owner.get_task(cancelled.id).result is None
+        owner.close()
+        other.close()
+
+    def test_fail_orphaned_tasks(self, db_path):
+        """Test that active tasks of a worker without heartbeats are failed"""
+        crashed = SQLiteTaskStore(db_path)
+        alive = SQLiteTaskStore(db_path)
+        restarted = SQLiteTaskStore(db_path)
+        alive.heartbeat()
+        orphan = crashed.create_task("video_compress")
+        crashed.update_progress(orphan.id, 40.0)
+        finished = crashed.create_task("video_compress")
+        crashed.complete_task(finished.id, TaskResult(success=True))
+        running = alive.create_task("video_compress")
+
+        restarted.heartbeat()
+        assert restarted.fail_orphaned_tasks(worker_timeout=60) == 1
+
+        failed = restarted.get_task(orphan.id)
+        assert failed.status == TaskStatus.FAILED
+        assert failed.result.error == ORPHANED_TASK_ERROR
+        assert restarted.get_task(finished.id).status == TaskStatus.COMPLETED
+        assert restarted.get_task(running.id).status == TaskStatus.PENDING
+        for store in (crashed, alive, restarted):
+            store.close()
+
+    def test_fail_orphaned_tasks_after_worker_timeout(self, db_path):
+        """Test that a worker whose heartbeat is too old counts as stopped"""
+        stopped = SQLiteTaskStore(db_path)
+        stopped.heartbeat()
+        task = stopped.create_task("video_compress")
+        other = SQLiteTaskStore(db_path)
+
+        assert other.fail_orphaned_tasks(worker_timeout=60) == 0
+        assert other.fail_orphaned_tasks(worker_timeout=-1) == 1
+        assert other.get_task(task.id).status == TaskStatus.FAILED
+        stopped.close()
+        other.close()
+
+    def test_opens_database_without_owner_column(self, db_path):
+        """Test that a database from before tasks recorded their worker is upgraded"""
+        conn = sqlite3.connect(db_path)
+        conn.executescript(_SCHEMA.replace(",\n    owner TEXT", ""))
+        conn.close()
+
+        store = SQLiteTaskStore(db_path)
+        task = store.create_task("test_task")
+
+        assert store.get_task(task.id).status == TaskStatus.PENDING
+        store.close()
+
+    def test_update_progress_does_not_revive_finished_task(self, store):
+        """Test that a late progress update leaves a cancelled or completed task alone"""
+        cancelled = store.create_task("test_task")
+        completed = store.create_task("test_task")
+        store.cancel_task(cancelled.id)
+        store.complete_task(completed.id, TaskResult(success=True))
+
+        assert store.update_progress(cancelled.id, 80.0, "Encoding...") is False
+        assert store.update_progress(completed.id, 80.0, "Encoding...") is False
+        assert store.get_task(cancelled.id).status == TaskStatus.CANCELLED
+        assert store.get_task(completed.id).status == TaskStatus.COMPLETED
+
+    def test_get_all_tasks(self, store):
+        """Test getting all tasks"""
+        task1 = store.create_task("task1")
+        task2 = store.create_task("task2")
+
+        all_tasks = store.get_all_tasks()
+
+        assert set(all_tasks) == {task1.id, task2.id}
+
+    def test_remove_task(self, store):
+        """Test deleting a task by ID"""
+        task = store.create_task("test_task")
+
+        assert store.remove_task(task.id) is True
+        assert store.remove_task(task.id) is False
+        assert store.get_task(task.id) is None
+
+    def test_cleanup_old_tasks(self, db_path):
+        """Test that tasks past their TTL are removed"""
+        store = SQLiteTaskStore(db_path, task_ttl_minutes=0)
+        task = store.create_task("old_task")
+        time.sleep(0.01)
+
+        removed = store.cleanup_old_tasks()
+
+        assert removed == 1
+        assert store.get_task(task.id) is None
+        store.close()
+
+    def test_tasks_persist_across_instances(self, db_path):
+        """Test that a task written by one store is visible to another"""
+        writer = SQLiteTaskStore(db_path)
+        task = writer.create_task("test_task")
+        writer.update_progress(task.id, 40.0, "Encoding")
+        writer.close()
+
+        reader = SQLiteTaskStore(db_path)
+        retrieved = reader.get_task(task.id)
+        reader.close()
+
+        assert retrieved.progress.percent == 40.0
+        assert retrieved.status == TaskStatus.PROCESSING
+
+
+class TestSQLiteTaskStoreAsync:
+    """Async tests for SQLiteTaskStore"""
+
+    @pytest.mark.asyncio
+    async def test_subscribe_finished_task(self, store):
+        """Test subscribing to already finished tasks"""
+        completed = store.create_task("test_task")
+        store.complete_task(completed.id, TaskResult(success=True))
+        failed = store.create_task("test_task")
+        store.fail_task(failed.id, "Error")
+        cancelled = store.create_task("test_task")
+        store.cancel_task(cancelled.id)
+
+        for task_id, event in (
+            (completed.id, "complete"),
+            (failed.id, "error"),
+            (cancelled.id, "cancelled"),
+        ):
+            messages = [msg async for msg in store.subscribe(task_id)]
+            assert [m["event"] for m in messages] == [event]
+
+    @pytest.mark.asyncio
+    async def test_subscribe_nonexistent_task(self, store):
+        """Test subscribing to nonexistent task"""
+        messages = [msg async for msg in store.subscribe("nonexistent")]
+
+        assert len(messages) == 1
+        assert "not found" in messages[0]["data"]["message"]
+
+    @pytest.mark.asyncio
+    async def test_subscriber_sees_updates_from_other_store(self, db_path):
+        """Test that progress written by another process-like store reaches subscribers"""
+        subscriber_store = SQLiteTaskStore(db_path, poll_interval=0.01)
+        worker_store = SQLiteTaskStore(db_path)
+        task = worker_store.create_task("test_task")
+
+        async def update_progress():
+            await asyncio.sleep(0.05)
+            worker_store.update_progress(task.id, 50.0, "Half done")
+            await asyncio.sleep(0.05)
+            worker_store.complete_task(task.id, TaskResult(success=True, message="Done"))
+
+        updater = asyncio.create_task(update_progress())
+
+        messages = []
+        async for msg in subscriber_store.subscribe(task.id):
+            messages.append(msg)
+
+        await updater
+        subscriber_store.close()
+        worker_store.close()
+
+        assert messages[0]["event"] == "progress"
+        assert any(m["event"] == "progress" and m["data"]["percent"] == 50.0 for m in messages)
+        assert messages[-1]["event"] == "complete"
+        assert messages[-1]["data"]["message"] == "Done"
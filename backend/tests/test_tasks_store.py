@@ -117,6 +117,31 @@ class TestTaskStore:
         cancelled_task = store.get_task(task.id)
         assert cancelled_task.status == TaskStatus.CANCELLED
 
+    def test_finished_task_stays_final(self):
+        """Test that a cancel after completion, or a completion after a cancel, is refused"""
+        store = TaskStore()
+        completed = store.create_task("test_task")
+        cancelled = store.create_task("test_task")
+
+        store.complete_task(completed.id, TaskResult(success=True))
+        assert store.cancel_task(completed.id) is False
+        assert store.get_task(completed.id).status == TaskStatus.COMPLETED
+
+        store.cancel_task(cancelled.id)
+        assert store.complete_task(cancelled.id, TaskResult(success=True)) is False
+        assert store.fail_task(cancelled.id, "Killed") is False
+        assert store.get_task(cancelled.id).status == TaskStatus.CANCELLED
+        assert store.get_task(cancelled.id).result is None
+
+    def test_update_progress_does_not_revive_cancelled_task(self):
+        """Test that a late progress update leaves a cancelled task cancelled"""
+        store = TaskStore()
+        task = store.create_task("test_task")
+        store.cancel_task(task.id)
+
+        assert store.update_progress(task.id, 80.0) is False
+        assert store.get_task(task.id).status == TaskStatus.CANCELLED
+
     def test_cancel_nonexistent_task(self):
         """Test cancelling nonexistent task"""
         store = TaskStore()
@@ -269,3 +294,59 @@ class TestTaskStoreAsync:
         # Both subscribers should receive complete event
         assert any(m["event"] == "complete" for m in received_1)
         assert any(m["event"] == "complete" for m in received_2)
+
+
+class TestTaskStorePublishing:
+    """Tests for coalesced, rate-limited progress publishing"""
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_gets_latest_progress(self):
+        """Test that progress events overwrite each other for a subscriber that lags"""
+        store = TaskStore(min_publish_interval=0, min_percent_delta=0)
+        task = store.create_task("test_task")
+        stream = store.subscribe(task.id)
+        await stream.__anext__()  # Initial progress
+
+        for percent in range(1, 500):
+            store.update_progress(task.id, percent / 5, "Encoding", "encoding")
+        store.complete_task(task.id, TaskResult(success=True))
+
+        remaining = [msg async for msg in stream]
+
+        assert [m["event"] for m in remaining] == ["complete"]
+
+    @pytest.mark.asyncio
+    async def test_latest_progress_delivered(self):
+        """Test that a waiting subscriber receives the most recent progress value"""
+        store = TaskStore(min_publish_interval=0, min_percent_delta=0)
+        task = store.create_task("test_task")
+        stream = store.subscribe(task.id)
+        await stream.__anext__()
+
+        store.update_progress(task.id, 10.0, "Encoding", "encoding")
+        store.update_progress(task.id, 20.0, "Encoding", "encoding")
+        message = await stream.__anext__()
+        await stream.aclose()
+
+        assert message["data"]["percent"] == 20.0
+        assert store._subscribers[task.id] == []
+
+    def test_progress_rate_limited(self):
+        """Test that small, frequent updates are not all published"""
+        store = TaskStore(min_publish_interval=60, min_percent_delta=5)
+        task = store.create_task("test_task")
+
+        assert store._should_publish(task.id, 10.0, "encoding") is True
+        assert store._should_publish(task.id, 11.0, "encoding") is False
+        assert store._should_publish(task.id, 15.0, "encoding") is True
+        assert store._should_publish(task.id, 15.5, "finalizing") is True
+
+    def test_rate_limited_update_still_stored(self):
+        """Test that throttled updates still change the task state"""
+        store = TaskStore(min_publish_interval=60, min_percent_delta=5)
+        task = store.create_task("test_task")
+
+        store.update_progress(task.id, 10.0, "Encoding", "encoding")
+        store.update_progress(task.id, 11.0, "Encoding", "encoding")
+
+        assert store.get_task(task.id).progress.percent == 11.0
@@ -5,6 +5,7 @@ Tests for validation utilities
 from app.utils.validators import (
     get_file_extension,
     sanitize_filename,
+    sniff_format,
     validate_file_format,
     validate_image_format,
     validate_pdf_format,
@@ -77,3 +78,28 @@ def test_sanitize_filename():
     # ".." is replaced by "_", so "test..file.jpg" becomes "test_file.jpg" (single _)
     assert sanitize_filename("test..file.jpg") == "test_file.jpg"
     assert sanitize_filename("test/file.jpg") == "file.jpg"  # / removed by Path.name
+
+
+def test_sniff_format():
+    """Test format detection from magic bytes"""
+    assert sniff_format(b"\x00\x00\x00\x18ftypmp42" + b"\x00" * 52) == "mp4"
+    assert sniff_format(b"\x00\x00\x00\x14ftypqt  " + b"\x00" * 52) == "mov"
+    assert sniff_format(b"\x1a\x45\xdf\xa3" + b"\x00" * 60) == "mkv"
+    assert sniff_format(b"RIFF\x00\x00\x00\x00AVI LIST") == "avi"
+    assert sniff_format(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == "webp"
+    assert sniff_format(b"\x89PNG\r\n\x1a\n") == "png"
+    assert sniff_format(b"\xff\xd8\xff\xe0") == "jpeg"
+    assert sniff_format(b"GIF89a") == "gif"
+    assert sniff_format(b"%PDF-1.7") == "pdf"
+    assert sniff_format(b"mock video content") is None
+    assert sniff_format(b"") is None
+
+
+def test_validate_format_with_header():
+    """Test that a given header is checked instead of the extension"""
+    png_header = b"\x89PNG\r\n\x1a\n"
+
+    assert validate_image_format("photo.mp4", png_header) is True
+    assert validate_image_format("photo.png", b"not an image") is False
+    assert validate_video_format("clip.mp4", png_header) is False
+    assert validate_video_format("clip.bin", b"\x00\x00\x00\x18ftypisom") is True
@@ -34,25 +34,24 @@ def create_mock_video_file(filename: str = "test_video.mp4"):
     return {"file": (filename, io.BytesIO(content), "video/mp4")}
 
 
+def _close_job(task_id, job_type, coro, **kwargs):
+    """scheduler.submit stand-in that closes the job's coroutine instead of running it"""
+    coro.close()
+    return MagicMock()
+
+
 class TestCompressVideoAsyncEndpoint:
     """Tests for POST /api/v1/video/compress/async"""
 
     @patch("app.api.video.run_compress_task", new_callable=AsyncMock)
-    @patch("app.api.video.asyncio.create_task")
+    @patch("app.api.video.scheduler.submit", side_effect=_close_job)
     @patch("app.api.video.save_upload_file")
-    def test_compress_async_success(self, mock_save, mock_create_task, mock_run_task, client):
+    def test_compress_async_success(self, mock_save, mock_submit, mock_run_task, client):
         """Test successful async compression request"""
         from pathlib import Path
 
         mock_save.return_value = Path("/tmp/test_video.mp4")
 
-        # Make create_task consume the coroutine to avoid warnings
-        def consume_coroutine(coro):
-            # Create a task-like object but don't actually await
-            return MagicMock()
-
-        mock_create_task.side_effect = consume_coroutine
-
         response = client.post(
             "/api/v1/video/compress/async",
             files=create_mock_video_file(),
@@ -82,21 +81,16 @@ class TestCompressVideoAsyncEndpoint:
         assert "unsupported" in response.json()["detail"].lower()
 
     @patch("app.api.video.run_compress_task", new_callable=AsyncMock)
-    @patch("app.api.video.asyncio.create_task")
+    @patch("app.api.video.scheduler.submit", side_effect=_close_job)
     @patch("app.api.video.save_upload_file")
     def test_compress_async_different_qualities(
-        self, mock_save, mock_create_task, mock_run_task, client
+        self, mock_save, mock_submit, mock_run_task, client
     ):
         """Test async compression with different quality settings"""
         from pathlib import Path
 
         mock_save.return_value = Path("/tmp/test.mp4")
 
-        def consume_coroutine(coro):
-            return MagicMock()
-
-        mock_create_task.side_effect = consume_coroutine
-
         for quality in ["low", "medium", "high"]:
             response = client.post(
                 "/api/v1/video/compress/async",
@@ -108,23 +102,62 @@ class TestCompressVideoAsyncEndpoint:
             assert task.metadata["quality"] == quality
 
 
+class TestCompressTargetSizeAsyncEndpoint:
+    """Tests for target_size_mb on POST /api/v1/video/compress/async"""
+
+    @patch("app.api.video.run_compress_task", new_callable=AsyncMock)
+    @patch("app.api.video.scheduler.submit", side_effect=_close_job)
+    @patch("app.api.video.save_upload_file")
+    def test_target_size_recorded(self, mock_save, mock_submit, mock_run_task, client):
+        """Test that the target size is passed to the background task"""
+        from pathlib import Path
+
+        mock_save.return_value = Path("/tmp/test_video.mp4")
+
+        response = client.post(
+            "/api/v1/video/compress/async",
+            files=create_mock_video_file(),
+            data={"target_size_mb": "25"},
+        )
+
+        assert response.status_code == 200
+        task = task_store.get_task(response.json()["task_id"])
+        assert task.metadata["target_size_mb"] == 25.0
+        assert mock_run_task.call_args[0][-1] == 25.0
+
+    def test_invalid_target_size(self, client):
+        """Test that a non-positive size is rejected"""
+        response = client.post(
+            "/api/v1/video/compress/async",
+            files=create_mock_video_file(),
+            data={"target_size_mb": "0"},
+        )
+
+        assert response.status_code == 400
+
+    def test_target_size_with_chunked(self, client):
+        """Test that two-pass target size and chunked encoding are exclusive"""
+        response = client.post(
+            "/api/v1/video/compress/async",
+            files=create_mock_video_file(),
+            data={"target_size_mb": "25", "chunked": "true"},
+        )
+
+        assert response.status_code == 400
+
+
 class TestConvertVideoAsyncEndpoint:
     """Tests for POST /api/v1/video/convert/async"""
 
     @patch("app.api.video.run_convert_task", new_callable=AsyncMock)
-    @patch("app.api.video.asyncio.create_task")
+    @patch("app.api.video.scheduler.submit", side_effect=_close_job)
     @patch("app.api.video.save_upload_file")
-    def test_convert_async_success(self, mock_save, mock_create_task, mock_run_task, client):
+    def test_convert_async_success(self, mock_save, mock_submit, mock_run_task, client):
         """Test successful async conversion request"""
         from pathlib import Path
 
         mock_save.return_value = Path("/tmp/test_video.mp4")
 
-        def consume_coroutine(coro):
-            return MagicMock()
-
-        mock_create_task.side_effect = consume_coroutine
-
         response = client.post(
             "/api/v1/video/convert/async",
             files=create_mock_video_file(),
@@ -167,19 +200,14 @@ class TestConvertVideoAsyncEndpoint:
         assert "unsupported" in response.json()["detail"].lower()
 
     @patch("app.api.video.run_convert_task", new_callable=AsyncMock)
-    @patch("app.api.video.asyncio.create_task")
+    @patch("app.api.video.scheduler.submit", side_effect=_close_job)
     @patch("app.api.video.save_upload_file")
-    def test_convert_async_all_formats(self, mock_save, mock_create_task, mock_run_task, client):
+    def test_convert_async_all_formats(self, mock_save, mock_submit, mock_run_task, client):
         """Test async conversion to all supported formats"""
         from pathlib import Path
 
         mock_save.return_value = Path("/tmp/test.mp4")
 
-        def consume_coroutine(coro):
-            return MagicMock()
-
-        mock_create_task.side_effect = consume_coroutine
-
         supported_formats = ["mp4", "avi", "mov", "mkv", "flv", "wmv"]
 
         for fmt in supported_formats:
@@ -190,14 +218,45 @@ class TestConvertVideoAsyncEndpoint:
             )
             assert response.status_code == 200, f"Failed for format: {fmt}"
 
+    @patch("app.api.video.run_convert_task", new_callable=AsyncMock)
+    @patch("app.api.video.scheduler.submit", side_effect=_close_job)
+    @patch("app.api.video.save_upload_file")
+    def test_convert_async_hls(self, mock_save, mock_submit, mock_run_task, client):
+        """Test that streaming output goes to a directory linked to the task"""
+        from pathlib import Path
+
+        mock_save.return_value = Path("/tmp/test_video.mp4")
+
+        with patch("app.api.video.expiry_manager.track_task") as mock_track:
+            response = client.post(
+                "/api/v1/video/convert/async",
+                files=create_mock_video_file(),
+                data={"output_format": "hls"},
+            )
+
+        assert response.status_code == 200
+        output_path = mock_track.call_args.kwargs["outputs"][0]
+        assert output_path.name.endswith("_test_video_stream")
+        assert mock_run_task.call_args.args[2:4] == (output_path, "hls")
+
+    def test_convert_async_streaming_not_chunked(self, client):
+        """Test that HLS/DASH output cannot be chunked"""
+        response = client.post(
+            "/api/v1/video/convert/async",
+            files=create_mock_video_file(),
+            data={"output_format": "dash", "chunked": "true"},
+        )
+
+        assert response.status_code == 400
+
 
 class TestVideoAsyncIntegration:
     """Integration tests for async video endpoints with task system"""
 
     @patch("app.api.video.run_compress_task", new_callable=AsyncMock)
-    @patch("app.api.video.asyncio.create_task")
+    @patch("app.api.video.scheduler.submit", side_effect=_close_job)
     @patch("app.api.video.save_upload_file", new_callable=AsyncMock)
-    def test_task_workflow(self, mock_save, mock_create_task, mock_run_task, client):
+    def test_task_workflow(self, mock_save, mock_submit, mock_run_task, client):
         """Test complete task workflow: create -> status -> complete"""
         from pathlib import Path
 
@@ -205,11 +264,6 @@ class TestVideoAsyncIntegration:
 
         mock_save.return_value = Path("/tmp/test.mp4")
 
-        def consume_coroutine(coro):
-            return MagicMock()
-
-        mock_create_task.side_effect = consume_coroutine
-
         # Create task via endpoint
         response = client.post(
             "/api/v1/video/compress/async",
@@ -246,19 +300,14 @@ class TestVideoAsyncIntegration:
         assert status_response.json()["result"]["success"] is True
 
     @patch("app.api.video.run_compress_task", new_callable=AsyncMock)
-    @patch("app.api.video.asyncio.create_task")
+    @patch("app.api.video.scheduler.submit", side_effect=_close_job)
     @patch("app.api.video.save_upload_file")
-    def test_task_cancellation(self, mock_save, mock_create_task, mock_run_task, client):
+    def test_task_cancellation(self, mock_save, mock_submit, mock_run_task, client):
         """Test task cancellation"""
         from pathlib import Path
 
         mock_save.return_value = Path("/tmp/test.mp4")
 
-        def consume_coroutine(coro):
-            return MagicMock()
-
-        mock_create_task.side_effect = consume_coroutine
-
         # Create task
         response = client.post(
             "/api/v1/video/compress/async",
@@ -279,19 +328,14 @@ class TestVideoAsyncIntegration:
         assert status_response.json()["status"] == "cancelled"
 
     @patch("app.api.video.run_compress_task", new_callable=AsyncMock)
-    @patch("app.api.video.asyncio.create_task")
+    @patch("app.api.video.scheduler.submit", side_effect=_close_job)
     @patch("app.api.video.save_upload_file")
-    def test_multiple_concurrent_tasks(self, mock_save, mock_create_task, mock_run_task, client):
+    def test_multiple_concurrent_tasks(self, mock_save, mock_submit, mock_run_task, client):
         """Test multiple concurrent tasks"""
         from pathlib import Path
 
         mock_save.return_value = Path("/tmp/test.mp4")
 
-        def consume_coroutine(coro):
-            return MagicMock()
-
-        mock_create_task.side_effect = consume_coroutine
-
         task_ids = []
 
         # Create multiple tasks
@@ -311,3 +355,196 @@ class TestVideoAsyncIntegration:
         for task_id in task_ids:
             status = client.get(f"/api/v1/tasks/{task_id}/status")
             assert status.status_code == 200
+
+
+class TestRotateGifExtractAsyncEndpoints:
+    """Tests for POST /api/v1/video/{rotate,to-gif,extract-audio}/async"""
+
+    @patch("app.api.video.scheduler.submit", side_effect=_close_job)
+    @patch("app.api.video.save_upload_file")
+    def test_rotate_async(self, mock_save, mock_submit, client):
+        """Test that a rotation task is created"""
+        from pathlib import Path
+
+        mock_save.return_value = Path("/tmp/test_video.mp4")
+
+        response = client.post(
+            "/api/v1/video/rotate/async", files=create_mock_video_file(), data={"angle": "90"}
+        )
+
+        assert response.status_code == 200
+        task = task_store.get_task(response.json()["task_id"])
+        assert task.task_type == "video_rotate"
+        assert task.metadata["angle"] == 90
+
+    def test_rotate_async_invalid_angle(self, client):
+        """Test that unsupported angles are rejected before upload"""
+        response = client.post(
+            "/api/v1/video/rotate/async", files=create_mock_video_file(), data={"angle": "45"}
+        )
+
+        assert response.status_code == 400
+
+    @patch("app.api.video.scheduler.submit", side_effect=_close_job)
+    @patch("app.api.video.save_upload_file")
+    def test_gif_async(self, mock_save, mock_submit, client):
+        """Test that a GIF task is created with its options"""
+        from pathlib import Path
+
+        mock_save.return_value = Path("/tmp/test_video.mp4")
+
+        response = client.post(
+            "/api/v1/video/to-gif/async",
+            files=create_mock_video_file(),
+            data={"start_time": "1.5", "duration": "3", "fps": "10"},
+        )
+
+        assert response.status_code == 200
+        task = task_store.get_task(response.json()["task_id"])
+        assert task.task_type == "video_gif"
+        assert task.metadata["fps"] == 10
+        assert task.metadata["duration"] == 3.0
+
+    @patch("app.services.video_service.get_webp_encoder", return_value="libwebp_anim")
+    @patch("app.api.video.scheduler.submit", side_effect=_close_job)
+    @patch("app.api.video.save_upload_file")
+    def test_gif_async_webp(self, mock_save, mock_submit, mock_encoder, client):
+        """Test that WebP output gets a .webp file"""
+        from pathlib import Path
+
+        mock_save.return_value = Path("/tmp/test_video.mp4")
+
+        with patch("app.api.video.expiry_manager.track_task") as mock_track:
+            response = client.post(
+                "/api/v1/video/to-gif/async",
+                files=create_mock_video_file(),
+                data={"output_format": "webp", "sparse_palette": "true"},
+            )
+
+        assert response.status_code == 200
+        output_path = mock_track.call_args.kwargs["outputs"][0]
+        assert output_path.name.endswith("_test_video.webp")
+        task = task_store.get_task(response.json()["task_id"])
+        assert task.metadata["output_format"] == "webp"
+
+    def test_gif_async_invalid_dither(self, client):
+        """Test that unknown dither modes are rejected"""
+        response = client.post(
+            "/api/v1/video/to-gif/async", files=create_mock_video_file(), data={"dither": "x"}
+        )
+
+        assert response.status_code == 400
+        assert "dither" in response.json()["detail"]
+
+    @patch("app.services.video_service.get_webp_encoder", return_value=None)
+    @patch("app.api.video.save_upload_file")
+    def test_gif_async_webp_without_encoder(self, mock_save, mock_encoder, client):
+        """Test that WebP output is rejected before upload when FFmpeg lacks libwebp"""
+        response = client.post(
+            "/api/v1/video/to-gif/async",
+            files=create_mock_video_file(),
+            data={"output_format": "webp"},
+        )
+
+        assert response.status_code == 400
+        assert "libwebp" in response.json()["detail"]
+        mock_save.assert_not_called()
+
+    def test_gif_async_invalid_fps(self, client):
+        """Test that out of range fps is rejected"""
+        response = client.post(
+            "/api/v1/video/to-gif/async", files=create_mock_video_file(), data={"fps": "120"}
+        )
+
+        assert response.status_code == 400
+
+    @patch("app.api.video.scheduler.submit", side_effect=_close_job)
+    @patch("app.api.video.save_upload_file")
+    def test_extract_audio_async(self, mock_save, mock_submit, client):
+        """Test that an audio extraction task is created"""
+        from pathlib import Path
+
+        mock_save.return_value = Path("/tmp/test_video.mp4")
+
+        response = client.post(
+            "/api/v1/video/extract-audio/async",
+            files=create_mock_video_file(),
+            data={"output_format": "ogg"},
+        )
+
+        assert response.status_code == 200
+        task = task_store.get_task(response.json()["task_id"])
+        assert task.task_type == "video_extract_audio"
+        assert task.metadata["output_format"] == "ogg"
+
+    def test_extract_audio_async_invalid_format(self, client):
+        """Test that unsupported audio formats are rejected"""
+        response = client.post(
+            "/api/v1/video/extract-audio/async",
+            files=create_mock_video_file(),
+            data={"output_format": "wma"},
+        )
+
+        assert response.status_code == 400
+
+
+class TestThumbnailsEndpoints:
+    """Tests for POST /api/v1/video/thumbnails and /thumbnails/async"""
+
+    @patch("app.api.video.extract_thumbnails")
+    @patch("app.api.video.save_upload_file")
+    def test_thumbnails_sync(self, mock_save, mock_extract, client):
+        """Test that the sprite and VTT URLs are returned"""
+        from pathlib import Path
+
+        from app.models.video import VideoThumbnailsResponse
+
+        mock_save.return_value = Path("/tmp/test_video.mp4")
+        mock_extract.return_value = VideoThumbnailsResponse(
+            success=True,
+            message="4 thumbnails extracted successfully",
+            filename="thumbs_test_video.jpg",
+            download_url="/api/v1/download/thumbs_test_video.jpg",
+            vtt_filename="thumbs_test_video.vtt",
+            vtt_download_url="/api/v1/download/thumbs_test_video.vtt",
+            count=4,
+        )
+
+        response = client.post(
+            "/api/v1/video/thumbnails", files=create_mock_video_file(), data={"count": "4"}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["vtt_download_url"].endswith(".vtt")
+        sprite_path, vtt_path = mock_extract.call_args.args[1:3]
+        assert vtt_path == sprite_path.with_suffix(".vtt")
+
+    def test_thumbnails_invalid_width(self, client):
+        """Test that out of range widths are rejected before upload"""
+        response = client.post(
+            "/api/v1/video/thumbnails", files=create_mock_video_file(), data={"width": "4000"}
+        )
+
+        assert response.status_code == 400
+
+    @patch("app.api.video.scheduler.submit", side_effect=_close_job)
+    @patch("app.api.video.save_upload_file")
+    def test_thumbnails_async(self, mock_save, mock_submit, client):
+        """Test that both outputs are tracked for expiry"""
+        from pathlib import Path
+
+        mock_save.return_value = Path("/tmp/test_video.mp4")
+
+        with patch("app.api.video.expiry_manager.track_task") as mock_track:
+            response = client.post(
+                "/api/v1/video/thumbnails/async",
+                files=create_mock_video_file(),
+                data={"count": "20", "columns": "5"},
+            )
+
+        assert response.status_code == 200
+        task = task_store.get_task(response.json()["task_id"])
+        assert task.task_type == "video_thumbnails"
+        assert task.metadata["columns"] == 5
+        outputs = mock_track.call_args.kwargs["outputs"]
+        assert [p.suffix for p in outputs] == [".jpg", ".vtt"]
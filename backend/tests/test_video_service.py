@@ -6,55 +6,68 @@ Uses mocking for FFmpeg operations
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+import ffmpeg
 import pytest
 
 from app.services.video_service import (
+    STRATEGY_REENCODE,
+    STRATEGY_REMUX,
+    STRATEGY_ROTATION_METADATA,
+    STRATEGY_STREAM_COPY,
+    can_concat_copy,
+    can_copy_streams,
+    check_gif_params,
     compress_video,
     convert_video,
     extract_audio,
     get_available_h264_encoder,
+    get_rotation,
+    meets_quality,
+    merge_videos,
+    rotate_video,
     video_to_gif,
 )
+from app.utils.capabilities import CapabilityRegistry
+from app.utils.media_probe import MediaInfo
 
 
 class TestGetAvailableH264Encoder:
     """Tests for encoder detection"""
 
-    @patch("app.services.video_service.subprocess.run")
+    @patch("app.utils.capabilities.subprocess.run")
     def test_libx264_available(self, mock_run):
         """Test detection of libx264"""
-        mock_run.return_value = MagicMock(stdout="V..... libx264 H.264 encoder")
-        result = get_available_h264_encoder()
+        mock_run.return_value = MagicMock(returncode=0, stdout=" V..... libx264 H.264 encoder")
+        with patch("app.services.video_service.capabilities", CapabilityRegistry()):
+            result = get_available_h264_encoder()
         assert result == "libx264"
 
-    @patch("app.services.video_service.subprocess.run")
-    def test_libopenh264_fallback(self, mock_run):
-        """Test fallback to libopenh264"""
-        mock_run.return_value = MagicMock(stdout="V..... libopenh264")
-        result = get_available_h264_encoder()
-        assert result == "libopenh264"
-
-    @patch("app.services.video_service.subprocess.run")
-    def test_h264_vaapi_fallback(self, mock_run):
-        """Test fallback to h264_vaapi"""
-        mock_run.return_value = MagicMock(stdout="V..... h264_vaapi")
-        result = get_available_h264_encoder()
-        assert result == "h264_vaapi"
-
-    @patch("app.services.video_service.subprocess.run")
+    @patch("app.utils.capabilities.subprocess.run")
     def test_no_encoder_available(self, mock_run):
         """Test when no encoder is available"""
-        mock_run.return_value = MagicMock(stdout="no encoders")
-        result = get_available_h264_encoder()
+        mock_run.return_value = MagicMock(returncode=0, stdout="no encoders")
+        with patch("app.services.video_service.capabilities", CapabilityRegistry()):
+            result = get_available_h264_encoder()
         assert result is None
 
-    @patch("app.services.video_service.subprocess.run")
+    @patch("app.utils.capabilities.subprocess.run")
     def test_subprocess_exception(self, mock_run):
-        """Test handling subprocess exception"""
-        mock_run.side_effect = Exception("Command failed")
-        result = get_available_h264_encoder()
+        """Test handling a missing ffmpeg binary"""
+        mock_run.side_effect = FileNotFoundError("ffmpeg")
+        with patch("app.services.video_service.capabilities", CapabilityRegistry()):
+            result = get_available_h264_encoder()
         assert result is None
 
+    @patch("app.utils.capabilities.subprocess.run")
+    def test_probed_once(self, mock_run):
+        """Test that ffmpeg -encoders is not run again on every request"""
+        mock_run.return_value = MagicMock(returncode=0, stdout=" V..... libx264 H.264 encoder")
+        with patch("app.services.video_service.capabilities", CapabilityRegistry()):
+            get_available_h264_encoder()
+            calls = mock_run.call_count
+            get_available_h264_encoder()
+        assert mock_run.call_count == calls
+
 
 class TestCompressVideo:
     """Tests for compress_video function"""
@@ -222,40 +235,22 @@ class TestConvertVideo:
         assert result.success is False
 
 
+def _compiled_runs(mock_run) -> list:
+    """Command lines of the graphs passed to a mocked ffmpeg.run"""
+    import ffmpeg
+
+    return [" ".join(ffmpeg.compile(call.args[0])) for call in mock_run.call_args_list]
+
+
 class TestVideoToGif:
     """Tests for video_to_gif function"""
 
     @patch("app.services.video_service.get_file_size")
     @patch("app.services.video_service.ffmpeg.run")
-    @patch("app.services.video_service.ffmpeg.output")
-    @patch("app.services.video_service.ffmpeg.filter")
-    @patch("app.services.video_service.ffmpeg.filter_multi_output")
-    @patch("app.services.video_service.ffmpeg.input")
-    def test_successful_video_to_gif(
-        self,
-        mock_input,
-        mock_split,
-        mock_filter,
-        mock_output,
-        mock_run,
-        mock_size,
-    ):
-        """Test successful conversion to GIF"""
+    def test_successful_video_to_gif(self, mock_run, mock_size):
+        """Test that the palette is generated first, then applied while streaming"""
         mock_size.side_effect = [500000, 120000]
 
-        mock_input.return_value = MagicMock(name="input_stream")
-        fps_stream = MagicMock(name="fps_stream")
-        scaled_stream = MagicMock(name="scaled_stream")
-        split_streams = (MagicMock(name="split0"), MagicMock(name="split1"))
-        palette = MagicMock(name="palette")
-        palette_use = MagicMock(name="palette_use")
-        output_stream = MagicMock(name="output_stream")
-
-        mock_filter.side_effect = [fps_stream, scaled_stream, palette_use]
-        mock_split.return_value = split_streams
-        split_streams[0].filter.return_value = palette
-        mock_output.return_value = output_stream
-
         result = video_to_gif(
             input_path=Path("/tmp/input.mp4"),
             output_path=Path("/tmp/output.gif"),
@@ -268,6 +263,92 @@ class TestVideoToGif:
 
         assert result.success is True
         assert result.download_url == "/api/v1/download/output.gif"
+        palette_cmd, render_cmd = _compiled_runs(mock_run)
+        # Input seeking on both runs
+        assert palette_cmd.startswith("ffmpeg -ss 1.5 -t 3.0 -i /tmp/input.mp4")
+        assert "]fps=10[" in palette_cmd and "palettegen" in palette_cmd
+        assert palette_cmd.endswith("/tmp/palette_output.png")
+        assert render_cmd.startswith("ffmpeg -ss 1.5 -t 3.0 -i /tmp/input.mp4")
+        assert "-i /tmp/palette_output.png" in render_cmd
+        assert "paletteuse=dither=sierra2_4a" in render_cmd
+        assert "split" not in render_cmd
+
+    @patch("app.services.video_service.get_file_size", return_value=1000)
+    @patch("app.services.video_service.ffmpeg.run")
+    def test_sparse_palette(self, mock_run, mock_size):
+        """Test that a sparse palette samples fewer frames than the GIF shows"""
+        video_to_gif(Path("/tmp/input.mp4"), Path("/tmp/output.gif"), fps=15, sparse_palette=True)
+
+        palette_cmd, render_cmd = _compiled_runs(mock_run)
+        assert "]fps=2" in palette_cmd
+        assert "]fps=15[" in render_cmd
+
+    @patch("app.services.video_service.get_known_hash", return_value="abc123")
+    @patch("app.services.video_service.get_file_size", return_value=1000)
+    @patch("app.services.video_service.ffmpeg.run")
+    def test_palette_reused_across_renders(self, mock_run, mock_size, mock_hash, tmp_path):
+        """Test that another dither setting on the same segment skips palettegen"""
+        from app.utils.artifact_cache import ArtifactCache
+
+        def write_outputs(stream, **kwargs):
+            import ffmpeg
+
+            Path(ffmpeg.compile(stream)[-1]).write_bytes(b"png")
+
+        mock_run.side_effect = write_outputs
+        output_path = tmp_path / "output.gif"
+
+        with patch(
+            "app.services.video_service.palette_cache", ArtifactCache(tmp_path / "cache", 8)
+        ):
+            first = video_to_gif(Path("/tmp/input.mp4"), output_path, dither="bayer")
+            second = video_to_gif(Path("/tmp/input.mp4"), output_path, dither="none")
+
+        assert first.success and second.success
+        runs = _compiled_runs(mock_run)
+        assert len(runs) == 3
+        assert "palettegen" not in runs[2]
+        assert "paletteuse=dither=none" in runs[2]
+        assert not (tmp_path / "palette_output.png").exists()
+
+    @patch("app.services.video_service.get_webp_encoder", return_value="libwebp_anim")
+    @patch("app.services.video_service.get_file_size", return_value=1000)
+    @patch("app.services.video_service.ffmpeg.run")
+    def test_webp_output(self, mock_run, mock_size, mock_encoder):
+        """Test that WebP is encoded in one run without a palette"""
+        result = video_to_gif(
+            Path("/tmp/input.mp4"), Path("/tmp/output.webp"), output_format="webp", loop=False
+        )
+
+        assert result.success is True
+        assert "WebP" in result.message
+        (cmd,) = _compiled_runs(mock_run)
+        assert "-vcodec libwebp_anim" in cmd
+        assert "-loop 1" in cmd
+        assert "palette" not in cmd
+
+    @patch("app.services.video_service.get_file_size", return_value=1000)
+    @patch("app.services.video_service.ffmpeg.run")
+    def test_apng_output(self, mock_run, mock_size):
+        """Test APNG output with infinite plays"""
+        result = video_to_gif(Path("/tmp/input.mp4"), Path("/tmp/output.png"), output_format="apng")
+
+        assert result.success is True
+        (cmd,) = _compiled_runs(mock_run)
+        assert "-f apng" in cmd
+        assert "-plays 0" in cmd
+
+    @patch("app.services.video_service.get_webp_encoder", return_value=None)
+    @patch("app.services.video_service.ffmpeg.run")
+    def test_webp_without_libwebp(self, mock_run, mock_encoder):
+        """Test that WebP fails early when FFmpeg has no WebP encoder"""
+        result = video_to_gif(
+            Path("/tmp/input.mp4"), Path("/tmp/output.webp"), output_format="webp"
+        )
+
+        assert result.success is False
+        assert "libwebp" in result.message
+        mock_run.assert_not_called()
 
     def test_invalid_fps(self):
         """Test invalid fps is rejected early"""
@@ -280,29 +361,20 @@ class TestVideoToGif:
         assert result.success is False
         assert "fps" in result.message.lower()
 
+    def test_invalid_dither(self):
+        """Test unknown dither modes are rejected early"""
+        result = video_to_gif(Path("/tmp/input.mp4"), Path("/tmp/output.gif"), dither="random")
+
+        assert result.success is False
+        assert "dither" in result.message
+
     @patch("app.services.video_service.ffmpeg.run")
-    @patch("app.services.video_service.ffmpeg.output")
-    @patch("app.services.video_service.ffmpeg.filter")
-    @patch("app.services.video_service.ffmpeg.filter_multi_output")
-    @patch("app.services.video_service.ffmpeg.input")
     @patch("app.services.video_service.get_file_size")
-    def test_ffmpeg_error(
-        self,
-        mock_size,
-        mock_input,
-        mock_split,
-        mock_filter,
-        mock_output,
-        mock_run,
-    ):
+    def test_ffmpeg_error(self, mock_size, mock_run):
         """Test FFmpeg error handling for GIF conversion"""
         import ffmpeg
 
         mock_size.side_effect = [1000, 2000]
-        mock_input.return_value = MagicMock()
-        mock_filter.side_effect = [MagicMock(), MagicMock(), MagicMock()]
-        mock_split.return_value = (MagicMock(), MagicMock())
-        mock_output.return_value = MagicMock()
         mock_run.side_effect = ffmpeg.Error("ffmpeg", b"", b"gif error")
 
         result = video_to_gif(Path("/tmp/input.mp4"), Path("/tmp/output.gif"))
@@ -311,32 +383,38 @@ class TestVideoToGif:
         assert "ffmpeg" in result.message.lower()
 
     @patch("app.services.video_service.ffmpeg.run", side_effect=Exception("Unexpected error"))
-    @patch("app.services.video_service.ffmpeg.output")
-    @patch("app.services.video_service.ffmpeg.filter")
-    @patch("app.services.video_service.ffmpeg.filter_multi_output")
-    @patch("app.services.video_service.ffmpeg.input")
     @patch("app.services.video_service.get_file_size", return_value=1000)
-    def test_general_exception(
-        self,
-        mock_size,
-        mock_input,
-        mock_split,
-        mock_filter,
-        mock_output,
-        mock_run,
-    ):
+    def test_general_exception(self, mock_size, mock_run):
         """Test general exception handling for GIF conversion"""
-        mock_input.return_value = MagicMock()
-        mock_filter.side_effect = [MagicMock(), MagicMock(), MagicMock()]
-        mock_split.return_value = (MagicMock(), MagicMock())
-        mock_output.return_value = MagicMock()
-
         result = video_to_gif(Path("/tmp/input.mp4"), Path("/tmp/output.gif"))
 
         assert result.success is False
         assert "error converting video to gif" in result.message.lower()
 
 
+class TestVideoToGifDuration:
+    """Tests for the probed duration check of video_to_gif"""
+
+    @patch("app.services.video_service.ffmpeg.run")
+    @patch("app.services.video_service.media_probe")
+    def test_start_time_past_end(self, mock_probe, mock_run):
+        """Test that a start past the end of the video fails before running FFmpeg"""
+        mock_probe.get.return_value = MediaInfo({"format": {"duration": "8.0"}})
+
+        result = video_to_gif(Path("/tmp/input.mp4"), Path("/tmp/output.gif"), start_time=9)
+
+        assert result.success is False
+        assert "8.00s" in result.message
+        mock_run.assert_not_called()
+
+    @patch("app.services.video_service.media_probe")
+    def test_params_checked_without_input(self, mock_probe):
+        """Test that parameters can be checked before the upload exists"""
+        assert check_gif_params(None, 9, None, None, 12) is None
+        assert check_gif_params(None, 0, None, None, 0) == "fps must be between 1 and 60"
+        mock_probe.get.assert_not_called()
+
+
 class TestExtractAudio:
     """Tests for extract_audio function"""
 
@@ -432,3 +510,364 @@ class TestExtractAudio:
         result = convert_video(Path("/tmp/input.mp4"), Path("/tmp/output.avi"), "avi", "medium")
 
         assert result.success is False
+
+
+def _probe(
+    video_codec="h264", audio_codec="aac", width=1920, rotation=None, cover_art=False, bit_rate=None
+):
+    """Minimal ffprobe output with one video and one audio stream"""
+    video = {
+        "index": 0,
+        "codec_type": "video",
+        "codec_name": video_codec,
+        "profile": "High",
+        "width": width,
+        "height": 1080,
+        "pix_fmt": "yuv420p",
+        "r_frame_rate": "30/1",
+    }
+    if bit_rate is not None:
+        video["bit_rate"] = bit_rate
+    if rotation is not None:
+        video["side_data_list"] = [{"side_data_type": "Display Matrix", "rotation": rotation}]
+    streams = [video]
+    if audio_codec:
+        streams.append(
+            {
+                "index": 1,
+                "codec_type": "audio",
+                "codec_name": audio_codec,
+                "sample_rate": "48000",
+                "channels": 2,
+            }
+        )
+    if cover_art:
+        streams.insert(
+            0,
+            {
+                "index": 2,
+                "codec_type": "video",
+                "codec_name": "png",
+                "disposition": {"attached_pic": 1},
+            },
+        )
+    return {"streams": streams, "format": {"duration": "60.0"}}
+
+
+class TestStreamCopyPlanner:
+    """Tests for the ffprobe-driven stream-copy checks"""
+
+    def test_h264_aac_fits_mp4_and_mkv(self):
+        """Test that H.264/AAC can be remuxed into common containers"""
+        assert can_copy_streams(_probe(), "mp4") is True
+        assert can_copy_streams(_probe(), "mkv") is True
+        assert can_copy_streams(_probe(), "avi") is False  # AVI does not take AAC
+
+    def test_incompatible_codecs_need_reencode(self):
+        """Test that codecs the container cannot hold are rejected"""
+        assert can_copy_streams(_probe(video_codec="vp9"), "mp4") is False
+        assert can_copy_streams(_probe(audio_codec="vorbis"), "mp4") is False
+        assert can_copy_streams(_probe(video_codec="vp9", audio_codec="vorbis"), "mkv") is True
+
+    def test_missing_probe_or_video(self):
+        """Test that unknown inputs are never copied"""
+        assert can_copy_streams(None, "mp4") is False
+        assert can_copy_streams({"streams": [{"codec_type": "audio"}]}, "mp4") is False
+
+    def test_cover_art_is_ignored(self):
+        """Test that an attached picture is not taken for the main video stream"""
+        assert can_copy_streams(_probe(cover_art=True), "mp4") is True
+
+    def test_meets_quality_compares_bit_rate(self):
+        """Test that only sources at or below the preset's bit rate meet it"""
+        assert meets_quality(_probe(), None) is True
+        assert meets_quality(_probe(bit_rate="2000000"), "medium") is True
+        assert meets_quality(_probe(bit_rate="2000000"), "low") is False
+        assert meets_quality(_probe(), "high") is False  # Unknown bit rate
+
+        # MKV stores no per-stream bit rate, the file's is used
+        whole_file = _probe()
+        whole_file["format"]["bit_rate"] = "900000"
+        assert meets_quality(whole_file, "low") is True
+        assert meets_quality(None, "low") is False
+
+    def test_rotation_from_display_matrix_and_tag(self):
+        """Test reading the clockwise rotation"""
+        assert get_rotation(_probe()) == 0
+        assert get_rotation(_probe(rotation=-90)) == 90
+        assert get_rotation(_probe(rotation=90)) == 270
+
+        tagged = _probe()
+        tagged["streams"][0]["tags"] = {"rotate": "180"}
+        assert get_rotation(tagged) == 180
+
+    def test_concat_copy_requires_matching_parameters(self):
+        """Test that inputs are only joined as-is when their parameters match"""
+        assert can_concat_copy([_probe(), _probe()], "mp4") is True
+        assert can_concat_copy([_probe(), _probe(width=1280)], "mp4") is False
+        assert can_concat_copy([_probe(), _probe(audio_codec=None)], "mp4") is False
+        assert can_concat_copy([_probe(), None], "mp4") is False
+
+
+class TestStreamCopyPaths:
+    """Tests for the fast paths of convert, rotate and merge"""
+
+    @patch("app.services.video_service.ffmpeg.run")
+    @patch("app.services.video_service.get_available_h264_encoder")
+    @patch("app.services.video_service.probe_video", return_value=_probe())
+    @patch("app.services.video_service.get_file_size", return_value=1000)
+    def test_convert_remuxes_compatible_streams(
+        self, mock_size, mock_probe, mock_encoder, mock_run
+    ):
+        """Test that MKV with H.264/AAC is remuxed to MP4"""
+        result = convert_video(Path("/tmp/input.mkv"), Path("/tmp/output.mp4"), "mp4")
+
+        args = mock_run.call_args.args[0].get_args()
+        assert result.success is True
+        assert result.strategy == STRATEGY_REMUX
+        assert args[args.index("-c") + 1] == "copy"
+        assert ["-map", "0:0", "-map", "0:1"] == args[2:6]
+        mock_encoder.assert_not_called()
+
+    @patch("app.services.video_service.ffmpeg.run")
+    @patch("app.services.video_service.get_available_h264_encoder", return_value="libx264")
+    @patch("app.services.video_service.probe_video", return_value=_probe(bit_rate="8000000"))
+    @patch("app.services.video_service.get_file_size", return_value=1000)
+    def test_convert_with_quality_reencodes(self, mock_size, mock_probe, mock_encoder, mock_run):
+        """Test that a source above the preset's bit rate is re-encoded, not remuxed"""
+        result = convert_video(Path("/tmp/input.mkv"), Path("/tmp/output.mp4"), "mp4", "low")
+
+        args = mock_run.call_args.args[0].get_args()
+        assert result.strategy == STRATEGY_REENCODE
+        assert args[args.index("-crf") + 1] == "28"
+        assert mock_run.call_count == 1
+
+    @patch("app.services.video_service.ffmpeg.run")
+    @patch("app.services.video_service.get_available_h264_encoder")
+    @patch("app.services.video_service.probe_video", return_value=_probe(bit_rate="800000"))
+    @patch("app.services.video_service.get_file_size", return_value=1000)
+    def test_convert_with_quality_remuxes_source_within_it(
+        self, mock_size, mock_probe, mock_encoder, mock_run
+    ):
+        """Test that a source already below the preset's bit rate is remuxed"""
+        result = convert_video(Path("/tmp/input.mkv"), Path("/tmp/output.mp4"), "mp4", "low")
+
+        assert result.strategy == STRATEGY_REMUX
+        mock_encoder.assert_not_called()
+
+    @patch("app.services.video_service.ffmpeg.run")
+    @patch("app.services.video_service.get_available_h264_encoder", return_value="libx264")
+    @patch("app.services.video_service.probe_video", return_value=_probe(video_codec="vp9"))
+    @patch("app.services.video_service.get_file_size", return_value=1000)
+    def test_convert_reencodes_incompatible_streams(
+        self, mock_size, mock_probe, mock_encoder, mock_run
+    ):
+        """Test that VP9 going to MP4 is re-encoded"""
+        result = convert_video(Path("/tmp/input.webm"), Path("/tmp/output.mp4"), "mp4")
+
+        args = mock_run.call_args.args[0].get_args()
+        assert result.strategy == STRATEGY_REENCODE
+        assert args[args.index("-c:v") + 1] == "libx264"
+
+    @patch("app.services.video_service.ffmpeg.run")
+    @patch("app.services.video_service.probe_video")
+    @patch("app.services.video_service.get_file_size", return_value=1000)
+    def test_rotate_rewrites_display_matrix(self, mock_size, mock_probe, mock_run):
+        """Test that rotating an MP4 only rewrites its rotation metadata"""
+        mock_probe.side_effect = [_probe(rotation=-90), _probe(rotation=180)]
+
+        result = rotate_video(Path("/tmp/input.mp4"), Path("/tmp/output.mp4"), 90)
+
+        args = mock_run.call_args.args[0].get_args()
+        assert result.success is True
+        assert result.strategy == STRATEGY_ROTATION_METADATA
+        # 90 already applied + 90 requested = 180 clockwise
+        assert args[:2] == ["-display_rotation", "180"]
+        assert args[args.index("-c") + 1] == "copy"
+
+    @patch("app.services.video_service.ffmpeg.run")
+    @patch("app.services.video_service.get_available_h264_encoder", return_value="libx264")
+    @patch("app.services.video_service.probe_video")
+    @patch("app.services.video_service.get_file_size", return_value=1000)
+    def test_rotate_reencodes_when_metadata_not_applied(
+        self, mock_size, mock_probe, mock_encoder, mock_run
+    ):
+        """Test fallback to the transpose filter when the rotation does not stick"""
+        mock_probe.return_value = _probe()  # Output never shows the new rotation
+
+        result = rotate_video(Path("/tmp/input.mp4"), Path("/tmp/output.mp4"), 90)
+
+        args = mock_run.call_args.args[0].get_args()
+        assert result.strategy == STRATEGY_REENCODE
+        assert "transpose=1" in " ".join(args)
+        assert mock_run.call_count == 3  # FFmpeg 6+ option, legacy tag, re-encode
+
+    @patch("app.services.video_service.ffmpeg.run")
+    @patch("app.services.video_service.get_available_h264_encoder")
+    @patch("app.services.video_service.probe_video", return_value=_probe())
+    @patch("app.services.video_service.get_file_size", return_value=1000)
+    def test_quality_merge_copies_matching_inputs(
+        self, mock_size, mock_probe, mock_encoder, mock_run, tmp_path
+    ):
+        """Test that quality mode joins identical-parameter inputs without re-encoding"""
+        inputs = [tmp_path / "a.mp4", tmp_path / "b.mp4"]
+
+        result = merge_videos(inputs, tmp_path / "merged.mp4", "mp4", None, "quality")
+
+        args = mock_run.call_args.args[0].get_args()
+        assert result.success is True
+        assert result.strategy == STRATEGY_STREAM_COPY
+        assert args[args.index("-c") + 1] == "copy"
+        # Only the streams the probe compared are copied
+        assert args[args.index("-map") : args.index("-c")] == ["-map", "0:v:0", "-map", "0:a:0?"]
+        mock_encoder.assert_not_called()
+
+    @patch("app.services.video_service.ffmpeg.run")
+    @patch("app.services.video_service.get_available_h264_encoder", return_value="libx264")
+    @patch("app.services.video_service.probe_video", return_value=_probe())
+    @patch("app.services.video_service.get_file_size", return_value=1000)
+    def test_quality_merge_falls_back_when_copy_fails(
+        self, mock_size, mock_probe, mock_encoder, mock_run, tmp_path
+    ):
+        """Test that a concat copy FFmpeg rejects is redone by re-encoding"""
+        mock_run.side_effect = [ffmpeg.Error("ffmpeg", b"", b"Non-monotonous DTS"), None]
+        inputs = [tmp_path / "a.mp4", tmp_path / "b.mp4"]
+        output_path = tmp_path / "merged.mp4"
+        output_path.write_bytes(b"partial")
+
+        result = merge_videos(inputs, output_path, "mp4", None, "quality")
+
+        args = mock_run.call_args.args[0].get_args()
+        assert result.success is True
+        assert result.strategy == STRATEGY_REENCODE
+        assert args[args.index("-c:v") + 1] == "libx264"
+        assert mock_run.call_count == 2
+
+    @patch("app.services.video_service.ffmpeg.run")
+    @patch("app.services.video_service.get_available_h264_encoder", return_value="libx264")
+    @patch("app.services.video_service.probe_video")
+    @patch("app.services.video_service.get_file_size", return_value=1000)
+    def test_quality_merge_reencodes_mismatched_inputs(
+        self, mock_size, mock_probe, mock_encoder, mock_run, tmp_path
+    ):
+        """Test that inputs with different resolutions are re-encoded"""
+        mock_probe.side_effect = [_probe(), _probe(width=1280)]
+        inputs = [tmp_path / "a.mp4", tmp_path / "b.mp4"]
+
+        result = merge_videos(inputs, tmp_path / "merged.mp4", "mp4", None, "quality")
+
+        assert result.strategy == STRATEGY_REENCODE
+
+    @patch("app.services.video_service.ffmpeg.run")
+    @patch("app.services.video_service.get_available_h264_encoder", return_value="libx264")
+    @patch("app.services.video_service.probe_video")
+    @patch("app.services.video_service.get_file_size", return_value=1000)
+    def test_quality_merge_with_quality_reencodes(
+        self, mock_size, mock_probe, mock_encoder, mock_run, tmp_path
+    ):
+        """Test that inputs above the preset's bit rate are not stream-copied"""
+        mock_probe.side_effect = [_probe(bit_rate="800000"), _probe(bit_rate="8000000")]
+        inputs = [tmp_path / "a.mp4", tmp_path / "b.mp4"]
+
+        result = merge_videos(inputs, tmp_path / "merged.mp4", "mp4", "low", "quality")
+
+        args = mock_run.call_args.args[0].get_args()
+        assert result.strategy == STRATEGY_REENCODE
+        assert args[args.index("-crf") + 1] == "28"
+        assert mock_run.call_count == 1
+
+
+class TestThumbnails:
+    """Tests for the thumbnail sprite sheet"""
+
+    @patch("app.services.video_service.media_probe")
+    def test_plan_layout(self, mock_probe):
+        """Test evenly spaced seek points and a square-ish grid"""
+        from app.services.video_service import plan_thumbnails
+
+        mock_probe.get.return_value = MediaInfo(_probe())
+
+        plan = plan_thumbnails(Path("/tmp/input.mp4"), count=10, width=160)
+
+        assert plan["times"][:2] == [3.0, 9.0]
+        assert plan["height"] == 90
+        assert (plan["columns"], plan["rows"]) == (4, 3)
+
+    @patch("app.services.video_service.media_probe")
+    def test_plan_rotated_video(self, mock_probe):
+        """Test that portrait videos stored rotated get portrait thumbnails"""
+        from app.services.video_service import plan_thumbnails
+
+        mock_probe.get.return_value = MediaInfo(_probe(rotation=-90))
+
+        plan = plan_thumbnails(Path("/tmp/input.mp4"), count=4, width=90, columns=4)
+
+        assert plan["height"] == 160
+        assert plan["rows"] == 1
+
+    @patch("app.services.video_service.media_probe")
+    def test_plan_without_video(self, mock_probe):
+        """Test that audio-only files give no plan"""
+        from app.services.video_service import plan_thumbnails
+
+        mock_probe.get.return_value = MediaInfo(
+            {"streams": [{"codec_type": "audio"}], "format": {"duration": "60.0"}}
+        )
+
+        assert plan_thumbnails(Path("/tmp/input.mp3"), count=4, width=160) is None
+
+    def test_vtt_cues(self):
+        """Test that each interval points at its sprite cell"""
+        from app.services.video_service import build_thumbnails_vtt
+
+        plan = {
+            "times": [15.0, 45.0, 75.0],
+            "interval": 30.0,
+            "duration": 3700.5,
+            "width": 160,
+            "height": 90,
+            "columns": 2,
+            "rows": 2,
+        }
+
+        vtt = build_thumbnails_vtt(plan, "thumbs.jpg").splitlines()
+
+        assert vtt[0] == "WEBVTT"
+        assert vtt[2:4] == ["00:00:00.000 --> 00:00:30.000", "thumbs.jpg#xywh=0,0,160,90"]
+        assert vtt[5:7] == ["00:00:30.000 --> 00:01:00.000", "thumbs.jpg#xywh=160,0,160,90"]
+        assert vtt[8:10] == ["00:01:00.000 --> 01:01:40.500", "thumbs.jpg#xywh=0,90,160,90"]
+
+    @patch("app.services.video_service.get_file_size", return_value=1000)
+    @patch("app.services.video_service.ffmpeg.run")
+    @patch("app.services.video_service.media_probe")
+    def test_extract_thumbnails(self, mock_probe, mock_run, mock_size, tmp_path):
+        """Test keyframe-only seeks per thumbnail, then one tiling run"""
+        from app.services.video_service import extract_thumbnails
+
+        mock_probe.get.return_value = MediaInfo(_probe())
+        sprite_path = tmp_path / "thumbs.jpg"
+        vtt_path = tmp_path / "thumbs.vtt"
+
+        result = extract_thumbnails(Path("/tmp/input.mp4"), sprite_path, vtt_path, count=4)
+
+        assert result.success is True
+        assert result.vtt_download_url == "/api/v1/download/thumbs.vtt"
+        assert (result.columns, result.rows) == (2, 2)
+        runs = _compiled_runs(mock_run)
+        assert len(runs) == 5
+        assert runs[0].startswith("ffmpeg -noaccurate_seek -skip_frame nokey -ss 7.500")
+        assert "scale=160:90" in runs[0]
+        assert "tile=2x2" in runs[4]
+        assert "thumbs.jpg#xywh=160,90,160,90" in vtt_path.read_text()
+        assert not (tmp_path / "frames_thumbs").exists()
+
+    def test_invalid_count(self, tmp_path):
+        """Test that out of range counts are rejected"""
+        from app.services.video_service import extract_thumbnails
+
+        result = extract_thumbnails(
+            Path("/tmp/input.mp4"), tmp_path / "t.jpg", tmp_path / "t.vtt", count=0
+        )
+
+        assert result.success is False
+        assert "count" in result.message
@@ -25,70 +25,42 @@ def cleanup_tasks():
 class TestGetAvailableH264Encoder:
     """Tests for encoder detection"""
 
-    @patch("app.services.video_service_async.subprocess.run")
-    def test_libx264_available(self, mock_run):
-        """Test when libx264 is available"""
-        from app.services.video_service_async import get_available_h264_encoder
-
-        mock_run.return_value = MagicMock(stdout="libx264 H.264 encoder")
-        result = get_available_h264_encoder()
-        assert result == "libx264"
-
-    @patch("app.services.video_service_async.subprocess.run")
-    def test_libopenh264_fallback(self, mock_run):
-        """Test fallback to libopenh264"""
-        from app.services.video_service_async import get_available_h264_encoder
-
-        mock_run.return_value = MagicMock(stdout="libopenh264 OpenH264 encoder")
-        result = get_available_h264_encoder()
-        assert result == "libopenh264"
-
-    @patch("app.services.video_service_async.subprocess.run")
-    def test_no_encoder_available(self, mock_run):
-        """Test when no encoder is available"""
-        from app.services.video_service_async import get_available_h264_encoder
-
-        mock_run.return_value = MagicMock(stdout="some other encoder")
-        result = get_available_h264_encoder()
-        assert result is None
-
-    @patch("app.services.video_service_async.subprocess.run")
-    def test_subprocess_error(self, mock_run):
-        """Test handling subprocess error"""
-        from app.services.video_service_async import get_available_h264_encoder
+    def test_shared_with_sync_service(self):
+        """Test that both services use the one capability-backed detection"""
+        from app.services import video_service, video_service_async
 
-        mock_run.side_effect = Exception("Command failed")
-        result = get_available_h264_encoder()
-        assert result is None
+        assert video_service_async.get_available_h264_encoder is (
+            video_service.get_available_h264_encoder
+        )
 
 
 class TestGetVideoDuration:
     """Tests for video duration detection"""
 
-    @patch("app.services.video_service_async.subprocess.run")
-    def test_get_duration_success(self, mock_run):
+    @patch("app.utils.media_probe.ffmpeg.probe")
+    def test_get_duration_success(self, mock_probe):
         """Test successful duration detection"""
         from app.services.video_service_async import get_video_duration
 
-        mock_run.return_value = MagicMock(stdout="120.5\n")
+        mock_probe.return_value = {"format": {"duration": "120.5"}, "streams": []}
         result = get_video_duration(Path("/tmp/video.mp4"))
         assert result == 120.5
 
-    @patch("app.services.video_service_async.subprocess.run")
-    def test_get_duration_error(self, mock_run):
+    @patch("app.utils.media_probe.ffmpeg.probe")
+    def test_get_duration_error(self, mock_probe):
         """Test duration detection error"""
         from app.services.video_service_async import get_video_duration
 
-        mock_run.side_effect = Exception("ffprobe failed")
+        mock_probe.side_effect = Exception("ffprobe failed")
         result = get_video_duration(Path("/tmp/video.mp4"))
         assert result is None
 
-    @patch("app.services.video_service_async.subprocess.run")
-    def test_get_duration_invalid_output(self, mock_run):
+    @patch("app.utils.media_probe.ffmpeg.probe")
+    def test_get_duration_invalid_output(self, mock_probe):
         """Test handling invalid output"""
         from app.services.video_service_async import get_video_duration
 
-        mock_run.return_value = MagicMock(stdout="invalid")
+        mock_probe.return_value = {"format": {"duration": "invalid"}, "streams": []}
         result = get_video_duration(Path("/tmp/video.mp4"))
         assert result is None
 
@@ -184,9 +156,87 @@ class TestCompressVideoWithProgress:
         assert task_store.get_task(task.id).status == TaskStatus.FAILED
 
 
+def _h264_probe(bit_rate="800000"):
+    """ffprobe output of an H.264/AAC file with the given video bit rate"""
+    return {
+        "streams": [
+            {
+                "index": 0,
+                "codec_type": "video",
+                "codec_name": "h264",
+                "profile": "High",
+                "width": 1280,
+                "height": 720,
+                "pix_fmt": "yuv420p",
+                "r_frame_rate": "30/1",
+                "bit_rate": bit_rate,
+            },
+            {
+                "index": 1,
+                "codec_type": "audio",
+                "codec_name": "aac",
+                "sample_rate": "48000",
+                "channels": 2,
+            },
+        ],
+        "format": {"duration": "10.0"},
+    }
+
+
 class TestConvertVideoWithProgress:
     """Tests for convert_video_with_progress"""
 
+    @pytest.mark.asyncio
+    @patch("app.utils.ffmpeg_progress.asyncio.create_subprocess_exec")
+    @patch("app.services.video_service_async.probe_video", return_value=_h264_probe())
+    @patch("app.services.video_service_async.get_video_duration", return_value=10.0)
+    @patch("app.services.video_service_async.get_available_h264_encoder")
+    @patch("app.services.video_service_async.get_file_size", return_value=1000)
+    async def test_remuxes_source_meeting_quality(
+        self, mock_size, mock_encoder, mock_duration, mock_probe, mock_subprocess
+    ):
+        """Test that H.264/AAC below the preset's bit rate is remuxed with progress"""
+        from app.services.video_service_async import convert_video_with_progress
+
+        mock_subprocess.return_value = _ffmpeg_process(progress_seconds=5)
+        task = task_store.create_task("test")
+
+        result = await convert_video_with_progress(
+            task.id, Path("/tmp/input.mkv"), Path("/tmp/output.mp4"), "mp4", "medium"
+        )
+
+        cmd = mock_subprocess.call_args[0]
+        assert result.success is True
+        assert result.strategy == "remux"
+        assert cmd[cmd.index("-c") + 1] == "copy"
+        mock_encoder.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("app.utils.ffmpeg_progress.asyncio.create_subprocess_exec")
+    @patch("app.services.video_service_async.probe_video", return_value=_h264_probe())
+    @patch("app.services.video_service_async.get_video_duration", return_value=10.0)
+    @patch("app.services.video_service_async.get_available_h264_encoder", return_value="libx264")
+    @patch("app.services.video_service_async.get_file_size", return_value=1000)
+    async def test_failed_remux_falls_back_to_reencoding(
+        self, mock_size, mock_encoder, mock_duration, mock_probe, mock_subprocess
+    ):
+        """Test that a remux FFmpeg rejects is redone by re-encoding"""
+        from app.services.video_service_async import convert_video_with_progress
+
+        mock_subprocess.side_effect = [
+            _ffmpeg_process(returncode=1, stderr=b"Could not write header"),
+            _ffmpeg_process(),
+        ]
+        task = task_store.create_task("test")
+
+        result = await convert_video_with_progress(
+            task.id, Path("/tmp/input.mkv"), Path("/tmp/output.mp4"), "mp4", "medium"
+        )
+
+        cmd = mock_subprocess.call_args[0]
+        assert result.strategy == "reencode"
+        assert "libx264" in cmd
+
     @pytest.mark.asyncio
     @patch("app.services.video_service_async.get_available_h264_encoder")
     @patch("app.services.video_service_async.get_file_size")
@@ -305,3 +355,820 @@ class TestConvertVideoWithProgress:
 
         assert result.success is False
         assert task_store.get_task(task.id).status == TaskStatus.FAILED
+
+
+class TestMergeVideosWithProgress:
+    """Tests for merge_videos_with_progress"""
+
+    @pytest.mark.asyncio
+    @patch("app.utils.ffmpeg_progress.asyncio.create_subprocess_exec")
+    @patch("app.services.video_service_async.probe_video", return_value=_h264_probe())
+    @patch("app.services.video_service_async.get_video_duration", return_value=10.0)
+    @patch("app.services.video_service_async.get_available_h264_encoder")
+    @patch("app.services.video_service_async.get_file_size", return_value=1000)
+    async def test_quality_mode_copies_matching_inputs(
+        self, mock_size, mock_encoder, mock_duration, mock_probe, mock_subprocess, tmp_path
+    ):
+        """Test that inputs sharing parameters and meeting the quality are joined as-is"""
+        from app.services.video_service_async import merge_videos_with_progress
+
+        mock_subprocess.return_value = _ffmpeg_process(progress_seconds=10)
+        task = task_store.create_task("test")
+
+        result = await merge_videos_with_progress(
+            task.id,
+            [tmp_path / "a.mp4", tmp_path / "b.mp4"],
+            tmp_path / "merged.mp4",
+            "mp4",
+            "medium",
+        )
+
+        cmd = mock_subprocess.call_args[0]
+        assert result.success is True
+        assert result.strategy == "stream_copy"
+        assert cmd[cmd.index("-f") + 1] == "concat"
+        assert cmd[cmd.index("-c") + 1] == "copy"
+        mock_encoder.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("app.services.video_service_async.asyncio.create_subprocess_exec")
+    @patch("app.services.video_service_async.probe_video", return_value=_h264_probe("8000000"))
+    @patch("app.services.video_service_async.get_video_duration", return_value=10.0)
+    @patch("app.services.video_service_async.get_available_h264_encoder", return_value="libx264")
+    @patch("app.services.video_service_async.get_file_size", return_value=1000)
+    async def test_quality_mode_reencodes_above_quality(
+        self, mock_size, mock_encoder, mock_duration, mock_probe, mock_subprocess, tmp_path
+    ):
+        """Test that inputs above the preset's bit rate are re-encoded at it"""
+        from app.services.video_service_async import merge_videos_with_progress
+
+        mock_subprocess.return_value = _ffmpeg_process()
+        task = task_store.create_task("test")
+
+        result = await merge_videos_with_progress(
+            task.id,
+            [tmp_path / "a.mp4", tmp_path / "b.mp4"],
+            tmp_path / "merged.mp4",
+            "mp4",
+            "low",
+        )
+
+        cmd = mock_subprocess.call_args[0]
+        assert result.strategy == "reencode"
+        assert cmd[cmd.index("-crf") + 1] == "28"
+        assert mock_subprocess.call_count == 1
+
+
+class TestPlanSegments:
+    """Tests for keyframe-aligned segment planning"""
+
+    def test_short_video_is_not_split(self):
+        """Test that a video shorter than two minimum segments stays whole"""
+        from app.services.video_service_async import plan_segments
+
+        assert plan_segments([0.0, 5.0, 10.0], 15.0, 8, 10.0) == [(0.0, None)]
+
+    def test_cuts_on_nearest_keyframes(self):
+        """Test that segments start on the keyframes closest to even splits"""
+        from app.services.video_service_async import plan_segments
+
+        keyframes = [float(t) for t in range(0, 120, 4)]  # Every 4 seconds
+
+        segments = plan_segments(keyframes, 120.0, 4, 10.0)
+
+        assert segments == [(0.0, 28.0), (28.0, 60.0), (60.0, 88.0), (88.0, None)]
+
+    def test_sparse_keyframes_give_fewer_segments(self):
+        """Test that cuts closer than the minimum length are dropped"""
+        from app.services.video_service_async import plan_segments
+
+        segments = plan_segments([0.0, 50.0, 55.0], 100.0, 4, 10.0)
+
+        assert segments == [(0.0, 50.0), (50.0, None)]
+
+
+class TestGetKeyframeTimes:
+    """Tests for keyframe detection"""
+
+    @patch("app.utils.media_probe.ffmpeg.probe", return_value={"streams": [], "format": {}})
+    @patch("app.utils.media_probe.subprocess.run")
+    def test_keyframes_from_packet_flags(self, mock_run, mock_probe):
+        """Test that only keyframe packets are kept, relative to the first one"""
+        from app.services.video_service_async import get_keyframe_times
+
+        mock_run.return_value = MagicMock(
+            stdout="1.500000,K__\n1.540000,___\n3.500000,K_\nN/A,K__\n2.000000,__\n"
+        )
+
+        assert get_keyframe_times(Path("/tmp/video.mp4")) == [0.0, 2.0]
+
+    @patch("app.utils.media_probe.ffmpeg.probe", return_value={"streams": [], "format": {}})
+    @patch("app.utils.media_probe.subprocess.run")
+    def test_probe_error(self, mock_run, mock_probe):
+        """Test that a failing ffprobe gives no keyframes"""
+        from app.services.video_service_async import get_keyframe_times
+
+        mock_run.side_effect = Exception("ffprobe failed")
+
+        assert get_keyframe_times(Path("/tmp/video.mp4")) == []
+
+
+def _ffmpeg_process(returncode=0, progress_seconds=None, stderr=b""):
+    """Mock FFmpeg process that reports one progress line"""
+    process = AsyncMock()
+    process.returncode = returncode
+    lines = [b"progress=end\n", b""]
+    if progress_seconds is not None:
+        lines.insert(0, f"out_time_ms={int(progress_seconds * 1_000_000)}\n".encode())
+    process.stdout.readline = AsyncMock(side_effect=lines)
+    process.communicate = AsyncMock(return_value=(b"", stderr))
+    return process
+
+
+class TestChunkedEncoding:
+    """Tests for segment-parallel encoding"""
+
+    @pytest.fixture
+    def segment_scheduler(self):
+        """Scheduler with three segment slots"""
+        from app.tasks.scheduler import SEGMENT_JOB, JobScheduler
+
+        scheduler = JobScheduler({SEGMENT_JOB: 3}, store=task_store)
+        with patch("app.services.video_service_async.scheduler", scheduler):
+            yield scheduler
+
+    @pytest.mark.asyncio
+    @patch("app.services.video_service_async.asyncio.create_subprocess_exec")
+    @patch("app.services.video_service_async.has_audio_stream", return_value=True)
+    @patch("app.services.video_service_async.get_keyframe_times")
+    @patch("app.services.video_service_async.get_video_duration", return_value=90.0)
+    @patch("app.services.video_service_async.get_available_h264_encoder", return_value="libx264")
+    @patch("app.services.video_service_async.get_file_size", return_value=1000)
+    async def test_segments_encoded_then_joined(
+        self,
+        mock_size,
+        mock_encoder,
+        mock_duration,
+        mock_keyframes,
+        mock_audio,
+        mock_subprocess,
+        segment_scheduler,
+        tmp_path,
+    ):
+        """Test that segments, audio and the concat join each run FFmpeg once"""
+        from app.services.video_service_async import compress_video_with_progress
+
+        mock_keyframes.return_value = [float(t) for t in range(0, 90, 2)]
+        mock_subprocess.side_effect = lambda *args, **kwargs: _ffmpeg_process(progress_seconds=30)
+
+        task = task_store.create_task("test")
+        result = await compress_video_with_progress(
+            task.id, tmp_path / "input.mp4", tmp_path / "output.mp4", "high", chunked=True
+        )
+
+        assert result.success is True
+        commands = [call.args for call in mock_subprocess.call_args_list]
+        segments = [cmd for cmd in commands if "-ss" in cmd]
+        assert [cmd[cmd.index("-ss") + 1] for cmd in segments] == [
+            "0.000000",
+            "30.000000",
+            "60.000000",
+        ]
+        assert all("0:v:0" in cmd for cmd in segments)
+        assert sum("0:a:0" in cmd and "-f" not in cmd for cmd in commands) == 1
+        join = commands[-1]
+        assert join[join.index("-f") + 1] == "concat"
+        assert join[join.index("-c") + 1] == "copy"
+        assert not (tmp_path / "segments_output").exists()
+
+    @pytest.mark.asyncio
+    @patch("app.services.video_service_async.asyncio.create_subprocess_exec")
+    @patch("app.services.video_service_async.has_audio_stream", return_value=False)
+    @patch("app.services.video_service_async.get_keyframe_times")
+    @patch("app.services.video_service_async.get_video_duration", return_value=90.0)
+    @patch("app.services.video_service_async.get_available_h264_encoder", return_value="libx264")
+    @patch("app.services.video_service_async.get_file_size", return_value=1000)
+    async def test_failed_segment_fails_task(
+        self,
+        mock_size,
+        mock_encoder,
+        mock_duration,
+        mock_keyframes,
+        mock_audio,
+        mock_subprocess,
+        segment_scheduler,
+        tmp_path,
+    ):
+        """Test that one failing segment fails the whole task"""
+        from app.services.video_service_async import convert_video_with_progress
+
+        mock_keyframes.return_value = [float(t) for t in range(0, 90, 2)]
+        processes = iter(
+            [
+                _ffmpeg_process(),
+                _ffmpeg_process(returncode=1, stderr=b"segment broke"),
+                _ffmpeg_process(),
+            ]
+        )
+        mock_subprocess.side_effect = lambda *args, **kwargs: next(processes)
+
+        task = task_store.create_task("test")
+        result = await convert_video_with_progress(
+            task.id, tmp_path / "input.mp4", tmp_path / "output.mkv", "mkv", chunked=True
+        )
+
+        assert result.success is False
+        assert "segment broke" in result.error
+        assert task_store.get_task(task.id).status == TaskStatus.FAILED
+
+    @pytest.mark.asyncio
+    @patch("app.services.video_service_async.asyncio.create_subprocess_exec")
+    @patch("app.services.video_service_async.get_keyframe_times", return_value=[0.0, 4.0])
+    @patch("app.services.video_service_async.get_video_duration", return_value=8.0)
+    @patch("app.services.video_service_async.get_available_h264_encoder", return_value="libx264")
+    @patch("app.services.video_service_async.get_file_size", return_value=1000)
+    async def test_short_video_encoded_in_one_run(
+        self,
+        mock_size,
+        mock_encoder,
+        mock_duration,
+        mock_keyframes,
+        mock_subprocess,
+        segment_scheduler,
+        tmp_path,
+    ):
+        """Test fallback to a single encode when the video is too short to split"""
+        from app.services.video_service_async import compress_video_with_progress
+
+        mock_subprocess.side_effect = lambda *args, **kwargs: _ffmpeg_process(progress_seconds=4)
+
+        task = task_store.create_task("test")
+        result = await compress_video_with_progress(
+            task.id, tmp_path / "input.mp4", tmp_path / "output.mp4", chunked=True
+        )
+
+        assert result.success is True
+        assert mock_subprocess.call_count == 1
+        assert "-ss" not in mock_subprocess.call_args.args
+
+
+class TestRunFfmpegGraph:
+    """Tests for the shared -progress graph runner"""
+
+    @pytest.mark.asyncio
+    @patch("app.utils.ffmpeg_progress.asyncio.create_subprocess_exec")
+    async def test_progress_mapped_to_task(self, mock_subprocess):
+        """Test that the output time is reported between start and end percent"""
+        import ffmpeg
+
+        from app.utils.ffmpeg_progress import run_ffmpeg_graph
+
+        mock_subprocess.return_value = _ffmpeg_process(progress_seconds=2)
+        task = task_store.create_task("test")
+        stream = ffmpeg.input("/tmp/in.mp3").output("/tmp/out.ogg")
+
+        error = await run_ffmpeg_graph(task.id, stream, 4.0, "Converting", 10, 90)
+
+        assert error is None
+        cmd = mock_subprocess.call_args[0]
+        assert cmd[0] == "ffmpeg"
+        assert "-progress" in cmd and "pipe:1" in cmd
+        assert "-y" in cmd
+        progress = task_store.get_task(task.id).progress
+        assert progress.percent == 50
+        assert progress.message == "Converting... 50%"
+
+    @pytest.mark.asyncio
+    @patch("app.utils.ffmpeg_progress.asyncio.create_subprocess_exec")
+    async def test_failure_returns_stderr(self, mock_subprocess):
+        """Test that a failed run returns FFmpeg's error output"""
+        import ffmpeg
+
+        from app.utils.ffmpeg_progress import run_ffmpeg_graph
+
+        mock_subprocess.return_value = _ffmpeg_process(1, stderr=b"Invalid data found")
+        task = task_store.create_task("test")
+        stream = ffmpeg.input("/tmp/in.mp3").output("/tmp/out.ogg")
+
+        error = await run_ffmpeg_graph(task.id, stream, None, "Converting")
+
+        assert error == "Invalid data found"
+
+
+class TestRotateVideoWithProgress:
+    """Tests for rotate_video_with_progress"""
+
+    @pytest.mark.asyncio
+    @patch("app.services.video_service_async.rotate_by_metadata", return_value=True)
+    @patch("app.services.video_service_async.get_file_size", return_value=1000)
+    async def test_metadata_rotation_skips_encoding(self, mock_size, mock_metadata):
+        """Test that copyable videos complete without an encode"""
+        from app.services.video_service_async import rotate_video_with_progress
+
+        task = task_store.create_task("test")
+        with patch("app.services.video_service_async.run_ffmpeg_graph") as mock_graph:
+            result = await rotate_video_with_progress(
+                task.id, Path("/tmp/in.mp4"), Path("/tmp/out.mp4"), 90
+            )
+
+        assert result.success is True
+        assert "metadata" in result.message
+        assert result.strategy == "rotation_metadata"
+        mock_graph.assert_not_called()
+        assert task_store.get_task(task.id).status == TaskStatus.COMPLETED
+
+    @pytest.mark.asyncio
+    @patch("app.utils.ffmpeg_progress.asyncio.create_subprocess_exec")
+    @patch("app.services.video_service_async.get_video_duration", return_value=4.0)
+    @patch("app.services.video_service_async.get_available_h264_encoder", return_value="libx264")
+    @patch("app.services.video_service_async.rotate_by_metadata", return_value=False)
+    @patch("app.services.video_service_async.get_file_size", return_value=1000)
+    async def test_reencode_with_progress(
+        self, mock_size, mock_metadata, mock_encoder, mock_duration, mock_subprocess
+    ):
+        """Test that other videos go through the transpose filter with progress"""
+        from app.services.video_service_async import rotate_video_with_progress
+
+        mock_subprocess.return_value = _ffmpeg_process(progress_seconds=2)
+        task = task_store.create_task("test")
+
+        result = await rotate_video_with_progress(
+            task.id, Path("/tmp/in.avi"), Path("/tmp/out.avi"), 90
+        )
+
+        assert result.success is True
+        assert result.strategy == "reencode"
+        cmd = mock_subprocess.call_args[0]
+        assert "transpose=1" in " ".join(cmd)
+        assert "libx264" in cmd
+
+    @pytest.mark.asyncio
+    @patch("app.services.video_service_async.get_available_h264_encoder", return_value=None)
+    @patch("app.services.video_service_async.rotate_by_metadata", return_value=False)
+    @patch("app.services.video_service_async.get_file_size", return_value=1000)
+    async def test_no_encoder_available(self, mock_size, mock_metadata, mock_encoder):
+        """Test failure when re-encoding is needed without an encoder"""
+        from app.services.video_service_async import rotate_video_with_progress
+
+        task = task_store.create_task("test")
+        result = await rotate_video_with_progress(
+            task.id, Path("/tmp/in.avi"), Path("/tmp/out.avi"), 90
+        )
+
+        assert result.success is False
+        assert task_store.get_task(task.id).status == TaskStatus.FAILED
+
+
+class TestVideoToGifWithProgress:
+    """Tests for video_to_gif_with_progress"""
+
+    @pytest.mark.asyncio
+    @patch("app.utils.ffmpeg_progress.asyncio.create_subprocess_exec")
+    @patch("app.services.video_service_async.get_video_duration", return_value=10.0)
+    @patch("app.services.video_service_async.check_gif_params", return_value=None)
+    @patch("app.services.video_service_async.get_file_size", return_value=1000)
+    async def test_progress_over_segment(
+        self, mock_size, mock_check, mock_duration, mock_subprocess
+    ):
+        """Test that progress is measured against the GIF segment, not the video"""
+        from app.services.video_service_async import video_to_gif_with_progress
+
+        mock_subprocess.side_effect = lambda *args, **kwargs: _ffmpeg_process(progress_seconds=2)
+        task = task_store.create_task("test")
+
+        result = await video_to_gif_with_progress(
+            task.id, Path("/tmp/in.mp4"), Path("/tmp/out.gif"), start_time=6.0
+        )
+
+        assert result.success is True
+        palette_cmd, render_cmd = (" ".join(call.args) for call in mock_subprocess.call_args_list)
+        assert "palettegen" in palette_cmd
+        assert "paletteuse" in render_cmd
+        # 2s encoded of the 4s remaining after start_time
+        assert task_store.get_task(task.id).progress.message == "Rendering GIF... 50%"
+
+    @pytest.mark.asyncio
+    @patch("app.utils.ffmpeg_progress.asyncio.create_subprocess_exec")
+    @patch("app.services.video_service_async.get_video_duration", return_value=10.0)
+    @patch("app.services.video_service_async.check_gif_params", return_value=None)
+    @patch("app.services.video_service_async.get_file_size", return_value=1000)
+    async def test_apng_skips_palette(self, mock_size, mock_check, mock_duration, mock_subprocess):
+        """Test that APNG output renders in a single run"""
+        from app.services.video_service_async import video_to_gif_with_progress
+
+        mock_subprocess.return_value = _ffmpeg_process(progress_seconds=5)
+        task = task_store.create_task("test")
+
+        result = await video_to_gif_with_progress(
+            task.id, Path("/tmp/in.mp4"), Path("/tmp/out.png"), output_format="apng"
+        )
+
+        assert result.success is True
+        assert mock_subprocess.call_count == 1
+        assert task_store.get_task(task.id).progress.message == "Rendering APNG... 50%"
+
+    @pytest.mark.asyncio
+    @patch("app.services.video_service_async.check_gif_params")
+    @patch("app.services.video_service_async.get_file_size", return_value=1000)
+    async def test_invalid_params(self, mock_size, mock_check):
+        """Test that parameter errors fail the task before FFmpeg runs"""
+        from app.services.video_service_async import video_to_gif_with_progress
+
+        mock_check.return_value = "start_time exceeds video duration"
+        task = task_store.create_task("test")
+
+        result = await video_to_gif_with_progress(
+            task.id, Path("/tmp/in.mp4"), Path("/tmp/out.gif"), start_time=60.0
+        )
+
+        assert result.success is False
+        assert result.error == "start_time exceeds video duration"
+
+
+class TestExtractAudioWithProgress:
+    """Tests for extract_audio_with_progress"""
+
+    @pytest.mark.asyncio
+    @patch("app.utils.ffmpeg_progress.asyncio.create_subprocess_exec")
+    @patch("app.services.video_service_async.get_video_duration", return_value=4.0)
+    @patch("app.services.video_service_async.get_file_size", return_value=1000)
+    async def test_successful_extraction(self, mock_size, mock_duration, mock_subprocess):
+        """Test extraction with the format's codec"""
+        from app.services.video_service_async import extract_audio_with_progress
+
+        mock_subprocess.return_value = _ffmpeg_process(progress_seconds=2)
+        task = task_store.create_task("test")
+
+        result = await extract_audio_with_progress(
+            task.id, Path("/tmp/in.mp4"), Path("/tmp/out.flac"), "flac"
+        )
+
+        assert result.success is True
+        assert "flac" in mock_subprocess.call_args[0]
+
+    @pytest.mark.asyncio
+    @patch("app.utils.ffmpeg_progress.asyncio.create_subprocess_exec")
+    @patch("app.services.video_service_async.get_video_duration", return_value=4.0)
+    @patch("app.services.video_service_async.get_file_size", return_value=1000)
+    async def test_ffmpeg_error(self, mock_size, mock_duration, mock_subprocess):
+        """Test that FFmpeg's error output fails the task"""
+        from app.services.video_service_async import extract_audio_with_progress
+
+        mock_subprocess.return_value = _ffmpeg_process(
+            1, stderr=b"Output file does not contain any stream"
+        )
+        task = task_store.create_task("test")
+
+        result = await extract_audio_with_progress(
+            task.id, Path("/tmp/in.mp4"), Path("/tmp/out.mp3")
+        )
+
+        assert result.success is False
+        assert "does not contain any stream" in result.error
+
+
+class TestPlanTargetSize:
+    """Tests for the target size bitrate planner"""
+
+    def test_bitrate_from_duration(self):
+        """Test that the budget minus overhead and audio goes to the video"""
+        from app.services.video_service_async import plan_target_size
+
+        # 25 MB over 100s: 25 * 8192 * 0.97 / 100 = 1986 kbps, 128 of them audio
+        plan = plan_target_size(25, 100, with_audio=True, source_height=1080)
+
+        assert plan["video_kbps"] == 1858
+        assert plan["audio_kbps"] == 128
+        assert plan["height"] == 720
+
+    def test_no_upscaling(self):
+        """Test that a small source keeps its size whatever the bitrate"""
+        from app.services.video_service_async import plan_target_size
+
+        plan = plan_target_size(25, 100, with_audio=False, source_height=480)
+
+        assert plan["audio_kbps"] == 0
+        assert plan["height"] is None
+
+    def test_low_bitrate_scales_down_and_reduces_audio(self):
+        """Test the fallback to a small resolution and audio bitrate"""
+        from app.services.video_service_async import plan_target_size
+
+        plan = plan_target_size(8, 120, with_audio=True, source_height=1080)
+
+        assert plan["audio_kbps"] == 64
+        assert plan["height"] == 360
+
+    def test_target_too_small(self):
+        """Test that an unreachable size is refused"""
+        from app.services.video_service_async import plan_target_size
+
+        assert plan_target_size(1, 600, with_audio=True, source_height=1080) is None
+
+
+class TestTargetSizeCompression:
+    """Tests for compress_video_with_progress with target_size_mb"""
+
+    @pytest.mark.asyncio
+    @patch("app.services.video_service_async.asyncio.create_subprocess_exec")
+    @patch("app.services.video_service_async.get_video_height", return_value=1080)
+    @patch("app.services.video_service_async.has_audio_stream", return_value=True)
+    @patch("app.services.video_service_async.get_video_duration", return_value=100.0)
+    @patch("app.services.video_service_async.get_available_h264_encoder", return_value="libx264")
+    @patch("app.services.video_service_async.get_file_size", side_effect=[100_000_000, 24_000_000])
+    async def test_two_passes(
+        self, mock_size, mock_encoder, mock_duration, mock_audio, mock_height, mock_subprocess
+    ):
+        """Test that libx264 analyzes then encodes at the planned bitrate"""
+        from app.services.video_service_async import compress_video_with_progress
+
+        progress = []
+        mock_subprocess.side_effect = lambda *args, **kwargs: _ffmpeg_process(progress_seconds=50)
+        task = task_store.create_task("video_compress")
+        original_update = task_store.update_progress
+
+        def record(task_id, percent, message, stage):
+            progress.append(message)
+            original_update(task_id, percent, message, stage)
+
+        with patch.object(task_store, "update_progress", side_effect=record):
+            result = await compress_video_with_progress(
+                task.id,
+                Path("/tmp/input.mp4"),
+                Path("/tmp/output.mp4"),
+                target_size_mb=25,
+            )
+
+        assert result.success is True
+        assert "scaled to 720p" in result.message
+        first, second = (call[0] for call in mock_subprocess.call_args_list)
+        assert first[first.index("-pass") + 1] == "1"
+        assert "-an" in first
+        assert second[second.index("-pass") + 1] == "2"
+        assert second[second.index("-b:v") + 1] == "1858k"
+        assert "scale=-2:720" in second
+        assert second[-1] == "/tmp/output.mp4"
+        assert "Analyzing (pass 1/2)... 50%" in progress
+        assert "Encoding (pass 2/2)... 50%" in progress
+
+    @pytest.mark.asyncio
+    @patch("app.services.video_service_async.asyncio.create_subprocess_exec")
+    @patch("app.services.video_service_async.get_video_height", return_value=480)
+    @patch("app.services.video_service_async.has_audio_stream", return_value=False)
+    @patch("app.services.video_service_async.get_video_duration", return_value=100.0)
+    @patch(
+        "app.services.video_service_async.get_available_h264_encoder", return_value="libopenh264"
+    )
+    @patch("app.services.video_service_async.get_file_size", return_value=1000)
+    async def test_single_pass_for_other_encoders(
+        self, mock_size, mock_encoder, mock_duration, mock_audio, mock_height, mock_subprocess
+    ):
+        """Test that encoders without two-pass support get a constrained single pass"""
+        from app.services.video_service_async import compress_video_with_progress
+
+        mock_subprocess.return_value = _ffmpeg_process(progress_seconds=50)
+        task = task_store.create_task("video_compress")
+
+        result = await compress_video_with_progress(
+            task.id, Path("/tmp/input.mp4"), Path("/tmp/output.mp4"), target_size_mb=25
+        )
+
+        assert result.success is True
+        assert mock_subprocess.call_count == 1
+        cmd = mock_subprocess.call_args[0]
+        assert "-pass" not in cmd
+        assert "-maxrate" in cmd
+        assert "-an" in cmd
+
+    @pytest.mark.asyncio
+    @patch("app.services.video_service_async.get_video_height", return_value=1080)
+    @patch("app.services.video_service_async.has_audio_stream", return_value=True)
+    @patch("app.services.video_service_async.get_video_duration", return_value=3600.0)
+    @patch("app.services.video_service_async.get_available_h264_encoder", return_value="libx264")
+    @patch("app.services.video_service_async.get_file_size", return_value=1000)
+    async def test_target_too_small(
+        self, mock_size, mock_encoder, mock_duration, mock_audio, mock_height
+    ):
+        """Test that an unreachable size fails the task without encoding"""
+        from app.services.video_service_async import compress_video_with_progress
+
+        task = task_store.create_task("video_compress")
+
+        result = await compress_video_with_progress(
+            task.id, Path("/tmp/input.mp4"), Path("/tmp/output.mp4"), target_size_mb=5
+        )
+
+        assert result.success is False
+        assert "too small" in result.error
+        assert task_store.get_task(task.id).status == TaskStatus.FAILED
+
+    @pytest.mark.asyncio
+    @patch("app.services.video_service_async.get_video_duration", return_value=None)
+    @patch("app.services.video_service_async.get_file_size", return_value=1000)
+    async def test_unknown_duration(self, mock_size, mock_duration):
+        """Test that a target size needs the probed duration"""
+        from app.services.video_service_async import compress_video_with_progress
+
+        task = task_store.create_task("video_compress")
+
+        result = await compress_video_with_progress(
+            task.id, Path("/tmp/input.mp4"), Path("/tmp/output.mp4"), target_size_mb=25
+        )
+
+        assert result.success is False
+        assert "duration" in result.error
+
+
+class TestExtractThumbnailsWithProgress:
+    """Tests for extract_thumbnails_with_progress"""
+
+    PLAN = {
+        "times": [5.0, 15.0, 25.0],
+        "interval": 10.0,
+        "duration": 30.0,
+        "width": 160,
+        "height": 90,
+        "columns": 3,
+        "rows": 1,
+    }
+
+    @pytest.mark.asyncio
+    @patch("app.services.video_service_async.asyncio.create_subprocess_exec")
+    @patch("app.services.video_service_async.plan_thumbnails")
+    @patch("app.services.video_service_async.get_file_size", return_value=1000)
+    async def test_sprite_and_vtt(self, mock_size, mock_plan, mock_subprocess, tmp_path):
+        """Test that every thumbnail is grabbed before the sprite is tiled"""
+        from app.services.video_service_async import extract_thumbnails_with_progress
+
+        mock_plan.return_value = self.PLAN
+        mock_subprocess.side_effect = lambda *args, **kwargs: _ffmpeg_process()
+        task = task_store.create_task("video_thumbnails")
+        sprite_path = tmp_path / "thumbs.jpg"
+
+        result = await extract_thumbnails_with_progress(
+            task.id, Path("/tmp/in.mp4"), sprite_path, tmp_path / "thumbs.vtt", count=3
+        )
+
+        assert result.success is True
+        assert result.download_urls == [
+            "/api/v1/download/thumbs.jpg",
+            "/api/v1/download/thumbs.vtt",
+        ]
+        cmds = [" ".join(call.args) for call in mock_subprocess.call_args_list]
+        assert sum("-skip_frame nokey" in cmd for cmd in cmds) == 3
+        assert "tile=3x1" in cmds[-1]
+        assert (tmp_path / "thumbs.vtt").read_text().startswith("WEBVTT")
+        assert task_store.get_task(task.id).status == TaskStatus.COMPLETED
+
+    @pytest.mark.asyncio
+    @patch("app.services.video_service_async.asyncio.create_subprocess_exec")
+    @patch("app.services.video_service_async.plan_thumbnails")
+    @patch("app.services.video_service_async.get_file_size", return_value=1000)
+    async def test_failed_grab_fails_task(self, mock_size, mock_plan, mock_subprocess, tmp_path):
+        """Test that one failed seek fails the task without building the sprite"""
+        from app.services.video_service_async import extract_thumbnails_with_progress
+
+        mock_plan.return_value = self.PLAN
+        mock_subprocess.side_effect = lambda *args, **kwargs: _ffmpeg_process(
+            1, stderr=b"Invalid data found"
+        )
+        task = task_store.create_task("video_thumbnails")
+
+        result = await extract_thumbnails_with_progress(
+            task.id, Path("/tmp/in.mp4"), tmp_path / "t.jpg", tmp_path / "t.vtt", count=3
+        )
+
+        assert result.success is False
+        assert "Invalid data found" in result.error
+        assert not any("tile=" in " ".join(c.args) for c in mock_subprocess.call_args_list)
+
+    @pytest.mark.asyncio
+    @patch("app.services.video_service_async.plan_thumbnails", return_value=None)
+    async def test_unreadable_video(self, mock_plan, tmp_path):
+        """Test that a file without a video stream fails the task"""
+        from app.services.video_service_async import extract_thumbnails_with_progress
+
+        task = task_store.create_task("video_thumbnails")
+
+        result = await extract_thumbnails_with_progress(
+            task.id, Path("/tmp/in.mp4"), tmp_path / "t.jpg", tmp_path / "t.vtt"
+        )
+
+        assert result.success is False
+        assert task_store.get_task(task.id).status == TaskStatus.FAILED
+
+
+class TestPlanRenditions:
+    """Tests for plan_renditions"""
+
+    def test_source_height_caps_ladder(self):
+        """Test that renditions taller than the source are skipped"""
+        from app.services.video_service_async import plan_renditions
+
+        assert [h for h, _ in plan_renditions(720)] == [720, 480, 360]
+        assert [h for h, _ in plan_renditions(2160)] == [1080, 720, 480, 360]
+
+    def test_small_source(self):
+        """Test that a source below the ladder keeps its own (even) height"""
+        from app.services.video_service_async import plan_renditions
+
+        assert plan_renditions(241) == [(240, 800)]
+
+    def test_unknown_height(self):
+        """Test that an unprobed source stops at 720p"""
+        from app.services.video_service_async import plan_renditions
+
+        assert [h for h, _ in plan_renditions(None)] == [720, 480, 360]
+
+
+class TestStreamingConversion:
+    """Tests for HLS/DASH output of convert_video_with_progress"""
+
+    async def _convert(self, mock_subprocess, output_dir, output_format):
+        from app.services.video_service_async import convert_video_with_progress
+
+        mock_subprocess.side_effect = lambda *args, **kwargs: _ffmpeg_process(progress_seconds=5)
+        task = task_store.create_task("video_convert")
+        result = await convert_video_with_progress(
+            task.id, Path("/tmp/in.mp4"), output_dir, output_format
+        )
+        return task, result, list(mock_subprocess.call_args.args)
+
+    @pytest.mark.asyncio
+    @patch("app.services.video_service_async.asyncio.create_subprocess_exec")
+    @patch("app.services.video_service_async.has_audio_stream", return_value=True)
+    @patch("app.services.video_service_async.get_video_height", return_value=720)
+    @patch("app.services.video_service_async.get_video_duration", return_value=10.0)
+    @patch("app.services.video_service_async.get_available_h264_encoder", return_value="libx264")
+    async def test_hls_ladder(
+        self, mock_encoder, mock_duration, mock_height, mock_audio, mock_subprocess, tmp_path
+    ):
+        """Test one run producing aligned fMP4 renditions sharing one audio stream"""
+        output_dir = tmp_path / "video_stream"
+
+        task, result, cmd = await self._convert(mock_subprocess, output_dir, "hls")
+
+        assert result.success is True
+        assert result.download_url == "/api/v1/download/video_stream/master.m3u8"
+        assert result.download_urls == [result.download_url]
+        assert output_dir.is_dir()
+        assert cmd[cmd.index("-v") + 1] == "error"
+        graph = cmd[cmd.index("-filter_complex") + 1]
+        assert graph.startswith("[0:v]split=3[s0][s1][s2]")
+        assert "[s2]scale=-2:360[v2]" in graph
+        assert cmd[cmd.index("-b:v:0") + 1] == "2800k"
+        assert cmd[cmd.index("-sc_threshold") + 1] == "0"
+        assert cmd[cmd.index("-force_key_frames") + 1] == "expr:gte(t,n_forced*4)"
+        assert cmd[cmd.index("-hls_segment_type") + 1] == "fmp4"
+        assert cmd[cmd.index("-var_stream_map") + 1] == (
+            "a:0,agroup:audio,name:audio v:0,name:720p,agroup:audio "
+            "v:1,name:480p,agroup:audio v:2,name:360p,agroup:audio"
+        )
+        assert cmd[-1] == str(output_dir / "stream_%v" / "index.m3u8")
+        assert "720p, 480p, 360p" in result.message
+        assert task_store.get_task(task.id).status == TaskStatus.COMPLETED
+
+    @pytest.mark.asyncio
+    @patch("app.services.video_service_async.asyncio.create_subprocess_exec")
+    @patch("app.services.video_service_async.has_audio_stream", return_value=False)
+    @patch("app.services.video_service_async.get_video_height", return_value=480)
+    @patch("app.services.video_service_async.get_video_duration", return_value=10.0)
+    @patch("app.services.video_service_async.get_available_h264_encoder", return_value="libx264")
+    async def test_dash_also_writes_hls_playlists(
+        self, mock_encoder, mock_duration, mock_height, mock_audio, mock_subprocess, tmp_path
+    ):
+        """Test the DASH manifest plus HLS playlists of the same segments"""
+        output_dir = tmp_path / "video_stream"
+
+        task, result, cmd = await self._convert(mock_subprocess, output_dir, "dash")
+
+        assert result.download_urls == [
+            "/api/v1/download/video_stream/manifest.mpd",
+            "/api/v1/download/video_stream/master.m3u8",
+        ]
+        assert "0:a:0" not in cmd
+        assert cmd[cmd.index("-adaptation_sets") + 1] == "id=0,streams=v"
+        assert cmd[cmd.index("-hls_playlist") + 1] == "1"
+        assert cmd[-1] == str(output_dir / "manifest.mpd")
+
+    @pytest.mark.asyncio
+    @patch("app.services.video_service_async.asyncio.create_subprocess_exec")
+    @patch("app.services.video_service_async.has_audio_stream", return_value=True)
+    @patch("app.services.video_service_async.get_video_height", return_value=1080)
+    @patch("app.services.video_service_async.get_video_duration", return_value=10.0)
+    @patch("app.services.video_service_async.get_available_h264_encoder", return_value="libx264")
+    async def test_failure(
+        self, mock_encoder, mock_duration, mock_height, mock_audio, mock_subprocess, tmp_path
+    ):
+        """Test that an FFmpeg error fails the task"""
+        from app.services.video_service_async import convert_video_with_progress
+
+        mock_subprocess.return_value = _ffmpeg_process(1, stderr=b"Unknown encoder")
+        task = task_store.create_task("video_convert")
+
+        result = await convert_video_with_progress(
+            task.id, Path("/tmp/in.mp4"), tmp_path / "video_stream", "hls"
+        )
+
+        assert result.success is False
+        assert "Unknown encoder" in result.error
@@ -32,6 +32,7 @@ class TestVideoToGifEndpoint:
             download_url="/api/v1/download/gif_test_video.gif",
             original_size=1000,
             processed_size=200,
+            strategy=None,
         )
 
         with open(test_file, "rb") as f: